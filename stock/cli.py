@@ -0,0 +1,602 @@
+import argparse
+import contextlib
+import cProfile
+import csv
+import datetime
+import json
+import os
+import pstats
+import statistics
+import sys
+from datetime import timedelta
+from functools import partial
+
+from stock.data import config
+from stock.data import trace as tracer
+from stock.data.config import CLI_CONFIG
+from stock.data.history_cache import CachedFetch, fetch_from_source
+from stock.data.synthetic_data import fetch_synthetic_data
+from stock.data.trace import ERROR, INFO, WARNING, trace
+from stock.mock_platform import original_strategy_engine, strategy_engine
+from stock.mock_platform.batch import run_pipeline
+from stock.mock_platform.engine_comparison import ENGINE_VARIANTS, compare_engines, print_comparison_table
+from stock.mock_platform.screener import print_screen_results, screen_stocks
+from stock.mock_platform.service import to_json_value
+
+"""
+统一命令行入口：股票池、日期区间、并行度、缓存、性能分析和输出格式都由命令行参数指定，生产任务无需修改源码
+
+    python -m stock.cli analyze  --watchlist 自选股.json --end 2025-04-12 --workers 4 --cache-dir cache
+    python -m stock.cli screen   --watchlist 股票池.csv --top-n 20 --format csv --output top.csv
+    python -m stock.cli backtest --symbols sh.600570 --start 2024-01-01 --end 2024-12-31 --format json
+    python -m stock.cli sweep    --watchlist 自选股.json --param OBV_CONFIG.obv_slope_window --values 5 10 20
+    python -m stock.cli bench    support_resistance ring_buffer --profile bench.prof
+
+- 股票池文件：自选股导出的 JSON（{"data": {"stocks": [...]}}）、[{symbol, name}] / [symbol] 形式的 JSON，
+  或每行一只股票的文本 / CSV（symbol[,name]，# 开头为注释）
+- --cache-dir 把获取的行情数据按 (股票, 日期区间) 保存到本地（stock/data/history_cache.py），子进程共用；
+  --end 为今天（默认）时当日K线还会变化，不读写缓存
+- --profile 用 cProfile 记录整个命令：不带路径时在 stderr 输出耗时最多的函数，带路径时保存 .prof 文件
+- 运行日志（trace）默认输出到 stderr，stdout 只输出结果，便于重定向或管道处理
+"""
+
+FORMATS = ('text', 'json', 'csv', 'markdown')
+
+
+# ================================
+# 股票池与日期
+# ================================
+
+def _ticker(symbol, name=None):
+    symbol = str(symbol).strip()
+    return {'symbol': symbol, 'name': (name or '').strip() or symbol}
+
+
+def load_watchlist(path):
+    """
+    读取股票池文件
+
+    :param path: .json（自选股导出格式、[{symbol, name}] 或 [symbol]），其他扩展名按每行 symbol[,name] 读取
+    :return: [{'symbol': ..., 'name': ...}, ...]
+    """
+    with open(path, encoding='utf-8-sig') as f:
+        if path.lower().endswith('.json'):
+            data = json.load(f)
+            if isinstance(data, dict):
+                return original_strategy_engine.stocks_from_watchlist(data)
+            return [_ticker(item) if isinstance(item, str) else _ticker(item['symbol'], item.get('name'))
+                    for item in data]
+
+        stocks = []
+        for row in csv.reader(f):
+            if not row or not row[0].strip() or row[0].lstrip().startswith('#'):
+                continue
+            if row[0].strip().lower() == 'symbol':  # 表头
+                continue
+            stocks.append(_ticker(row[0], row[1] if len(row) > 1 else None))
+        return stocks
+
+
+def resolve_stocks(args):
+    """合并 --watchlist 文件与 --symbols，按代码去重并保持顺序"""
+    stocks = []
+    for path in args.watchlist or ():
+        stocks.extend(load_watchlist(path))
+    stocks.extend(_ticker(symbol) for symbol in args.symbols or ())
+    unique = {}
+    for ticker in stocks:
+        unique.setdefault(ticker['symbol'], ticker)
+    if not unique:
+        raise ValueError("股票池为空：请通过 --watchlist 或 --symbols 指定股票")
+    return list(unique.values())
+
+
+def _date(value):
+    try:
+        return datetime.datetime.strptime(value, "%Y-%m-%d").strftime("%Y-%m-%d")
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"日期格式应为 YYYY-MM-DD: {value}")
+
+
+def resolve_dates(start_date=None, end_date=None, lookback_days=None):
+    """
+    补全日期区间：end 默认今天，start 默认 end 之前 lookback_days 天
+
+    :param lookback_days: None 读取 CLI_CONFIG["LOOKBACK_DAYS"]
+    :return: (start_date, end_date)，格式 YYYY-MM-DD
+    """
+    end_date = end_date or datetime.date.today().strftime("%Y-%m-%d")
+    if not start_date:
+        lookback_days = CLI_CONFIG.get("LOOKBACK_DAYS", 365) if lookback_days is None else lookback_days
+        start_date = (datetime.datetime.strptime(end_date, "%Y-%m-%d")
+                      - timedelta(days=lookback_days)).strftime("%Y-%m-%d")
+    if start_date > end_date:
+        raise ValueError(f"开始日期晚于结束日期: {start_date} > {end_date}")
+    return start_date, end_date
+
+
+def _shift_date(date, days):
+    return (datetime.datetime.strptime(date, "%Y-%m-%d") - timedelta(days=days)).strftime("%Y-%m-%d")
+
+
+def build_fetch(args):
+    """
+    按 --data-source 与 --cache-dir 构造数据源函数 fetch_data(symbol, start_date, end_date)
+
+    :return: 数据源函数，None 表示使用各引擎默认的 DataFetcher（不缓存）
+    """
+    fetch_data = fetch_synthetic_data if args.data_source == 'synthetic' else None
+    cache_dir = args.cache_dir if args.cache_dir is not None else CLI_CONFIG.get("CACHE_DIR", "")
+    if cache_dir:
+        return CachedFetch(cache_dir, fetch_data or fetch_from_source)
+    return fetch_data
+
+
+# ================================
+# 输出
+# ================================
+
+@contextlib.contextmanager
+def open_output(path):
+    """--output 指定时写入文件，否则写入 stdout；导出函数中的 print 一并重定向"""
+    if not path:
+        yield sys.stdout
+        return
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with open(path, 'w', encoding='utf-8', newline='') as f, contextlib.redirect_stdout(f):
+        yield f
+
+
+def write_json(value, f):
+    json.dump(to_json_value(value), f, ensure_ascii=False, indent=2)
+    f.write("\n")
+
+
+def write_csv(rows, f):
+    """字典列表写为 CSV，列为各行键的并集（按首次出现的顺序）"""
+    fields = {}
+    for row in rows:
+        fields.update(dict.fromkeys(row))
+    writer = csv.DictWriter(f, fieldnames=list(fields), lineterminator="\n")
+    writer.writeheader()
+    for row in rows:
+        writer.writerow({key: to_json_value(value) for key, value in row.items()})
+
+
+def write_rows(rows, f, fmt):
+    """text 格式按对齐的列输出，其余格式见 write_json / write_csv"""
+    if fmt == 'json':
+        return write_json(rows, f)
+    if fmt == 'csv':
+        return write_csv(rows, f)
+    for row in rows:
+        f.write("  ".join(f"{key}={value:.4f}" if isinstance(value, float) else f"{key}={value}"
+                          for key, value in row.items()) + "\n")
+
+
+# ================================
+# analyze
+# ================================
+
+def analysis_rows(results, engine):
+    """批量分析结果的摘要行（CSV / text 输出）"""
+    rows = []
+    for result in results:
+        row = {'ticker': result['ticker'], 'ticker_name': result['ticker_name']}
+        if engine == 'strategy':
+            analysis = result.get('analysis')
+            row['final_decision'] = analysis['final_decision'] if analysis else '分析失败'
+            row['market_type'] = analysis.get('market_type') if analysis else None
+        else:
+            for key in ('final_suggestion', 'final_score', 'support', 'resistance',
+                        'stop_loss', 'take_profit'):
+                row[key] = result.get(key)
+        row['error'] = result.get('error')
+        row['elapsed'] = result.get('elapsed')
+        rows.append(row)
+    return rows
+
+
+def comparison_rows(comparison):
+    """引擎对比结果的逐只股票行：每个引擎一组 建议 / 得分 列"""
+    rows = []
+    for item in comparison['rows']:
+        row = {'ticker': item['ticker'], 'ticker_name': item['ticker_name']}
+        for name in comparison['engines']:
+            result = item['results'][name] if item['error'] is None else {}
+            row[f'{name}_decision'] = result.get('decision')
+            row[f'{name}_score'] = result.get('score')
+        row['agree'] = item.get('agree')
+        row['error'] = item['error']
+        rows.append(row)
+    return rows
+
+
+def cmd_analyze(args, fetch_data, stocks, start_date, end_date):
+    if args.engine == 'compare':
+        comparison = compare_engines(stocks, start_date, end_date, engines=args.engines, fetch_data=fetch_data,
+                                     workers=args.workers, fetch_workers=args.fetch_workers)
+        with open_output(args.output) as f:
+            if args.format == 'json':
+                comparison = dict(comparison, pairwise={f"{a} vs {b}": count
+                                                        for (a, b), count in comparison['pairwise'].items()})
+                write_json(comparison, f)
+            elif args.format == 'csv':
+                write_csv(comparison_rows(comparison), f)
+            else:
+                print_comparison_table(comparison, only_disagreements=args.only_disagreements or None)
+        return comparison
+
+    engine = strategy_engine if args.engine == 'strategy' else original_strategy_engine
+    options = {} if args.engine == 'strategy' else {'retention': args.retention}
+    results = engine.batch_analysis_stocks(stocks, start_date, end_date, workers=args.workers,
+                                           chunksize=args.chunksize, fetch_data=fetch_data,
+                                           pipeline=args.pipeline, fetch_workers=args.fetch_workers, **options)
+    if args.format == 'markdown':
+        if os.path.dirname(args.output):
+            os.makedirs(os.path.dirname(args.output), exist_ok=True)
+        engine.export_analysis_to_markdown(results, output_path=args.output)
+        trace(INFO, 'cli.report', f"报告已写入 {args.output}", path=args.output)
+        return results
+    with open_output(args.output) as f:
+        if args.format == 'json':
+            write_json(results, f)
+        elif args.format == 'csv':
+            write_csv(analysis_rows(results, args.engine), f)
+        elif args.engine == 'strategy':
+            strategy_engine.export_analysis_to_console(results)
+        else:
+            write_rows(analysis_rows(results, args.engine), f, 'text')
+    return results
+
+
+# ================================
+# screen
+# ================================
+
+def cmd_screen(args, fetch_data, stocks, start_date, end_date):
+    screen_result = screen_stocks(stocks, start_date, end_date, top_n=args.top_n, sort_by=args.sort_by,
+                                  workers=args.workers, chunksize=args.chunksize, fetch_data=fetch_data,
+                                  pipeline=args.pipeline, fetch_workers=args.fetch_workers)
+    with open_output(args.output) as f:
+        if args.format == 'json':
+            write_json(screen_result, f)
+        elif args.format == 'csv':
+            write_csv(screen_result['top'], f)
+        else:
+            print_screen_results(screen_result)
+    return screen_result
+
+
+# ================================
+# backtest / sweep
+# ================================
+
+def _run_backtests(args, fetch_data, stocks, start_date, end_date, compute):
+    # start 之前多取 warmup_days 天用于指标预热；每只股票获取一次数据，compute(ticker, stock_data) 在进程池中执行
+    warmup_days = CLI_CONFIG.get("BACKTEST_WARMUP_DAYS", 180) if args.warmup_days is None else args.warmup_days
+    return run_pipeline(partial(original_strategy_engine.fetch_ticker, start_date=_shift_date(start_date, warmup_days),
+                                end_date=end_date, fetch_data=fetch_data),
+                        compute, stocks, workers=args.workers, fetch_workers=args.fetch_workers)
+
+
+def _initial_capital(args):
+    return CLI_CONFIG.get("INITIAL_CAPITAL", 100000) if args.initial_capital is None else args.initial_capital
+
+
+def cmd_backtest(args, fetch_data, stocks, start_date, end_date):
+    batch = _run_backtests(args, fetch_data, stocks, start_date, end_date,
+                           partial(original_strategy_engine.backtest_ticker_data, start_date=start_date,
+                                   end_date=end_date, initial_capital=_initial_capital(args)))
+    rows, details = [], []
+    for item in batch:
+        ticker = item['item']
+        if item['error'] is not None:
+            trace(ERROR, 'backtest.error', f"\n【错误】：{ticker['symbol']} 回测失败：{item['error']}",
+                  ticker=ticker['symbol'], error=item['error'])
+            rows.append({'symbol': ticker['symbol'], 'name': ticker['name'], 'error': item['error']})
+            continue
+        result = item['result']
+        rows.append({'symbol': result['symbol'], 'name': result['name'], 'portfolio_value': result['portfolio_value'],
+                     'returns': result['returns'], 'trades': len(result['transactions']), 'error': None})
+        details.append(result)
+
+    with open_output(args.output) as f:
+        if args.format == 'json':
+            # 逐日建议序列较大，只在 --details 时输出
+            write_json([result if args.details else {key: value for key, value in result.items()
+                                                     if key != 'suggestions'}
+                        for result in details], f)
+        elif args.format == 'csv':
+            write_csv(rows, f)
+        else:
+            write_rows(rows, f, 'text')
+            returns = [row['returns'] for row in rows if row['error'] is None]
+            if returns:
+                print(f"\n共回测 {len(returns)} 只股票（失败 {len(rows) - len(returns)} 只），{start_date} ~ {end_date}，"
+                      f"平均收益率 {statistics.mean(returns):.2%}，中位数 {statistics.median(returns):.2%}", file=f)
+    return rows
+
+
+def parse_param(param):
+    """
+    解析配置项路径 CONFIG_NAME.key[.key...]（如 OBV_CONFIG.obv_slope_window）
+
+    :return: (所在的字典, 最后一级键)
+    """
+    name, _, path = param.partition('.')
+    target = getattr(config, name, None)
+    if not isinstance(target, dict) or not path:
+        raise ValueError(f"配置项应为 CONFIG_NAME.key 形式（CONFIG_NAME 为 stock/data/config.py 中的配置字典）: {param}")
+    keys = path.split('.')
+    for key in keys[:-1]:
+        target = target.get(key)
+        if not isinstance(target, dict):
+            raise ValueError(f"配置项不存在: {param}")
+    if keys[-1] not in target:
+        raise ValueError(f"配置项不存在: {param}")
+    return target, keys[-1]
+
+
+def parse_value(value):
+    """命令行取值按 JSON 解析（数字、列表、true / false），解析失败时作为字符串"""
+    try:
+        return json.loads(value)
+    except ValueError:
+        return value
+
+
+@contextlib.contextmanager
+def override_config(param, value):
+    """临时修改一个配置项（指标函数在调用时读取配置字典，修改后立即生效），退出时恢复原值"""
+    target, key = parse_param(param)
+    original = target[key]
+    target[key] = value
+    try:
+        yield
+    finally:
+        target[key] = original
+
+
+# 同一份数据依次按每个取值回测（sweep 的分析函数，可在子进程中执行）
+def sweep_ticker_data(ticker, stock_data, start_date, end_date, param, values, initial_capital):
+    outcomes = []
+    for value in values:
+        with override_config(param, value):
+            result = original_strategy_engine.backtest_ticker_data(ticker, stock_data, start_date, end_date,
+                                                                   initial_capital)
+        outcomes.append({'returns': result['returns'], 'trades': len(result['transactions'])})
+    return outcomes
+
+
+def cmd_sweep(args, fetch_data, stocks, start_date, end_date):
+    parse_param(args.param)  # 提前校验配置项
+    values = [parse_value(value) for value in args.values]
+    batch = _run_backtests(args, fetch_data, stocks, start_date, end_date,
+                           partial(sweep_ticker_data, start_date=start_date, end_date=end_date, param=args.param,
+                                   values=values, initial_capital=_initial_capital(args)))
+    outcomes = []
+    for item in batch:
+        if item['error'] is not None:
+            trace(ERROR, 'sweep.error', f"\n【错误】：{item['item']['symbol']} 回测失败：{item['error']}",
+                  ticker=item['item']['symbol'], error=item['error'])
+            continue
+        outcomes.append(item['result'])
+
+    # 所有取值的回测结果完全相同：该配置项很可能没有被回测读取（例如被引擎中的固定值覆盖）
+    if len(values) > 1 and outcomes and all(outcome[1:] == outcome[:-1] for outcome in outcomes):
+        trace(WARNING, 'sweep.no_effect', f"【警告】：{args.param} 的所有取值回测结果完全相同，该配置项可能不影响回测",
+              param=args.param)
+
+    rows = []
+    for j, value in enumerate(values):
+        returns = [outcome[j]['returns'] for outcome in outcomes]
+        rows.append({
+            'param': args.param,
+            'value': json.dumps(value, ensure_ascii=False),
+            'tickers': len(returns),
+            'failed': len(batch) - len(returns),
+            'mean_returns': statistics.mean(returns) if returns else float('nan'),
+            'median_returns': statistics.median(returns) if returns else float('nan'),
+            'win_rate': sum(r > 0 for r in returns) / len(returns) if returns else float('nan'),
+            'trades': sum(outcome[j]['trades'] for outcome in outcomes),
+        })
+    with open_output(args.output) as f:
+        write_rows(rows, f, args.format)
+    return rows
+
+
+# ================================
+# bench
+# ================================
+
+def bench_functions():
+    """benchmark.py 中的 bench_* 函数：{名称（去掉 bench_ 前缀）: 函数}"""
+    from stock.simulator import benchmark
+    return {name[len('bench_'):]: func for name, func in vars(benchmark).items()
+            if name.startswith('bench_') and callable(func)}
+
+
+def _flatten_result(result, prefix=''):
+    flat = {}
+    for key, value in result.items():
+        if isinstance(value, dict):
+            flat.update(_flatten_result(value, f"{prefix}{key}."))
+        else:
+            flat[f"{prefix}{key}"] = value
+    return flat
+
+
+def cmd_bench(args):
+    from stock.simulator.benchmark import print_bench_result
+    functions = bench_functions()
+    if args.list:
+        print("\n".join(functions))
+        return None
+    names = args.names or list(functions)
+    unknown = [name for name in names if name not in functions]
+    if unknown:
+        raise ValueError(f"未知的基准测试: {unknown}，可选 {list(functions)}")
+
+    results = {}
+    with open_output(args.output) as f:
+        for name in names:
+            results[name] = _flatten_result(functions[name]())
+            if args.format == 'text':
+                print_bench_result(name, results[name])
+                f.flush()
+        if args.format == 'json':
+            write_json(results, f)
+        elif args.format == 'csv':
+            write_csv([dict(name=name, **result) for name, result in results.items()], f)
+    return results
+
+
+# ================================
+# 参数解析与入口
+# ================================
+
+COMMANDS = {
+    'analyze': cmd_analyze,
+    'screen': cmd_screen,
+    'backtest': cmd_backtest,
+    'sweep': cmd_sweep,
+}
+
+
+def _runtime_parser():
+    # 所有子命令共用：输出、日志与性能分析
+    parser = argparse.ArgumentParser(add_help=False)
+    group = parser.add_argument_group("输出与诊断")
+    group.add_argument('--format', default='text', help="输出格式")
+    group.add_argument('--output', '-o', help="输出文件，默认 stdout（markdown 格式必须指定）")
+    group.add_argument('--profile', nargs='?', const='-', metavar='PATH',
+                       help="用 cProfile 记录整个命令；不带路径时在 stderr 输出耗时最多的函数，带路径时保存 .prof 文件")
+    group.add_argument('--profile-top', type=int, default=None,
+                       help="--profile 输出的函数个数，默认读取 CLI_CONFIG[\"PROFILE_TOP\"]")
+    group.add_argument('--log-level', choices=list(tracer.LEVELS), help="运行日志级别，默认读取 TRACE_CONFIG")
+    group.add_argument('--log-format', choices=('text', 'json'), help="运行日志格式，默认读取 TRACE_CONFIG")
+    group.add_argument('--log-output', default='stderr', help="运行日志输出位置：stdout / stderr / 文件路径（默认 stderr）")
+    return parser
+
+
+def _data_parser():
+    # 分析类子命令共用：股票池、日期区间、数据源、缓存与并行度
+    parser = argparse.ArgumentParser(add_help=False)
+    group = parser.add_argument_group("股票池与日期")
+    group.add_argument('--watchlist', '-w', action='append', metavar='FILE',
+                       help="股票池文件（JSON 或每行 symbol[,name] 的文本 / CSV），可重复指定")
+    group.add_argument('--symbols', '-s', nargs='+', metavar='SYMBOL', help="股票代码，如 sh.600570 AAPL 00700")
+    group.add_argument('--start', type=_date, help="开始日期 YYYY-MM-DD，默认 --end 之前 --lookback-days 天")
+    group.add_argument('--end', type=_date, help="结束日期 YYYY-MM-DD，默认今天")
+    group.add_argument('--lookback-days', type=int, help="未指定 --start 时向前取的天数，默认读取 CLI_CONFIG")
+
+    group = parser.add_argument_group("数据源与并行")
+    group.add_argument('--data-source', choices=('fetcher', 'synthetic'), default='fetcher',
+                       help="fetcher：DataFetcher 在线获取；synthetic：本地模拟数据（调试用）")
+    group.add_argument('--cache-dir', help="行情数据磁盘缓存目录，默认读取 CLI_CONFIG[\"CACHE_DIR\"]（为空不缓存）")
+    group.add_argument('--workers', '-j', type=int, help="分析进程数，0 表示全部 CPU 核数，默认读取 BATCH_CONFIG")
+    group.add_argument('--fetch-workers', type=int, help="流水线模式下获取数据的线程数，默认读取 BATCH_CONFIG")
+    group.add_argument('--chunksize', type=int, help="每次提交给子进程的股票数量，默认读取 BATCH_CONFIG")
+    group.add_argument('--pipeline', action=argparse.BooleanOptionalAction, default=None,
+                       help="流水线模式（线程获取数据、进程分析），默认读取 BATCH_CONFIG")
+    return parser
+
+
+def _backtest_options(parser):
+    parser.add_argument('--warmup-days', type=int, help="start 之前额外获取的历史天数，默认读取 CLI_CONFIG")
+    parser.add_argument('--initial-capital', type=float, help="初始资金，默认读取 CLI_CONFIG")
+
+
+def build_parser():
+    runtime, data = _runtime_parser(), _data_parser()
+    parser = argparse.ArgumentParser(prog='python -m stock.cli', description="股票分析命令行入口")
+    commands = parser.add_subparsers(dest='command', required=True, metavar='COMMAND')
+
+    analyze = commands.add_parser('analyze', parents=[data, runtime], help="批量分析股票池")
+    analyze.add_argument('--engine', choices=('original', 'strategy', 'compare'), default='original',
+                         help="original：原始评分引擎；strategy：策略引擎；compare：共享指标对比多个引擎")
+    analyze.add_argument('--engines', nargs='+', choices=list(ENGINE_VARIANTS),
+                         help="compare 参与对比的引擎，默认读取 COMPARE_CONFIG")
+    analyze.add_argument('--only-disagreements', action='store_true', help="compare 只列出方向不一致的股票")
+    analyze.add_argument('--retention', choices=('last', 'tail', 'full'),
+                         help="original 原始指标值的保留策略，默认读取 RESULT_CONFIG")
+    analyze.set_defaults(formats=FORMATS)
+
+    screen = commands.add_parser('screen', parents=[data, runtime], help="流式选股，输出得分最高的 N 只")
+    screen.add_argument('--top-n', type=int, help="保留的股票数量，默认读取 SCREEN_CONFIG")
+    screen.add_argument('--sort-by', choices=('final_score', 'buy_score'), help="排序依据，默认读取 SCREEN_CONFIG")
+    screen.set_defaults(formats=('text', 'json', 'csv'))
+
+    backtest = commands.add_parser('backtest', parents=[data, runtime], help="按原始评分引擎的逐日建议回测")
+    _backtest_options(backtest)
+    backtest.add_argument('--details', action='store_true', help="json 输出中包含逐日建议序列")
+    backtest.set_defaults(formats=('text', 'json', 'csv'))
+
+    sweep = commands.add_parser('sweep', parents=[data, runtime],
+                                help="参数扫描：对一个配置项的多个取值分别回测，比较收益率")
+    sweep.add_argument('--param', required=True, help="回测会读取的配置项，如 OBV_CONFIG.obv_slope_window、MACD_CONFIG.fast_period")
+    sweep.add_argument('--values', nargs='+', required=True, help="取值（按 JSON 解析，如 70 0.03 [5,20] true）")
+    _backtest_options(sweep)
+    sweep.set_defaults(formats=('text', 'json', 'csv'))
+
+    bench = commands.add_parser('bench', parents=[runtime], help="运行 benchmark.py 中的基准测试")
+    bench.add_argument('names', nargs='*', help="基准测试名称（去掉 bench_ 前缀），默认全部")
+    bench.add_argument('--list', action='store_true', help="列出可用的基准测试")
+    bench.set_defaults(formats=('text', 'json', 'csv'))
+    return parser
+
+
+def run(args):
+    """按解析后的参数执行子命令，返回子命令的结果"""
+    if args.command == 'bench':
+        return cmd_bench(args)
+    stocks = resolve_stocks(args)
+    start_date, end_date = resolve_dates(args.start, args.end, args.lookback_days)
+    trace(INFO, 'cli.start', f"{args.command}：{len(stocks)} 只股票，{start_date} ~ {end_date}",
+          command=args.command, tickers=len(stocks), start=start_date, end=end_date)
+    return COMMANDS[args.command](args, build_fetch(args), stocks, start_date, end_date)
+
+
+def _report_profile(profiler, path, top):
+    if path != '-':
+        profiler.dump_stats(path)
+        trace(INFO, 'cli.profile', f"性能分析结果已保存到 {path}（python -m pstats {path} 查看）", path=path)
+        return
+    top = CLI_CONFIG.get("PROFILE_TOP", 30) if top is None else top
+    pstats.Stats(profiler, stream=sys.stderr).sort_stats('cumulative').print_stats(top)
+
+
+def main(argv=None):
+    """命令行入口，返回进程退出码"""
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    if args.format not in args.formats:
+        parser.error(f"{args.command} 不支持输出格式 {args.format}，可选 {list(args.formats)}")
+    if args.format == 'markdown' and not args.output:
+        parser.error("markdown 格式需要通过 --output 指定报告文件")
+    tracer.configure(level=args.log_level, fmt=args.log_format, output=args.log_output)
+
+    profiler = cProfile.Profile() if args.profile else None
+    if profiler is not None:
+        profiler.enable()
+    try:
+        run(args)
+    except ValueError as e:
+        trace(ERROR, 'cli.error', f"【错误】：{e}", error=str(e))
+        return 2
+    except BrokenPipeError:
+        # 输出被管道提前关闭（如 | head）：丢弃剩余输出，避免退出时再次报错
+        os.dup2(os.open(os.devnull, os.O_WRONLY), sys.stdout.fileno())
+        return 1
+    finally:
+        if profiler is not None:
+            profiler.disable()
+            _report_profile(profiler, args.profile, args.profile_top)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -2,6 +2,15 @@
 # 股票技术指标配置（含详细说明）
 # ================================
 
+# ⚡ 递推核函数加速后端配置
+KERNEL_CONFIG = {
+    "BACKEND": "auto"  # auto（已安装 numba 时用 numba，否则用 numpy）/ numba / numpy / python
+    # ▶️ 作用：选择 Wilder 平滑、EWM、OBV 累加、滚动极值等递推计算的实现，见 stock/indicator/kernels.py。
+    # 💡 使用建议：
+    #   - 参数扫描、大批量回测建议安装 numba；运行时可用 kernels.set_kernel_backend() 切换。
+    #   - python 后端为逐元素参考实现，仅用于等价性校验。
+}
+
 # 📈 Stochastic RSI 配置（随机相对强弱指标）
 STOCHASTIC_RSI = {
     'K_PERIOD': 21,  # %K 周期。控制 RSI 的取样范围。越大越平稳，信号更可靠但更滞后。
@@ -102,7 +111,8 @@ KELTNER_CONFIG = {
 OBV_CONFIG = {
     "obv_initial_value": 1000,
     "obv_threshold_positive": 0.3,
-    "obv_threshold_negative": -0.3
+    "obv_threshold_negative": -0.3,
+    "obv_slope_window": 5,  # OBV 趋势斜率（滚动线性回归）的窗口长度
     # ▶️ 作用：通过成交量与价格关系推测资金流入流出情况。
     # 🔍 反映：
     #   - OBV 持续上升：多头量能增强。
@@ -115,8 +125,13 @@ OBV_CONFIG = {
 # 🧮 VWAP 配置（成交量加权平均价）
 VWAP_CONFIG = {
     "buy_threshold": 1.5,
-    "sell_threshold": -1.5
+    "sell_threshold": -1.5,
+    "MODE": "cumulative",   # VWAP 计算模式：cumulative（自切片首日累计）/ rolling（最近 N 根K线）/ session（按周期锚定）
+    "ROLLING_WINDOW": 20,   # rolling 模式的窗口长度（K线数）
+    "SESSION_ANCHOR": "M"   # session 模式的锚定周期：W（周）/ M（月）/ Q（季）/ Y（年），每个周期首日重新累计
     # ▶️ 作用：衡量当前价格相对市场平均成本的位置，常用于判断交易性价比。
+    # ⚙️ 模式说明：
+    #   - cumulative 的数值取决于调用方切片的起点；rolling / session 与切片起点无关，适合逐日滚动回测。
     # 🔍 反映：
     #   - 当前价高于VWAP +1.5%：强势运行，主力可能持续推高。
     #   - 当前价低于VWAP -1.5%：资金抛压明显，注意风险。
@@ -124,3 +139,176 @@ VWAP_CONFIG = {
     #   - 日内交易/机构进出场监控非常有效。
     #   - 配合价格行为与趋势指标过滤虚假信号。
 }
+
+# 🗓️ 多周期配置（周线 / 月线）
+TIMEFRAME_CONFIG = {
+    "TIMEFRAMES": {"weekly": "W", "monthly": "M"},  # 周期名称 -> pandas 周期别名（W 为周一至周日，M 为自然月）
+    "INDICATORS": ["rsi", "macd", "bollinger"]      # 在周线 / 月线上计算的指标（名称见 stock/indicator/registry.py）
+    # ▶️ 作用：由日线增量聚合出周线、月线K线，新的一天到来时只更新最后一根周期K线，不重新重采样全部历史。
+    # 🔍 反映：
+    #   - 周线 / 月线信号与日线一致：趋势共振，信号更可靠。
+    #   - 日线与大周期信号相反：多为大趋势中的短期回调或反弹。
+    # 💡 使用建议：
+    #   - 月线 MACD 至少需要约 3 年日线数据才有有效值，数据不足时该周期指标给出观望。
+    #   - 周期K线的日期为该周期内最后一个交易日，未走完的周期会随新数据更新。
+}
+
+# 🚀 批量分析并行配置
+BATCH_CONFIG = {
+    "WORKERS": 1,      # 并行进程数：1 为单进程串行（默认），0 表示使用全部 CPU 核数
+    "CHUNKSIZE": 0,    # 每次提交给子进程的股票数量：0 表示自动（约为 股票数 / (进程数 × 4)）
+    "PIPELINE": False, # 流水线模式：获取数据的线程与分析进程同时工作，总耗时约为 max(获取, 分析)
+    "FETCH_WORKERS": 4,  # 流水线模式下获取数据的线程数
+    "QUEUE_SIZE": 16   # 流水线模式下已获取、待分析的股票数据上限（队列满时获取线程等待，控制内存占用）
+    # ▶️ 作用：batch_analysis_stocks 在进程池中并行分析自选股列表，结果顺序与输入一致。
+    # 🔍 反映：
+    #   - 单只股票获取数据或分析失败时只记录该股票的错误信息，不影响其他股票。
+    #   - 每只股票的分析耗时记录在结果的 elapsed 字段中。
+    # 💡 使用建议：
+    #   - 报告服务器可设为 CPU 核数；股票数量远大于进程数时适当增大 CHUNKSIZE 以减少进程间通信。
+    #   - 数据获取以网络等待为主时开启 PIPELINE；baostock（A股）登录状态为全局会话，A股建议 FETCH_WORKERS 设为 1。
+}
+
+# 🗃️ 批量分析结果保留策略（stock/mock_platform/results.py）
+RESULT_CONFIG = {
+    "RETENTION": "last",  # 原始指标值的保留方式：last（只保留最新值）/ tail（最近 TAIL_BARS 根K线）/ full（完整序列）
+    "TAIL_BARS": 20       # tail 策略保留的K线数
+    # ▶️ 作用：batch_analysis_stocks 返回的每只股票结果中，原始指标序列按该策略裁剪后再保留。
+    # 🔍 反映：
+    #   - last：每只股票的结果只有几 KB，数千只股票的批量分析内存占用与历史长度无关。
+    #   - full：保留全部指标序列（含布林带、Keltner 复制出的行情表），内存随 股票数 × 历史长度 增长。
+    # 💡 使用建议：
+    #   - 生成报告、选股使用 last；需要在结果上画近期走势图时使用 tail；只有单只股票调试时使用 full。
+}
+
+# 🔎 选股配置（stock/mock_platform/screener.py）
+SCREEN_CONFIG = {
+    "TOP_N": 50,                # 保留的候选股票数量
+    "SORT_BY": "final_score"    # 排序依据：final_score（原始评分引擎的融合评分）/ buy_score（策略引擎的加权买入得分）
+    # ▶️ 作用：股票逐只流过分析，只在大小为 TOP_N 的堆中保留得分最高的候选，分析结果中的原始指标序列立即丢弃。
+    # 🔍 反映：
+    #   - 内存占用只与 TOP_N 有关，与股票池大小无关。
+    #   - 得分为 NaN 或分析失败的股票不参与排名，失败数量计入结果的 failed。
+    # 💡 使用建议：
+    #   - 全市场选股时开启 BATCH_CONFIG 中的 PIPELINE / WORKERS，获取数据与分析重叠进行。
+}
+
+# 🧭 运行日志 / 追踪配置（stock/data/trace.py）
+TRACE_CONFIG = {
+    "LEVEL": "warning",  # 输出级别：debug / info / warning / error / off（off 完全静默）
+    "FORMAT": "text",    # 输出格式：text（与原 print 输出相同的文字）/ json（每个事件一行 JSON）
+    "OUTPUT": "stdout"   # 输出位置：stdout / stderr / 文件路径（追加写入）
+    # ▶️ 作用：分析、评分、回测等热路径中的运行信息统一通过 trace() 输出，低于 LEVEL 的事件在函数入口直接返回。
+    # 🔍 反映：
+    #   - debug：每个指标的评分与权重、MACD 数据不足、数据获取区间等逐条明细。
+    #   - info：正在分析的股票、回测逐日建议、止盈止损触发等；warning / error：数据缺失、分析失败。
+    # 💡 使用建议：
+    #   - 默认 warning：批量分析、选股不为每只股票输出逐条信息，只报告数据缺失与失败。
+    #   - 交互查看单只股票的分析过程时设为 info（命令行 --log-level info）；需要事后检索时设为 json 并输出到文件。
+    #   - 运行中可调用 trace.configure(level=..., fmt=..., output=...) 临时调整；批量任务的子进程沿用主进程当前的设置。
+}
+
+# 🛰️ 常驻分析服务配置（stock/mock_platform/service.py）
+SERVICE_CONFIG = {
+    "HOST": "127.0.0.1",       # 监听地址（默认只接受本机请求）
+    "PORT": 8765,              # 监听端口
+    "DATA_SOURCE": "fetcher",  # 数据源：fetcher（DataFetcher 在线获取）/ synthetic（本地模拟数据，用于调试与测试）
+    "HISTORY_CACHE_SIZE": 512, # 内存中保留的行情数据份数（按 股票 + 日期区间 缓存，超出后淘汰最久未使用的）
+    "RESULT_CACHE_SIZE": 2048, # 内存中保留的分析 / 回测结果份数
+    "MAX_CONCURRENCY": 4,      # 同时执行计算的请求数上限，超出的请求排队等待
+    "METRICS_WINDOW": 1000,    # 每个接口保留最近多少次请求的耗时，用于计算 p50 / p99
+    "LOOKBACK_DAYS": 365,      # 请求未指定 start 时，向前取的历史天数
+    "BACKTEST_WARMUP_DAYS": 180  # 回测在 start 之前额外获取的历史天数（指标预热，对应 back_test 的 stock_data_forward_days）
+    # ▶️ 作用：常驻进程只在启动时付出一次 pandas / 数据源等导入开销，行情数据与分析结果保存在内存中，
+    #    通过本地 HTTP 接口提供 /analyze、/screen、/backtest，/metrics 返回各接口的请求数与 p50 / p99 耗时。
+    # 🔍 反映：
+    #   - 同一股票、同一日期区间的重复请求直接命中缓存，不再获取数据和计算指标。
+    #   - 并发请求由线程处理，MAX_CONCURRENCY 限制同时计算的数量，避免内存和 CPU 被大量请求挤占。
+    # 💡 使用建议：
+    #   - 行情数据每日收盘后才变化，日内长期运行无需清空缓存；跨日运行时调用 /clear 或重启服务。
+    #   - 服务没有鉴权，不要把 HOST 改为对外网开放的地址。
+}
+
+# 🌙 收盘后自选股增量刷新配置（stock/mock_platform/watchlist.py）
+WATCHLIST_CONFIG = {
+    "STATE_DIR": "../data/watchlist_state",  # 流式指标状态的保存目录（全部股票保存在一个快照文件 watchlist_state.npz 中）
+    "LOOKBACK_DAYS": 365                     # 首次建立状态时获取的历史天数（与每日重新分析一年数据的区间一致）
+    # ▶️ 作用：收盘后只获取每只股票上次刷新之后新收盘的K线，推进已保存的流式指标状态，生成新的建议与变化。
+    # 🔍 反映：
+    #   - 首次运行（或指标参数修改后）获取 LOOKBACK_DAYS 天历史建立状态，之后每天只处理新增的一根K线。
+    #   - 刷新结果中列出综合建议与各指标建议相对上一次刷新的变化。
+    # 💡 使用建议：
+    #   - 每个交易日收盘后定时运行一次；漏跑几天时会一次补齐缺失的K线。
+    #   - 修改 config 中的指标参数后状态会自动重建，无需手动删除状态文件。
+}
+
+# 💾 状态快照配置（stock/data/snapshot.py）
+SNAPSHOT_CONFIG = {
+    "INTERVAL": 60,    # 长时间运行的任务中两次写快照的最小间隔（秒），任务结束时总会写一次
+    "COMPRESS": False  # 是否压缩快照文件（文件约小一半，写入和读取更慢）
+    # ▶️ 作用：把每只股票的流式指标状态、滚动窗口和权重表按列保存为一个 .npz 文件（不使用 pickle），
+    #    启动时直接读取，不必重新获取和回放一年的K线来预热 ADX / ATR / EWM 类指标。
+    # 🔍 反映：
+    #   - 文件头记录格式版本和每个数组的 CRC32，文件损坏或版本不一致时不使用快照，自动重新建立状态。
+    #   - 写入先写临时文件再替换，进程在写入过程中被终止也不会损坏已有快照。
+    # 💡 使用建议：
+    #   - 股票较多、刷新时间较长时适当调小 INTERVAL，中途中断后可以从最近一次快照继续。
+    #   - 快照只保存状态，不保存代码；升级指标实现后格式版本或参数指纹不一致的状态会被重建。
+}
+
+# 🔁 实时模式定长K线缓冲区配置（stock/data/ring_buffer.py）
+RING_BUFFER_CONFIG = {
+    "CAPACITY": 0,         # 每只股票保留的K线数；0 表示按指标配置自动计算
+    "WARMUP_MULTIPLE": 4   # 自动计算时取 最长预热长度（如 MACD 慢线 + 信号线周期）× 该倍数
+    # ▶️ 作用：实时 / 流式模式只保留每只股票最近 CAPACITY 根K线，内存固定，追加新K线 O(1)，
+    #    读取时返回连续的数组视图，直接传给指标核函数，不复制、不拼接 DataFrame。
+    # 🔍 反映：
+    #   - 窗口类指标（布林带、滚动极值、滚动均值）只依赖最近的窗口，缓冲区足够长时与全历史计算完全一致。
+    #   - EWM / Wilder 平滑类指标（MACD、RSI、ADX、ATR）依赖全部历史，与全历史计算的差异随缓冲区长度指数衰减。
+    # 💡 使用建议：
+    #   - 修改指标周期后自动计算的长度随之变化；需要与回测结果严格一致时调大 WARMUP_MULTIPLE，
+    #     或使用 stock/indicator/streaming.py 的递推状态。
+}
+
+# ⚖️ 策略引擎对比配置（stock/mock_platform/engine_comparison.py）
+COMPARE_CONFIG = {
+    "ENGINES": [],                # 参与对比的引擎（engine_comparison.ENGINE_VARIANTS 中的名称）；为空表示全部已注册引擎
+    "ONLY_DISAGREEMENTS": False   # 分歧表中只列出引擎间买入 / 卖出 / 观望方向不一致的股票
+    # ▶️ 作用：每只股票只获取一次数据、每个指标只计算一次，strategy_engine、original_strategy_engine
+    #    及注册的变体在同一份指标结果上给出综合建议，输出逐只股票的分歧表和两两分歧统计。
+    # 🔍 反映：
+    #   - 两个引擎的建议措辞不同（如“谨慎买入”与“买入”），按买入 / 卖出 / 观望方向判断是否一致。
+    #   - 增加引擎只增加很少的融合计算，总耗时主要取决于股票数量。
+    # 💡 使用建议：
+    #   - 调整权重或阈值前先注册为变体（register_engine_variant），与现有引擎对比分歧再决定是否替换。
+}
+
+# 📐 支撑位 / 压力位配置（stock/indicator/support_resistance.py）
+SUPPORT_RESISTANCE_CONFIG = {
+    "WINDOWS": [5, 20, 60],  # 收盘价滚动极值的窗口期，第一个为主窗口期（分析结果中的 support / resistance）
+    "BUFFER": 0.02,          # 收盘价触及或突破支撑 / 压力位时向外修正的比例
+    "PIVOTS": False          # 是否同时计算经典枢轴点（P / R1 / S1 / R2 / S2，需要 high / low 列）
+    # ▶️ 作用：多个时间尺度的支撑 / 压力位，短窗口反映近期波动区间，长窗口反映中期的重要高低点。
+    # 🔍 反映：
+    #   - 收盘价接近长窗口压力位且短窗口压力位已被突破时，说明价格正在挑战更高级别的阻力。
+    #   - 枢轴点基于当日高低收计算，作为下一交易日日内的参考位。
+    # 💡 使用建议：
+    #   - 主窗口期保持 5 时与原来的支撑 / 压力位一致；回测中使用 support_resistance_series 一次计算全历史。
+}
+
+# 🖥️ 命令行入口配置（stock/cli.py）
+CLI_CONFIG = {
+    "LOOKBACK_DAYS": 365,          # 未指定 --start 时，从 --end 向前取的历史天数
+    "BACKTEST_WARMUP_DAYS": 180,   # backtest / sweep 在 start 之前额外获取的历史天数（指标预热）
+    "INITIAL_CAPITAL": 100000,     # backtest / sweep 的初始资金
+    "CACHE_DIR": "",               # 行情数据磁盘缓存目录；为空表示不缓存（命令行 --cache-dir 优先）
+    "PROFILE_TOP": 30              # --profile 输出耗时最多的函数个数（按累计耗时排序）
+    # ▶️ 作用：python -m stock.cli analyze / screen / backtest / sweep / bench 统一从命令行指定股票池文件、
+    #    日期区间、并行进程数、缓存目录、性能分析和输出格式，生产任务无需修改各模块的 __main__。
+    # 🔍 反映：
+    #   - 开启 CACHE_DIR 后同一股票、同一日期区间只获取一次，重复运行（如调整参数后重跑）直接读取本地文件。
+    #   - --profile 用 cProfile 记录整个命令的耗时分布，定位获取数据、指标计算还是导出最慢。
+    # 💡 使用建议：
+    #   - 定时任务固定 --end 日期并开启缓存；收盘后数据会更新，当天的缓存只适合当天重复运行。
+    #   - 多进程（--workers > 1）时 cProfile 只记录主进程，分析子进程的计算耗时请使用 --workers 1。
+}
@@ -3,6 +3,7 @@ import baostock as bs
 import akshare as ak
 import pandas as pd
 import datetime
+from stock.data.trace import DEBUG, WARNING, trace
 
 class DataFetcher:
 
@@ -24,7 +25,8 @@ class DataFetcher:
         else:
             self.start_date = start_date
 
-        print(f"Start Date: {self.start_date}, End Date: {self.end_date}")
+        trace(DEBUG, 'fetch.range', f"Start Date: {self.start_date}, End Date: {self.end_date}",
+              ticker=ticker, start_date=self.start_date, end_date=self.end_date)
     def fetch_data(self):
         """
         根据股票代码自动选择数据源，返回统一格式的股票数据。
@@ -61,7 +63,7 @@ class DataFetcher:
             data_list.append(rs.get_row_data())
 
         if not data_list:
-            print(f"没有A股数据: {self.ticker}")
+            trace(WARNING, 'fetch.empty', f"没有A股数据: {self.ticker}", ticker=self.ticker)
             return None
 
         data = pd.DataFrame(data_list, columns=rs.fields)
@@ -80,7 +82,7 @@ class DataFetcher:
         data = ak.stock_hk_hist(symbol=self.ticker, period="daily", start_date=self.start_date.replace("-", ""), end_date=self.end_date.replace("-", ""), adjust="qfq")
 
         if data is None or data.empty:
-            print(f"没有港股数据: {self.ticker}")
+            trace(WARNING, 'fetch.empty', f"没有港股数据: {self.ticker}", ticker=self.ticker)
             return None
 
         # 重命名字段，使其与 A股 / 美股 统一
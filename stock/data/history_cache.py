@@ -0,0 +1,115 @@
+import contextlib
+import datetime
+import hashlib
+import os
+import re
+
+import numpy as np
+import pandas as pd
+from stock.data.stock_analysis import StockAnalysis
+from stock.data.trace import DEBUG, WARNING, trace
+
+"""
+行情数据磁盘缓存：按 (股票, 开始日期, 结束日期) 把数据源返回的日线数据保存为 .npz，重复运行的任务不再重新获取
+
+- 每份数据一个文件，日期存为 datetime64，各列存为 float64，不使用 pickle
+- 写入时先写临时文件再替换，多个进程同时写同一份数据时不会留下不完整的文件；文件损坏时当作未缓存，重新获取
+- 数据源返回空数据时不缓存；结束日期为今天或之后的区间当日K线还会变化，也不缓存
+- CachedFetch 与批量分析的 fetch_data 签名一致，可在子进程中使用（可被 pickle）
+"""
+
+
+def fetch_from_source(symbol, start_date, end_date):
+    """默认数据源：DataFetcher 按股票代码自动选择 A股 / 港股 / 美股"""
+    return StockAnalysis(symbol, symbol, start_date, end_date).data_fetcher.fetch_data()
+
+
+def cache_file(cache_dir, symbol, start_date, end_date):
+    """缓存文件路径：股票代码中的特殊字符替换为下划线，另加原始代码的短哈希避免冲突"""
+    safe = re.sub(r'[^0-9A-Za-z.-]', '_', symbol)
+    digest = hashlib.md5(symbol.encode('utf-8')).hexdigest()[:8]
+    return os.path.join(cache_dir, f"{safe}-{digest}_{start_date}_{end_date}.npz")
+
+
+def is_final(end_date):
+    """区间是否已经结束（结束日期早于今天），只有已结束区间的数据不会再变化"""
+    return pd.Timestamp(end_date).date() < datetime.date.today()
+
+
+def save_history(path, stock_data):
+    """保存一份日线数据（索引为日期）"""
+    columns = [str(column) for column in stock_data.columns]
+    arrays = {
+        '__dates__': stock_data.index.to_numpy(dtype='datetime64[ns]'),
+        '__columns__': np.array(columns, dtype=str),
+        '__index_name__': np.array([stock_data.index.name or 'date'], dtype=str),
+    }
+    for j, column in enumerate(columns):
+        arrays[f"c{j}"] = pd.to_numeric(stock_data.iloc[:, j], errors='coerce').to_numpy(dtype=float)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    try:
+        with open(tmp_path, 'wb') as f:
+            np.savez(f, **arrays)
+        os.replace(tmp_path, path)
+    except BaseException:
+        # 写入失败（磁盘已满、被中断等）时不留下临时文件
+        with contextlib.suppress(OSError):
+            os.remove(tmp_path)
+        raise
+
+
+def load_history(path):
+    """
+    读取 save_history 保存的数据，返回 DataFrame（与数据源返回的格式一致）
+
+    :raises ValueError: 文件损坏
+    """
+    try:
+        with np.load(path, allow_pickle=False) as npz:
+            columns = npz['__columns__'].tolist()
+            index = pd.DatetimeIndex(npz['__dates__'], name=str(npz['__index_name__'][0]))
+            return pd.DataFrame({column: npz[f"c{j}"] for j, column in enumerate(columns)}, index=index)
+    except OSError:
+        raise
+    except Exception as e:
+        # 与快照相同：损坏的文件可能在解析的任意位置出错，统一视为文件损坏
+        raise ValueError(f"缓存文件损坏: {type(e).__name__}: {e}") from e
+
+
+class CachedFetch:
+    """
+    带磁盘缓存的数据源
+
+    :param cache_dir: 缓存目录（不存在时自动创建）
+    :param fetch_data: 实际的数据源函数 fetch_data(symbol, start_date, end_date)，None 使用 DataFetcher
+    """
+
+    __slots__ = ("cache_dir", "fetch_data")
+
+    def __init__(self, cache_dir, fetch_data=None):
+        self.cache_dir = cache_dir
+        self.fetch_data = fetch_data if fetch_data is not None else fetch_from_source
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def __call__(self, symbol, start_date, end_date):
+        if not is_final(end_date):
+            return self.fetch_data(symbol, start_date, end_date)
+
+        path = cache_file(self.cache_dir, symbol, start_date, end_date)
+        if os.path.exists(path):
+            try:
+                stock_data = load_history(path)
+                trace(DEBUG, 'history_cache.hit', f"缓存命中: {symbol} {start_date} ~ {end_date}",
+                      ticker=symbol, path=path)
+                return stock_data
+            except (OSError, ValueError) as e:
+                trace(WARNING, 'history_cache.invalid', f"缓存文件无法读取，重新获取: {path}（{e}）",
+                      ticker=symbol, path=path, error=str(e))
+
+        stock_data = self.fetch_data(symbol, start_date, end_date)
+        if stock_data is not None and not stock_data.empty:
+            save_history(path, stock_data)
+        return stock_data
+
+    def __repr__(self):
+        return f"CachedFetch(cache_dir={self.cache_dir!r}, fetch_data={self.fetch_data!r})"
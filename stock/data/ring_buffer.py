@@ -0,0 +1,211 @@
+import numpy as np
+import pandas as pd
+from stock.data.config import RING_BUFFER_CONFIG
+from stock.indicator.registry import max_warmup
+
+"""
+实时模式的定长K线缓冲区：只保留每只股票最近 capacity 根K线，内存固定，追加 O(1)
+
+- 双写：数据区长度为 2 * capacity，每根K线同时写入位置 i 和 i + capacity，
+  最近 capacity 根K线总是数据区中连续的一段，读取时直接返回切片（不复制）
+- 数据按列存放（列 × 时间），每列的视图是连续的 float64 数组，可直接传给 stock/indicator/kernels 的核函数
+- RingBuffer：单只股票；UniverseRingBuffer：全部股票共用时间轴（列 × 股票 × 时间），每天一次追加全部股票
+- 返回的视图只读，且只在下一次追加之前有效（之后同一块内存会被覆盖），需要长期保存时调用方自行 copy()
+"""
+
+BAR_COLUMNS = ('open', 'high', 'low', 'close', 'volume', 'amount')
+
+
+def default_capacity(names=None):
+    """
+    按指标配置计算缓冲区长度：RING_BUFFER_CONFIG["CAPACITY"]，为 0 时取
+    最长预热长度（registry.max_warmup）× WARMUP_MULTIPLE
+
+    :param names: 参与计算的指标名称，默认全部已注册指标
+    :return: int
+    """
+    capacity = RING_BUFFER_CONFIG.get("CAPACITY", 0)
+    if capacity:
+        return int(capacity)
+    return max(2, int(max_warmup(names) * RING_BUFFER_CONFIG.get("WARMUP_MULTIPLE", 4)))
+
+
+def _day(date):
+    # 'YYYY-MM-DD' 字符串直接转换，避免逐根K线构造 Timestamp
+    if isinstance(date, str):
+        return np.datetime64(date[:10], 'D')
+    return np.datetime64(pd.Timestamp(date), 'D')
+
+
+def _readonly(view):
+    view.flags.writeable = False
+    return view
+
+
+class RingBuffer:
+    """
+    单只股票的定长K线缓冲区
+
+    :param capacity: 保留的K线数，None 取 default_capacity()
+    :param columns: 数据列
+    """
+
+    __slots__ = ("capacity", "columns", "_index", "_values", "_dates", "_count")
+
+    def __init__(self, capacity=None, columns=BAR_COLUMNS):
+        self.capacity = int(capacity or default_capacity())
+        self.columns = tuple(columns)
+        self._index = {column: j for j, column in enumerate(self.columns)}
+        self._values = np.full((len(self.columns), 2 * self.capacity), np.nan)
+        self._dates = np.zeros(2 * self.capacity, dtype='datetime64[D]')
+        self._count = 0
+
+    def __len__(self):
+        return min(self._count, self.capacity)
+
+    @property
+    def count(self):
+        """累计追加的K线数（含已被覆盖的）"""
+        return self._count
+
+    def _window(self):
+        # 最近 len(self) 根K线在数据区中的起止位置
+        end = self._count % self.capacity + self.capacity
+        return end - len(self), end
+
+    def append(self, date, row):
+        """
+        追加一根K线
+
+        :param date: K线日期
+        :param row: 与 columns 顺序一致的数值序列，或 {列名: 值}（缺少的列为 NaN）
+        """
+        if isinstance(row, dict):
+            row = [row.get(column, np.nan) for column in self.columns]
+        position = self._count % self.capacity
+        self._values[:, position] = row
+        self._values[:, position + self.capacity] = row
+        self._dates[position] = self._dates[position + self.capacity] = _day(date)
+        self._count += 1
+
+    def extend(self, stock_data):
+        """按日期顺序追加一段行情数据（DataFrame，索引为日期），只写入最后 capacity 根"""
+        stock_data = stock_data.sort_index().iloc[-self.capacity:]
+        values = stock_data.reindex(columns=list(self.columns)).to_numpy(dtype=float)
+        for date, row in zip(stock_data.index, values):
+            self.append(date, row)
+
+    def column(self, name):
+        """最近 len(self) 根K线某一列的只读视图（连续 float64 数组，不复制）"""
+        start, end = self._window()
+        return _readonly(self._values[self._index[name], start:end])
+
+    def values(self):
+        """全部列的只读视图，形状为 (列数, len(self))"""
+        start, end = self._window()
+        return _readonly(self._values[:, start:end])
+
+    def dates(self):
+        start, end = self._window()
+        return _readonly(self._dates[start:end])
+
+    def last(self):
+        """最近一根K线：(日期字符串, {列名: 值})，缓冲区为空时返回 None"""
+        if not self._count:
+            return None
+        position = (self._count - 1) % self.capacity + self.capacity
+        return str(self._dates[position]), dict(zip(self.columns, self._values[:, position].tolist()))
+
+    def frame(self):
+        """最近 len(self) 根K线的 DataFrame（索引为日期），与 DataFetcher 返回的格式一致"""
+        index = pd.DatetimeIndex(self.dates().astype('datetime64[ns]'), name='date')
+        return pd.DataFrame(self.values().T, index=index, columns=list(self.columns), copy=False)
+
+    def rows(self):
+        """[[日期字符串, 值...], ...]，用于保存状态"""
+        dates = np.datetime_as_string(self.dates()).tolist()
+        return [[date] + row for date, row in zip(dates, self.values().T.tolist())]
+
+    def __repr__(self):
+        return f"RingBuffer(capacity={self.capacity}, size={len(self)}, count={self._count})"
+
+
+class UniverseRingBuffer:
+    """
+    全部股票共用时间轴的定长K线缓冲区：每个交易日调用一次 append，写入全部股票当天的K线
+
+    数据区形状为 (列数, 股票数, 2 * capacity)，column(name) 返回 (股票数, len) 的视图，每只股票一行且连续。
+    当天没有K线的股票（停牌等）记为 NaN。
+
+    :param symbols: 股票代码列表（顺序即行序）
+    :param capacity: 保留的K线数，None 取 default_capacity()
+    :param columns: 数据列
+    """
+
+    __slots__ = ("symbols", "capacity", "columns", "_rows", "_index", "_values", "_dates", "_count")
+
+    def __init__(self, symbols, capacity=None, columns=BAR_COLUMNS):
+        self.symbols = list(symbols)
+        self.capacity = int(capacity or default_capacity())
+        self.columns = tuple(columns)
+        self._rows = {symbol: i for i, symbol in enumerate(self.symbols)}
+        self._index = {column: j for j, column in enumerate(self.columns)}
+        self._values = np.full((len(self.columns), len(self.symbols), 2 * self.capacity), np.nan)
+        self._dates = np.zeros(2 * self.capacity, dtype='datetime64[D]')
+        self._count = 0
+
+    def __len__(self):
+        return min(self._count, self.capacity)
+
+    @property
+    def count(self):
+        return self._count
+
+    def _window(self):
+        end = self._count % self.capacity + self.capacity
+        return end - len(self), end
+
+    def append(self, date, values):
+        """
+        追加一个交易日全部股票的K线
+
+        :param date: 交易日
+        :param values: 形状为 (股票数, 列数) 的数组（行序与 symbols 一致），
+                       或 {股票代码: {列名: 值}}（缺少的股票或列为 NaN）
+        """
+        if isinstance(values, dict):
+            day = np.full((len(self.symbols), len(self.columns)), np.nan)
+            for symbol, bar in values.items():
+                day[self._rows[symbol]] = [bar.get(column, np.nan) for column in self.columns]
+            values = day
+        values = np.asarray(values, dtype=float).T
+        position = self._count % self.capacity
+        self._values[:, :, position] = values
+        self._values[:, :, position + self.capacity] = values
+        self._dates[position] = self._dates[position + self.capacity] = _day(date)
+        self._count += 1
+
+    def column(self, name):
+        """某一列的只读视图，形状为 (股票数, len(self))，每行连续"""
+        start, end = self._window()
+        return _readonly(self._values[self._index[name], :, start:end])
+
+    def ticker_column(self, symbol, name):
+        """单只股票某一列的只读视图（连续 float64 数组，不复制）"""
+        start, end = self._window()
+        return _readonly(self._values[self._index[name], self._rows[symbol], start:end])
+
+    def dates(self):
+        start, end = self._window()
+        return _readonly(self._dates[start:end])
+
+    def frame(self, symbol):
+        """单只股票最近 len(self) 根K线的 DataFrame（索引为日期）"""
+        start, end = self._window()
+        index = pd.DatetimeIndex(self.dates().astype('datetime64[ns]'), name='date')
+        values = _readonly(self._values[:, self._rows[symbol], start:end])
+        return pd.DataFrame(values.T, index=index, columns=list(self.columns), copy=False)
+
+    def __repr__(self):
+        return (f"UniverseRingBuffer(symbols={len(self.symbols)}, capacity={self.capacity}, "
+                f"size={len(self)}, count={self._count})")
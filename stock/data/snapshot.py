@@ -0,0 +1,297 @@
+import datetime
+import json
+import os
+import time
+import zlib
+
+import numpy as np
+from stock.data.config import SNAPSHOT_CONFIG
+from stock.data.trace import ERROR, INFO, trace
+
+"""
+状态快照：把大量结构相同的状态字典（流式指标状态、滚动窗口、权重表等）保存为一个 .npz 文件
+
+- 只接受由 dict / list / str / int / float / bool / None 组成的状态（即各状态类 state_dict() 的结果），不使用 pickle
+- 按列存储：结构相同的记录分为一组，同一位置的值在所有记录间拼成一个数组；列表按长度拼接，
+  元组行按列拆开，启动时一次读取几百个数组，而不是逐个解析上千个文件
+- 文件头记录格式版本和每个数组的 CRC32，文件头自身的 CRC32 单独保存；读取时校验，
+  文件截断、损坏或版本不一致时不使用快照（load_snapshot 返回 None），由调用方重新建立状态
+- 写入时先写临时文件再替换，中断时不会留下不完整的快照
+"""
+
+SNAPSHOT_FORMAT = "stock-state-snapshot"
+SNAPSHOT_VERSION = 1
+
+
+# ================================
+# 编码：状态字典 -> 列
+# ================================
+
+def _flatten(value, path, leaves):
+    # 把嵌套字典展开为 [(路径, 叶子)]，列表（含空列表）和标量都是叶子，空字典单独记为叶子
+    if isinstance(value, dict):
+        if not value:
+            leaves.append((path, 'dict', value))
+        for key, item in value.items():
+            if not isinstance(key, str):
+                raise ValueError(f"快照只支持字符串键: {key!r}")
+            _flatten(item, path + (key,), leaves)
+    elif isinstance(value, (list, tuple)):
+        leaves.append((path, 'list', value))
+    else:
+        leaves.append((path, 'scalar', value))
+    return leaves
+
+
+def _is_number(value):
+    return isinstance(value, (int, float, np.integer, np.floating)) and not isinstance(value, (bool, np.bool_))
+
+
+def _encode_column(values, name, arrays):
+    """
+    把一列标量编码为数组，返回类型标记：str / bool / int / float / none
+
+    含 None 的列另存一个布尔掩码 <name>.none；int 与 float 混合的列按 float 保存。
+    """
+    present = [value for value in values if value is not None]
+    if len(present) != len(values):
+        arrays[f"{name}.none"] = np.array([value is None for value in values], dtype=bool)
+    if not values:
+        kind, fill, dtype = 'float', 0.0, np.float64
+    elif not present:
+        return 'none'
+    elif all(isinstance(value, str) for value in present):
+        kind, fill, dtype = 'str', '', str
+    elif all(isinstance(value, (bool, np.bool_)) for value in present):
+        kind, fill, dtype = 'bool', False, bool
+    elif all(isinstance(value, (int, np.integer)) and _is_number(value) for value in present):
+        kind, fill, dtype = 'int', 0, np.int64
+    elif all(_is_number(value) for value in present):
+        kind, fill, dtype = 'float', 0.0, np.float64
+    else:
+        raise ValueError(f"快照列 {name} 的值类型不一致: {sorted({type(value).__name__ for value in present})}")
+    arrays[name] = np.array([fill if value is None else value for value in values], dtype=dtype)
+    return kind
+
+
+def _decode_column(kind, name, arrays, size):
+    if kind == 'none':
+        return [None] * size
+    values = arrays[name].tolist()
+    if f"{name}.none" in arrays:
+        values = [None if missing else value for value, missing in zip(values, arrays[f"{name}.none"].tolist())]
+    return values
+
+
+def _encode_list(leaf_values, name, arrays):
+    # 列表叶子：记录每条记录的长度，元素拼接后按列保存（元素为列表/元组时每个位置一列）
+    arrays[f"{name}.len"] = np.array([len(value) for value in leaf_values], dtype=np.int64)
+    elements = [element for value in leaf_values for element in value]
+    rows = [isinstance(element, (list, tuple)) for element in elements]
+    if not any(rows):
+        return {'width': 0, 'columns': [_encode_column(elements, f"{name}.0", arrays)]}
+    if not all(rows):
+        raise ValueError(f"快照列表 {name} 中同时存在标量和行")
+    width = len(elements[0])
+    if any(len(element) != width for element in elements):
+        raise ValueError(f"快照列表 {name} 中行的长度不一致")
+    return {'width': width,
+            'columns': [_encode_column([element[j] for element in elements], f"{name}.{j}", arrays)
+                        for j in range(width)]}
+
+
+def _decode_list(leaf, name, arrays):
+    lengths = arrays[f"{name}.len"].tolist()
+    total = sum(lengths)
+    if leaf['width'] == 0:
+        elements = _decode_column(leaf['columns'][0], f"{name}.0", arrays, total)
+    else:
+        columns = [_decode_column(kind, f"{name}.{j}", arrays, total) for j, kind in enumerate(leaf['columns'])]
+        elements = list(map(list, zip(*columns)))
+    values, start = [], 0
+    for length in lengths:
+        values.append(elements[start:start + length])
+        start += length
+    return values
+
+
+def _encode_section(section, prefix, arrays):
+    # 按结构（叶子路径与类型）把记录分组，每组每个叶子一列
+    groups = {}
+    for key, record in section.items():
+        if not isinstance(record, dict):
+            raise ValueError(f"快照记录必须是字典: {key!r}")
+        leaves = _flatten(record, (), [])
+        signature = tuple((path, kind) for path, kind, _ in leaves)
+        groups.setdefault(signature, []).append((key, [value for _, _, value in leaves]))
+
+    encoded = []
+    for group_index, (signature, records) in enumerate(groups.items()):
+        name = f"{prefix}.{group_index}"
+        arrays[f"{name}.keys"] = np.array([key for key, _ in records], dtype=str)
+        leaves = []
+        for leaf_index, (path, kind) in enumerate(signature):
+            leaf_name = f"{name}.{leaf_index}"
+            values = [leaf_values[leaf_index] for _, leaf_values in records]
+            leaf = {'path': list(path), 'kind': kind}
+            if kind == 'scalar':
+                leaf['column'] = _encode_column(values, leaf_name, arrays)
+            elif kind == 'list':
+                leaf.update(_encode_list(values, leaf_name, arrays))
+            leaves.append(leaf)
+        encoded.append({'name': name, 'size': len(records), 'leaves': leaves})
+    return encoded
+
+
+def _set_path(record, path, value):
+    for key in path[:-1]:
+        record = record.setdefault(key, {})
+    record[path[-1]] = value
+
+
+def _decode_section(groups, arrays):
+    section = {}
+    for group in groups:
+        name, size = group['name'], group['size']
+        records = [{} for _ in range(size)]
+        for leaf_index, leaf in enumerate(group['leaves']):
+            leaf_name = f"{name}.{leaf_index}"
+            if leaf['kind'] == 'dict':
+                values = [{} for _ in range(size)]
+            elif leaf['kind'] == 'list':
+                values = _decode_list(leaf, leaf_name, arrays)
+            else:
+                values = _decode_column(leaf['column'], leaf_name, arrays, size)
+            # 路径为空的叶子只能是空记录 {}
+            if leaf['path']:
+                for record, value in zip(records, values):
+                    _set_path(record, leaf['path'], value)
+        section.update(zip(arrays[f"{name}.keys"].tolist(), records))
+    return section
+
+
+def _checksum(array):
+    return zlib.crc32(np.ascontiguousarray(array).tobytes()) & 0xFFFFFFFF
+
+
+# ================================
+# 读写
+# ================================
+
+def save_snapshot(path, sections, meta=None, compress=None):
+    """
+    保存快照
+
+    :param path: 快照文件路径（.npz）
+    :param sections: {分区名: {记录键: 状态字典}}，如 {'states': {symbol: state_dict}, 'tables': {...}}
+    :param meta: 可选的附加信息（可 JSON 序列化），读取时原样返回
+    :param compress: 是否压缩，None 读取 SNAPSHOT_CONFIG["COMPRESS"]
+    :return: 快照文件大小（字节）
+    """
+    compress = SNAPSHOT_CONFIG.get("COMPRESS", False) if compress is None else compress
+    arrays = {}
+    layout = {name: _encode_section(section, f"s{index}", arrays)
+              for index, (name, section) in enumerate(sections.items())}
+    header = {
+        'format': SNAPSHOT_FORMAT,
+        'version': SNAPSHOT_VERSION,
+        'created': datetime.datetime.now().isoformat(timespec='seconds'),
+        'meta': meta,
+        'sections': layout,
+        'checksums': {name: _checksum(array) for name, array in arrays.items()},
+    }
+    header_bytes = np.frombuffer(json.dumps(header, ensure_ascii=False).encode('utf-8'), dtype=np.uint8)
+    arrays['__header__'] = header_bytes
+    arrays['__header_crc__'] = np.array([_checksum(header_bytes)], dtype=np.uint32)
+
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    # 传入文件对象，避免 numpy 自动补 .npz 后缀
+    with open(path + '.tmp', 'wb') as f:
+        (np.savez_compressed if compress else np.savez)(f, **arrays)
+    os.replace(path + '.tmp', path)
+    return os.path.getsize(path)
+
+
+def read_snapshot(path):
+    """
+    读取并校验快照
+
+    :return: {'sections': {分区名: {记录键: 状态字典}}, 'meta': ..., 'created': ...}
+    :raises ValueError: 文件损坏、校验失败或格式版本不一致
+    """
+    try:
+        with np.load(path, allow_pickle=False) as npz:
+            arrays = {name: npz[name] for name in npz.files}
+    except OSError:
+        raise
+    except Exception as e:
+        # 损坏的文件可能在 zipfile / .npy 文件头解析的任意位置出错（BadZipFile、NotImplementedError、TokenError 等）
+        raise ValueError(f"快照文件损坏: {type(e).__name__}: {e}") from e
+
+    if '__header__' not in arrays or '__header_crc__' not in arrays:
+        raise ValueError("快照缺少文件头")
+    header_bytes = arrays.pop('__header__')
+    if _checksum(header_bytes) != int(arrays.pop('__header_crc__')[0]):
+        raise ValueError("快照文件头校验失败")
+    header = json.loads(header_bytes.tobytes().decode('utf-8'))
+    if header.get('format') != SNAPSHOT_FORMAT or header.get('version') != SNAPSHOT_VERSION:
+        raise ValueError(f"快照格式或版本不一致: {header.get('format')} v{header.get('version')}")
+
+    checksums = header['checksums']
+    if set(checksums) != set(arrays):
+        raise ValueError("快照中的数组与文件头记录不一致")
+    for name, array in arrays.items():
+        if _checksum(array) != checksums[name]:
+            raise ValueError(f"快照数组校验失败: {name}")
+
+    return {
+        'sections': {name: _decode_section(groups, arrays) for name, groups in header['sections'].items()},
+        'meta': header.get('meta'),
+        'created': header.get('created'),
+    }
+
+
+def load_snapshot(path):
+    """
+    启动时读取快照：文件不存在返回 None；损坏或版本不一致时记录错误并返回 None（由调用方重新建立状态）
+    """
+    if not os.path.exists(path):
+        return None
+    try:
+        return read_snapshot(path)
+    except (OSError, ValueError) as e:
+        trace(ERROR, 'snapshot.invalid', f"【错误】：快照 {path} 无法使用，将重新建立状态：{e}", path=path, error=str(e))
+        return None
+
+
+class SnapshotWriter:
+    """
+    定期写快照：maybe_write() 距上次写入超过 interval 秒时才写入，长时间运行的任务中可以频繁调用
+
+    :param path: 快照文件路径
+    :param interval: 写入间隔（秒），None 读取 SNAPSHOT_CONFIG["INTERVAL"]
+    """
+
+    __slots__ = ("path", "interval", "last_write", "writes")
+
+    def __init__(self, path, interval=None):
+        self.path = path
+        self.interval = SNAPSHOT_CONFIG.get("INTERVAL", 60) if interval is None else interval
+        self.last_write = time.monotonic()
+        self.writes = 0
+
+    def maybe_write(self, build, force=False, meta=None):
+        """
+        :param build: 无参函数，返回 save_snapshot 的 sections（只在需要写入时调用）
+        :param force: 忽略时间间隔立即写入（如任务结束时）
+        :return: 是否写入
+        """
+        if not force and time.monotonic() - self.last_write < self.interval:
+            return False
+        size = save_snapshot(self.path, build(), meta=meta)
+        self.last_write = time.monotonic()
+        self.writes += 1
+        trace(INFO, 'snapshot.write', f"快照已写入 {self.path}（{size} 字节）", path=self.path, size=size)
+        return True
@@ -0,0 +1,86 @@
+import zlib
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+
+
+@lru_cache(maxsize=64)
+def _business_days(start_date, days):
+    # pd.bdate_range 生成长区间较慢，相同区间的日期索引（不可变）直接复用
+    return pd.bdate_range(start=start_date, periods=days, name="date")
+
+
+def _business_day_count(start_date, end_date):
+    """[start_date, end_date] 内的工作日数量（与 len(pd.bdate_range(start_date, end_date)) 相同）"""
+    return int(np.busday_count(np.datetime64(start_date, 'D'), np.datetime64(end_date, 'D') + 1))
+
+
+def make_synthetic_ohlcv(days=500, start_date="2015-01-01", start_price=100.0, seed=0):
+    """
+    生成与真实日线形状一致的模拟 OHLCV 数据（几何布朗运动 + 随机振幅与成交量）
+
+    用于基准测试与离线调试，列名与 DataFetcher 返回的数据保持一致。
+
+    参数:
+    days (int): 交易日数量
+    start_date (str): 起始日期（YYYY-MM-DD），按工作日生成索引
+    start_price (float): 起始价格
+    seed (int): 随机种子，保证结果可复现
+
+    返回:
+    pd.DataFrame: 包含 open, high, low, close, volume, amount 列，索引为 date
+    """
+    rng = np.random.default_rng(seed)
+
+    close = start_price * np.exp(np.cumsum(rng.normal(0.0003, 0.02, days)))
+    open_ = close * (1 + rng.normal(0, 0.006, days))
+    high = np.maximum(open_, close) * (1 + rng.uniform(0, 0.02, days))
+    low = np.minimum(open_, close) * (1 - rng.uniform(0, 0.02, days))
+    volume = rng.lognormal(13, 0.4, days).round()
+
+    index = _business_days(start_date, days)
+    return pd.DataFrame({
+        "open": open_,
+        "high": high,
+        "low": low,
+        "close": close,
+        "volume": volume,
+        "amount": close * volume,
+    }, index=index)
+
+
+def fetch_synthetic_data(ticker, start_date, end_date):
+    """
+    模拟数据源：按股票代码生成可复现的日线数据，接口与批量分析的 fetch_data 参数一致
+
+    参数:
+    ticker (str): 股票代码（决定随机种子，同一代码每次生成相同数据）
+    start_date (str): 开始日期（YYYY-MM-DD）
+    end_date (str): 结束日期（YYYY-MM-DD）
+
+    返回:
+    pd.DataFrame: 区间内每个工作日一根K线
+    """
+    days = _business_day_count(start_date, end_date)
+    return make_synthetic_ohlcv(days=days, start_date=start_date, seed=zlib.crc32(ticker.encode("utf-8")))
+
+
+def fetch_synthetic_history(ticker, start_date, end_date, history_start="2015-01-01", history_end="2030-12-31"):
+    """
+    模拟数据源：每只股票对应一段 history_start 至 history_end 的固定行情，按区间截取
+
+    与 fetch_synthetic_data 不同，同一只股票不同区间的数据互相衔接（同一日期的K线相同），
+    可用于增量获取、逐日刷新等需要跨次请求保持一致的场景。
+
+    参数:
+    ticker (str): 股票代码（决定随机种子）
+    start_date (str): 开始日期（YYYY-MM-DD）
+    end_date (str): 结束日期（YYYY-MM-DD）
+
+    返回:
+    pd.DataFrame: 区间内每个工作日一根K线（区间超出固定行情的部分没有数据）
+    """
+    days = _business_day_count(history_start, history_end)
+    history = make_synthetic_ohlcv(days=days, start_date=history_start, seed=zlib.crc32(ticker.encode("utf-8")))
+    return history.loc[start_date:end_date]
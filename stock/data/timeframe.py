@@ -0,0 +1,197 @@
+import numpy as np
+import pandas as pd
+from stock.data.config import TIMEFRAME_CONFIG  # 从配置文件导入多周期配置
+
+"""
+多周期K线：由日线增量聚合出周线 / 月线
+
+已走完的周期K线只追加不再改动，新的一天到来时只合并进最后一根（未走完的）周期K线，
+避免每次分析都对全部日线历史重新 resample。
+"""
+
+# 各列的聚合方式（与 DataFrame.resample().agg() 的 first / max / min / last / sum 一致）
+BAR_COLUMNS = ('open', 'high', 'low', 'close', 'volume', 'amount')
+
+
+class ResampledBars:
+    """
+    单个周期的增量聚合K线
+
+    已走完的周期K线存放在按需扩容的数组中，只有最后一根K线会随新的日线更新。
+    每次数据变化 version 加 1，调用方可据此判断缓存的指标结果是否失效。
+    """
+
+    def __init__(self, freq):
+        """
+        :param freq: pandas 周期别名，如 W（周）、M（月）、Q（季）
+        """
+        self.freq = freq
+        self.version = 0
+        self._columns = None
+        self._values = None     # 已走完的周期K线（行数 = 容量）
+        self._labels = None     # 已走完的周期K线日期（周期内最后一个交易日）
+        self._size = 0
+        self._current_key = None
+        self._current_values = None
+        self._current_label = None
+        self._frame = None
+        self._frame_version = -1
+
+    def __len__(self):
+        return self._size + (self._current_key is not None)
+
+    def _aggregate(self, values, starts, ends):
+        """按 [starts, ends) 分组聚合日线数组"""
+        result = np.empty((len(starts), len(self._columns)))
+        for j, column in enumerate(self._columns):
+            data = values[:, j]
+            if column == 'open':
+                result[:, j] = data[starts]
+            elif column == 'high':
+                result[:, j] = np.fmax.reduceat(data, starts)
+            elif column == 'low':
+                result[:, j] = np.fmin.reduceat(data, starts)
+            elif column == 'close':
+                result[:, j] = data[ends - 1]
+            else:
+                result[:, j] = np.add.reduceat(np.nan_to_num(data), starts)
+        return result
+
+    def _merge(self, current, new):
+        """将同一周期内新到的日线聚合结果合并进当前周期K线"""
+        merged = current.copy()
+        for j, column in enumerate(self._columns):
+            if column == 'high':
+                merged[j] = np.fmax(current[j], new[j])
+            elif column == 'low':
+                merged[j] = np.fmin(current[j], new[j])
+            elif column == 'close':
+                merged[j] = new[j]
+            elif column in ('volume', 'amount'):
+                merged[j] = current[j] + new[j]
+        return merged
+
+    def _close_bars(self, values, labels):
+        """追加已走完的周期K线，容量不足时按倍数扩容"""
+        count = len(values)
+        if count == 0:
+            return
+        if self._values is None:
+            capacity = max(64, count)
+            self._values = np.empty((capacity, len(self._columns)))
+            self._labels = np.empty(capacity, dtype='datetime64[ns]')
+        elif self._size + count > len(self._values):
+            capacity = max(2 * len(self._values), self._size + count)
+            self._values = np.resize(self._values, (capacity, len(self._columns)))
+            self._labels = np.resize(self._labels, capacity)
+        self._values[self._size:self._size + count] = values
+        self._labels[self._size:self._size + count] = labels
+        self._size += count
+
+    def append(self, daily_data):
+        """
+        追加新的日线数据（日期必须晚于已聚合的最后一个交易日）
+
+        :param daily_data: 日线 DataFrame，索引为 DatetimeIndex
+        """
+        if daily_data is None or daily_data.empty:
+            return
+        if not isinstance(daily_data.index, pd.DatetimeIndex):
+            raise ValueError("多周期聚合需要以日期（DatetimeIndex）为索引的日线数据")
+        if self._columns is None:
+            self._columns = tuple(column for column in BAR_COLUMNS if column in daily_data.columns)
+
+        values = daily_data[list(self._columns)].to_numpy(dtype=float)
+        keys = daily_data.index.to_period(self.freq).asi8
+        labels = daily_data.index.to_numpy(dtype='datetime64[ns]')
+
+        # 按周期切分：同一周期内连续的日线为一组
+        starts = np.concatenate(([0], np.flatnonzero(np.diff(keys)) + 1))
+        ends = np.append(starts[1:], len(keys))
+        bars = self._aggregate(values, starts, ends)
+        bar_keys = keys[starts]
+        bar_labels = labels[ends - 1]
+
+        # 第一组若与未走完的周期相同，合并进当前周期K线
+        if self._current_key is not None and bar_keys[0] == self._current_key:
+            bars[0] = self._merge(self._current_values, bars[0])
+        elif self._current_key is not None:
+            self._close_bars(self._current_values[np.newaxis, :], [self._current_label])
+
+        # 除最后一组外都已走完，最后一组成为新的当前周期K线
+        self._close_bars(bars[:-1], bar_labels[:-1])
+        self._current_key = bar_keys[-1]
+        self._current_values = bars[-1]
+        self._current_label = bar_labels[-1]
+        self.version += 1
+
+    def to_frame(self):
+        """
+        返回周期K线 DataFrame（包含未走完的最后一根），同一版本内重复调用直接返回缓存
+
+        :return: pd.DataFrame，索引为周期内最后一个交易日
+        """
+        if self._frame_version == self.version:
+            return self._frame
+
+        columns = list(self._columns or BAR_COLUMNS)
+        if self._current_key is None:
+            frame = pd.DataFrame(columns=columns, dtype=float, index=pd.DatetimeIndex([], name='date'))
+        else:
+            values = np.vstack((self._values[:self._size], self._current_values)) if self._size else \
+                self._current_values[np.newaxis, :]
+            labels = np.append(self._labels[:self._size], np.datetime64(self._current_label, 'ns'))
+            frame = pd.DataFrame(values, columns=columns, index=pd.DatetimeIndex(labels, name='date'))
+
+        self._frame = frame
+        self._frame_version = self.version
+        return frame
+
+
+class MultiTimeframeBars:
+    """
+    日线 + 多周期K线缓存
+
+    用法：每次拿到最新的日线数据后调用 update()，只有比上次更晚的交易日会被聚合，
+    周线 / 月线只更新最后一根K线；通过 bars('weekly') 取得对应周期的K线。
+    """
+
+    def __init__(self, timeframes=None):
+        """
+        :param timeframes: {周期名称: pandas 周期别名}，默认读取 TIMEFRAME_CONFIG["TIMEFRAMES"]
+        """
+        if timeframes is None:
+            timeframes = TIMEFRAME_CONFIG["TIMEFRAMES"]
+        self.timeframes = {name: ResampledBars(freq) for name, freq in timeframes.items()}
+        self.last_date = None
+
+    def update(self, daily_data):
+        """
+        合并日线数据中比上次更晚的交易日（已聚合过的日期会被跳过）
+
+        :param daily_data: 日线 DataFrame（可为完整历史，也可只含新增的交易日）
+        :return: 本次新增的交易日数量
+        """
+        if daily_data is None or daily_data.empty:
+            return 0
+        new_data = daily_data
+        if self.last_date is not None:
+            # 日线按日期升序，二分定位第一个新交易日
+            new_data = daily_data.iloc[daily_data.index.searchsorted(self.last_date, side='right'):]
+        if new_data.empty:
+            return 0
+
+        for resampled in self.timeframes.values():
+            resampled.append(new_data)
+        self.last_date = new_data.index[-1]
+        return len(new_data)
+
+    def bars(self, timeframe):
+        """返回指定周期的K线 DataFrame"""
+        if timeframe not in self.timeframes:
+            raise KeyError(f"未配置的周期: {timeframe}，可选 {list(self.timeframes)}")
+        return self.timeframes[timeframe].to_frame()
+
+    def version(self, timeframe):
+        """返回指定周期K线的数据版本（每次更新加 1）"""
+        return self.timeframes[timeframe].version
@@ -0,0 +1,102 @@
+import json
+import sys
+import threading
+import time
+from stock.data.config import TRACE_CONFIG
+
+"""
+结构化运行日志：分级输出事件，关闭时几乎没有开销
+
+- trace(level, event, message, **fields)：低于当前级别时在入口直接返回
+- 构造消息本身开销较大的热路径先用 tracing(level) 判断，关闭时连消息都不构造
+- text 格式只输出 message（与原来的 print 输出一致）；json 格式每个事件输出一行 JSON：
+  {"ts": 时间戳, "level": 级别, "event": 事件名, "message": 文字, 其他字段...}
+"""
+
+DEBUG = 10
+INFO = 20
+WARNING = 30
+ERROR = 40
+OFF = 100
+
+LEVELS = {"debug": DEBUG, "info": INFO, "warning": WARNING, "error": ERROR, "off": OFF}
+LEVEL_NAMES = {value: name for name, value in LEVELS.items()}
+
+# 当前输出级别、格式和输出位置（由 configure 修改）
+_threshold = LEVELS[TRACE_CONFIG.get("LEVEL", "warning")]
+_format = TRACE_CONFIG.get("FORMAT", "text")
+_output = TRACE_CONFIG.get("OUTPUT", "stdout")
+_file = None
+_lock = threading.Lock()
+
+
+def _level_value(level):
+    return LEVELS[level] if isinstance(level, str) else int(level)
+
+
+def configure(level=None, fmt=None, output=None):
+    """
+    修改输出级别、格式或输出位置（未传入的参数保持不变）
+
+    :param level: debug / info / warning / error / off，或对应的整数级别
+    :param fmt: text / json
+    :param output: stdout / stderr / 文件路径
+    """
+    global _threshold, _format, _output, _file
+    with _lock:
+        if level is not None:
+            _threshold = _level_value(level)
+        if fmt is not None:
+            if fmt not in ("text", "json"):
+                raise ValueError(f"不支持的输出格式: {fmt}")
+            _format = fmt
+        if output is not None and output != _output:
+            if _file is not None:
+                _file.close()
+                _file = None
+            _output = output
+
+
+def settings():
+    """当前的 (级别, 格式, 输出位置)，可原样传给 configure（如在子进程中恢复主进程的设置）"""
+    return _threshold, _format, _output
+
+
+def tracing(level):
+    """当前级别下 level 级别的事件是否会输出"""
+    return level >= _threshold
+
+
+def _stream():
+    global _file
+    if _output == "stdout":
+        return sys.stdout
+    if _output == "stderr":
+        return sys.stderr
+    if _file is None:
+        _file = open(_output, "a", encoding="utf-8")
+    return _file
+
+
+def trace(level, event, message="", **fields):
+    """
+    输出一个事件
+
+    :param level: DEBUG / INFO / WARNING / ERROR
+    :param event: 事件名，如 'analyze.start'、'score.indicator'
+    :param message: 文字说明（text 格式下输出的内容）
+    :param fields: 结构化字段（json 格式下一并输出）
+    """
+    if level < _threshold:
+        return
+    if _format == "json":
+        record = {"ts": time.time(), "level": LEVEL_NAMES.get(level, level), "event": event, "message": message}
+        record.update(fields)
+        line = json.dumps(record, ensure_ascii=False, default=str)
+    else:
+        line = message
+    with _lock:
+        stream = _stream()
+        stream.write(line + "\n")
+        if stream is not sys.stdout:
+            stream.flush()
@@ -1,6 +1,8 @@
 import pandas as pd
 import numpy as np
 from stock.data.config import ADX_CONFIG  # 从配置文件导入参数
+from stock.indicator.kernels import wilder_sum_smoothing
+from stock.indicator.signals import BUY, HOLD, Suggestion, select_signals
 
 def calculate_dm(high, low):
     """计算正向/负向趋向变动（+DM / -DM）"""
@@ -13,12 +15,8 @@ def calculate_dm(high, low):
     return pd.Series(plus_dm, index=high.index), pd.Series(minus_dm, index=high.index)
 
 def wilder_smoothing(series, period):
-    """Wilder's 平滑法，用于 TR / DM 平滑"""
-    result = series.copy()
-    result.iloc[:period] = series.iloc[:period].sum()
-    for i in range(period, len(series)):
-        result.iloc[i] = result.iloc[i - 1] - (result.iloc[i - 1] / period) + series.iloc[i]
-    return result
+    """Wilder's 平滑法，用于 TR / DM 平滑（递推由 kernels 后端执行）"""
+    return pd.Series(wilder_sum_smoothing(series.to_numpy(dtype=np.float64), period), index=series.index)
 
 def calculate_adx_safe(stock_data, epsilon=1e-10):
     """
@@ -65,59 +63,49 @@ def generate_adx_operation_suggestion(adx_data):
     根据 ADX 指标生成操作建议
     """
     latest_adx = adx_data.iloc[-1]
-    suggestion_text = f"ADX - 当前 ADX 指数为 {latest_adx:.2f}，"
 
     if latest_adx < ADX_CONFIG['WEAK_TREND_THRESHOLD']:
-        suggestion_text += (
-            "\n\n市场缺乏明显趋势，可能处于横盘或震荡整理阶段。\n"
-            "📌 建议：\n"
-            "  - 趋势较弱，避免盲目操作，宜【观望】。\n"
-            "  - 等待进一步信号确认。"
-        )
         suggestion_level = "观望"
         detailed_suggestion = (
             "当前ADX值低于弱趋势阈值，市场缺乏明显的方向性，可能处于横盘震荡阶段。"
             "不建议进行激进操作，应等待市场信号确认，避免在不明朗的市场环境中亏损。"
         )
     elif ADX_CONFIG['WEAK_TREND_THRESHOLD'] <= latest_adx < ADX_CONFIG['MEDIUM_TREND_THRESHOLD']:
-        suggestion_text += (
-            "\n\n趋势初步形成，但仍较弱。\n"
-            "📌 建议：\n"
-            "  - 保持【观望】或轻仓试探，确认趋势方向再操作。"
-        )
         suggestion_level = "观望"
         detailed_suggestion = (
             "ADX值在弱趋势与中趋势之间，市场的趋势虽然有所初步形成，但还较为弱势。"
             "此时应保持观望，或者轻仓试探，待趋势方向进一步确认后再决定操作。"
         )
     elif ADX_CONFIG['MEDIUM_TREND_THRESHOLD'] <= latest_adx < ADX_CONFIG['STRONG_TREND_THRESHOLD']:
-        suggestion_text += (
-            "\n\n市场呈现明显趋势，方向明确。\n"
-            "📌 建议：\n"
-            "  - 顺势操作，适时【买入】或加仓。\n"
-            "  - 同时注意短期调整风险。"
-        )
         suggestion_level = "买入"
         detailed_suggestion = (
             "ADX值显示市场趋势较为明显，建议顺势操作，考虑【买入】或加仓。"
             "但需要注意短期内可能会出现调整，建议设置止损防范风险。"
         )
     else:
-        suggestion_text += (
-            "\n\n市场处于强烈单边趋势中，动能旺盛。\n"
-            "📌 建议：\n"
-            "  - 积极顺势操作，可【买入】或【持有】。\n"
-            "  - 建议设置止盈止损，防范突发回调风险。"
-        )
         suggestion_level = "买入"
         detailed_suggestion = (
             "ADX值超过强趋势阈值，表明市场处于强烈的单边趋势中，动能旺盛。"
             "此时可以积极顺势操作，考虑【买入】或【持有】。但是要设置止盈止损，防止市场回调。"
         )
 
+    # 返回建议和详细建议（详细建议为常量文本，无需格式化）
+    return Suggestion(suggestion_level, detailed_suggestion)
+
+
+
+def generate_adx_signal_series(adx_data):
+    """
+    一次向量化计算每根K线的 ADX 信号，阈值与 generate_adx_operation_suggestion 一致
+
+    参数:
+    adx_data (pd.Series): ADX 指标序列
+
+    返回:
+    np.ndarray: int8 信号数组（1 买入 / 0 观望），与 adx_data 等长
+    """
+    adx = np.asarray(adx_data, dtype=float)
 
-    # 返回建议和详细建议
-    return {
-        "suggestion": suggestion_level,
-        "detailed_suggestion": detailed_suggestion
-    }
+    # 低于中等趋势阈值 → 观望，其余（中等及强趋势）→ 买入
+    no_clear_trend = adx < ADX_CONFIG['MEDIUM_TREND_THRESHOLD']
+    return select_signals([no_clear_trend, ~no_clear_trend], [HOLD, BUY])
@@ -1,14 +1,12 @@
 import pandas as pd
 import numpy as np
 from stock.data.config import ATR_CONFIG  # 从配置文件导入参数
+from stock.indicator.kernels import wilder_mean_smoothing
+from stock.indicator.signals import BUY, HOLD, Suggestion, select_signals
 
 def wilder_smoothing(series, period):
-    """Wilder’s Smoothing，用于更准确的 ATR"""
-    result = series.copy()
-    result.iloc[:period] = series.iloc[:period].mean()
-    for i in range(period, len(series)):
-        result.iloc[i] = (result.iloc[i - 1] * (period - 1) + series.iloc[i]) / period
-    return result
+    """Wilder’s Smoothing，用于更准确的 ATR（递推由 kernels 后端执行）"""
+    return pd.Series(wilder_mean_smoothing(series.to_numpy(dtype=np.float64), period), index=series.index)
 
 def calculate_atr(stock_data):
     """
@@ -43,56 +41,54 @@ def generate_atr_operation_suggestion(atr_data):
     atr_data (pd.Series): ATR 指标序列
 
     返回:
-    dict: 包含操作建议及详细建议的字典
+    Suggestion: 包含操作建议及详细建议的只读映射
     """
     recent_window = ATR_CONFIG["RECENT_WINDOW"]
 
     latest_atr = atr_data.iloc[-1]
-    recent_mean_atr = atr_data.rolling(window=recent_window).mean().iloc[-1]
+    # 只需要最后一个窗口的均值，无需对整段序列做 rolling
+    recent_mean_atr = atr_data.iloc[-recent_window:].mean(skipna=False) if len(atr_data) >= recent_window else np.nan
     atr_ratio = (latest_atr / recent_mean_atr) if recent_mean_atr != 0 else 1
 
-    suggestion_text = f"ATR - 当前 ATR 值为 {latest_atr:.2f}，过去 {recent_window} 日均值为 {recent_mean_atr:.2f}，波动比率为 {atr_ratio:.2f}。"
-
     if atr_ratio > 1.2:
-        suggestion_text += (
-            "\n\n📈 市场波动显著增加，可能出现大幅振荡或行情转折。\n"
-            "📌 建议：\n"
-            "  - 谨慎操作，避免追涨杀跌。\n"
-            "  - 可考虑收紧止损保护，降低仓位波动风险。"
-        )
         suggestion_level = "观望"
         detailed_suggestion = (
             "当前ATR值较高，表明市场波动性较大。建议谨慎操作，避免在波动剧烈的市场中盲目追涨杀跌。"
             "建议收紧止损保护，适时调整仓位，降低潜在的波动风险。"
         )
     elif atr_ratio < 0.8:
-        suggestion_text += (
-            "\n\n📉 市场波动较小，行情较为稳定。\n"
-            "📌 建议：\n"
-            "  - 适合短线操作或趋势跟踪策略。\n"
-            "  - 可适度加仓或关注突破机会。"
-        )
         suggestion_level = "买入"
         detailed_suggestion = (
             "当前ATR值较低，表明市场波动性较小，行情较为平稳。适合短线操作或趋势跟踪策略，"
             "可以适度加仓或关注可能的突破机会。"
         )
     else:
-        suggestion_text += (
-            "\n\n⚖ 当前波动性稳定，尚无明显变化趋势。\n"
-            "📌 建议：\n"
-            "  - 持续观察，维持当前策略。\n"
-            "  - 配合其他指标（如ADX/RSI）确认入场时机。"
-        )
         suggestion_level = "观望"
         detailed_suggestion = (
             "当前市场波动性较为稳定，没有出现显著的波动趋势。建议持续观察市场动向，"
             "同时结合其他指标（如ADX、RSI）确认合适的入场时机。"
         )
 
-    # 返回包含建议和详细建议的字典
-    return {
-        "suggestion": suggestion_level,
-        "detailed_suggestion": detailed_suggestion
-    }
+    # 返回包含建议和详细建议的只读映射
+    return Suggestion(suggestion_level, detailed_suggestion)
+
+
+
+def generate_atr_signal_series(atr_data):
+    """
+    一次向量化计算每根K线的 ATR 信号，阈值与 generate_atr_operation_suggestion 一致
+
+    参数:
+    atr_data (pd.Series): ATR 指标序列
+
+    返回:
+    np.ndarray: int8 信号数组（1 买入 / 0 观望），与 atr_data 等长
+    """
+    recent_window = ATR_CONFIG["RECENT_WINDOW"]
+
+    atr = pd.Series(atr_data, dtype=float)
+    recent_mean_atr = atr.rolling(window=recent_window).mean()
+    atr_ratio = (atr / recent_mean_atr).where(recent_mean_atr != 0, 1).to_numpy()
 
+    # 波动放大 → 观望；波动收敛 → 买入；其余 → 观望
+    return select_signals([atr_ratio > 1.2, atr_ratio < 0.8], [HOLD, BUY])
@@ -1,6 +1,7 @@
 import pandas as pd
 import matplotlib.pyplot as plt
 from stock.data.config import BOLLINGER_CONFIG  # 配置中应包含 WINDOW 和 NUM_STD
+from stock.indicator.signals import BUY, SELL, Suggestion, select_signals
 
 
 def calculate_bollinger_bands(data: pd.DataFrame) -> pd.DataFrame:
@@ -33,7 +34,7 @@ def generate_bollinger_signals(data: pd.DataFrame) -> pd.DataFrame:
     )
 
 
-def generate_bollinger_operations(df: pd.DataFrame) -> dict:
+def generate_bollinger_operations(df: pd.DataFrame) -> Suggestion:
     """
     基于最新布林带状态生成操作建议
 
@@ -41,48 +42,49 @@ def generate_bollinger_operations(df: pd.DataFrame) -> dict:
     df (pd.DataFrame): 包含布林带指标的股票数据
 
     返回:
-    dict: 包含操作建议及详细建议的字典
+    Suggestion: 包含操作建议及详细建议的只读映射
     """
     latest = df.iloc[-1]
 
-    suggestion_text = f"布林带指标：当前收盘价为 {latest['close']:.2f}，下轨 {latest['Lower_Band']:.2f}，上轨 {latest['Upper_Band']:.2f}。\n"
-
     if latest["Buy_Signal"]:
-        suggestion_text += (
-            "\n价格刚刚跌破下轨，可能出现超卖反弹。\n"
-            "📌 建议：关注反弹确认信号，适当低吸试探建仓，可设置小止损保护。"
-        )
         suggestion_level = "买入"
         detailed_suggestion = (
             "当前价格刚刚跌破布林带下轨，市场可能处于超卖状态，存在反弹机会。建议观察反弹信号，"
             "适量低吸试探建仓，并设置小止损来规避市场波动风险。"
         )
     elif latest["Sell_Signal"]:
-        suggestion_text += (
-            "\n价格刚刚突破上轨，可能为短期超买。\n"
-            "📌 建议：关注回调信号或滞涨迹象，可逢高减仓或落袋为安。"
-        )
         suggestion_level = "卖出"
         detailed_suggestion = (
             "当前价格突破布林带上轨，市场可能处于超买状态，存在回调风险。建议密切关注回调信号，"
             "或在滞涨迹象出现时逢高减仓或止盈。"
         )
     else:
-        suggestion_text += (
-            "\n价格位于布林带中轨之间，市场波动有限，方向尚不明确。\n"
-            "📌 建议：继续观望，待价格突破上下轨或配合其他指标判断。"
-        )
         suggestion_level = "观望"
         detailed_suggestion = (
             "当前价格位于布林带中轨之间，市场波动较小，方向尚不明确。建议保持观望，"
             "待价格突破布林带上下轨时再作进一步决策，或者结合其他指标来确认入场时机。"
         )
 
-    # 返回包含建议和详细建议的字典
-    return {
-        "suggestion": suggestion_level,
-        "detailed_suggestion": detailed_suggestion
-    }
+    # 返回包含建议和详细建议的只读映射
+    return Suggestion(suggestion_level, detailed_suggestion)
+
+
+
+
+def generate_bollinger_signal_series(df: pd.DataFrame):
+    """
+    一次向量化计算每根K线的布林带信号，判断逻辑与 generate_bollinger_operations 一致
+
+    参数:
+    df (pd.DataFrame): 经 generate_bollinger_signals 处理、含 Buy_Signal / Sell_Signal 列的数据
+
+    返回:
+    np.ndarray: int8 信号数组（1 买入 / -1 卖出 / 0 观望），与 df 等长
+    """
+    return select_signals(
+        [df["Buy_Signal"].to_numpy(dtype=bool), df["Sell_Signal"].to_numpy(dtype=bool)],
+        [BUY, SELL]
+    )
 
 
 
@@ -1,6 +1,7 @@
 import pandas as pd
 import matplotlib.pyplot as plt
 from stock.data.config import KELTNER_CONFIG  # 从配置文件导入参数
+from stock.indicator.signals import BUY, SELL, Suggestion, select_signals
 
 
 def calculate_keltner_channel(stock_data):
@@ -40,7 +41,7 @@ def generate_keltner_channel_operation_suggestion(kc_df):
     kc_df (pd.DataFrame): 包含收盘价与 KC 三线的 DataFrame
 
     返回:
-    dict: 包含操作建议及详细建议的字典
+    Suggestion: 包含操作建议及详细建议的只读映射
     """
     latest_row = kc_df.iloc[-1]
 
@@ -48,46 +49,46 @@ def generate_keltner_channel_operation_suggestion(kc_df):
     upper = latest_row["Upper_Band"]
     lower = latest_row["Lower_Band"]
 
-    suggestion_text = f"Keltner Channel - 当前收盘价: {close:.2f}, 上轨: {upper:.2f}, 下轨: {lower:.2f}，"
-
     if close > upper:
-        suggestion_text += (
-            "\n\n收盘价突破上轨，可能存在超买，📌 建议：\n"
-            "  - 【卖出】或【减仓】，注意利润保护\n"
-            "  - 设置止损防止回调风险"
-        )
         suggestion_level = "卖出"
         detailed_suggestion = (
             "当前收盘价突破上轨，表明市场可能处于超买状态。建议适时卖出或减仓，"
             "同时注意止盈并设置止损以防市场回调。"
         )
     elif close < lower:
-        suggestion_text += (
-            "\n\n收盘价跌破下轨，可能存在超卖，📌 建议：\n"
-            "  - 【买入】或【加仓】，但注意确认反弹\n"
-            "  - 设置止损防趋势下行"
-        )
         suggestion_level = "买入"
         detailed_suggestion = (
             "当前收盘价突破下轨，表明市场可能处于超卖状态。建议考虑买入或加仓，"
             "但务必确认反弹信号，设置止损以防趋势进一步下行。"
         )
     else:
-        suggestion_text += (
-            "\n\n收盘价位于通道中轨之间，趋势不明朗，📌 建议：\n"
-            "  - 【观望】，等待方向突破或结合其他指标"
-        )
         suggestion_level = "观望"
         detailed_suggestion = (
             "当前市场处于横盘整理状态，收盘价位于中轨附近，趋势不明朗。"
             "建议观望，等待价格突破通道的上下轨或结合其他指标进行操作。"
         )
 
-    # 返回包含建议和详细建议的字典
-    return {
-        "suggestion": suggestion_level,
-        "detailed_suggestion": detailed_suggestion
-    }
+    # 返回包含建议和详细建议的只读映射
+    return Suggestion(suggestion_level, detailed_suggestion)
+
+
+
+
+def generate_keltner_channel_signal_series(kc_df):
+    """
+    一次向量化计算每根K线的 Keltner Channel 信号，判断逻辑与 generate_keltner_channel_operation_suggestion 一致
+
+    参数:
+    kc_df (pd.DataFrame): 包含收盘价与 KC 三线的 DataFrame
+
+    返回:
+    np.ndarray: int8 信号数组（1 买入 / -1 卖出 / 0 观望），与 kc_df 等长
+    """
+    close = kc_df["close"].to_numpy(dtype=float)
+    upper = kc_df["Upper_Band"].to_numpy(dtype=float)
+    lower = kc_df["Lower_Band"].to_numpy(dtype=float)
+
+    return select_signals([close > upper, close < lower], [SELL, BUY])
 
 
 
@@ -0,0 +1,418 @@
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+from stock.data.config import KERNEL_CONFIG  # 从配置文件导入加速后端配置
+
+try:
+    import numba  # 可选依赖：安装后递推核函数由 numba JIT 编译
+except ImportError:
+    numba = None
+
+"""
+递推类指标的计算核函数（Wilder 平滑、EWM、OBV 累加、滚动极值/均值、滚动线性回归）
+
+这些计算本质上是逐元素的递推，pandas 的 .iloc 循环非常慢。这里提供三种可在运行时切换的后端：
+  - numba：用 numba.njit 编译逐元素循环（需安装 numba）
+  - numpy：纯 NumPy 实现，递推按块展开为 cumsum，不依赖 numba
+  - python：与 numba 相同的逐元素循环，不编译，作为等价性校验的参考实现
+
+所有核函数输入输出均为 float64 的 np.ndarray。
+"""
+
+BACKENDS = ("numba", "numpy", "python")
+
+_backend = None
+
+
+# ================================
+# 逐元素循环（python 后端直接执行，numba 后端编译执行）
+# ================================
+
+def _wilder_sum_loop(x, period, seed):
+    out = np.empty(x.shape[0])
+    out[:period] = seed
+    for i in range(period, x.shape[0]):
+        out[i] = out[i - 1] - (out[i - 1] / period) + x[i]
+    return out
+
+
+def _wilder_mean_loop(x, period, seed):
+    out = np.empty(x.shape[0])
+    out[:period] = seed
+    for i in range(period, x.shape[0]):
+        out[i] = (out[i - 1] * (period - 1) + x[i]) / period
+    return out
+
+
+def _ewm_loop(x, alpha):
+    # 与 pandas ewm(alpha=..., adjust=False, ignore_na=False).mean() 逐步一致
+    out = np.empty(x.shape[0])
+    if x.shape[0] == 0:
+        return out
+    old_wt_factor = 1.0 - alpha
+    weighted = x[0]
+    observed = weighted == weighted
+    out[0] = weighted if observed else np.nan
+    old_wt = 1.0
+    for i in range(1, x.shape[0]):
+        cur = x[i]
+        is_observation = cur == cur
+        observed = observed or is_observation
+        if weighted == weighted:
+            old_wt *= old_wt_factor
+            if is_observation:
+                if weighted != cur:
+                    weighted = (old_wt * weighted + alpha * cur) / (old_wt + alpha)
+                old_wt = 1.0
+        elif is_observation:
+            weighted = cur
+        out[i] = weighted if observed else np.nan
+    return out
+
+
+def _obv_loop(close, volume, initial_value):
+    out = np.empty(close.shape[0])
+    total = 0.0
+    for i in range(close.shape[0]):
+        if i > 0:
+            delta = close[i] - close[i - 1]
+            if delta > 0:
+                total += volume[i]
+            elif delta < 0:
+                total -= volume[i]
+        out[i] = total + initial_value
+    return out
+
+
+def _rolling_extreme_loop(x, window, find_max):
+    # 单调队列：每个元素最多入队出队一次，O(n)；窗口内存在 NaN 时结果为 NaN（与 pandas 一致）
+    n = x.shape[0]
+    out = np.full(n, np.nan)
+    queue = np.empty(n, dtype=np.int64)
+    head = 0
+    tail = 0
+    nan_count = 0
+    for i in range(n):
+        value = x[i]
+        if value != value:
+            nan_count += 1
+        else:
+            while tail > head and ((x[queue[tail - 1]] <= value) if find_max else (x[queue[tail - 1]] >= value)):
+                tail -= 1
+            queue[tail] = i
+            tail += 1
+        if i >= window:
+            dropped = x[i - window]
+            if dropped != dropped:
+                nan_count -= 1
+        while tail > head and queue[head] <= i - window:
+            head += 1
+        if i >= window - 1 and nan_count == 0:
+            out[i] = x[queue[head]]
+    return out
+
+
+def _rolling_mean_loop(x, window):
+    n = x.shape[0]
+    out = np.full(n, np.nan)
+    total = 0.0
+    nan_count = 0
+    for i in range(n):
+        value = x[i]
+        if value != value:
+            nan_count += 1
+        else:
+            total += value
+        if i >= window:
+            dropped = x[i - window]
+            if dropped != dropped:
+                nan_count -= 1
+            else:
+                total -= dropped
+        if i >= window - 1 and nan_count == 0:
+            out[i] = total / window
+    return out
+
+
+_LOOPS = {
+    "wilder_sum": _wilder_sum_loop,
+    "wilder_mean": _wilder_mean_loop,
+    "ewm": _ewm_loop,
+    "obv": _obv_loop,
+    "rolling_extreme": _rolling_extreme_loop,
+    "rolling_mean": _rolling_mean_loop,
+}
+
+_compiled_loops = {}
+
+
+def _loop(name):
+    """按当前后端取得逐元素循环：numba 后端首次调用时编译并缓存"""
+    if get_kernel_backend() != "numba":
+        return _LOOPS[name]
+    if name not in _compiled_loops:
+        _compiled_loops[name] = numba.njit(cache=True, nogil=True)(_LOOPS[name])
+    return _compiled_loops[name]
+
+
+# ================================
+# 纯 NumPy 实现
+# ================================
+
+def _linear_recurrence_numpy(x, start, seed, decay, scale):
+    """
+    按块求解 y[i] = decay * y[i-1] + scale * x[i]（i >= start，y[start-1] = seed）
+
+    块内展开为 y[s+j] = decay^(j+1) * (y[s-1] + Σ scale*x[s+k] / decay^(k+1))，用 cumsum 一次算完；
+    块长按 decay 自动选择，使 1/decay^块长 不超过 1e3，保证展开后的数值误差在 1e-12 量级。
+    """
+    out = np.empty(x.shape[0])
+    out[:start] = seed
+    if start >= x.shape[0]:
+        return out
+
+    block = max(1, int(np.log(1e3) / -np.log(decay))) if 0 < decay < 1 else 1
+    steps = np.arange(1, block + 1)
+    growth = decay ** steps
+    shrink = 1.0 / growth
+
+    previous = seed
+    for begin in range(start, x.shape[0], block):
+        chunk = scale * x[begin:begin + block]
+        size = chunk.shape[0]
+        out[begin:begin + size] = growth[:size] * (previous + np.cumsum(chunk * shrink[:size]))
+        previous = out[begin + size - 1]
+    return out
+
+
+def _ewm_numpy(x, alpha):
+    valid = ~np.isnan(x)
+    if not valid.any():
+        return np.full(x.shape[0], np.nan)
+    first = int(np.argmax(valid))
+    if not valid[first:].all():
+        # 中间存在缺失值时权重会随缺口变化，交由逐元素循环处理以保持与 pandas 一致
+        return _ewm_loop(x, alpha)
+    out = np.full(x.shape[0], np.nan)
+    out[first:] = _linear_recurrence_numpy(x[first:], 1, x[first], 1.0 - alpha, alpha)
+    return out
+
+
+def _rolling_extreme_numpy(x, window, find_max):
+    out = np.full(x.shape[0], np.nan)
+    if x.shape[0] >= window:
+        windows = sliding_window_view(x, window)
+        out[window - 1:] = windows.max(axis=1) if find_max else windows.min(axis=1)
+    return out
+
+
+def _rolling_mean_numpy(x, window):
+    out = np.full(x.shape[0], np.nan)
+    if x.shape[0] >= window:
+        is_nan = np.isnan(x)
+        sums = np.concatenate(([0.0], np.cumsum(np.where(is_nan, 0.0, x))))
+        nans = np.concatenate(([0], np.cumsum(is_nan)))
+        window_sum = sums[window:] - sums[:-window]
+        window_nan = nans[window:] - nans[:-window]
+        out[window - 1:] = np.where(window_nan == 0, window_sum / window, np.nan)
+    return out
+
+
+# ================================
+# 后端选择
+# ================================
+
+def available_backends():
+    """返回当前环境可用的后端"""
+    return tuple(name for name in BACKENDS if name != "numba" or numba is not None)
+
+
+def set_kernel_backend(name="auto"):
+    """
+    运行时切换核函数后端
+
+    :param name: numba / numpy / python / auto（有 numba 用 numba，否则用 numpy）
+    :return: 实际使用的后端名称
+    """
+    global _backend
+    if name == "auto":
+        name = "numba" if numba is not None else "numpy"
+    if name not in BACKENDS:
+        raise ValueError(f"不支持的核函数后端: {name}，可选 {BACKENDS} 或 auto")
+    if name == "numba" and numba is None:
+        raise ValueError("未安装 numba，无法使用 numba 后端")
+    _backend = name
+    return _backend
+
+
+def get_kernel_backend():
+    """返回当前后端，首次调用时按 KERNEL_CONFIG["BACKEND"] 初始化"""
+    if _backend is None:
+        set_kernel_backend(KERNEL_CONFIG.get("BACKEND", "auto"))
+    return _backend
+
+
+# ================================
+# 对外核函数
+# ================================
+
+def _as_float_array(values):
+    return np.ascontiguousarray(values, dtype=np.float64)
+
+
+def _as_window_array(values):
+    # 与 pandas rolling 一致：±inf 视同缺失值
+    x = _as_float_array(values)
+    return np.where(np.isfinite(x), x, np.nan)
+
+
+def wilder_sum_smoothing(values, period):
+    """
+    Wilder 累加平滑（ADX 使用）：前 period 个值为前 period 项之和，之后 y = y - y/period + x
+
+    :param values: 输入序列（array-like）
+    :param period: 平滑周期
+    :return: np.ndarray
+    """
+    x = _as_float_array(values)
+    seed = np.nansum(x[:period])
+    if get_kernel_backend() == "numpy":
+        return _linear_recurrence_numpy(x, min(period, x.shape[0]), seed, 1.0 - 1.0 / period, 1.0)
+    return _loop("wilder_sum")(x, period, seed)
+
+
+def wilder_mean_smoothing(values, period):
+    """
+    Wilder 均值平滑（ATR 使用）：前 period 个值为前 period 项均值，之后 y = (y*(period-1) + x) / period
+
+    :param values: 输入序列（array-like）
+    :param period: 平滑周期
+    :return: np.ndarray
+    """
+    x = _as_float_array(values)
+    head = x[:period]
+    seed = head[~np.isnan(head)].mean() if (~np.isnan(head)).any() else np.nan
+    if get_kernel_backend() == "numpy":
+        return _linear_recurrence_numpy(x, min(period, x.shape[0]), seed, (period - 1) / period, 1.0 / period)
+    return _loop("wilder_mean")(x, period, seed)
+
+
+def ewm_mean(values, span):
+    """
+    指数加权均值，等价于 pandas ewm(span=span, adjust=False).mean()
+
+    :param values: 输入序列（array-like）
+    :param span: EWM 跨度
+    :return: np.ndarray
+    """
+    x = _as_float_array(values)
+    alpha = 2.0 / (span + 1.0)
+    if get_kernel_backend() == "numpy":
+        return _ewm_numpy(x, alpha)
+    return _loop("ewm")(x, alpha)
+
+
+def obv_accumulate(close, volume, initial_value=0.0):
+    """
+    OBV 累加：上涨加量，下跌减量，持平不变
+
+    :param close: 收盘价序列（不含缺失值）
+    :param volume: 成交量序列（不含缺失值）
+    :param initial_value: OBV 初始值
+    :return: np.ndarray
+    """
+    close = _as_float_array(close)
+    volume = _as_float_array(volume)
+    if get_kernel_backend() == "numpy":
+        delta = np.diff(close, prepend=np.nan)
+        change = np.where(delta > 0, volume, np.where(delta < 0, -volume, 0.0))
+        return np.cumsum(change) + initial_value
+    return _loop("obv")(close, volume, float(initial_value))
+
+
+def rolling_max(values, window):
+    """滚动最大值，等价于 pandas rolling(window).max()"""
+    x = _as_window_array(values)
+    if get_kernel_backend() == "numpy":
+        return _rolling_extreme_numpy(x, window, True)
+    return _loop("rolling_extreme")(x, window, True)
+
+
+def rolling_min(values, window):
+    """滚动最小值，等价于 pandas rolling(window).min()"""
+    x = _as_window_array(values)
+    if get_kernel_backend() == "numpy":
+        return _rolling_extreme_numpy(x, window, False)
+    return _loop("rolling_extreme")(x, window, False)
+
+
+def rolling_mean(values, window):
+    """滚动均值，等价于 pandas rolling(window).mean()"""
+    x = _as_window_array(values)
+    if get_kernel_backend() == "numpy":
+        return _rolling_mean_numpy(x, window)
+    return _loop("rolling_mean")(x, window)
+
+
+def _linregress_windows(y, window):
+    """对 y 中每个完整窗口做闭式线性回归，返回 (slope, r2)，长度为 len(y) - window + 1"""
+    n = y.shape[0]
+    is_nan = np.isnan(y)
+    if (~is_nan).any():
+        y = y - y[~is_nan].mean()
+    y = np.where(is_nan, 0.0, y)
+    k = np.arange(n, dtype=np.float64)
+
+    def window_sums(x):
+        total = np.concatenate(([0.0], np.cumsum(x)))
+        return total[window:] - total[:-window]
+
+    sum_y = window_sums(y)
+    sum_ky = window_sums(k * y)
+    sum_yy = window_sums(y * y)
+    nan_count = window_sums(is_nan.astype(np.float64))
+
+    # 窗口内自变量改写为 k - start，Σx·y = Σk·y - start·Σy
+    start = k[:n - window + 1]
+    sum_xy = sum_ky - start * sum_y
+    sum_x = window * (window - 1) / 2.0
+    sum_xx = (window - 1) * window * (2 * window - 1) / 6.0
+
+    cov = window * sum_xy - sum_x * sum_y
+    var_x = window * sum_xx - sum_x * sum_x
+    var_y = np.maximum(window * sum_yy - sum_y * sum_y, 0.0)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        slope = np.where(var_y > 0, cov / var_x, 0.0)
+        r2 = np.where(var_y > 0, np.clip(cov * cov / (var_x * var_y), 0.0, 1.0), 0.0)
+
+    valid = nan_count == 0
+    return np.where(valid, slope, np.nan), np.where(valid, r2, np.nan)
+
+
+def rolling_linregress(values, window):
+    """
+    滚动线性回归：对每个窗口内的值以 0..window-1 为自变量做最小二乘拟合，
+    返回每根K线的斜率与 R²，等价于逐窗口调用 np.polyfit(range(window), y, 1)
+
+    用 y、k·y、y² 的累计和求出所有窗口的回归统计量，总计算量 O(n)，与窗口长度无关。
+    累计和按块重新起算（块间重叠 window-1 根K线），并在块内减去均值，
+    避免长序列上累计和过大、相减时损失精度（如 OBV 这类持续漂移的序列）。
+    窗口内存在缺失值时结果为 NaN；窗口内数值全部相同时斜率为 0、R² 记为 0。
+
+    :param values: 输入序列（array-like）
+    :param window: 回归窗口长度（至少为 2）
+    :return: (slope, r2) 两个 np.ndarray，前 window-1 个值为 NaN
+    """
+    if window < 2:
+        raise ValueError(f"回归窗口长度至少为 2，当前为 {window}")
+
+    y = _as_window_array(values)
+    n = y.shape[0]
+    slope = np.full(n, np.nan)
+    r2 = np.full(n, np.nan)
+
+    block = max(256, 4 * window)
+    for end in range(window - 1, n, block):
+        stop = min(end + block, n)
+        slope[end:stop], r2[end:stop] = _linregress_windows(y[end - window + 1:stop], window)
+    return slope, r2
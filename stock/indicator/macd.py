@@ -1,6 +1,10 @@
 import pandas as pd
+import numpy as np
 import matplotlib.pyplot as plt
 from stock.data.config import MACD_CONFIG
+from stock.data.trace import DEBUG, trace
+from stock.indicator.kernels import ewm_mean
+from stock.indicator.signals import BUY, SELL, HOLD, Suggestion, select_signals
 
 
 def calculate_macd(data):
@@ -14,11 +18,11 @@ def calculate_macd(data):
     slow = MACD_CONFIG["slow_period"]
     signal = MACD_CONFIG["signal_period"]
 
-    ema_fast = data.ewm(span=fast, adjust=False).mean()
-    ema_slow = data.ewm(span=slow, adjust=False).mean()
+    ema_fast = pd.Series(ewm_mean(data, fast), index=data.index)
+    ema_slow = pd.Series(ewm_mean(data, slow), index=data.index)
 
     macd = ema_fast - ema_slow
-    signal_line = macd.ewm(span=signal, adjust=False).mean()
+    signal_line = pd.Series(ewm_mean(macd, signal), index=data.index)
     hist = macd - signal_line
 
     return macd,signal_line,hist
@@ -34,27 +38,21 @@ def generate_macd_signal(macd, signal, hist):
     hist (pd.Series): MACD 的柱状图数据 (暂时未使用，可根据需要扩展)
 
     返回:
-    dict: 包含操作建议、解释、策略和风险提示的字典
+    Suggestion: 包含操作建议、解释、策略和风险提示的只读映射
     """
     if not isinstance(macd, pd.Series): macd = pd.Series(macd)
     if not isinstance(signal, pd.Series): signal = pd.Series(signal)
 
     if len(macd) < 2 or len(signal) < 2:
-        print("MACD 或 Signal 数据不足，返回'观望'")
-        return {
-            "suggestion": "观望",
-            "detailed_suggestion": "MACD 或 Signal 数据不足，无法生成建议。"
-        }
+        trace(DEBUG, 'macd.insufficient', "MACD 或 Signal 数据不足，返回'观望'")
+        return Suggestion("观望", "MACD 或 Signal 数据不足，无法生成建议。")
 
     macd = pd.to_numeric(macd, errors='coerce')
     signal = pd.to_numeric(signal, errors='coerce')
 
     if macd.isna().any() or signal.isna().any():
-        print("MACD 或 Signal 存在 NaN 值，返回'观望'")
-        return {
-            "suggestion": "观望",
-            "detailed_suggestion": "MACD 或 Signal 存在 NaN 值，无法生成建议。"
-        }
+        trace(DEBUG, 'macd.nan', "MACD 或 Signal 存在 NaN 值，返回'观望'")
+        return Suggestion("观望", "MACD 或 Signal 存在 NaN 值，无法生成建议。")
 
     latest_macd = macd.iloc[-1]
     prev_macd = macd.iloc[-2]
@@ -109,11 +107,42 @@ def generate_macd_signal(macd, signal, hist):
             "- 注意回调信号，设置动态止盈。"
         )
 
-    # 返回包含操作建议、解释、策略和风险提示的字典
-    return {
-        "suggestion": suggestion,
-        "detailed_suggestion": f"信号解释：{explanation}\n策略建议：\n{strategy}\n风险提示：\n{risk}"
-    }
+    # 返回包含操作建议的只读映射，解释、策略和风险提示在读取详细建议时才拼接
+    return Suggestion(
+        suggestion,
+        lambda: f"信号解释：{explanation}\n策略建议：\n{strategy}\n风险提示：\n{risk}"
+    )
+
+
+
+def generate_macd_signal_series(macd, signal):
+    """
+    一次向量化计算每根K线的 MACD 信号，判断逻辑与 generate_macd_signal 一致
+
+    参数:
+    macd (pd.Series): MACD 指标数据
+    signal (pd.Series): Signal 指标数据
+
+    返回:
+    np.ndarray: int8 信号数组（1 买入 / -1 卖出 / 0 观望），与 macd 等长
+    """
+    macd = pd.to_numeric(pd.Series(macd), errors='coerce').to_numpy(dtype=float)
+    signal = pd.to_numeric(pd.Series(signal), errors='coerce').to_numpy(dtype=float)
+
+    prev_macd = np.roll(macd, 1)
+    prev_signal = np.roll(signal, 1)
+
+    # 与逐日计算一致：首根K线数据不足，截至当日出现过 NaN 的K线均视为无效
+    valid = np.cumsum(np.isnan(macd) | np.isnan(signal)) == 0
+    valid[:1] = False
+
+    buy_signal = (macd > signal) & (prev_macd <= prev_signal)
+    sell_signal = (macd < signal) & (prev_macd >= prev_signal)
+
+    return select_signals(
+        [~valid, buy_signal, sell_signal, macd < 0],
+        [HOLD, BUY, SELL, SELL]
+    )
 
 
 
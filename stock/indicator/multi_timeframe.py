@@ -0,0 +1,74 @@
+from stock.data.config import TIMEFRAME_CONFIG  # 从配置文件导入多周期配置
+from stock.data.timeframe import MultiTimeframeBars
+from stock.indicator.registry import compute_signal_series, compute_suggestions, get_indicator
+from stock.indicator.signals import Suggestion
+
+"""
+多周期指标：在 MultiTimeframeBars 维护的周线 / 月线K线上计算 RSI、MACD、布林带等指标，
+K线数量约为日线的 1/5（周线）和 1/21（月线），计算量相应减少；周期K线未变化时直接复用上次结果。
+"""
+
+
+class MultiTimeframeIndicators:
+    """
+    多周期指标计算与缓存
+
+    与 MultiTimeframeBars 配合使用：每次 update() 新的日线后调用 suggestions()，
+    只有数据版本发生变化的周期才会重新计算指标。
+    """
+
+    def __init__(self, bars=None, names=None):
+        """
+        :param bars: MultiTimeframeBars 对象，默认按 TIMEFRAME_CONFIG 新建
+        :param names: 各周期上计算的指标名称，默认读取 TIMEFRAME_CONFIG["INDICATORS"]
+        """
+        self.bars = bars if bars is not None else MultiTimeframeBars()
+        self.names = list(names if names is not None else TIMEFRAME_CONFIG["INDICATORS"])
+        self._cache = {}
+
+    def update(self, daily_data):
+        """合并新的日线数据，返回新增的交易日数量"""
+        return self.bars.update(daily_data)
+
+    def _cached(self, kind, timeframe, compute):
+        key = (kind, timeframe)
+        version = self.bars.version(timeframe)
+        if key not in self._cache or self._cache[key][0] != version:
+            self._cache[key] = (version, compute(self.bars.bars(timeframe)))
+        return self._cache[key][1]
+
+    def _split_by_warmup(self, bar_data):
+        # 周期K线数量不足预热长度的指标不计算（如 1 年日线对应的月线 MACD）
+        ready = [name for name in self.names if len(bar_data) >= get_indicator(name).warmup_bars]
+        pending = [name for name in self.names if name not in ready]
+        return ready, pending
+
+    def suggestions(self, timeframes=None):
+        """
+        计算各周期的最新指标建议
+
+        :param timeframes: 周期名称列表，默认全部周期
+        :return: {周期名称: {指标名称: Suggestion}}
+        """
+        def compute(bar_data):
+            ready, pending = self._split_by_warmup(bar_data)
+            result = compute_suggestions(bar_data, ready) if ready else {}
+            for name in pending:
+                result[name] = Suggestion("观望", lambda n=name: f"{n} - 周期K线数量不足（{len(bar_data)} 根），观望")
+            return {name: result[name] for name in self.names}
+
+        timeframes = list(self.bars.timeframes) if timeframes is None else timeframes
+        return {timeframe: self._cached('suggestions', timeframe, compute) for timeframe in timeframes}
+
+    def signal_series(self, timeframes=None):
+        """
+        计算各周期K线上的全历史 int8 信号序列（与对应周期的K线等长）
+
+        :param timeframes: 周期名称列表，默认全部周期
+        :return: {周期名称: {指标名称: np.ndarray}}
+        """
+        timeframes = list(self.bars.timeframes) if timeframes is None else timeframes
+        return {
+            timeframe: self._cached('signals', timeframe, lambda bar_data: compute_signal_series(bar_data, self.names))
+            for timeframe in timeframes
+        }
@@ -2,6 +2,8 @@ import pandas as pd
 import numpy as np
 import matplotlib.pyplot as plt
 from stock.data.config import OBV_CONFIG  # 从配置文件导入参数
+from stock.indicator.kernels import obv_accumulate, rolling_linregress
+from stock.indicator.signals import BUY, SELL, Suggestion, select_signals
 
 def calculate_obv(stock_data, initial_value=None, strict=False):
     """
@@ -36,16 +38,31 @@ def calculate_obv(stock_data, initial_value=None, strict=False):
     stock_data['close'] = stock_data['close'].ffill()
     stock_data['volume'] = stock_data['volume'].fillna(0)
 
-    # 收盘价变化（向后差）
-    delta = stock_data['close'].diff()
+    # OBV 累加：上涨加量，下跌减量，持平不变（由 kernels 后端执行）
+    obv = obv_accumulate(stock_data['close'], stock_data['volume'], initial_value)
 
-    # OBV 逻辑向量化处理：上涨加量，下跌减量，持平不变
-    obv_change = np.where(delta > 0, stock_data['volume'],
-                          np.where(delta < 0, -stock_data['volume'], 0))
+    return pd.Series(obv, index=stock_data.index)
 
-    obv = np.cumsum(obv_change) + initial_value
 
-    return pd.Series(obv, index=stock_data.index)
+def calculate_obv_slope(obv_data, window=None, with_r2=False):
+    """
+    计算 OBV 的滚动线性回归斜率（趋势强度），每根K线一次 O(n) 算出
+
+    参数:
+    obv_data (pd.Series): OBV 值序列（也可用于其他需要趋势斜率的序列）
+    window (int): 回归窗口长度（默认读取配置 obv_slope_window）
+    with_r2 (bool): 是否同时返回拟合优度 R²
+
+    返回:
+    pd.Series: 斜率序列；with_r2=True 时返回包含 'slope' 和 'r2' 两列的 pd.DataFrame
+    """
+    if window is None:
+        window = OBV_CONFIG.get("obv_slope_window", 5)
+
+    slope, r2 = rolling_linregress(obv_data, window)
+    if with_r2:
+        return pd.DataFrame({'slope': slope, 'r2': r2}, index=obv_data.index)
+    return pd.Series(slope, index=obv_data.index)
 
 
 def plot_obv(stock_data, obv_data):
@@ -82,59 +99,75 @@ def generate_obv_operation_suggestion(obv_data, stock_data):
     stock_data (pd.DataFrame): 股票数据，包含收盘价
 
     返回:
-    dict: 包含操作建议和详细建议的字典
+    Suggestion: 包含操作建议和详细建议的只读映射（详细建议在读取时才生成）
     """
-    # OBV 和收盘价的变化趋势
-    obv_trend = obv_data.diff().iloc[-1]
-    price_trend = stock_data['close'].diff().iloc[-1]
+    # OBV 和收盘价的变化趋势（只需最后两根K线）
+    obv_trend = obv_data.iloc[-1] - obv_data.iloc[-2] if len(obv_data) >= 2 else np.nan
+    price_trend = stock_data['close'].iloc[-1] - stock_data['close'].iloc[-2] if len(stock_data) >= 2 else np.nan
 
     # OBV 配置参数
     threshold_positive = OBV_CONFIG["obv_threshold_positive"]
     threshold_negative = OBV_CONFIG["obv_threshold_negative"]
 
-    # 默认操作建议
-    detailed_suggestion = "无建议，观望"
-    simple_suggestion = "观望"
+    def detail(text):
+        return lambda: f"OBV - {obv_trend:.2f}, 收盘价变化 - {price_trend:.2f}, {text}"
 
     # OBV 增加且股价也上涨
     if obv_trend > threshold_positive and price_trend > 0:
-        detailed_suggestion = (
-            f"OBV - {obv_trend:.2f}, 收盘价变化 - {price_trend:.2f}, "
+        return Suggestion("买入", detail(
             "OBV 上升且股价上涨，显示市场的多头力量强劲，继续上涨的可能性较大。\n"
             "📌 建议：市场向好，建议【买入】或持有当前仓位，顺势而为。"
-        )
-        simple_suggestion = "买入"
+        ))
 
     # OBV 增加但股价下跌
-    elif obv_trend > threshold_positive and price_trend < 0:
-        detailed_suggestion = (
-            f"OBV - {obv_trend:.2f}, 收盘价变化 - {price_trend:.2f}, "
+    if obv_trend > threshold_positive and price_trend < 0:
+        return Suggestion("买入", detail(
             "虽然 OBV 增加，但股价下跌，可能是短期回调或震荡区间的形成。\n"
             "📌 建议：注意价格回调，可能是买入机会，但建议保持谨慎。"
-        )
-        simple_suggestion = "买入"
+        ))
 
     # OBV 下降且股价上涨
-    elif obv_trend < threshold_negative and price_trend > 0:
-        detailed_suggestion = (
-            f"OBV - {obv_trend:.2f}, 收盘价变化 - {price_trend:.2f}, "
+    if obv_trend < threshold_negative and price_trend > 0:
+        return Suggestion("卖出", detail(
             "OBV 下降但股价上涨，市场的多头动能不足，可能是伪突破。\n"
             "📌 建议：市场动能减弱，建议【卖出】或保持观望，避免追高。"
-        )
-        simple_suggestion = "卖出"
+        ))
 
     # OBV 下降且股价下跌
-    elif obv_trend < threshold_negative and price_trend < 0:
-        detailed_suggestion = (
-            f"OBV - {obv_trend:.2f}, 收盘价变化 - {price_trend:.2f}, "
+    if obv_trend < threshold_negative and price_trend < 0:
+        return Suggestion("卖出", detail(
             "OBV 和股价都在下降，表明市场空头力量较强，可能出现持续下行。\n"
             "📌 建议：市场空头趋势明显，建议【卖出】或保持观望，避免持仓。"
-        )
-        simple_suggestion = "卖出"
+        ))
+
+    # 默认操作建议
+    return Suggestion("观望", "无建议，观望")
+
 
-    # 返回包含操作建议和详细建议的字典
-    return {
-        "suggestion": simple_suggestion,
-        "detailed_suggestion": detailed_suggestion
-    }
 
+def generate_obv_signal_series(obv_data, stock_data):
+    """
+    一次向量化计算每根K线的 OBV 信号，阈值与 generate_obv_operation_suggestion 一致
+
+    参数:
+    obv_data (pd.Series): OBV 值序列
+    stock_data (pd.DataFrame): 股票数据，包含收盘价
+
+    返回:
+    np.ndarray: int8 信号数组（1 买入 / -1 卖出 / 0 观望），与 obv_data 等长
+    """
+    obv_trend = obv_data.diff().to_numpy(dtype=float)
+    price_trend = stock_data['close'].diff().to_numpy(dtype=float)
+
+    threshold_positive = OBV_CONFIG["obv_threshold_positive"]
+    threshold_negative = OBV_CONFIG["obv_threshold_negative"]
+
+    return select_signals(
+        [
+            (obv_trend > threshold_positive) & (price_trend > 0),
+            (obv_trend > threshold_positive) & (price_trend < 0),
+            (obv_trend < threshold_negative) & (price_trend > 0),
+            (obv_trend < threshold_negative) & (price_trend < 0),
+        ],
+        [BUY, BUY, SELL, SELL]
+    )
@@ -0,0 +1,264 @@
+from stock.data.config import (ADX_CONFIG, ATR_CONFIG, BOLLINGER_CONFIG, KELTNER_CONFIG, MACD_CONFIG, OBV_CONFIG,
+                               RSI_CONFIG, STOCHASTIC_RSI, VWAP_CONFIG)
+from stock.indicator.adx import calculate_adx_safe, generate_adx_operation_suggestion, generate_adx_signal_series
+from stock.indicator.atr import calculate_atr, generate_atr_operation_suggestion, generate_atr_signal_series
+from stock.indicator.bollinger_bands import (calculate_bollinger_bands, generate_bollinger_operations,
+                                             generate_bollinger_signal_series, generate_bollinger_signals)
+from stock.indicator.keltner_channel import (calculate_keltner_channel, generate_keltner_channel_operation_suggestion,
+                                             generate_keltner_channel_signal_series)
+from stock.indicator.macd import calculate_macd, generate_macd_signal, generate_macd_signal_series
+from stock.indicator.obv import calculate_obv, generate_obv_operation_suggestion, generate_obv_signal_series
+from stock.indicator.rsi import calculate_rsi_for_multiple_windows, generate_operation_suggestion, generate_rsi_signal_series
+from stock.indicator.stochastic_rsi import (calculate_stochastic_rsi, generate_stochastic_rsi_operation_suggestion,
+                                            generate_stochastic_rsi_signal_series)
+from stock.indicator.vwap import calculate_vwap, generate_vwap_operation_suggestion, generate_vwap_signal_series
+
+"""
+指标注册表：每个指标声明所需的数据列、参数配置、预热长度和输出结构，
+策略引擎按权重和策略规则实际引用到的指标按需计算，新增指标只需 register_indicator 一次。
+"""
+
+
+class IndicatorSpec:
+    """
+    单个指标的声明
+
+    - name: 指标名称（与权重表、策略规则中的键一致）
+    - inputs: 计算所需的数据列
+    - params: 参数配置（config.py 中的配置字典）
+    - warmup: 返回预热长度（K线数）的函数，按当前配置计算，配置修改后自动生效
+    - outputs: 原始值的输出结构说明
+    - compute(stock_data) -> raw: 计算原始指标值
+    - suggest(raw, stock_data) -> Suggestion: 基于最新K线生成操作建议
+    - signals(raw, stock_data) -> np.ndarray: 全历史 int8 信号序列
+    """
+
+    __slots__ = ("name", "inputs", "params", "warmup", "outputs", "compute", "suggest", "signals")
+
+    def __init__(self, name, inputs, params, warmup, outputs, compute, suggest, signals):
+        self.name = name
+        self.inputs = tuple(inputs)
+        self.params = params
+        self.warmup = warmup
+        self.outputs = outputs
+        self.compute = compute
+        self.suggest = suggest
+        self.signals = signals
+
+    @property
+    def warmup_bars(self):
+        """当前配置下的预热长度"""
+        return int(self.warmup())
+
+    def __repr__(self):
+        return f"IndicatorSpec({self.name!r}, inputs={self.inputs}, warmup={self.warmup_bars})"
+
+
+# 注册表（保持注册顺序）
+INDICATORS = {}
+
+
+def register_indicator(spec):
+    """注册指标，同名指标会被覆盖；返回 spec 便于链式使用"""
+    INDICATORS[spec.name] = spec
+    return spec
+
+
+def get_indicator(name):
+    """按名称获取指标声明"""
+    if name not in INDICATORS:
+        raise KeyError(f"未注册的指标: {name}")
+    return INDICATORS[name]
+
+
+def indicator_names():
+    """返回全部已注册指标名称（按注册顺序）"""
+    return list(INDICATORS)
+
+
+def _weight_is_active(weight):
+    # 兼容两种权重表：{'rsi': 0.15} 与 {'rsi': {'买入': 0.05, '卖出': 0.05, '观望': 0.025}}
+    if isinstance(weight, dict):
+        return any(value != 0 for value in weight.values())
+    return weight != 0
+
+
+def active_indicators(weights=None, rule_indicators=()):
+    """
+    计算权重非零或被策略规则引用的指标名称（按注册顺序）
+
+    参数:
+    weights (dict): 指标权重表，None 表示不按权重筛选（全部参与）
+    rule_indicators (iterable): 策略规则引用的指标名称（可为嵌套的名称组）
+
+    返回:
+    list: 需要计算的指标名称
+    """
+    if weights is None:
+        return indicator_names()
+
+    needed = {name for name, weight in weights.items() if _weight_is_active(weight)}
+    for item in rule_indicators:
+        if isinstance(item, str):
+            needed.add(item)
+        else:
+            needed.update(item)
+    return [name for name in INDICATORS if name in needed]
+
+
+def required_columns(names):
+    """给定指标所需数据列的并集"""
+    columns = []
+    for name in names:
+        for column in get_indicator(name).inputs:
+            if column not in columns:
+                columns.append(column)
+    return columns
+
+
+def max_warmup(names=None):
+    """给定指标（默认全部）中最长的预热长度"""
+    names = indicator_names() if names is None else names
+    return max((get_indicator(name).warmup_bars for name in names), default=0)
+
+
+def compute_raw_indicators(stock_data, names=None):
+    """
+    只计算指定指标的原始值
+
+    参数:
+    stock_data (pd.DataFrame): 股票数据
+    names (list): 指标名称，默认全部已注册指标
+
+    返回:
+    dict: {指标名称: 原始值}
+    """
+    names = indicator_names() if names is None else names
+    return {name: get_indicator(name).compute(stock_data) for name in names}
+
+
+def compute_suggestions(stock_data, names=None):
+    """只计算指定指标的最新操作建议，返回 {指标名称: Suggestion}"""
+    names = indicator_names() if names is None else names
+    return {
+        name: get_indicator(name).suggest(raw, stock_data)
+        for name, raw in compute_raw_indicators(stock_data, names).items()
+    }
+
+
+def compute_signal_series(stock_data, names=None):
+    """只计算指定指标的全历史 int8 信号序列，返回 {指标名称: np.ndarray}"""
+    names = indicator_names() if names is None else names
+    return {
+        name: get_indicator(name).signals(raw, stock_data)
+        for name, raw in compute_raw_indicators(stock_data, names).items()
+    }
+
+
+# ================================
+# 内置指标
+# ================================
+
+def _macd_raw(stock_data):
+    macd_line, signal_line, hist = calculate_macd(stock_data['close'])
+    return {'macd': macd_line, 'signal': signal_line, 'hist': hist}
+
+
+register_indicator(IndicatorSpec(
+    name='rsi',
+    inputs=('close',),
+    params=RSI_CONFIG,
+    warmup=lambda: max(RSI_CONFIG['window_list']) + 1,
+    outputs='dict[int, Series]：各窗口期 RSI',
+    compute=calculate_rsi_for_multiple_windows,
+    suggest=lambda raw, data: generate_operation_suggestion(raw),
+    signals=lambda raw, data: generate_rsi_signal_series(raw),
+))
+
+register_indicator(IndicatorSpec(
+    name='macd',
+    inputs=('close',),
+    params=MACD_CONFIG,
+    warmup=lambda: MACD_CONFIG['slow_period'] + MACD_CONFIG['signal_period'],
+    outputs="dict：'macd' / 'signal' / 'hist' 三个 Series",
+    compute=_macd_raw,
+    suggest=lambda raw, data: generate_macd_signal(raw['macd'], raw['signal'], raw['hist']),
+    signals=lambda raw, data: generate_macd_signal_series(raw['macd'], raw['signal']),
+))
+
+register_indicator(IndicatorSpec(
+    name='bollinger',
+    inputs=('close',),
+    params=BOLLINGER_CONFIG,
+    warmup=lambda: BOLLINGER_CONFIG['WINDOW'] + 1,
+    outputs='DataFrame：原始列 + SMA / Upper_Band / Lower_Band',
+    compute=calculate_bollinger_bands,
+    suggest=lambda raw, data: generate_bollinger_operations(generate_bollinger_signals(raw)),
+    signals=lambda raw, data: generate_bollinger_signal_series(generate_bollinger_signals(raw)),
+))
+
+register_indicator(IndicatorSpec(
+    name='obv',
+    inputs=('close', 'volume'),
+    params=OBV_CONFIG,
+    warmup=lambda: 2,
+    outputs='Series：OBV',
+    compute=calculate_obv,
+    suggest=lambda raw, data: generate_obv_operation_suggestion(raw, data),
+    signals=lambda raw, data: generate_obv_signal_series(raw, data),
+))
+
+register_indicator(IndicatorSpec(
+    name='vwap',
+    inputs=('close', 'volume'),
+    params=VWAP_CONFIG,
+    warmup=lambda: VWAP_CONFIG.get('ROLLING_WINDOW', 20) if VWAP_CONFIG.get('MODE') == 'rolling' else 1,
+    outputs='Series：VWAP',
+    compute=calculate_vwap,
+    suggest=lambda raw, data: generate_vwap_operation_suggestion(data, raw),
+    signals=lambda raw, data: generate_vwap_signal_series(data, raw),
+))
+
+register_indicator(IndicatorSpec(
+    name='stochastic_rsi',
+    inputs=('close',),
+    params=STOCHASTIC_RSI,
+    warmup=lambda: STOCHASTIC_RSI['K_PERIOD'] + STOCHASTIC_RSI['SMOOTH_K'] + STOCHASTIC_RSI['D_PERIOD'] - 2,
+    outputs="DataFrame：'%K' / '%D'",
+    compute=calculate_stochastic_rsi,
+    suggest=lambda raw, data: generate_stochastic_rsi_operation_suggestion(raw),
+    signals=lambda raw, data: generate_stochastic_rsi_signal_series(raw),
+))
+
+register_indicator(IndicatorSpec(
+    name='adx',
+    inputs=('high', 'low', 'close'),
+    params=ADX_CONFIG,
+    warmup=lambda: 2 * ADX_CONFIG['PERIOD'],
+    outputs='Series：ADX',
+    compute=calculate_adx_safe,
+    suggest=lambda raw, data: generate_adx_operation_suggestion(raw),
+    signals=lambda raw, data: generate_adx_signal_series(raw),
+))
+
+register_indicator(IndicatorSpec(
+    name='atr',
+    inputs=('high', 'low', 'close'),
+    params=ATR_CONFIG,
+    warmup=lambda: ATR_CONFIG['PERIOD'] + ATR_CONFIG['RECENT_WINDOW'],
+    outputs='Series：ATR',
+    compute=calculate_atr,
+    suggest=lambda raw, data: generate_atr_operation_suggestion(raw),
+    signals=lambda raw, data: generate_atr_signal_series(raw),
+))
+
+register_indicator(IndicatorSpec(
+    name='keltner',
+    inputs=('high', 'low', 'close'),
+    params=KELTNER_CONFIG,
+    warmup=lambda: KELTNER_CONFIG['PERIOD'],
+    outputs='DataFrame：原始列 + Middle_Band / Upper_Band / Lower_Band',
+    compute=calculate_keltner_channel,
+    suggest=lambda raw, data: generate_keltner_channel_operation_suggestion(raw),
+    signals=lambda raw, data: generate_keltner_channel_signal_series(raw),
+))
@@ -2,6 +2,8 @@ import pandas as pd
 import numpy as np
 import matplotlib.pyplot as plt
 from stock.data.config import RSI_CONFIG  # 从配置文件导入 RSI 参数
+from stock.indicator.kernels import ewm_mean
+from stock.indicator.signals import BUY, SELL, Suggestion, select_signals
 
 def calculate_rsi(data, window=None):
     """
@@ -25,8 +27,8 @@ def calculate_rsi(data, window=None):
     gain = np.maximum(delta, 0)  # gain 可以直接通过向量化的最大值运算获得
     loss = np.maximum(-delta, 0)  # loss 可以直接通过向量化的最大值运算获得
 
-    avg_gain = gain.ewm(span=window, adjust=False).mean()
-    avg_loss = loss.ewm(span=window, adjust=False).mean()
+    avg_gain = pd.Series(ewm_mean(gain, window), index=data.index)
+    avg_loss = pd.Series(ewm_mean(loss, window), index=data.index)
 
     # 避免除以零
     rs = avg_gain / (avg_loss + 1e-10)  # 加一个小的正数避免除零
@@ -87,7 +89,7 @@ def generate_operation_suggestion(rsi_values):
     rsi_values (dict): 含有多个周期 RSI 值的字典（例如 {6: Series, 14: Series, 24: Series}）
 
     返回:
-    dict: 包含操作建议和详细建议的字典
+    Suggestion: 包含操作建议和详细建议的只读映射
     """
     latest_rsi_values = {window: rsi.iloc[-1] for window, rsi in rsi_values.items()}
     overbought = RSI_CONFIG["overbought"]
@@ -106,36 +108,50 @@ def generate_operation_suggestion(rsi_values):
     elif short_rsi > overbought and long_rsi > overbought:
         sell_count += 1
 
-    # 文案构建
-    detail = "RSI - 当前各周期 RSI 指数如下：\n"
-    for window, value in sorted(latest_rsi_values.items()):
-        detail += f"- {window} 日 RSI：{value:.2f}  "
-
-    # 操作建议构建
-    result = '观望'
+    # 操作建议构建（详细建议为常量文本，无需再拼接各周期数值）
     if buy_count > sell_count:
-        suggestion = (
+        return Suggestion('买入', (
             f"RSI - 综合判断：多个周期 RSI 值均低于超卖区间，且短期与长期走势均显示超卖，"
             "市场可能出现反弹，📌 建议【买入】。根据当前的超卖信号，"
             "您可以考虑趁市场低迷时买入，但需警惕短期的震荡风险。"
-        )
-        result = '买入'
-    elif sell_count > buy_count:
-        suggestion = (
+        ))
+    if sell_count > buy_count:
+        return Suggestion('卖出', (
             f"RSI - 综合判断：多个周期 RSI 值均高于超买区间，且短期与长期走势均显示超买，"
             "市场可能面临回调，📌 建议【卖出】。当前市场可能处于过度上涨状态，"
             "若您持有股票，考虑适时卖出以锁定收益，避免回调风险。"
-        )
-        result = '卖出'
-    else:
-        suggestion = (
-            f"RSI - 综合判断：各周期 RSI 指标未明显偏离常态，当前短期与长期走势保持中性，"
-            "市场缺乏明确的超买或超卖信号，📌 建议【观望】。此时宜保持观望，等待市场进一步明朗。"
-        )
-
-    # 返回包含操作建议和详细建议的字典
-    return {
-        "suggestion": result,
-        "detailed_suggestion": suggestion
-    }
+        ))
+    return Suggestion('观望', (
+        f"RSI - 综合判断：各周期 RSI 指标未明显偏离常态，当前短期与长期走势保持中性，"
+        "市场缺乏明确的超买或超卖信号，📌 建议【观望】。此时宜保持观望，等待市场进一步明朗。"
+    ))
+
+
+def generate_rsi_signal_series(rsi_values):
+    """
+    一次向量化计算每根K线的多周期 RSI 信号，判断逻辑与 generate_operation_suggestion 一致
+
+    参数:
+    rsi_values (dict): 含有多个周期 RSI 值的字典（例如 {6: Series, 14: Series, 24: Series}）
+
+    返回:
+    np.ndarray: int8 信号数组（1 买入 / -1 卖出 / 0 观望），与 RSI 序列等长
+    """
+    overbought = RSI_CONFIG["overbought"]
+    oversold = RSI_CONFIG["oversold"]
+
+    # 形状：(周期数, K线数)
+    matrix = np.vstack([np.asarray(rsi, dtype=float) for rsi in rsi_values.values()])
+
+    buy_count = (matrix < oversold).sum(axis=0)
+    sell_count = (matrix > overbought).sum(axis=0)
+
+    # 趋势增强判断：所有周期同时超卖/超买时额外计数
+    short_rsi = matrix.min(axis=0)
+    long_rsi = matrix.max(axis=0)
+    all_oversold = (short_rsi < oversold) & (long_rsi < oversold)
+    all_overbought = ~all_oversold & (short_rsi > overbought) & (long_rsi > overbought)
+    buy_count = buy_count + all_oversold
+    sell_count = sell_count + all_overbought
 
+    return select_signals([buy_count > sell_count, sell_count > buy_count], [BUY, SELL])
@@ -0,0 +1,93 @@
+from collections.abc import Mapping
+
+import numpy as np
+
+# ================================
+# 指标信号编码（全历史向量化信号使用）
+# ================================
+# 买入 = 1，卖出 = -1，观望 = 0，统一使用 int8 存储，每根K线仅占 1 字节
+
+BUY = 1
+SELL = -1
+HOLD = 0
+
+SIGNAL_DTYPE = np.int8
+
+# 中文建议 -> 信号编码
+LABEL_TO_SIGNAL = {
+    "买入": BUY,
+    "卖出": SELL,
+    "观望": HOLD,
+}
+
+# 信号编码 -> 中文建议
+SIGNAL_TO_LABEL = {value: label for label, value in LABEL_TO_SIGNAL.items()}
+
+
+def select_signals(conditions, choices):
+    """
+    按 if/elif 的先后顺序合成 int8 信号数组，未命中任何条件的K线记为观望
+
+    参数:
+    conditions (list): 布尔条件数组列表（顺序即判断优先级）
+    choices (list): 与条件一一对应的信号编码（BUY / SELL / HOLD）
+
+    返回:
+    np.ndarray: int8 信号数组（1 / -1 / 0）
+    """
+    conditions = [np.asarray(condition, dtype=bool) for condition in conditions]
+    return np.select(conditions, choices, default=HOLD).astype(SIGNAL_DTYPE)
+
+
+def signal_to_label(signal):
+    """将单个信号编码转换为中文建议"""
+    return SIGNAL_TO_LABEL.get(int(signal), "观望")
+
+
+class Suggestion(Mapping):
+    """
+    指标操作建议结果（轻量只读映射）
+
+    保持与原 {"suggestion": ..., "detailed_suggestion": ...} 字典相同的读取方式，
+    但详细建议文本只在第一次读取 'detailed_suggestion' 时才构建并缓存。
+    回测、权重校准等只读取 'suggestion' 的场景因此不再承担长文本拼接的开销。
+    """
+
+    __slots__ = ("suggestion", "_detail")
+
+    _KEYS = ("suggestion", "detailed_suggestion")
+
+    def __init__(self, suggestion, detail):
+        """
+        :param suggestion: 操作建议（买入 / 卖出 / 观望）
+        :param detail: 详细建议文本，或返回该文本的无参可调用对象（延迟构建）
+        """
+        self.suggestion = suggestion
+        self._detail = detail
+
+    @property
+    def detailed_suggestion(self):
+        if callable(self._detail):
+            self._detail = self._detail()
+        return self._detail
+
+    @property
+    def signal(self):
+        """操作建议对应的信号编码（1 / -1 / 0）"""
+        return LABEL_TO_SIGNAL.get(self.suggestion, HOLD)
+
+    def __getitem__(self, key):
+        if key == "suggestion":
+            return self.suggestion
+        if key == "detailed_suggestion":
+            return self.detailed_suggestion
+        raise KeyError(key)
+
+    def __iter__(self):
+        return iter(self._KEYS)
+
+    def __len__(self):
+        return len(self._KEYS)
+
+    def __repr__(self):
+        return f"Suggestion({self.suggestion!r})"
@@ -2,6 +2,8 @@ import pandas as pd
 import numpy as np
 import matplotlib.pyplot as plt
 from stock.data.config import STOCHASTIC_RSI  # 直接从配置文件导入参数
+from stock.indicator.kernels import ewm_mean, rolling_max, rolling_mean, rolling_min
+from stock.indicator.signals import BUY, SELL, Suggestion, select_signals
 
 def calculate_stochastic_rsi(stock_data):
     """
@@ -22,26 +24,28 @@ def calculate_stochastic_rsi(stock_data):
     if k_period <= 0 or d_period <= 0 or smooth_k <= 0:
         raise ValueError("K_PERIOD, D_PERIOD 和 SMOOTH_K 必须大于零。")
 
+    close = pd.to_numeric(stock_data['close'], errors='coerce')
+
     # 计算 RSI
-    delta = stock_data['close'].diff()
+    delta = close.diff()
     gain = np.maximum(delta, 0)  # 向量化计算涨幅
     loss = np.maximum(-delta, 0)  # 向量化计算跌幅
-    avg_gain = gain.ewm(span=14, adjust=False).mean()
-    avg_loss = loss.ewm(span=14, adjust=False).mean()
+    avg_gain = ewm_mean(gain, 14)
+    avg_loss = ewm_mean(loss, 14)
     rs = avg_gain / (avg_loss + 1e-10)  # 避免除零
     rsi = 100 - (100 / (1 + rs))
 
     # 计算 %K
-    lowest_low = stock_data['close'].rolling(window=k_period).min()
-    highest_high = stock_data['close'].rolling(window=k_period).max()
-    k = ((rsi - lowest_low) / (highest_high - lowest_low)) * 100
-    k = pd.to_numeric(k, errors='coerce')  # 确保 %K 是数值类型
+    lowest_low = rolling_min(close, k_period)
+    highest_high = rolling_max(close, k_period)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        k = ((rsi - lowest_low) / (highest_high - lowest_low)) * 100
 
     # 平滑 %K
-    k_smoothed = k.rolling(window=smooth_k).mean()
+    k_smoothed = rolling_mean(k, smooth_k)
 
     # 计算 %D
-    d = k_smoothed.rolling(window=d_period).mean()
+    d = rolling_mean(k_smoothed, d_period)
 
     return pd.DataFrame({'%K': k_smoothed, '%D': d}, index=stock_data.index)
 
@@ -75,7 +79,7 @@ def generate_stochastic_rsi_operation_suggestion(stochastic_rsi_data):
     stochastic_rsi_data (pd.DataFrame): 包含 %K 和 %D 的 Stochastic RSI 数据
 
     返回:
-    dict: 包含操作建议和详细建议的字典
+    Suggestion: 包含操作建议和详细建议的只读映射（详细建议在读取时才生成）
     """
     # 获取最新的 %K 和 %D 值
     latest_k = stochastic_rsi_data['%K'].iloc[-1]
@@ -85,46 +89,47 @@ def generate_stochastic_rsi_operation_suggestion(stochastic_rsi_data):
     overbought = 80
     oversold = 20
 
-    # 初始化操作建议
-    result = '观望'
+    def detail(text):
+        return lambda: f"Stochastic RSI - %K: {latest_k:.2f}, %D: {latest_d:.2f}，{text}"
+
     if latest_k > overbought and latest_d > overbought:
-        suggestion = (
-            f"Stochastic RSI - %K: {latest_k:.2f}, %D: {latest_d:.2f}，市场处于超买区，"
-            "价格可能过高，存在回调风险。\n📌 建议：卖出或减仓。"
-        )
-        result = "卖出"
-
-    elif latest_k < oversold and latest_d < oversold:
-        suggestion = (
-            f"Stochastic RSI - %K: {latest_k:.2f}, %D: {latest_d:.2f}，市场处于超卖区，"
-            "可能存在反弹机会。\n📌 建议：买入或加仓。"
-        )
-        result = "买入"
-
-    elif latest_k > latest_d and latest_k < overbought:
-        suggestion = (
-            f"Stochastic RSI - %K: {latest_k:.2f}, %D: {latest_d:.2f}，%K 上穿 %D，"
-            "显示潜在上涨信号。\n📌 建议：买入信号，准备入场。"
-        )
-        result = "买入"
-
-    elif latest_k < latest_d and latest_k > oversold:
-        suggestion = (
-            f"Stochastic RSI - %K: {latest_k:.2f}, %D: {latest_d:.2f}，%K 下穿 %D，"
-            "显示潜在下跌信号。\n📌 建议：卖出信号，准备减仓。"
-        )
-        result = "卖出"
-
-    else:
-        suggestion = (
-            f"Stochastic RSI - %K: {latest_k:.2f}, %D: {latest_d:.2f}，目前指标无明显趋势，"
-            "市场震荡整理。\n📌 建议：观望，等待更明确信号。"
-        )
-        result = "观望"
-
-    # 返回包含操作建议和详细建议的字典
-    return {
-        "suggestion": result,
-        "detailed_suggestion": suggestion
-    }
+        return Suggestion("卖出", detail("市场处于超买区，价格可能过高，存在回调风险。\n📌 建议：卖出或减仓。"))
+
+    if latest_k < oversold and latest_d < oversold:
+        return Suggestion("买入", detail("市场处于超卖区，可能存在反弹机会。\n📌 建议：买入或加仓。"))
+
+    if latest_k > latest_d and latest_k < overbought:
+        return Suggestion("买入", detail("%K 上穿 %D，显示潜在上涨信号。\n📌 建议：买入信号，准备入场。"))
+
+    if latest_k < latest_d and latest_k > oversold:
+        return Suggestion("卖出", detail("%K 下穿 %D，显示潜在下跌信号。\n📌 建议：卖出信号，准备减仓。"))
+
+    return Suggestion("观望", detail("目前指标无明显趋势，市场震荡整理。\n📌 建议：观望，等待更明确信号。"))
+
+
+
+def generate_stochastic_rsi_signal_series(stochastic_rsi_data):
+    """
+    一次向量化计算每根K线的 Stochastic RSI 信号，阈值与 generate_stochastic_rsi_operation_suggestion 一致
+
+    参数:
+    stochastic_rsi_data (pd.DataFrame): 包含 %K 和 %D 的 Stochastic RSI 数据
+
+    返回:
+    np.ndarray: int8 信号数组（1 买入 / -1 卖出 / 0 观望），与输入等长
+    """
+    k = stochastic_rsi_data['%K'].to_numpy(dtype=float)
+    d = stochastic_rsi_data['%D'].to_numpy(dtype=float)
+
+    overbought = 80
+    oversold = 20
 
+    return select_signals(
+        [
+            (k > overbought) & (d > overbought),
+            (k < oversold) & (d < oversold),
+            (k > d) & (k < overbought),
+            (k < d) & (k > oversold),
+        ],
+        [SELL, BUY, BUY, SELL]
+    )
@@ -0,0 +1,762 @@
+import json
+import math
+from collections import deque
+
+import numpy as np
+import pandas as pd
+from stock.data.config import (ADX_CONFIG, ATR_CONFIG, BOLLINGER_CONFIG, KELTNER_CONFIG, MACD_CONFIG, OBV_CONFIG,
+                               RSI_CONFIG, STOCHASTIC_RSI, VWAP_CONFIG)
+from stock.data.ring_buffer import BAR_COLUMNS, RingBuffer
+from stock.indicator.registry import get_indicator, indicator_names
+
+"""
+流式指标状态：每根新K线以 O(1) 推进递推状态（EWM、Wilder 平滑、OBV 累加、滚动窗口），不必重算整段历史
+
+- 每个指标保存递推所需的最少状态，以及最近 tail 根K线的指标输出；操作建议直接调用注册表中的 suggest，
+  判断逻辑与批量计算完全相同（各指标的建议最多只读取最近 ATR_CONFIG["RECENT_WINDOW"] 根K线）
+- 递推步骤与 kernels 中的逐元素循环一致：同一段行情逐根推进得到的最新值与批量计算相同
+  （布林带、Keltner 的滚动均值 / 标准差按窗口直接求和，与 pandas 的结果只有舍入误差）
+- StreamingState 提供与 AnalysisContext 相同的 data / raw(name) / suggestion(name) 接口，
+  策略引擎的市场类型识别和综合建议可以直接在流式状态上执行
+- state_dict() / from_state_dict() 把状态转换为只含数字、字符串和列表的字典，可保存为 JSON
+"""
+
+STATE_VERSION = 1
+
+NAN = float('nan')
+
+
+def suggestion_tail():
+    """操作建议需要的最近K线数（ATR 建议读取最近 RECENT_WINDOW 根，MACD / OBV / 布林带读取最近 2 根）"""
+    return max(2, ATR_CONFIG["RECENT_WINDOW"])
+
+
+def _finite(value):
+    # 与 kernels 中的滚动窗口一致：±inf 视同缺失值
+    return value if value == value and not math.isinf(value) else NAN
+
+
+# ================================
+# 状态序列化
+# ================================
+
+class _Stateful:
+    """以 __slots__ 为状态字段的对象：state_dict() 导出，load_state() 写回（结构由构造参数决定）"""
+
+    __slots__ = ()
+
+    def _slots(self):
+        for cls in type(self).__mro__:
+            yield from getattr(cls, '__slots__', ())
+
+    def state_dict(self):
+        return {name: _dump(getattr(self, name)) for name in self._slots()}
+
+    def load_state(self, state):
+        for name in self._slots():
+            setattr(self, name, _load(getattr(self, name), state[name]))
+        return self
+
+
+def _dump(value):
+    if isinstance(value, _Stateful):
+        return value.state_dict()
+    if isinstance(value, (deque, list, tuple)):
+        return [_dump(item) for item in value]
+    if isinstance(value, dict):
+        return {str(key): _dump(item) for key, item in value.items()}
+    if isinstance(value, np.generic):
+        return value.item()
+    return value
+
+
+def _load(current, data):
+    if isinstance(current, _Stateful):
+        return current.load_state(data)
+    if isinstance(current, deque):
+        return deque((tuple(item) if isinstance(item, list) else item for item in data), maxlen=current.maxlen)
+    if isinstance(current, dict):
+        return {key: _load(item, data[str(key)]) for key, item in current.items()}
+    if isinstance(current, tuple):
+        return tuple(data)
+    return data
+
+
+# ================================
+# 递推原语
+# ================================
+
+class EWMState(_Stateful):
+    """指数加权均值，与 kernels.ewm_mean（pandas ewm(span, adjust=False)）逐步一致，含缺失值处理"""
+
+    __slots__ = ("alpha", "weighted", "old_wt", "observed", "count")
+
+    def __init__(self, span):
+        self.alpha = 2.0 / (span + 1.0)
+        self.weighted = NAN
+        self.old_wt = 1.0
+        self.observed = False
+        self.count = 0
+
+    def update(self, value):
+        if self.count == 0:
+            self.weighted = value
+            self.observed = value == value
+        else:
+            is_observation = value == value
+            self.observed = self.observed or is_observation
+            if self.weighted == self.weighted:
+                self.old_wt *= 1.0 - self.alpha
+                if is_observation:
+                    if self.weighted != value:
+                        self.weighted = (self.old_wt * self.weighted + self.alpha * value) / (self.old_wt + self.alpha)
+                    self.old_wt = 1.0
+            elif is_observation:
+                self.weighted = value
+        self.count += 1
+        return self.weighted if self.observed else NAN
+
+
+class WilderSumState(_Stateful):
+    """
+    Wilder 累加平滑（与 kernels.wilder_sum_smoothing 一致）
+
+    批量计算中前 period 个值都等于前 period 项之和（用到了之后的数据），流式计算在第 period 根K线时才得到该值，
+    之前返回 NaN；预热期之后两者相同。
+    """
+
+    __slots__ = ("period", "head", "value")
+
+    def __init__(self, period):
+        self.period = period
+        self.head = []
+        self.value = NAN
+
+    @property
+    def ready(self):
+        return len(self.head) >= self.period
+
+    def update(self, value):
+        if not self.ready:
+            self.head.append(value)
+            if self.ready:
+                self.value = float(np.nansum(np.array(self.head)))
+            return self.value
+        self.value = self.value - (self.value / self.period) + value
+        return self.value
+
+
+class WilderMeanState(WilderSumState):
+    """Wilder 均值平滑（与 kernels.wilder_mean_smoothing 一致），初值为前 period 项中非缺失值的均值"""
+
+    __slots__ = ()
+
+    def update(self, value):
+        if not self.ready:
+            self.head.append(value)
+            if self.ready:
+                head = np.array(self.head)
+                valid = head[~np.isnan(head)]
+                self.value = float(valid.mean()) if valid.size else NAN
+            return self.value
+        self.value = (self.value * (self.period - 1) + value) / self.period
+        return self.value
+
+
+class RollingMeanState(_Stateful):
+    """滚动均值，累加 / 扣减的顺序与 kernels.rolling_mean 的逐元素循环一致；窗口未满或含缺失值时为 NaN"""
+
+    __slots__ = ("window", "values", "total", "nan_count")
+
+    def __init__(self, window):
+        self.window = window
+        self.values = deque(maxlen=window)
+        self.total = 0.0
+        self.nan_count = 0
+
+    def update(self, value):
+        value = _finite(value)
+        if value != value:
+            self.nan_count += 1
+        else:
+            self.total += value
+        if len(self.values) == self.window:
+            dropped = self.values[0]
+            if dropped != dropped:
+                self.nan_count -= 1
+            else:
+                self.total -= dropped
+        self.values.append(value)
+        if len(self.values) == self.window and self.nan_count == 0:
+            return self.total / self.window
+        return NAN
+
+
+class RollingWindowState(_Stateful):
+    """最近 window 个值（窗口长度为常数，每次求值 O(window)，与历史长度无关）"""
+
+    __slots__ = ("window", "values")
+
+    def __init__(self, window):
+        self.window = window
+        self.values = deque(maxlen=window)
+
+    def update(self, value):
+        self.values.append(_finite(value))
+
+    def array(self):
+        """窗口已满且不含缺失值时返回数组，否则返回 None"""
+        if len(self.values) < self.window:
+            return None
+        values = np.array(self.values)
+        return None if np.isnan(values).any() else values
+
+    def max(self):
+        values = self.array()
+        return NAN if values is None else float(values.max())
+
+    def min(self):
+        values = self.array()
+        return NAN if values is None else float(values.min())
+
+    def mean(self):
+        values = self.array()
+        return NAN if values is None else float(values.mean())
+
+    def std(self):
+        values = self.array()
+        return NAN if values is None or self.window < 2 else float(values.std(ddof=1))
+
+
+class RollingExtremeState(_Stateful):
+    """
+    滚动最大 / 最小值，与 kernels.rolling_max / rolling_min 逐步一致：单调队列，每个值最多入队出队一次（均摊 O(1)），
+    窗口内存在缺失值时为 NaN
+    """
+
+    __slots__ = ("window", "find_max", "queue", "missing", "missing_count", "count")
+
+    def __init__(self, window, find_max):
+        self.window = window
+        self.find_max = find_max
+        self.queue = deque()                 # (序号, 值)，值单调
+        self.missing = deque(maxlen=window)  # 最近 window 个值是否缺失
+        self.missing_count = 0
+        self.count = 0
+
+    def update(self, value):
+        value = _finite(value)
+        index = self.count
+        is_missing = value != value
+        if len(self.missing) == self.window and self.missing[0]:
+            self.missing_count -= 1
+        self.missing.append(is_missing)
+        self.missing_count += is_missing
+        if not is_missing:
+            queue = self.queue
+            while queue and ((queue[-1][1] <= value) if self.find_max else (queue[-1][1] >= value)):
+                queue.pop()
+            queue.append((index, value))
+        while self.queue and self.queue[0][0] <= index - self.window:
+            self.queue.popleft()
+        self.count += 1
+        return self.value()
+
+    def value(self):
+        if self.count < self.window or self.missing_count:
+            return NAN
+        return self.queue[0][1]
+
+
+class _RSIState(_Stateful):
+    """RSI 的涨跌幅 EWM 状态（calculate_rsi / calculate_stochastic_rsi 中的 RSI 计算）"""
+
+    __slots__ = ("gain", "loss")
+
+    def __init__(self, window):
+        self.gain = EWMState(window)
+        self.loss = EWMState(window)
+
+    def update(self, delta):
+        avg_gain = self.gain.update(max(delta, 0.0) if delta == delta else NAN)
+        avg_loss = self.loss.update(max(-delta, 0.0) if delta == delta else NAN)
+        rs = avg_gain / (avg_loss + 1e-10)
+        return 100 - (100 / (1 + rs))
+
+
+def _true_range(bar, prev_close):
+    # 与 pd.concat([tr1, tr2, tr3]).max(axis=1) 一致：首根K线没有前收盘价时只取 high - low
+    ranges = [bar['high'] - bar['low']]
+    if prev_close == prev_close:
+        ranges += [abs(bar['high'] - prev_close), abs(bar['low'] - prev_close)]
+    ranges = [value for value in ranges if value == value]
+    return max(ranges) if ranges else NAN
+
+
+# ================================
+# 各指标的流式状态
+# ================================
+
+class StreamingIndicator(_Stateful):
+    """
+    单个指标的流式状态
+
+    - update(bar, prev_bar)：推进一根K线（bar 为 {列名: 值}，prev_bar 为上一根K线或 None）
+    - outputs：最近 tail 根K线的指标输出（元组，字段顺序为 columns）
+    - raw(data)：按注册表中该指标的原始值格式构造最近 tail 根K线的结果，data 为对应的行情数据
+    """
+
+    __slots__ = ("outputs",)
+
+    name = None
+    columns = ()
+
+    def __init__(self, tail):
+        self.outputs = deque(maxlen=tail)
+
+    def update(self, bar, prev_bar):
+        self.outputs.append(tuple(self._step(bar, prev_bar)))
+
+    def _step(self, bar, prev_bar):
+        raise NotImplementedError
+
+    def column(self, position, index):
+        """第 position 个输出字段的最近 len(index) 个值"""
+        values = [output[position] for output in self.outputs]
+        return pd.Series(values[len(values) - len(index):], index=index, dtype=float)
+
+    def raw(self, data):
+        raise NotImplementedError
+
+
+class StreamingRSI(StreamingIndicator):
+    __slots__ = ("states",)
+
+    name = 'rsi'
+
+    def __init__(self, tail):
+        super().__init__(tail)
+        self.states = {window: _RSIState(window) for window in RSI_CONFIG.get("window_list", [6, 14, 24])}
+
+    @property
+    def columns(self):
+        return tuple(self.states)
+
+    def _step(self, bar, prev_bar):
+        delta = bar['close'] - prev_bar['close'] if prev_bar is not None else NAN
+        return [state.update(delta) for state in self.states.values()]
+
+    def raw(self, data):
+        return {window: self.column(position, data.index) for position, window in enumerate(self.states)}
+
+
+class StreamingMACD(StreamingIndicator):
+    __slots__ = ("fast", "slow", "signal")
+
+    name = 'macd'
+    columns = ('macd', 'signal', 'hist')
+
+    def __init__(self, tail):
+        super().__init__(tail)
+        self.fast = EWMState(MACD_CONFIG["fast_period"])
+        self.slow = EWMState(MACD_CONFIG["slow_period"])
+        self.signal = EWMState(MACD_CONFIG["signal_period"])
+
+    def _step(self, bar, prev_bar):
+        macd = self.fast.update(bar['close']) - self.slow.update(bar['close'])
+        signal = self.signal.update(macd)
+        return macd, signal, macd - signal
+
+    def raw(self, data):
+        return {key: self.column(position, data.index) for position, key in enumerate(self.columns)}
+
+
+class StreamingBollinger(StreamingIndicator):
+    __slots__ = ("close",)
+
+    name = 'bollinger'
+    columns = ('SMA', 'Upper_Band', 'Lower_Band')
+
+    def __init__(self, tail):
+        super().__init__(tail)
+        self.close = RollingWindowState(BOLLINGER_CONFIG["WINDOW"])
+
+    def _step(self, bar, prev_bar):
+        self.close.update(bar['close'])
+        sma, std = self.close.mean(), self.close.std()
+        num_std = BOLLINGER_CONFIG["NUM_STD"]
+        return sma, sma + num_std * std, sma - num_std * std
+
+    def raw(self, data):
+        return data.assign(**{key: self.column(position, data.index) for position, key in enumerate(self.columns)})
+
+
+class StreamingOBV(StreamingIndicator):
+    __slots__ = ("total", "last_close")
+
+    name = 'obv'
+    columns = ('obv',)
+
+    def __init__(self, tail):
+        super().__init__(tail)
+        self.total = 0.0
+        self.last_close = NAN
+
+    def _step(self, bar, prev_bar):
+        # 与 calculate_obv 一致：收盘价缺失时沿用前值，成交量缺失时记为 0
+        close = bar['close'] if bar['close'] == bar['close'] else self.last_close
+        volume = bar['volume'] if bar['volume'] == bar['volume'] else 0.0
+        delta = close - self.last_close  # 首根K线的前收盘价为 NaN，比较结果均为 False
+        if delta > 0:
+            self.total += volume
+        elif delta < 0:
+            self.total -= volume
+        self.last_close = close
+        return (self.total + OBV_CONFIG.get("obv_initial_value", 0),)
+
+    def raw(self, data):
+        return self.column(0, data.index)
+
+
+class StreamingVWAP(StreamingIndicator):
+    """
+    VWAP 的流式状态
+
+    - rolling：最近 ROLLING_WINDOW 根K线；session：每个锚定周期的第一根K线重新累计
+    - cumulative：lookback_days 不为 None 时只累计最新K线日期之前 lookback_days 天内的K线
+      （与每天重新分析最近 lookback_days 天数据时的切片起点一致），否则自状态建立起累计
+    """
+
+    __slots__ = ("mode", "lookback_days", "window", "total_value", "total_volume", "session", "last_close")
+
+    name = 'vwap'
+    columns = ('vwap',)
+
+    def __init__(self, tail, lookback_days=None):
+        super().__init__(tail)
+        self.mode = VWAP_CONFIG.get("MODE", "cumulative")
+        self.lookback_days = lookback_days
+        # 窗口内每根K线的 (日期, 成交额, 成交量)
+        self.window = deque()
+        self.total_value = 0.0
+        self.total_volume = 0.0
+        self.session = None
+        self.last_close = NAN
+
+    def _drop_first(self):
+        _, value, volume = self.window.popleft()
+        self.total_value -= value
+        self.total_volume -= volume
+
+    def _step(self, bar, prev_bar):
+        close = bar['close'] if bar['close'] == bar['close'] else self.last_close
+        volume = bar['volume'] if bar['volume'] == bar['volume'] else 0.0
+        self.last_close = close
+        date = pd.Timestamp(bar['date'])
+
+        if self.mode == "session":
+            session = str(date.to_period(VWAP_CONFIG.get("SESSION_ANCHOR", "M")))
+            if session != self.session:
+                while self.window:
+                    self._drop_first()
+                self.session = session
+        elif self.mode == "rolling":
+            while self.window and len(self.window) >= VWAP_CONFIG.get("ROLLING_WINDOW", 20):
+                self._drop_first()
+        elif self.mode != "cumulative":
+            raise ValueError(f"不支持的 VWAP 计算模式: {self.mode}")
+        elif self.lookback_days is not None:
+            start = (date - pd.Timedelta(days=self.lookback_days)).strftime("%Y-%m-%d")
+            while self.window and self.window[0][0] < start:
+                self._drop_first()
+
+        self.window.append((date.strftime("%Y-%m-%d"), close * volume, volume))
+        self.total_value += close * volume
+        self.total_volume += volume
+        return (self.total_value / self.total_volume if self.total_volume != 0 else NAN,)
+
+    def raw(self, data):
+        return self.column(0, data.index)
+
+
+class StreamingStochasticRSI(StreamingIndicator):
+    __slots__ = ("rsi", "closes", "smooth_k", "d")
+
+    name = 'stochastic_rsi'
+    columns = ('%K', '%D')
+
+    def __init__(self, tail):
+        super().__init__(tail)
+        k_period = STOCHASTIC_RSI.get('K_PERIOD', 14)
+        self.rsi = _RSIState(14)
+        self.closes = RollingWindowState(k_period)  # 最高 / 最低收盘价的窗口
+        self.smooth_k = RollingMeanState(STOCHASTIC_RSI.get('SMOOTH_K', 3))
+        self.d = RollingMeanState(STOCHASTIC_RSI.get('D_PERIOD', 3))
+
+    def _step(self, bar, prev_bar):
+        delta = bar['close'] - prev_bar['close'] if prev_bar is not None else NAN
+        rsi = self.rsi.update(delta)
+        self.closes.update(bar['close'])
+        lowest_low, highest_high = self.closes.min(), self.closes.max()
+        with np.errstate(divide='ignore', invalid='ignore'):
+            k = float(np.float64(rsi - lowest_low) / np.float64(highest_high - lowest_low) * 100)
+        k_smoothed = self.smooth_k.update(k)
+        return k_smoothed, self.d.update(k_smoothed)
+
+    def raw(self, data):
+        return pd.DataFrame({key: self.column(position, data.index) for position, key in enumerate(self.columns)},
+                            index=data.index)
+
+
+class StreamingADX(StreamingIndicator):
+    __slots__ = ("tr", "plus_dm", "minus_dm", "adx")
+
+    name = 'adx'
+    columns = ('adx',)
+
+    def __init__(self, tail):
+        super().__init__(tail)
+        period = ADX_CONFIG["PERIOD"]
+        self.tr = WilderSumState(period)
+        self.plus_dm = WilderSumState(period)
+        self.minus_dm = WilderSumState(period)
+        self.adx = WilderSumState(period)
+
+    def _step(self, bar, prev_bar, epsilon=1e-10):
+        prev_close = prev_bar['close'] if prev_bar is not None else NAN
+        up_move = bar['high'] - prev_bar['high'] if prev_bar is not None else NAN
+        down_move = bar['low'] - prev_bar['low'] if prev_bar is not None else NAN
+        plus_dm = up_move if (up_move > down_move) and (up_move > 0) else 0.0
+        minus_dm = -down_move if (down_move > up_move) and (down_move < 0) else 0.0
+
+        was_ready = self.tr.ready
+        tr_smooth = self.tr.update(_true_range(bar, prev_close))
+        plus_smooth = self.plus_dm.update(plus_dm)
+        minus_smooth = self.minus_dm.update(minus_dm)
+        if not self.tr.ready:
+            return (0.0,)
+
+        plus_di = 100 * (plus_smooth / (tr_smooth + epsilon))
+        minus_di = 100 * (minus_smooth / (tr_smooth + epsilon))
+        dx = 100 * (abs(plus_di - minus_di) / (plus_di + minus_di + epsilon))
+        if not was_ready:
+            # 批量计算中预热期内的平滑值都等于初值，DX 也相同：ADX 的初值为 period 个相同 DX 之和
+            for _ in range(self.adx.period - 1):
+                self.adx.update(dx)
+        adx = self.adx.update(dx)
+        return (0.0 if adx != adx else adx,)
+
+    def raw(self, data):
+        return self.column(0, data.index)
+
+
+class StreamingATR(StreamingIndicator):
+    __slots__ = ("atr",)
+
+    name = 'atr'
+    columns = ('atr',)
+
+    def __init__(self, tail):
+        super().__init__(tail)
+        self.atr = WilderMeanState(ATR_CONFIG["PERIOD"])
+
+    def _step(self, bar, prev_bar):
+        prev_close = prev_bar['close'] if prev_bar is not None else NAN
+        atr = self.atr.update(_true_range(bar, prev_close))
+        return (0.0 if atr != atr else atr,)
+
+    def raw(self, data):
+        return self.column(0, data.index)
+
+
+class StreamingKeltner(StreamingIndicator):
+    __slots__ = ("ema", "ranges")
+
+    name = 'keltner'
+    columns = ('Middle_Band', 'Upper_Band', 'Lower_Band')
+
+    def __init__(self, tail):
+        super().__init__(tail)
+        self.ema = EWMState(KELTNER_CONFIG["PERIOD"])
+        self.ranges = RollingWindowState(KELTNER_CONFIG["PERIOD"])
+
+    def _step(self, bar, prev_bar):
+        ema = self.ema.update((bar['high'] + bar['low'] + bar['close']) / 3)
+        self.ranges.update(abs(bar['high'] - bar['low']))
+        atr = self.ranges.mean()
+        multiplier = KELTNER_CONFIG["MULTIPLIER"]
+        return ema, ema + multiplier * atr, ema - multiplier * atr
+
+    def raw(self, data):
+        return data.assign(**{key: self.column(position, data.index) for position, key in enumerate(self.columns)})
+
+
+# 指标名称 -> 流式状态类（与注册表中的名称一致）
+STREAMING_INDICATORS = {
+    cls.name: cls for cls in (StreamingRSI, StreamingMACD, StreamingBollinger, StreamingOBV, StreamingVWAP,
+                              StreamingStochasticRSI, StreamingADX, StreamingATR, StreamingKeltner)
+}
+
+
+def register_streaming_indicator(cls):
+    """注册流式状态类（cls.name 需与注册表中的指标名称一致），返回 cls 便于作为装饰器使用"""
+    STREAMING_INDICATORS[cls.name] = cls
+    return cls
+
+
+# ================================
+# 单只股票的流式状态
+# ================================
+
+def state_fingerprint(names, tail=None, lookback_days=None):
+    """
+    状态的参数指纹：指标、指标配置、保留K线数或回看天数变化后，已保存的状态不再可用
+
+    :return: str，参数相同时相同
+    """
+    params = {name: get_indicator(name).params for name in names}
+    return json.dumps({'version': STATE_VERSION, 'names': list(names), 'params': params,
+                       'tail': tail or suggestion_tail(), 'lookback_days': lookback_days},
+                      sort_keys=True, ensure_ascii=False, default=str)
+
+
+class StreamingState:
+    """
+    单只股票全部指标的流式状态
+
+    - update(date, bar) / update_frame(stock_data)：推进新K线，已处理过的日期自动跳过
+    - data：最近 tail 根K线的行情数据（DataFrame）
+    - raw(name) / suggestion(name) / suggestions：与 AnalysisContext 相同的读取接口
+    """
+
+    __slots__ = ("symbol", "names", "tail", "lookback_days", "bars", "indicators", "last_date", "bar_count",
+                 "_cache")
+
+    def __init__(self, symbol, names=None, tail=None, lookback_days=None):
+        """
+        :param symbol: 股票代码
+        :param names: 参与计算的指标名称，默认全部已注册指标
+        :param tail: 保留的最近K线数，None 取 suggestion_tail()
+        :param lookback_days: 累计 VWAP 的回看天数（与每日重新分析的区间一致），None 表示自状态建立起累计
+        """
+        self.symbol = symbol
+        self.names = list(names) if names is not None else indicator_names()
+        self.tail = tail or suggestion_tail()
+        self.lookback_days = lookback_days
+        self.bars = RingBuffer(self.tail, BAR_COLUMNS)
+        self.indicators = {}
+        for name in self.names:
+            if name not in STREAMING_INDICATORS:
+                raise KeyError(f"指标没有流式实现: {name}")
+            cls = STREAMING_INDICATORS[name]
+            self.indicators[name] = cls(self.tail, lookback_days) if cls is StreamingVWAP else cls(self.tail)
+        self.last_date = None
+        self.bar_count = 0
+        self._cache = {}
+
+    def update(self, date, bar):
+        """
+        推进一根K线
+
+        :param date: K线日期
+        :param bar: {列名: 值}，至少包含 open / high / low / close / volume
+        :return: 是否推进（日期不晚于已处理的最后一根K线时跳过）
+        """
+        date = pd.Timestamp(date).strftime("%Y-%m-%d")
+        if self.last_date is not None and date <= self.last_date:
+            return False
+        bar = {column: float(bar.get(column, NAN)) if bar.get(column) is not None else NAN
+               for column in BAR_COLUMNS}
+        bar['date'] = date
+        last = self.bars.last()
+        prev_bar = dict(last[1], date=last[0]) if last is not None else None
+        for indicator in self.indicators.values():
+            indicator.update(bar, prev_bar)
+        self.bars.append(date, [bar[column] for column in BAR_COLUMNS])
+        self.last_date = date
+        self.bar_count += 1
+        self._cache = {}
+        return True
+
+    def update_frame(self, stock_data):
+        """
+        按日期顺序推进一段行情数据
+
+        :param stock_data: 行情数据（DataFrame，索引为日期）
+        :return: 实际推进的K线数
+        """
+        if stock_data is None or stock_data.empty:
+            return 0
+        stock_data = stock_data.sort_index()
+        columns = [column for column in BAR_COLUMNS if column in stock_data.columns]
+        values = stock_data[columns].apply(pd.to_numeric, errors='coerce').to_numpy(dtype=float)
+        return sum(self.update(date, dict(zip(columns, row))) for date, row in zip(stock_data.index, values))
+
+    @property
+    def data(self):
+        """最近 tail 根K线的行情数据"""
+        if 'data' not in self._cache:
+            # 缓冲区的视图在下一次 update 时会被覆盖，这里复制一份（只有 tail 根K线）
+            self._cache['data'] = self.bars.frame().copy()
+        return self._cache['data']
+
+    def raw(self, name):
+        """单个指标最近 tail 根K线的原始值（格式与注册表 compute 的结果相同）"""
+        key = ('raw', name)
+        if key not in self._cache:
+            self._cache[key] = self.indicators[name].raw(self.data)
+        return self._cache[key]
+
+    def suggestion(self, name):
+        """单个指标在最新K线上的操作建议"""
+        key = ('suggestion', name)
+        if key not in self._cache:
+            self._cache[key] = get_indicator(name).suggest(self.raw(name), self.data)
+        return self._cache[key]
+
+    @property
+    def suggestions(self):
+        """{指标名称: Suggestion}"""
+        return {name: self.suggestion(name) for name in self.names}
+
+    def fingerprint(self):
+        """参数指纹，见 state_fingerprint"""
+        return state_fingerprint(self.names, self.tail, self.lookback_days)
+
+    def state_dict(self):
+        """导出为只含数字、字符串和列表的字典（可直接保存为 JSON）"""
+        return {
+            'version': STATE_VERSION,
+            'symbol': self.symbol,
+            'names': self.names,
+            'tail': self.tail,
+            'lookback_days': self.lookback_days,
+            'fingerprint': self.fingerprint(),
+            'last_date': self.last_date,
+            'bar_count': self.bar_count,
+            'bars': self.bars.rows(),
+            'indicators': {name: indicator.state_dict() for name, indicator in self.indicators.items()},
+        }
+
+    @classmethod
+    def from_state_dict(cls, state):
+        """
+        从 state_dict() 的结果恢复
+
+        :return: StreamingState；版本或参数指纹与当前配置不一致时返回 None（需要重新建立状态）
+        """
+        if state.get('version') != STATE_VERSION:
+            return None
+        restored = cls(state['symbol'], state['names'], state['tail'], state.get('lookback_days'))
+        if restored.fingerprint() != state.get('fingerprint'):
+            return None
+        restored.last_date = state['last_date']
+        restored.bar_count = state['bar_count']
+        for row in state['bars']:
+            restored.bars.append(row[0], row[1:])
+        for name, indicator in restored.indicators.items():
+            indicator.load_state(state['indicators'][name])
+        return restored
+
+    def __repr__(self):
+        return f"StreamingState({self.symbol!r}, bars={self.bar_count}, last_date={self.last_date!r})"
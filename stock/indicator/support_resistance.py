@@ -0,0 +1,155 @@
+import numpy as np
+import pandas as pd
+from stock.data.config import SUPPORT_RESISTANCE_CONFIG
+from stock.indicator import kernels
+from stock.indicator.streaming import RollingExtremeState
+
+"""
+支撑位 / 压力位：多个窗口期的收盘价滚动极值，加可选的枢轴点（Pivot Point）
+
+- 窗口期 w 的支撑位 / 压力位为最近 w 根K线收盘价的最小 / 最大值；当前收盘价触及或突破时，
+  按 buffer 向外修正（与原来的 calculate_support_resistance 一致）
+- 枢轴点按当根K线的最高价、最低价、收盘价计算，作为下一交易日的参考位：
+  P = (H + L + C) / 3，R1 = 2P - L，S1 = 2P - H，R2 = P + (H - L)，S2 = P - (H - L)
+- support_resistance_series：滚动极值核函数一次计算全历史每根K线的位置（回测只需计算一遍）
+- support_resistance_levels：只取最新一根，只读取最近 max(窗口期) 根K线，与历史长度无关
+- SupportResistanceTracker：实时模式逐根推进，每根K线 O(1)（均摊）
+"""
+
+PIVOT_COLUMNS = ('pivot', 'pivot_r1', 'pivot_s1', 'pivot_r2', 'pivot_s2')
+
+
+def resolve_params(windows=None, buffer=None, pivots=None):
+    """
+    解析参数，None 读取 SUPPORT_RESISTANCE_CONFIG
+
+    :return: (windows, buffer, pivots)；windows 中第一个为主窗口期（结果中的 support / resistance）
+    """
+    windows = tuple(int(window) for window in (windows or SUPPORT_RESISTANCE_CONFIG.get("WINDOWS", (5,))))
+    if not windows or min(windows) < 1:
+        raise ValueError(f"窗口期必须为正整数: {windows}")
+    buffer = SUPPORT_RESISTANCE_CONFIG.get("BUFFER", 0.02) if buffer is None else buffer
+    pivots = SUPPORT_RESISTANCE_CONFIG.get("PIVOTS", False) if pivots is None else pivots
+    return windows, buffer, pivots
+
+
+def _apply_buffer(close, support, resistance, buffer):
+    # 收盘价触及或突破区间时向外修正；NaN 参与比较为 False，保持原值
+    with np.errstate(invalid='ignore'):
+        resistance = np.where(close >= resistance, close * (1 + buffer), resistance)
+        support = np.where(close <= support, close * (1 - buffer), support)
+    return support, resistance
+
+
+def pivot_levels(high, low, close):
+    """
+    经典枢轴点
+
+    :return: {列名: 数组或标量}，列名见 PIVOT_COLUMNS
+    """
+    pivot = (high + low + close) / 3
+    spread = high - low
+    return {
+        'pivot': pivot,
+        'pivot_r1': 2 * pivot - low,
+        'pivot_s1': 2 * pivot - high,
+        'pivot_r2': pivot + spread,
+        'pivot_s2': pivot - spread,
+    }
+
+
+def support_resistance_series(data, windows=None, buffer=None, pivots=None):
+    """
+    一次计算全历史每根K线的支撑位 / 压力位
+
+    参数:
+    data (pd.DataFrame): 行情数据，需包含 close；计算枢轴点时还需包含 high / low
+    windows (tuple): 窗口期，None 读取 SUPPORT_RESISTANCE_CONFIG["WINDOWS"]
+    buffer (float): 触及时的修正比例，None 读取 SUPPORT_RESISTANCE_CONFIG["BUFFER"]
+    pivots (bool): 是否计算枢轴点，None 读取 SUPPORT_RESISTANCE_CONFIG["PIVOTS"]
+
+    返回:
+    pd.DataFrame: 每个窗口期 w 一组 support_w / resistance_w 列，计算枢轴点时另有 PIVOT_COLUMNS 列
+    """
+    windows, buffer, pivots = resolve_params(windows, buffer, pivots)
+    close = data['close'].to_numpy(dtype=float)
+    columns = {}
+    for window in windows:
+        support, resistance = _apply_buffer(close, kernels.rolling_min(close, window),
+                                            kernels.rolling_max(close, window), buffer)
+        columns[f'support_{window}'] = support
+        columns[f'resistance_{window}'] = resistance
+    if pivots:
+        columns.update(pivot_levels(data['high'].to_numpy(dtype=float), data['low'].to_numpy(dtype=float), close))
+    return pd.DataFrame(columns, index=data.index)
+
+
+def _levels_from_row(row, windows, pivots):
+    levels = {window: {'support': row[f'support_{window}'], 'resistance': row[f'resistance_{window}']}
+              for window in windows}
+    return {
+        'support': levels[windows[0]]['support'],
+        'resistance': levels[windows[0]]['resistance'],
+        'levels': levels,
+        'pivots': {column: row[column] for column in PIVOT_COLUMNS} if pivots else None,
+    }
+
+
+def support_resistance_levels(data, windows=None, buffer=None, pivots=None):
+    """
+    最新一根K线的支撑位 / 压力位（只读取最近 max(windows) 根K线）
+
+    :return: dict，support / resistance 为主窗口期的位置，levels 为 {窗口期: {'support', 'resistance'}}，
+             pivots 为枢轴点（未启用时为 None）
+    """
+    windows, buffer, pivots = resolve_params(windows, buffer, pivots)
+    series = support_resistance_series(data.iloc[-max(windows):], windows, buffer, pivots)
+    if series.empty:
+        row = {column: np.nan for column in series.columns}
+    else:
+        row = {column: float(value) for column, value in series.iloc[-1].items()}
+    return _levels_from_row(row, windows, pivots)
+
+
+class SupportResistanceTracker:
+    """
+    实时模式的支撑位 / 压力位：逐根推进，每个窗口期维护收盘价的单调队列，每根K线均摊 O(1)
+
+    结果与 support_resistance_levels 对同一段数据的计算一致。极值只依赖最近 max(windows) 根K线，
+    重启时用环形缓冲区中的最近K线重新推进即可恢复，无需保存状态。
+    """
+
+    __slots__ = ("windows", "buffer", "pivots", "_lowest", "_highest", "levels")
+
+    def __init__(self, windows=None, buffer=None, pivots=None):
+        self.windows, self.buffer, self.pivots = resolve_params(windows, buffer, pivots)
+        self._lowest = {window: RollingExtremeState(window, find_max=False) for window in self.windows}
+        self._highest = {window: RollingExtremeState(window, find_max=True) for window in self.windows}
+        self.levels = None
+
+    def update(self, bar):
+        """
+        推进一根K线
+
+        :param bar: {列名: 值}，至少包含 close；计算枢轴点时还需包含 high / low
+        :return: 与 support_resistance_levels 格式相同的 dict
+        """
+        close = float(bar['close'])
+        row = {}
+        for window in self.windows:
+            support, resistance = _apply_buffer(close, self._lowest[window].update(close),
+                                                self._highest[window].update(close), self.buffer)
+            row[f'support_{window}'] = float(support)
+            row[f'resistance_{window}'] = float(resistance)
+        if self.pivots:
+            row.update({column: float(value) for column, value in
+                        pivot_levels(float(bar['high']), float(bar['low']), close).items()})
+        self.levels = _levels_from_row(row, self.windows, self.pivots)
+        return self.levels
+
+    def update_frame(self, stock_data):
+        """按顺序推进一段行情数据，返回最后一根K线的结果"""
+        columns = ['close', 'high', 'low'] if self.pivots else ['close']
+        for values in stock_data[columns].to_numpy(dtype=float):
+            self.update(dict(zip(columns, values)))
+        return self.levels
@@ -1,38 +1,122 @@
 import pandas as pd
+import numpy as np
 import matplotlib.pyplot as plt
 from stock.data.config import VWAP_CONFIG  # 从配置文件导入 VWAP 参数
+from stock.indicator.signals import BUY, SELL, Suggestion, select_signals
 
 
-def calculate_vwap(stock_data, strict=False):
+def calculate_vwap(stock_data, strict=False, mode=None, window=None, anchor=None):
     """
     计算成交量加权平均价格（VWAP）
 
     参数:
     stock_data (pd.DataFrame): 包含 'close' 和 'volume' 列的股票数据
     strict (bool): 严格模式，若为 True 则遇到 NaN 会报错，默认自动填补
+    mode (str): 计算模式 cumulative / rolling / session，默认读取 VWAP_CONFIG["MODE"]
+    window (int): rolling 模式的窗口长度，默认读取 VWAP_CONFIG["ROLLING_WINDOW"]
+    anchor (str): session 模式的锚定周期（W / M / Q / Y），默认读取 VWAP_CONFIG["SESSION_ANCHOR"]
 
     返回:
     pd.Series: VWAP 序列
     """
-    stock_data = stock_data.copy()
-    stock_data['close'] = pd.to_numeric(stock_data['close'], errors='coerce')
-    stock_data['volume'] = pd.to_numeric(stock_data['volume'], errors='coerce')
+    if mode is None:
+        mode = VWAP_CONFIG.get("MODE", "cumulative")
 
-    if strict:
-        if stock_data['close'].isnull().any() or stock_data['volume'].isnull().any():
-            missing = stock_data[stock_data[['close', 'volume']].isnull().any(axis=1)]
-            raise ValueError(f"VWAP 计算中发现缺失数据:\n{missing}")
+    cumulative = CumulativeVWAP(stock_data, strict=strict)
 
-    # 自动填补缺失数据
-    stock_data['close'] = stock_data['close'].ffill()
-    stock_data['volume'] = stock_data['volume'].fillna(0)
+    if mode == "cumulative":
+        return cumulative.cumulative()
+    if mode == "rolling":
+        return cumulative.rolling(window or VWAP_CONFIG.get("ROLLING_WINDOW", 20))
+    if mode == "session":
+        return cumulative.session(anchor or VWAP_CONFIG.get("SESSION_ANCHOR", "M"))
 
-    # 计算 VWAP = ∑(成交额) / ∑(成交量)
-    cumulative_value = (stock_data['close'] * stock_data['volume']).cumsum()
-    cumulative_volume = stock_data['volume'].cumsum()
+    raise ValueError(f"不支持的 VWAP 计算模式: {mode}")
+
+
+class CumulativeVWAP:
+    """
+    缓存累计成交额（价格×成交量）与累计成交量，任意区间的 VWAP 都由两次减法得到：
+
+        VWAP[i..j] = (∑pv[0..j] - ∑pv[0..i-1]) / (∑v[0..j] - ∑v[0..i-1])
+
+    对整段历史只做一次 cumsum，之后逐日滚动（walk-forward）时每个新窗口都是 O(1)，
+    不必像原来那样对每个切片重新计算。
+    """
+
+    def __init__(self, stock_data, strict=False):
+        """
+        :param stock_data: 包含 'close' 和 'volume' 列的股票数据
+        :param strict: 严格模式，若为 True 则遇到 NaN 会报错，默认自动填补
+        """
+        close = pd.to_numeric(stock_data['close'], errors='coerce')
+        volume = pd.to_numeric(stock_data['volume'], errors='coerce')
+
+        if strict:
+            if close.isnull().any() or volume.isnull().any():
+                missing = stock_data[close.isnull() | volume.isnull()]
+                raise ValueError(f"VWAP 计算中发现缺失数据:\n{missing}")
+
+        # 自动填补缺失数据
+        close = close.ffill().to_numpy(dtype=float)
+        volume = volume.fillna(0).to_numpy(dtype=float)
+
+        self.index = stock_data.index
+        # 前置一个 0，使区间 [i, j] 的和 = cum[j + 1] - cum[i]
+        self.cum_value = np.concatenate(([0.0], np.cumsum(close * volume)))
+        self.cum_volume = np.concatenate(([0.0], np.cumsum(volume)))
+
+    def __len__(self):
+        return len(self.index)
+
+    def window_vwap(self, end, length=None):
+        """
+        O(1) 计算截至第 end 根K线（含）、长度为 length 的窗口 VWAP
+
+        :param end: 窗口最后一根K线的位置
+        :param length: 窗口长度，None 表示自首根K线起累计
+        :return: float，VWAP 值（窗口内无成交量时为 NaN）
+        """
+        stop = end + 1
+        start = 0 if length is None else max(0, stop - length)
+        volume = self.cum_volume[stop] - self.cum_volume[start]
+        if volume == 0:
+            return np.nan
+        return (self.cum_value[stop] - self.cum_value[start]) / volume
+
+    def _between(self, starts):
+        """按每根K线对应的区间起点批量计算 VWAP"""
+        stops = np.arange(1, len(self) + 1)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            vwap = (self.cum_value[stops] - self.cum_value[starts]) / (self.cum_volume[stops] - self.cum_volume[starts])
+        return pd.Series(vwap, index=self.index)
+
+    def cumulative(self):
+        """自第一根K线起的累计 VWAP（与原 calculate_vwap 结果一致）"""
+        return self._between(np.zeros(len(self), dtype=int))
+
+    def rolling(self, window):
+        """最近 window 根K线的滚动 VWAP，前 window-1 根使用已有K线"""
+        if window <= 0:
+            raise ValueError("VWAP 滚动窗口必须大于零。")
+        starts = np.maximum(np.arange(1, len(self) + 1) - window, 0)
+        return self._between(starts)
+
+    def session(self, anchor="M"):
+        """按周期锚定的 VWAP：每个周期（周/月/季/年）的第一根K线重新开始累计"""
+        if not isinstance(self.index, pd.DatetimeIndex):
+            raise ValueError("session 模式要求数据索引为日期（DatetimeIndex）。")
+
+        periods = self.index.to_period(anchor).asi8
+        is_session_start = np.empty(len(self), dtype=bool)
+        is_session_start[:1] = True
+        is_session_start[1:] = periods[1:] != periods[:-1]
+
+        # 每根K线所在周期的起始位置
+        positions = np.where(is_session_start, np.arange(len(self)), 0)
+        starts = np.maximum.accumulate(positions)
+        return self._between(starts)
 
-    vwap = cumulative_value / cumulative_volume
-    return pd.Series(vwap, index=stock_data.index)
 
 
 
@@ -63,17 +147,20 @@ def plot_vwap(stock_data, vwap_data):
     plt.show()
 
 
-def generate_vwap_operation_suggestion(stock_data, vwap_data):
+def generate_vwap_operation_suggestion(stock_data, vwap_data=None):
     """
     根据 VWAP 指标生成详细操作建议
 
     参数:
     stock_data (pd.DataFrame): 股票数据，包含收盘价
-    vwap_data (pd.Series): VWAP 值
+    vwap_data (pd.Series): VWAP 值，默认按 VWAP_CONFIG["MODE"] 选择的模式计算
 
     返回:
-    dict: 包含操作建议和详细建议的字典
+    Suggestion: 包含操作建议和详细建议的只读映射（详细建议在读取时才生成）
     """
+    if vwap_data is None:
+        vwap_data = calculate_vwap(stock_data)
+
     # 获取最新的收盘价和 VWAP 值
     latest_price = stock_data['close'].iloc[-1]
     latest_vwap = vwap_data.iloc[-1]
@@ -85,32 +172,47 @@ def generate_vwap_operation_suggestion(stock_data, vwap_data):
     # 计算价格与 VWAP 的偏离程度（百分比）
     deviation = (latest_price - latest_vwap) / latest_vwap * 100
 
-    # 初始化操作建议
     if deviation > buy_threshold:
-        suggestion = "买入"
-        detailed_suggestion = (
+        return Suggestion("买入", lambda: (
             f"VWAP - {latest_vwap:.2f}, 当前股价 - {latest_price:.2f}，"
             f"股价高于 VWAP {deviation:.2f}%，显示市场的多头力量较强，价格有上涨潜力。\n"
             "📌 建议：市场处于上涨趋势，考虑买入或继续持有，顺势而为。"
-        )
-    elif deviation < sell_threshold:
-        suggestion = "卖出"
-        detailed_suggestion = (
+        ))
+    if deviation < sell_threshold:
+        return Suggestion("卖出", lambda: (
             f"VWAP - {latest_vwap:.2f}, 当前股价 - {latest_price:.2f}，"
             f"股价低于 VWAP {deviation:.2f}%，显示市场的空头力量较强，价格可能会下行。\n"
             "📌 建议：市场处于下行趋势，考虑卖出或减仓，避免亏损。"
-        )
-    else:
-        suggestion = "观望"
-        detailed_suggestion = (
-            f"VWAP - {latest_vwap:.2f}, 当前股价 - {latest_price:.2f}，"
-            "价格接近 VWAP，市场方向不明，短期内难以判断趋势。\n"
-            "📌 建议：维持观望，等待更明确的信号出现。"
-        )
+        ))
+    return Suggestion("观望", lambda: (
+        f"VWAP - {latest_vwap:.2f}, 当前股价 - {latest_price:.2f}，"
+        "价格接近 VWAP，市场方向不明，短期内难以判断趋势。\n"
+        "📌 建议：维持观望，等待更明确的信号出现。"
+    ))
+
+
+
+def generate_vwap_signal_series(stock_data, vwap_data=None):
+    """
+    一次向量化计算每根K线的 VWAP 信号，阈值与 generate_vwap_operation_suggestion 一致
+
+    参数:
+    stock_data (pd.DataFrame): 股票数据，包含收盘价
+    vwap_data (pd.Series): VWAP 值，默认按 VWAP_CONFIG["MODE"] 选择的模式计算
+
+    返回:
+    np.ndarray: int8 信号数组（1 买入 / -1 卖出 / 0 观望），与 vwap_data 等长
+    """
+    if vwap_data is None:
+        vwap_data = calculate_vwap(stock_data)
+
+    price = pd.to_numeric(stock_data['close'], errors='coerce').to_numpy(dtype=float)
+    vwap = np.asarray(vwap_data, dtype=float)
+
+    buy_threshold = VWAP_CONFIG.get("buy_threshold", 0.5)
+    sell_threshold = VWAP_CONFIG.get("sell_threshold", -0.5)
 
-    # 返回包含操作建议和详细建议的字典
-    return {
-        "suggestion": suggestion,
-        "detailed_suggestion": detailed_suggestion
-    }
+    with np.errstate(divide='ignore', invalid='ignore'):
+        deviation = (price - vwap) / vwap * 100
 
+    return select_signals([deviation > buy_threshold, deviation < sell_threshold], [BUY, SELL])
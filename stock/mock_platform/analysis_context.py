@@ -0,0 +1,92 @@
+import pandas as pd
+from stock.indicator.registry import get_indicator, indicator_names
+
+"""
+单次分析的上下文：持有清洗后的行情数据，以及本次分析中已计算的原始指标、操作建议、评分等结果
+
+同一次 analyze() 中，市场类型识别、加权评分、支撑/压力位和报告导出都从上下文读取，
+每个指标只计算一次，每个 generate_* 建议也只生成一次。
+"""
+
+# 需要为数值类型的行情列（美股数据的 amount 为 None，会被转换为 NaN）
+NUMERIC_COLUMNS = ('open', 'high', 'low', 'close', 'volume', 'amount')
+
+
+def clean_stock_data(stock_data):
+    """
+    清洗行情数据：按日期升序、去除重复日期（保留最后一条）、行情列转换为数值类型
+
+    数据本身已满足要求时直接返回原对象，不做复制。
+
+    参数:
+    stock_data (pd.DataFrame): 原始行情数据
+
+    返回:
+    pd.DataFrame: 清洗后的行情数据
+    """
+    data = stock_data
+    if data.index.has_duplicates:
+        data = data[~data.index.duplicated(keep='last')]
+    if not data.index.is_monotonic_increasing:
+        data = data.sort_index()
+
+    object_columns = [column for column in NUMERIC_COLUMNS
+                      if column in data.columns and not pd.api.types.is_numeric_dtype(data[column])]
+    if object_columns:
+        data = data.assign(**{column: pd.to_numeric(data[column], errors='coerce') for column in object_columns})
+    return data
+
+
+class AnalysisContext:
+    """
+    单次分析的计算结果缓存
+
+    - data: 清洗后的行情数据
+    - raw(name) / suggestion(name): 按需计算并缓存单个指标的原始值和操作建议
+    - raw_indicators / suggestions: 全部参与指标的原始值和操作建议
+    - cached(key, func): 缓存市场类型、评分、支撑/压力位等派生结果
+    """
+
+    def __init__(self, stock_data, names=None):
+        """
+        :param stock_data: 行情数据（DataFrame）
+        :param names: 参与分析的指标名称，默认全部已注册指标
+        """
+        self.data = clean_stock_data(stock_data)
+        self.names = list(names) if names is not None else indicator_names()
+        self._raw = {}
+        self._suggestions = {}
+        self._derived = {}
+
+    def raw(self, name):
+        """单个指标的原始值（首次读取时计算）"""
+        if name not in self._raw:
+            self._raw[name] = get_indicator(name).compute(self.data)
+        return self._raw[name]
+
+    def suggestion(self, name):
+        """单个指标的操作建议 Suggestion（首次读取时生成）"""
+        if name not in self._suggestions:
+            self._suggestions[name] = get_indicator(name).suggest(self.raw(name), self.data)
+        return self._suggestions[name]
+
+    @property
+    def raw_indicators(self):
+        """{指标名称: 原始值}"""
+        return {name: self.raw(name) for name in self.names}
+
+    @property
+    def suggestions(self):
+        """{指标名称: Suggestion}"""
+        return {name: self.suggestion(name) for name in self.names}
+
+    def cached(self, key, func):
+        """
+        读取派生结果，不存在时调用 func(self) 计算并缓存
+
+        :param key: 结果名称，如 'market_type'、'scores'、'support_resistance'
+        :param func: 以上下文为参数的计算函数
+        """
+        if key not in self._derived:
+            self._derived[key] = func(self)
+        return self._derived[key]
@@ -0,0 +1,355 @@
+import os
+import queue
+import threading
+import time
+import traceback
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+from itertools import islice
+from stock.data.config import BATCH_CONFIG  # 从配置文件导入并行配置
+from stock.data import trace as tracer
+from stock.data.trace import WARNING, trace
+
+"""
+批量任务执行：在进程池中并行执行单只股票的分析函数
+
+- 结果顺序与输入顺序一致
+- 单个任务抛出的异常被捕获并记录在结果中，不影响其他任务；结果无法序列化时该块内的每个任务记为失败
+- 子进程崩溃会使进程池中所有在途任务一起失败：进程池自动重建，这些任务逐个单独重新执行一次，
+  只有单独执行仍使子进程崩溃的任务记为失败
+- 记录每个任务的耗时
+- 支持按块（chunksize）提交，减少进程间通信次数
+- 流水线模式（run_pipeline）：获取数据的线程通过有界队列把数据交给分析进程，网络等待与计算重叠
+- 流式版本（iter_batch / iter_pipeline）：按完成顺序逐个产出结果，不保留已产出的结果，内存占用与股票数量无关
+"""
+
+
+def resolve_workers(workers=None):
+    """
+    解析并行进程数
+
+    :param workers: 进程数，None 读取 BATCH_CONFIG["WORKERS"]，0 或负数表示使用全部 CPU 核数
+    :return: 实际进程数（至少为 1）
+    """
+    if workers is None:
+        workers = BATCH_CONFIG.get("WORKERS", 1)
+    if workers <= 0:
+        workers = os.cpu_count() or 1
+    return workers
+
+
+def resolve_chunksize(task_count, workers, chunksize=None):
+    """
+    解析每次提交给子进程的任务数量
+
+    :param task_count: 任务总数
+    :param workers: 进程数
+    :param chunksize: 指定块大小，None 读取 BATCH_CONFIG["CHUNKSIZE"]，0 表示自动
+    :return: 块大小（至少为 1）
+    """
+    if chunksize is None:
+        chunksize = BATCH_CONFIG.get("CHUNKSIZE", 0)
+    if chunksize <= 0:
+        # 每个进程约分到 4 块，兼顾负载均衡与通信开销
+        chunksize = task_count // (workers * 4)
+    return max(1, chunksize)
+
+
+def _capture(call):
+    """执行无参函数并捕获异常，返回 (结果, 错误信息, 错误堆栈, 耗时秒)"""
+    start = time.perf_counter()
+    try:
+        return call(), None, None, time.perf_counter() - start
+    except Exception as e:
+        return None, f"{type(e).__name__}: {e}", traceback.format_exc(), time.perf_counter() - start
+
+
+def _task_result(item, result, error, error_traceback, elapsed):
+    return {
+        'item': item,
+        'result': result,
+        'error': error,
+        'traceback': error_traceback,
+        'elapsed': elapsed,
+    }
+
+
+# 获取线程向已满的队列放入数据时，每隔多少秒检查一次是否需要退出
+_PUT_TIMEOUT = 0.1
+
+
+def _failure(error):
+    """任务在子进程外失败（子进程崩溃、结果无法序列化等），返回值格式同 _capture"""
+    error_traceback = ''.join(traceback.format_exception(type(error), error, error.__traceback__))
+    return None, f"{type(error).__name__}: {error}", error_traceback, 0.0
+
+
+def _failed_results(items, error):
+    """整块任务在子进程外失败时，为块内每个任务生成失败结果"""
+    return [_task_result(item, *_failure(error)) for item in items]
+
+
+def _init_worker(trace_settings):
+    """子进程初始化：沿用主进程当前的运行日志设置（spawn 方式启动的子进程不会继承 configure 的修改）"""
+    tracer.configure(*trace_settings)
+
+
+def _create_pool(workers):
+    return ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(tracer.settings(),))
+
+
+class _RestartingPool:
+    """进程池：某个子进程异常退出导致进程池损坏（BrokenProcessPool）后，下一次提交时自动重建"""
+
+    def __init__(self, workers):
+        self.workers = workers
+        self._pool = _create_pool(workers)
+
+    def submit(self, fn, task):
+        try:
+            return self._pool.submit(fn, task)
+        except BrokenProcessPool:
+            trace(WARNING, 'batch.pool_restart', "【警告】：进程池已损坏（子进程异常退出），重建进程池后继续",
+                  workers=self.workers)
+            self._pool.shutdown(wait=False)
+            self._pool = _create_pool(self.workers)
+            return self._pool.submit(fn, task)
+
+    def shutdown(self):
+        # 提前结束（调用方不再读取结果）时取消尚未开始的任务
+        self._pool.shutdown(cancel_futures=True)
+
+
+def _run_task(task):
+    """执行单个任务并捕获异常，返回包含结果、错误信息和耗时的字典"""
+    func, item = task
+    return _task_result(item, *_capture(lambda: func(item)))
+
+
+def _run_chunk(task):
+    """执行一块任务，返回各任务的结果列表"""
+    func, items = task
+    return [_run_task((func, item)) for item in items]
+
+
+def _compute_task(task):
+    """流水线模式下的分析任务：compute(item, data)"""
+    compute, item, data = task
+    return _capture(lambda: compute(item, data))
+
+
+def run_batch(func, items, workers=None, chunksize=None):
+    """
+    对每个输入执行 func，workers > 1 时在进程池中并行执行
+
+    func 需为模块级函数（或其 functools.partial），返回值需可序列化，以便在子进程与主进程间传递。
+
+    :param func: 单个任务的处理函数 func(item)
+    :param items: 任务输入列表
+    :param workers: 并行进程数，None 读取 BATCH_CONFIG["WORKERS"]
+    :param chunksize: 每次提交给子进程的任务数量，None 读取 BATCH_CONFIG["CHUNKSIZE"]
+    :return: 与 items 顺序一致的结果列表，每项包含 item / result / error / traceback / elapsed
+    """
+    items = list(items)
+    results = [None] * len(items)
+    for index, result in iter_batch(func, items, workers, chunksize):
+        results[index] = result
+    return results
+
+
+def iter_batch(func, items, workers=None, chunksize=None):
+    """
+    run_batch 的流式版本：按完成顺序逐个产出 (序号, 结果)
+
+    items 可以是任意可迭代对象（如逐行读取的股票列表），按块提交、在途的块数不超过进程数的 2 倍，
+    已产出的结果不再保留，内存占用与股票数量无关。
+
+    :param func: 单个任务的处理函数 func(item)
+    :param items: 任务输入（可迭代对象），序号为其在 items 中的位置
+    :param workers: 并行进程数，None 读取 BATCH_CONFIG["WORKERS"]
+    :param chunksize: 每次提交给子进程的任务数量，None 读取 BATCH_CONFIG["CHUNKSIZE"]（items 无长度时自动取 1）
+    :return: 生成器，每项为 (序号, 结果)，结果字段同 run_batch
+    """
+    workers = resolve_workers(workers)
+    if hasattr(items, '__len__'):
+        workers = min(workers, max(1, len(items)))
+        chunksize = resolve_chunksize(len(items), workers, chunksize)
+    else:
+        chunksize = max(1, chunksize or BATCH_CONFIG.get("CHUNKSIZE", 0) or 1)
+
+    if workers == 1:
+        for index, item in enumerate(items):
+            yield index, _run_task((func, item))
+        return
+
+    def collect(done):
+        suspects = []
+        while done:
+            for future in done:
+                start, chunk = in_flight.pop(future)
+                try:
+                    results = future.result()
+                except BrokenProcessPool:
+                    suspects.extend(enumerate(chunk, start=start))
+                    continue
+                except Exception as e:
+                    results = _failed_results(chunk, e)
+                yield from enumerate(results, start=start)
+            # 进程池损坏时先等其余在途任务结束（它们同样会失败），再逐个单独重试，找出导致崩溃的任务
+            done = wait(in_flight)[0] if suspects else ()
+        for index, item in suspects:
+            try:
+                result = pool.submit(_run_task, (func, item)).result()
+            except Exception as e:
+                result = _task_result(item, *_failure(e))
+            yield index, result
+
+    items = iter(items)
+    pool = _RestartingPool(workers)
+    in_flight = {}
+    try:
+        start = 0
+        for chunk in iter(lambda: list(islice(items, chunksize)), []):
+            while len(in_flight) >= 2 * workers:
+                done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                yield from collect(done)
+            in_flight[pool.submit(_run_chunk, (func, chunk))] = (start, chunk)
+            start += len(chunk)
+        while in_flight:
+            done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+            yield from collect(done)
+    finally:
+        pool.shutdown()
+
+
+def run_pipeline(fetch, compute, items, workers=None, fetch_workers=None, queue_size=None):
+    """
+    流水线执行：fetch_workers 个线程获取数据放入有界队列，主线程取出后交给 compute 计算
+
+    获取数据（网络等待）与分析（CPU 计算）同时进行，总耗时约为 max(获取, 分析) 而不是两者之和；
+    队列满时获取线程等待，在途的分析任务数也不超过进程数的 2 倍，内存占用有上限。
+
+    :param fetch: 获取数据的函数 fetch(item)，在线程中执行
+    :param compute: 分析函数 compute(item, data)，workers > 1 时在子进程中执行（需为模块级函数或其 partial）
+    :param items: 任务输入列表
+    :param workers: 分析进程数，None 读取 BATCH_CONFIG["WORKERS"]；1 表示在主线程中分析
+    :param fetch_workers: 获取数据的线程数，None 读取 BATCH_CONFIG["FETCH_WORKERS"]
+    :param queue_size: 已获取、待分析的数据上限，None 读取 BATCH_CONFIG["QUEUE_SIZE"]
+    :return: 与 items 顺序一致的结果列表，每项在 run_batch 的字段之外另有 fetch_elapsed / compute_elapsed
+    """
+    items = list(items)
+    results = [None] * len(items)
+    for index, result in iter_pipeline(fetch, compute, items, workers, fetch_workers, queue_size):
+        results[index] = result
+    return results
+
+
+def iter_pipeline(fetch, compute, items, workers=None, fetch_workers=None, queue_size=None, task_count=None):
+    """
+    run_pipeline 的流式版本：按完成顺序逐个产出 (序号, 结果)
+
+    items 可以是任意可迭代对象，只在获取线程需要时才读取下一项；已产出的结果不再保留。
+
+    :param items: 任务输入（可迭代对象），序号为其在 items 中的位置
+    :param task_count: 任务数量，None 时取 len(items)（items 无长度时不限制线程数和进程数）
+    :return: 生成器，每项为 (序号, 结果)，结果字段同 run_pipeline
+    """
+    if task_count is None and hasattr(items, '__len__'):
+        task_count = len(items)
+    if task_count == 0:
+        return
+    limit = task_count if task_count is not None else float('inf')
+    workers = int(min(resolve_workers(workers), limit))
+    fetch_workers = int(max(1, min(fetch_workers or BATCH_CONFIG.get("FETCH_WORKERS", 4), limit)))
+    queue_size = max(1, queue_size or BATCH_CONFIG.get("QUEUE_SIZE", 16))
+
+    fetched = queue.Queue(maxsize=queue_size)
+    pending_items = enumerate(items)
+    lock = threading.Lock()
+    stop = threading.Event()  # 主线程结束（含调用方提前停止读取结果）时设置，获取线程随之退出
+    finished = object()  # 获取线程退出时放入队列的标记
+
+    def put(task):
+        """队列满时等待，形成背压；等待期间定期检查 stop，返回是否已放入"""
+        while not stop.is_set():
+            try:
+                fetched.put(task, timeout=_PUT_TIMEOUT)
+                return True
+            except queue.Full:
+                pass
+        return False
+
+    def fetcher():
+        while not stop.is_set():
+            with lock:
+                index, item = next(pending_items, (None, None))
+            if index is None:
+                put(finished)
+                return
+            if not put((index, item) + _capture(lambda: fetch(item))):
+                return
+
+    threads = [threading.Thread(target=fetcher, daemon=True) for _ in range(fetch_workers)]
+    for thread in threads:
+        thread.start()
+
+    def finish(index, item, fetch_elapsed, outcome):
+        result, error, error_traceback, compute_elapsed = outcome
+        entry = _task_result(item, result, error, error_traceback, fetch_elapsed + compute_elapsed)
+        entry['fetch_elapsed'] = fetch_elapsed
+        entry['compute_elapsed'] = compute_elapsed
+        return index, entry
+
+    def collect(done):
+        suspects = []
+        while done:
+            for future in done:
+                index, item, data, fetch_elapsed = in_flight.pop(future)
+                try:
+                    outcome = future.result()
+                except BrokenProcessPool:
+                    suspects.append((index, item, data, fetch_elapsed))
+                    continue
+                except Exception as e:
+                    outcome = _failure(e)
+                yield finish(index, item, fetch_elapsed, outcome)
+            # 同 iter_batch：进程池损坏时等其余在途任务结束，再逐个单独重试
+            done = wait(in_flight)[0] if suspects else ()
+        for index, item, data, fetch_elapsed in suspects:
+            try:
+                outcome = pool.submit(_compute_task, (compute, item, data)).result()
+            except Exception as e:
+                outcome = _failure(e)
+            yield finish(index, item, fetch_elapsed, outcome)
+
+    pool = _RestartingPool(workers) if workers > 1 else None
+    in_flight = {}
+    running_fetchers = len(threads)
+    try:
+        while running_fetchers:
+            task = fetched.get()
+            if task is finished:
+                running_fetchers -= 1
+                continue
+            index, item, data, error, error_traceback, fetch_elapsed = task
+            if error is not None:
+                yield finish(index, item, fetch_elapsed, (None, error, error_traceback, 0.0))
+            elif pool is None:
+                yield finish(index, item, fetch_elapsed, _compute_task((compute, item, data)))
+            else:
+                # 在途任务过多时先等待完成，避免已获取的数据在主进程中堆积
+                while len(in_flight) >= 2 * workers:
+                    done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                    yield from collect(done)
+                in_flight[pool.submit(_compute_task, (compute, item, data))] = (index, item, data, fetch_elapsed)
+
+        while in_flight:
+            done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+            yield from collect(done)
+    finally:
+        stop.set()
+        if pool is not None:
+            pool.shutdown()
+        # 获取线程最多再完成手头的一次 fetch，随后检查到 stop 退出
+        for thread in threads:
+            thread.join()
@@ -1,13 +1,6 @@
 from stock.data.stock_analysis import StockAnalysis
-from stock.indicator.rsi import *
-from stock.indicator.macd import *
-from stock.indicator.bollinger_bands import *
-from stock.indicator.obv import *
-from stock.indicator.vwap import *
-from stock.indicator.stochastic_rsi import *
-from stock.indicator.adx import *
-from stock.indicator.atr import *
-from stock.indicator.keltner_channel import *
+from stock.data.trace import INFO, trace
+from stock.indicator.registry import active_indicators, compute_signal_series, compute_suggestions
 import datetime
 from datetime import timedelta
 
@@ -17,29 +10,26 @@ from datetime import timedelta
 '''
 indicator_weights = {'rsi': {'买入': 0.04618915327938157, '卖出': 0.04618915327938157, '观望': 0.023094576639690785}, 'macd': {'买入': 0.04150259693199662, '卖出': 0.04150259693199662, '观望': 0.02075129846599831}, 'bollinger': {'买入': 0.04710713854330233, '卖出': 0.04710713854330233, '观望': 0.023553569271651167}, 'obv': {'买入': 0.041695856987558885, '卖出': 0.041695856987558885, '观望': 0.020847928493779443}, 'vwap': {'买入': 0.040439666626404164, '卖出': 0.040439666626404164, '观望': 0.020219833313202082}, 'stochastic_rsi': {'买入': 0.04184080202923059, '卖出': 0.04184080202923059, '观望': 0.020920401014615293}, 'adx': {'买入': 0.0473003985988646, '卖出': 0.0473003985988646, '观望': 0.0236501992994323}, 'atr': {'买入': 0.0473003985988646, '卖出': 0.0473003985988646, '观望': 0.0236501992994323}, 'keltner': {'买入': 0.04662398840439667, '卖出': 0.04662398840439667, '观望': 0.023311994202198334}}
 
-def calculate_indicators(stock_data):
+def calculate_indicators(stock_data, names=None):
     """
-    计算所有技术指标并返回建议
+    计算技术指标并返回建议，默认只计算权重非零的指标
+
+    names 为指定要计算的指标名称，None 表示按 indicator_weights 自动筛选
+    """
+    if names is None:
+        names = active_indicators(indicator_weights)
+    return compute_suggestions(stock_data, names)
+
+def calculate_indicator_signals(stock_data, names=None):
+    """
+    一次性计算全历史每根K线的各指标信号（int8：1 买入 / -1 卖出 / 0 观望），
+    替代在逐日递增切片上反复调用 calculate_indicators 的 O(n²) 做法
+
+    names 与 calculate_indicators 相同，None 表示按 indicator_weights 自动筛选
     """
-    indicators = {
-        'rsi': generate_operation_suggestion(
-            calculate_rsi_for_multiple_windows(stock_data)),
-        'macd': generate_macd_signal(
-            *calculate_macd(stock_data['close'])),
-        'bollinger': generate_bollinger_operations(
-            generate_bollinger_signals(
-                calculate_bollinger_bands(stock_data)
-            )
-        ),
-        'obv': generate_obv_operation_suggestion(calculate_obv(stock_data), stock_data),
-        'vwap': generate_vwap_operation_suggestion(stock_data, calculate_vwap(stock_data)),
-        'stochastic_rsi': generate_stochastic_rsi_operation_suggestion(calculate_stochastic_rsi(stock_data)),
-        'adx': generate_adx_operation_suggestion(calculate_adx_safe(stock_data)),
-        'atr': generate_atr_operation_suggestion(calculate_atr(stock_data)),
-        'keltner': generate_keltner_channel_operation_suggestion(
-            calculate_keltner_channel(stock_data))
-    }
-    return indicators
+    if names is None:
+        names = active_indicators(indicator_weights)
+    return compute_signal_series(stock_data, names)
 
 #整体指标建议
 def generate_combined_recommendation(indicator_results):
@@ -71,12 +61,13 @@ def analyze(stock, stock_data):
     :param stop_loss_pct: 设定的止损百分比
     :param stop_gain_pct: 设定的止盈百分比
     """
-    print(f"正在分析股票: {stock.ticker}")
+    trace(INFO, 'analyze.start', f"正在分析股票: {stock.ticker}", ticker=stock.ticker)
     indicator_results = calculate_indicators(stock_data)
     combined_recommendation = generate_combined_recommendation(indicator_results)
 
 
-    print(f"最终综合建议: {combined_recommendation}")
+    trace(INFO, 'analyze.result', f"最终综合建议: {combined_recommendation}",
+          ticker=stock.ticker, recommendation=combined_recommendation)
     return combined_recommendation
 
 def main():
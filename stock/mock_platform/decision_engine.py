@@ -0,0 +1,194 @@
+import numpy as np
+from stock.indicator.registry import get_indicator
+from stock.indicator.signals import BUY, SELL
+from stock.mock_platform.analysis_context import AnalysisContext
+from stock.mock_platform.strategy_engine import (DECISION_SCORES, GROUPED_STRATEGIES, MARKET_TYPES,
+                                                 WEIGHTED_DECISION_THRESHOLDS, active_indicators,
+                                                 adjust_weights_for_market, detect_market_type_series,
+                                                 indicator_weights)
+from stock.mock_platform.strategy_rules import count_votes, evaluate_strategies, signals_from_matrix, strategy_indicators
+
+"""
+向量化决策引擎：strategy_engine 中 weighted_decision / grouped_strategies / final_suggestion 的矩阵形式
+
+- 每种市场类型的调整后权重预先计算为只读的权重张量（市场类型 × 买/卖/观望 × 指标）
+- 输入为 int8 信号矩阵（K线 × 指标，也可以是 股票 × K线 × 指标），一次得到每根K线的
+  买入/卖出/观望得分、加权建议、策略建议和最终建议
+- 得分按指标顺序逐列累加（与标量路径的累加顺序相同），因此对最后一根K线的结果与标量路径逐位一致
+"""
+
+# 决策编码 -> 中文建议（编码即 DECISION_SCORES 中的得分）
+DECISION_LABELS = {score: label for label, score in DECISION_SCORES.items()}
+
+# 权重张量第二维的顺序
+ACTIONS = ("买入", "卖出", "观望")
+
+
+def decision_labels(codes):
+    """将决策编码数组转换为中文建议数组"""
+    codes = np.asarray(codes)
+    labels = np.empty(codes.shape, dtype=object)
+    for code, label in DECISION_LABELS.items():
+        labels[codes == code] = label
+    return labels
+
+
+class CompiledDecisionEngine:
+    """
+    预编译的决策引擎
+
+    构建时按 MARKET_TYPES 的顺序，对每种市场类型调用 adjust_weights_for_market 得到归一化后的权重，
+    存为只读张量 weights[市场类型, 动作, 指标]；之后每次决策只做数组运算，不再复制或归一化权重表。
+    """
+
+    __slots__ = ("names", "weights", "market_types", "strategies")
+
+    def __init__(self, weights=None, names=None, market_types=MARKET_TYPES, strategies=GROUPED_STRATEGIES):
+        """
+        :param weights: 指标权重表（结构同 strategy_engine.indicator_weights），默认使用 indicator_weights
+        :param names: 信号矩阵的列（指标）顺序，默认为权重非零或被策略组合引用的指标
+        :param market_types: 市场类型顺序（市场类型编码即其下标）
+        :param strategies: 策略组合（strategy_rules.compile_strategies 的结果），默认 GROUPED_STRATEGIES
+        """
+        weights = indicator_weights if weights is None else weights
+        self.strategies = tuple(strategies)
+        self.names = tuple(names if names is not None else
+                           active_indicators(weights, strategy_indicators(self.strategies)))
+        self.market_types = tuple(market_types)
+
+        tensor = np.zeros((len(self.market_types), len(ACTIONS), len(self.names)))
+        for m, market_type in enumerate(self.market_types):
+            adjusted = adjust_weights_for_market(market_type, weights)
+            for j, name in enumerate(self.names):
+                for a, action in enumerate(ACTIONS):
+                    tensor[m, a, j] = adjusted[name][action]
+        tensor.setflags(write=False)
+        self.weights = tensor
+
+    def signal_matrix(self, signals):
+        """
+        将 {指标名称: int8 信号数组} 组装为信号矩阵（最后一维按 self.names 排列）
+
+        缺少的指标按观望处理（与 strategy_engine 中未参与计算的指标一致）
+        """
+        shape = np.shape(next(iter(signals.values())))
+        matrix = np.zeros(shape + (len(self.names),), dtype=np.int8)
+        for j, name in enumerate(self.names):
+            if name in signals:
+                matrix[..., j] = signals[name]
+        return matrix
+
+    def scores(self, signal_matrix, market_codes):
+        """
+        计算每根K线的买入 / 卖出 / 观望加权得分
+
+        :param signal_matrix: int8 信号矩阵（... × 指标）
+        :param market_codes: 每根K线的市场类型编码（形状为信号矩阵去掉最后一维）
+        :return: (buy_score, sell_score, hold_score)
+        """
+        signal_matrix = np.asarray(signal_matrix)
+        market_codes = np.asarray(market_codes, dtype=np.intp)
+        # 按市场类型取出每根K线对应的权重（... × 动作 × 指标）
+        weights = self.weights[market_codes]
+
+        buy_score = np.zeros(signal_matrix.shape[:-1])
+        sell_score = np.zeros(signal_matrix.shape[:-1])
+        hold_score = np.zeros(signal_matrix.shape[:-1])
+        # 逐列累加（即 信号指示矩阵 · 权重 的矩阵乘积），累加顺序与标量路径相同，保证结果逐位一致
+        for j in range(len(self.names)):
+            column = signal_matrix[..., j]
+            is_buy = column == BUY
+            is_sell = column == SELL
+            buy_score = buy_score + np.where(is_buy, weights[..., 0, j], 0.0)
+            sell_score = sell_score + np.where(is_sell, weights[..., 1, j], 0.0)
+            hold_score = hold_score + np.where(~is_buy & ~is_sell, weights[..., 2, j], 0.0)
+        return buy_score, sell_score, hold_score
+
+    @staticmethod
+    def weighted_codes(buy_score, sell_score):
+        """加权建议编码，规则与 weighted_decision 一致"""
+        thresholds = WEIGHTED_DECISION_THRESHOLDS
+        diff = buy_score - sell_score
+        return np.select(
+            [
+                (buy_score > thresholds['strong_score']) & (buy_score > 2 * sell_score) & (diff > thresholds['strong_diff']),
+                (buy_score > sell_score) & (diff > thresholds['cautious_diff']),
+                (sell_score > thresholds['strong_score']) & (sell_score > 2 * buy_score) & (diff < -thresholds['strong_diff']),
+                (sell_score > buy_score) & (diff < -thresholds['cautious_diff']),
+            ],
+            [DECISION_SCORES["强烈买入"], DECISION_SCORES["谨慎买入"], DECISION_SCORES["强烈卖出"], DECISION_SCORES["谨慎卖出"]],
+            default=DECISION_SCORES["观望"]
+        ).astype(np.int8)
+
+    def grouped_codes(self, signal_matrix):
+        """策略组合建议编码，按 GROUPED_STRATEGIES 规则求值，合成方式与 grouped_strategies 一致"""
+        strategy_signals = evaluate_strategies(self.strategies, signals_from_matrix(signal_matrix, self.names))
+        buy_count, sell_count = count_votes(strategy_signals)
+        return np.select(
+            [buy_count >= 2, buy_count == 1, sell_count >= 2, sell_count == 1],
+            [DECISION_SCORES["强烈买入"], DECISION_SCORES["谨慎买入"], DECISION_SCORES["强烈卖出"], DECISION_SCORES["谨慎卖出"]],
+            default=DECISION_SCORES["观望"]
+        ).astype(np.int8)
+
+    @staticmethod
+    def final_codes(weighted, grouped):
+        """最终建议编码，规则与 final_suggestion 一致"""
+        total = weighted.astype(np.int16) + grouped
+        strong = (weighted == DECISION_SCORES["强烈买入"]) | (weighted == DECISION_SCORES["强烈卖出"])
+        agree = weighted == grouped
+        return np.select(
+            [
+                agree & strong,
+                agree & (total >= 4), agree & (total <= -4),
+                agree & (total >= 2), agree & (total <= -2),
+                ~agree & (total >= 3), ~agree & (total <= -3),
+            ],
+            [
+                weighted,
+                DECISION_SCORES["强烈买入"], DECISION_SCORES["强烈卖出"],
+                DECISION_SCORES["谨慎买入"], DECISION_SCORES["谨慎卖出"],
+                DECISION_SCORES["谨慎买入"], DECISION_SCORES["谨慎卖出"],
+            ],
+            default=DECISION_SCORES["观望"]
+        ).astype(np.int8)
+
+    def decide(self, signal_matrix, market_codes):
+        """
+        对每根K线（每只股票）一次给出加权得分与各级建议
+
+        :param signal_matrix: int8 信号矩阵（K线 × 指标 或 股票 × K线 × 指标），列顺序为 self.names
+        :param market_codes: 市场类型编码（MARKET_TYPES 下标），形状为信号矩阵去掉最后一维
+        :return: dict，包含 buy_score / sell_score / hold_score 以及 weighted / grouped / final 的决策编码
+                 （编码见 DECISION_SCORES，可用 decision_labels 转换为中文建议）
+        """
+        signal_matrix = np.asarray(signal_matrix)
+        buy_score, sell_score, hold_score = self.scores(signal_matrix, market_codes)
+        weighted = self.weighted_codes(buy_score, sell_score)
+        grouped = self.grouped_codes(signal_matrix)
+        return {
+            'buy_score': buy_score,
+            'sell_score': sell_score,
+            'hold_score': hold_score,
+            'weighted': weighted,
+            'grouped': grouped,
+            'final': self.final_codes(weighted, grouped),
+        }
+
+    def decide_stock(self, stock_data, context=None):
+        """
+        计算单只股票全历史每根K线的决策
+
+        :param stock_data: 股票数据
+        :param context: AnalysisContext，传入时复用其中已计算的指标（指标原始值均通过 context.raw 读取）
+        :return: 同 decide()
+        """
+        if context is None:
+            context = AnalysisContext(stock_data, names=self.names)
+        signals = {name: get_indicator(name).signals(context.raw(name), context.data) for name in self.names}
+        market_codes = detect_market_type_series(context.data, context).cat.codes.to_numpy()
+        return self.decide(self.signal_matrix(signals), market_codes)
+
+
+def compile_decision_engine(weights=None, names=None, strategies=GROUPED_STRATEGIES):
+    """按权重表和策略规则构建 CompiledDecisionEngine（权重表之后的修改不会影响已构建的引擎）"""
+    return CompiledDecisionEngine(weights, names, strategies=strategies)
@@ -0,0 +1,190 @@
+import datetime
+from datetime import timedelta
+from functools import partial
+from itertools import combinations
+from stock.data.config import COMPARE_CONFIG
+from stock.data.trace import ERROR, trace
+from stock.indicator.signals import BUY, HOLD, SELL
+from stock.mock_platform import original_strategy_engine, strategy_engine
+from stock.mock_platform.analysis_context import AnalysisContext
+from stock.mock_platform.batch import run_pipeline
+
+"""
+策略引擎对比：同一批股票只获取一次数据、每个指标只计算一次，在共享的分析上下文上同时执行
+strategy_engine（按标签加权）、original_strategy_engine（融合评分）以及注册的其他变体，输出逐只股票的分歧表
+
+- 每个引擎（变体）是一个函数 evaluate(context) -> {'decision': 综合建议, 'score': 得分, 'market_type': 市场类型}，
+  从 AnalysisContext 读取原始指标和操作建议，不重复计算指标
+- 总耗时随股票数量增长，而不是 股票数量 × 引擎数量
+- register_engine_variant 注册新的变体（如调整后的权重表），COMPARE_CONFIG["ENGINES"] 选择参与对比的引擎
+"""
+
+# 综合建议 -> 方向（两个引擎的建议措辞不同，按买入 / 卖出 / 观望方向判断是否一致）
+BUY_DECISIONS = ('强烈买入', '买入', '谨慎买入')
+SELL_DECISIONS = ('强烈卖出', '卖出', '谨慎卖出')
+
+
+def decision_direction(decision):
+    """综合建议的方向：BUY / SELL / HOLD（信号编码）"""
+    if decision in BUY_DECISIONS:
+        return BUY
+    if decision in SELL_DECISIONS:
+        return SELL
+    return HOLD
+
+
+# ================================
+# 引擎变体
+# ================================
+
+def evaluate_strategy_engine(context, indicator_weights=None):
+    """
+    strategy_engine：各指标建议按市场类型调整后的权重加权，再与策略规则融合
+
+    :param indicator_weights: 权重表，None 使用 strategy_engine.indicator_weights
+    """
+    engine = strategy_engine
+    indicator_weights = engine.indicator_weights if indicator_weights is None else indicator_weights
+    indicators = engine.calculate_indicators(context.data, context=context)
+    # 两个引擎的市场类型识别方法不同，缓存键分开
+    market_type = context.cached('strategy_market_type', lambda ctx: engine.detect_market_type(ctx.data, ctx))
+    buy_score, sell_score, _ = engine.weighted_scores(
+        indicators, engine.adjust_weights_for_market(market_type, indicator_weights))
+    decision, _ = engine.final_suggestion(indicators, market_type, indicator_weights)
+    return {'decision': decision, 'score': buy_score - sell_score, 'market_type': market_type}
+
+
+def evaluate_original_strategy_engine(context, adjust_for_market=True):
+    """
+    original_strategy_engine：各指标原始值打分后按权重融合
+
+    :param adjust_for_market: 是否按市场类型调整权重（False 时使用固定权重）
+    """
+    engine = original_strategy_engine
+    raw_values = context.raw_indicators
+    market_type = context.cached('original_market_type', lambda ctx: engine.calculate_market_type_from_indicators(
+        {name: {'raw': ctx.raw(name)} for name in ('adx', 'rsi', 'bollinger')}, ctx.data))
+    scores = context.cached('scores', lambda ctx: engine.score_indicators_from_raw(raw_values))
+    weights = engine.adjust_weights_for_market(market_type) if adjust_for_market else engine.indicator_weights
+    operation = engine.generate_operation_suggestion_from_scores(scores, weights, context.data)
+    return {'decision': operation['suggestion'], 'score': operation['final_score'], 'market_type': market_type}
+
+
+# 引擎名称 -> evaluate(context)
+ENGINE_VARIANTS = {
+    'strategy_engine': evaluate_strategy_engine,
+    'original_strategy_engine': evaluate_original_strategy_engine,
+    'original_static_weights': partial(evaluate_original_strategy_engine, adjust_for_market=False),
+}
+
+
+def register_engine_variant(name, evaluate):
+    """
+    注册一个引擎变体
+
+    :param name: 变体名称（对比表的列名）
+    :param evaluate: evaluate(context) -> {'decision': ..., 'score': ..., 'market_type': ...}；
+                     多进程对比时需为模块级函数或其 partial
+    """
+    ENGINE_VARIANTS[name] = evaluate
+    return evaluate
+
+
+def resolve_engines(engines=None):
+    """参与对比的引擎名称，None 读取 COMPARE_CONFIG["ENGINES"]（为空时取全部已注册变体）"""
+    engines = list(engines or COMPARE_CONFIG.get("ENGINES") or ENGINE_VARIANTS)
+    unknown = [name for name in engines if name not in ENGINE_VARIANTS]
+    if unknown:
+        raise ValueError(f"未注册的引擎: {unknown}，可选 {list(ENGINE_VARIANTS)}")
+    return engines
+
+
+# ================================
+# 对比
+# ================================
+
+# 在共享上下文上执行全部引擎（对比的分析函数，可在子进程中执行）
+def compare_ticker_data(ticker, stock_data, engines):
+    if stock_data is None or stock_data.empty:
+        raise ValueError(f"没有有效的股票数据: {ticker['symbol']}")
+    context = AnalysisContext(stock_data)
+    results = {name: ENGINE_VARIANTS[name](context) for name in engines}
+    directions = {name: decision_direction(result['decision']) for name, result in results.items()}
+    return {
+        'ticker': ticker['symbol'],
+        'ticker_name': ticker['name'],
+        'results': results,
+        'directions': directions,
+        'agree': len(set(directions.values())) <= 1,
+    }
+
+
+def compare_engines(stocks, start_date, end_date, engines=None, fetch_data=None, workers=None, fetch_workers=None):
+    """
+    对比多个引擎：每只股票获取一次数据、计算一次指标，全部引擎在同一个分析上下文上给出综合建议
+
+    :param stocks: [{'symbol': ..., 'name': ...}, ...]
+    :param engines: 参与对比的引擎名称，None 读取 COMPARE_CONFIG["ENGINES"]
+    :param fetch_data: 可选数据源函数 fetch_data(symbol, start_date, end_date)，默认使用 DataFetcher
+    :param workers: 分析进程数，None 读取 BATCH_CONFIG["WORKERS"]
+    :param fetch_workers: 获取数据的线程数，None 读取 BATCH_CONFIG["FETCH_WORKERS"]
+    :return: dict，rows 为与 stocks 顺序一致的逐只股票结果（失败时 error 字段记录错误信息），
+             engines 为引擎名称，pairwise 为 {(引擎A, 引擎B): 方向不一致的股票数}
+    """
+    engines = resolve_engines(engines)
+    batch = run_pipeline(partial(strategy_engine.fetch_ticker, start_date=start_date, end_date=end_date,
+                                 fetch_data=fetch_data),
+                         partial(compare_ticker_data, engines=engines),
+                         stocks, workers=workers, fetch_workers=fetch_workers)
+
+    rows = []
+    for item in batch:
+        ticker = item['item']
+        if item['error'] is not None:
+            trace(ERROR, 'compare.error', f"\n【错误】：{ticker['symbol']} 对比失败：{item['error']}",
+                  ticker=ticker['symbol'], error=item['error'])
+            rows.append({'ticker': ticker['symbol'], 'ticker_name': ticker['name'], 'error': item['error']})
+            continue
+        row = item['result']
+        row['error'] = None
+        rows.append(row)
+
+    compared = [row for row in rows if row['error'] is None]
+    pairwise = {(a, b): sum(row['directions'][a] != row['directions'][b] for row in compared)
+                for a, b in combinations(engines, 2)}
+    return {'rows': rows, 'engines': engines, 'pairwise': pairwise}
+
+
+def print_comparison_table(comparison, only_disagreements=None):
+    """
+    在控制台输出逐只股票的分歧表和两两分歧统计
+
+    :param only_disagreements: 只列出引擎间方向不一致的股票，None 读取 COMPARE_CONFIG["ONLY_DISAGREEMENTS"]
+    """
+    if only_disagreements is None:
+        only_disagreements = COMPARE_CONFIG.get("ONLY_DISAGREEMENTS", False)
+    engines = comparison['engines']
+    compared = [row for row in comparison['rows'] if row['error'] is None]
+    failed = [row for row in comparison['rows'] if row['error'] is not None]
+    disagreements = [row for row in compared if not row['agree']]
+
+    print(f"\n共对比 {len(compared)} 只股票（失败 {len(failed)} 只），{len(disagreements)} 只引擎间方向不一致：")
+    print("| 股票 | " + " | ".join(engines) + " | 一致 |")
+    print("|" + "---|" * (len(engines) + 2))
+    for row in (disagreements if only_disagreements else compared):
+        cells = [f"{row['results'][name]['decision']}（{row['results'][name]['score']:.3f}）" for name in engines]
+        print(f"| {row['ticker_name']}（{row['ticker']}） | " + " | ".join(cells) + f" | {'✓' if row['agree'] else '✗'} |")
+
+    print("\n两两分歧（方向不一致的股票数 / 占比）：")
+    for (a, b), count in comparison['pairwise'].items():
+        share = count / len(compared) if compared else 0.0
+        print(f" - {a} vs {b}：{count} / {share:.1%}")
+    for row in failed:
+        print(f"\n【错误】：{row['ticker']} 对比失败：{row['error']}")
+
+
+if __name__ == '__main__':
+    end_date = '2025-04-12'
+    start_date = (datetime.datetime.strptime(end_date, "%Y-%m-%d") - timedelta(days=365)).strftime("%Y-%m-%d")
+
+    print_comparison_table(compare_engines(original_strategy_engine.from_json(), start_date, end_date))
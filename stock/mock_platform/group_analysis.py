@@ -1,6 +1,7 @@
 import datetime
 from datetime import timedelta
 from stock.data.stock_analysis import StockAnalysis
+from stock.data.trace import INFO, trace, tracing
 from stock.indicator.rsi import *
 from stock.indicator.macd import *
 from stock.indicator.bollinger_bands import *
@@ -29,13 +30,13 @@ def calculate_indicators(stock_data):
 
 def strategy_with_reason(name, logic_desc, signals, decision):
     """
-    打印策略名称、逻辑说明、指标判断和最终建议
+    输出策略名称、逻辑说明、指标判断和最终建议
     """
-    print(f"\n【{name}】")
-    print(f"策略逻辑：{logic_desc}")
-    for indicator, signal in signals.items():
-        print(f" - {indicator.upper()}：{signal}")
-    print(f"策略建议：{decision}")
+    if tracing(INFO):
+        lines = [f"\n【{name}】", f"策略逻辑：{logic_desc}"]
+        lines += [f" - {indicator.upper()}：{signal}" for indicator, signal in signals.items()]
+        lines.append(f"策略建议：{decision}")
+        trace(INFO, 'strategy.result', "\n".join(lines), strategy=name, decision=decision)
     return decision
 
 def strategy_1(stock_data, indicators):
@@ -108,23 +109,22 @@ def final_advice(stock_data):
     buy_count = decisions.count("买入")
     sell_count = decisions.count("卖出")
 
-    print("\n【综合建议】")
+    trace(INFO, 'strategy.summary', "\n【综合建议】")
     if buy_count >= 2:
-        print(f"✔ 当前有 {buy_count} 个策略支持买入，建议：买入")
+        trace(INFO, 'strategy.final', f"✔ 当前有 {buy_count} 个策略支持买入，建议：买入", decision="买入")
         return "买入"
     elif sell_count >= 2:
-        print(f"✘ 当前有 {sell_count} 个策略支持卖出，建议：卖出")
+        trace(INFO, 'strategy.final', f"✘ 当前有 {sell_count} 个策略支持卖出，建议：卖出", decision="卖出")
         return "卖出"
     else:
-        print(f"当前无明显共识，建议：观望")
+        trace(INFO, 'strategy.final', f"当前无明显共识，建议：观望", decision="观望")
         return "观望"
 
 def analyze(stock, stock_data):
-    print(f"\n\n==============================")
-    print(f"正在分析股票: {stock.ticker}")
-    print("==============================")
+    trace(INFO, 'analyze.start', f"\n\n==============================\n正在分析股票: {stock.ticker}\n==============================",
+          ticker=stock.ticker)
     decision = final_advice(stock_data)
-    print(f"\n【最终操作建议】：{decision}")
+    trace(INFO, 'analyze.result', f"\n【最终操作建议】：{decision}", ticker=stock.ticker, decision=decision)
     return decision
 
 def main():
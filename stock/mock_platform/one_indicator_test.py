@@ -78,7 +78,8 @@ def backtest(stock):
         future_returns = calculate_future_return(stock_data, trade_date)
 
         # 计算每个指标的准确性
-        for indicator, recommendation in indicator_signals.items():
+        for indicator, signal in indicator_signals.items():
+            recommendation = signal['suggestion']
             best_future_days = max(future_returns, key=lambda d: future_returns[d] if future_returns[d] is not None else -1)
 
             if future_returns[best_future_days] is not None:
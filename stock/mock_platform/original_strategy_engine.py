@@ -1,8 +1,15 @@
 import datetime
 from datetime import timedelta
+from functools import partial
 from typing import Sequence
 
+from stock.data.config import BATCH_CONFIG
 from stock.data.stock_analysis import StockAnalysis
+from stock.data.trace import DEBUG, ERROR, INFO, WARNING, trace, tracing
+from stock.mock_platform.analysis_context import AnalysisContext
+from stock.mock_platform.batch import run_batch, run_pipeline
+from stock.mock_platform.results import IndicatorResult, ScoreResult, retain_raw
+from stock.simulator.simulation import Simulation
 from stock.indicator.rsi import *
 from stock.indicator.macd import *
 from stock.indicator.bollinger_bands import *
@@ -12,6 +19,7 @@ from stock.indicator.stochastic_rsi import *
 from stock.indicator.adx import *
 from stock.indicator.atr import *
 from stock.indicator.keltner_channel import *
+from stock.indicator.support_resistance import resolve_params, support_resistance_levels, support_resistance_series
 import json
 import ast
 
@@ -36,65 +44,24 @@ indicator_weights = {
 
 
 # ==== Step 1: 指标计算 ====
-def calculate_indicators_raw_and_suggestions(stock_data):
-    rsi_raw = calculate_rsi_for_multiple_windows(stock_data)
-    macd_line, signal_line, macd_hist = calculate_macd(stock_data['close'])
-    boll_raw = calculate_bollinger_bands(stock_data)
-    boll_signal = generate_bollinger_signals(boll_raw)
-    obv_raw = calculate_obv(stock_data)
-    vwap_raw = calculate_vwap(stock_data)
-    stoch_rsi_raw = calculate_stochastic_rsi(stock_data)
-    adx_raw = calculate_adx_safe(stock_data)
-    atr_raw = calculate_atr(stock_data)
-    keltner_raw = calculate_keltner_channel(stock_data)
+def calculate_indicators_raw_and_suggestions(stock_data, context=None):
+    """
+    计算各指标的原始值、操作建议和解释，每个指标只计算一次、每条建议只生成一次
 
-    return {
-        'rsi': {
-            'raw': rsi_raw,
-            'suggestion': generate_operation_suggestion(rsi_raw)['suggestion'],
-            'explanation': generate_operation_suggestion(rsi_raw)['detailed_suggestion']
-        },
-        'macd': {
-            'raw': {'macd': macd_line, 'signal': signal_line, 'hist': macd_hist},
-            'suggestion': generate_macd_signal(macd_line, signal_line, macd_hist)['suggestion'],
-            'explanation': generate_macd_signal(macd_line, signal_line, macd_hist)['detailed_suggestion']
-        },
-        'bollinger': {
-            'raw': boll_raw,
-            'suggestion': generate_bollinger_operations(boll_signal)['suggestion'],
-            'explanation': generate_bollinger_operations(boll_signal)['detailed_suggestion']
-        },
-        'obv': {
-            'raw': obv_raw,
-            'suggestion': generate_obv_operation_suggestion(obv_raw, stock_data)['suggestion'],
-            'explanation': generate_obv_operation_suggestion(obv_raw, stock_data)['detailed_suggestion']
-        },
-        'vwap': {
-            'raw': vwap_raw,
-            'suggestion': generate_vwap_operation_suggestion(stock_data, vwap_raw)['suggestion'],
-            'explanation': generate_vwap_operation_suggestion(stock_data, vwap_raw)['detailed_suggestion']
-        },
-        'stochastic_rsi': {
-            'raw': stoch_rsi_raw,
-            'suggestion': generate_stochastic_rsi_operation_suggestion(stoch_rsi_raw)['suggestion'],
-            'explanation': generate_stochastic_rsi_operation_suggestion(stoch_rsi_raw)['detailed_suggestion']
-        },
-        'adx': {
-            'raw': adx_raw,
-            'suggestion': generate_adx_operation_suggestion(adx_raw)['suggestion'],
-            'explanation': generate_adx_operation_suggestion(adx_raw)['detailed_suggestion']
-        },
-        'atr': {
-            'raw': atr_raw,
-            'suggestion': generate_atr_operation_suggestion(atr_raw)['suggestion'],
-            'explanation': generate_atr_operation_suggestion(atr_raw)['detailed_suggestion']
-        },
-        'keltner': {
-            'raw': keltner_raw,
-            'suggestion': generate_keltner_channel_operation_suggestion(keltner_raw)['suggestion'],
-            'explanation': generate_keltner_channel_operation_suggestion(keltner_raw)['detailed_suggestion']
+    :param stock_data: 股票数据
+    :param context: AnalysisContext，传入时复用其中已计算的结果
+    """
+    if context is None:
+        context = AnalysisContext(stock_data)
+
+    indicators = {}
+    for name, suggestion in context.suggestions.items():
+        indicators[name] = {
+            'raw': context.raw(name),
+            'suggestion': suggestion['suggestion'],
+            'explanation': suggestion['detailed_suggestion']
         }
-    }
+    return indicators
 
 def score_indicators_from_raw(indicators_raw, market_type="trend"):
     """
@@ -142,8 +109,10 @@ def score_indicators_from_raw(indicators_raw, market_type="trend"):
 
     # 4. OBV评分（斜率为正 → 买入）
     obv = indicators_raw.get('obv')
-    if obv is not None and not obv.empty and len(obv) >= 5:
-        slope = np.polyfit(range(5), obv[-5:], 1)[0]
+    slope_window = OBV_CONFIG.get("obv_slope_window", 5)
+    if obv is not None and not obv.empty and len(obv) >= slope_window:
+        # 只取最后一个窗口做闭式回归；全历史评分时可直接对整段 OBV 调用 calculate_obv_slope
+        slope = calculate_obv_slope(obv.iloc[-slope_window:], slope_window).iloc[-1]
         scores['obv'] = 1 / (1 + np.exp(-np.clip(slope, -500, 500)))
 
     # VWAP评分（价格低于VWAP → 低估）
@@ -205,8 +174,10 @@ def generate_operation_suggestion_from_scores(indicator_scores, indicator_weight
     for name, score in indicator_scores.items():
         weight = indicator_weights.get(name, 0)
 
-        # 打印每个指标的得分和权重，帮助调试
-        print(f"Processing {name} - Score: {score}, Weight: {weight}")
+        # 输出每个指标的得分和权重，帮助调试
+        if tracing(DEBUG):
+            trace(DEBUG, 'score.indicator', f"Processing {name} - Score: {score}, Weight: {weight}",
+                  indicator=name, score=score, weight=weight)
 
         # VWAP 特殊处理：如果是 Series，取最后一个值与当前价格比较
         if 'vwap' in name.lower() and isinstance(score, pd.Series):
@@ -221,11 +192,11 @@ def generate_operation_suggestion_from_scores(indicator_scores, indicator_weight
                 else:
                     score = 0.5
             except Exception as e:
-                print(f"❌ VWAP 序列处理异常: {e}")
+                trace(WARNING, 'score.vwap_error', f"❌ VWAP 序列处理异常: {e}", error=str(e))
                 score = 0.5  # 给中性评分
 
         elif isinstance(score, dict):
-            print(f"⚠️ Warning: {name} 的 score 是 dict，尝试提取 'value'")
+            trace(WARNING, 'score.dict', f"⚠️ Warning: {name} 的 score 是 dict，尝试提取 'value'", indicator=name)
             score = score.get('value', 0)
 
         # 确保 score 是数值类型
@@ -233,11 +204,12 @@ def generate_operation_suggestion_from_scores(indicator_scores, indicator_weight
             weighted_sum += score * weight
             total_weight += weight
         else:
-            print(f"Error: Indicator '{name}' score is not a valid number: {score}")
+            trace(WARNING, 'score.invalid', f"Error: Indicator '{name}' score is not a valid number: {score}",
+                  indicator=name, score=score)
 
     # 计算最终分数
     final_score = weighted_sum / total_weight if total_weight > 0 else 0.5
-    print(f"Final weighted score: {final_score}")
+    trace(DEBUG, 'score.final', f"Final weighted score: {final_score}", final_score=final_score)
 
     # 建议映射规则
     if final_score >= 0.8:
@@ -253,8 +225,8 @@ def generate_operation_suggestion_from_scores(indicator_scores, indicator_weight
     else:
         suggestion = '强烈卖出'
 
-    # 打印最终的操作建议
-    print(f"Final suggestion: {suggestion}")
+    # 输出最终的操作建议
+    trace(DEBUG, 'score.suggestion', f"Final suggestion: {suggestion}", suggestion=suggestion)
 
     # 仓位建议（根据评分生成不同仓位的建议）
     if suggestion == "强烈买入":
@@ -292,6 +264,16 @@ def generate_operation_suggestion_from_scores(indicator_scores, indicator_weight
         'take_profit': take_profit
     }
 
+# 融合评分 -> 综合建议（按顺序取第一个满足 final_score >= 阈值 的建议，都不满足时为强烈卖出）
+FINAL_SCORE_THRESHOLDS = (
+    (0.9, '强烈买入'),
+    (0.75, '买入'),
+    (0.6, '谨慎买入'),
+    (0.4, '观望'),
+    (0.25, '卖出'),
+)
+FINAL_SCORE_DEFAULT = '强烈卖出'
+
 def generate_operation_suggestion_from_scores(indicator_scores, indicator_weights, data):
     """
     加权融合评分，生成综合建议，并提供不同持仓情况下的具体操作建议。
@@ -315,11 +297,11 @@ def generate_operation_suggestion_from_scores(indicator_scores, indicator_weight
                 else:
                     score = 0.5
             except Exception as e:
-                print(f"❌ VWAP 序列处理异常: {e}")
+                trace(WARNING, 'score.vwap_error', f"❌ VWAP 序列处理异常: {e}", error=str(e))
                 score = 0.5  # 给中性评分
 
         elif isinstance(score, dict):
-            print(f"⚠️ Warning: {name} 的 score 是 dict，尝试提取 'value'")
+            trace(WARNING, 'score.dict', f"⚠️ Warning: {name} 的 score 是 dict，尝试提取 'value'", indicator=name)
             score = score.get('value', 0)
 
         # 确保 score 是数值类型
@@ -327,24 +309,15 @@ def generate_operation_suggestion_from_scores(indicator_scores, indicator_weight
             weighted_sum += score * weight
             total_weight += weight
         else:
-            print(f"Error: Indicator '{name}' score is not a valid number: {score}")
+            trace(WARNING, 'score.invalid', f"Error: Indicator '{name}' score is not a valid number: {score}",
+                  indicator=name, score=score)
 
     # 计算最终分数
     final_score = weighted_sum / total_weight if total_weight > 0 else 0.5
 
     # 调整映射规则，避免过于宽松的买入条件
-    if final_score >= 0.9:
-        suggestion = '强烈买入'
-    elif final_score >= 0.75:
-        suggestion = '买入'
-    elif final_score >= 0.6:
-        suggestion = '谨慎买入'
-    elif final_score >= 0.4:
-        suggestion = '观望'
-    elif final_score >= 0.25:
-        suggestion = '卖出'
-    else:
-        suggestion = '强烈卖出'
+    suggestion = next((label for threshold, label in FINAL_SCORE_THRESHOLDS if final_score >= threshold),
+                      FINAL_SCORE_DEFAULT)
 
     # 仓位建议（根据评分生成不同仓位的建议）
     if suggestion == "强烈买入":
@@ -371,7 +344,7 @@ def generate_operation_suggestion_from_scores(indicator_scores, indicator_weight
         operation_detail = "建议迅速减仓，仓位控制在 10% 以下。"
         stop_loss = "建议设置止损位于当前价格上方 5% 左右。"
         take_profit = "建议设置止盈位于当前价格下方 15% 左右。"
-    print(suggestion)
+    trace(DEBUG, 'score.suggestion', suggestion, final_score=final_score, suggestion=suggestion)
     return {
         'final_score': round(final_score, 3),
         'suggestion': suggestion,
@@ -408,6 +381,11 @@ def export_analysis_to_markdown(all_results, output_path):
             f.write(f"### 止盈建议：{take_profit}\n\n")
             f.write(f"### 支撑位：{support}\n\n")
             f.write(f"### 压力位：{resistance}\n\n")
+            levels = result.get('support_resistance_levels')
+            if levels and len(levels) > 1:
+                f.write("### 多周期支撑位 / 压力位：" + "，".join(
+                    f"{window}日 {level['support']:.2f} / {level['resistance']:.2f}" for window, level in levels.items())
+                        + "\n\n")
 
             f.write("### 各指标建议与解释：\n\n")
 
@@ -434,29 +412,11 @@ def calculate_support_resistance(data, window=5, buffer=0.02):
     :param buffer: 用于调整压力位和支撑位的偏差值（防止与当前股价完全重合）
     :return: 支撑位和压力位的字典
     """
-    # 如果 data 是一个切片，可以通过 .copy() 显式创建副本
-    data = data.copy()
-
-    # 然后进行修改
-    data.loc[:, 'rolling_high'] = data['close'].rolling(window).max()
-    data.loc[:, 'rolling_low'] = data['close'].rolling(window).min()
-
-# 获取当前支撑位（最近5天最低价）和压力位（最近5天最高价）
-    support_level = data['rolling_low'].iloc[-1]
-    resistance_level = data['rolling_high'].iloc[-1]
-
-    # 如果当前股价接近历史高点，加入 buffer 调整压力位
-    current_price = data['close'].iloc[-1]
-    if current_price >= resistance_level:
-        resistance_level = current_price * (1 + buffer)
-
-    # 如果当前股价接近历史低点，加入 buffer 调整支撑位
-    if current_price <= support_level:
-        support_level = current_price * (1 - buffer)
-
+    # 只读取最后一个窗口；多窗口期与枢轴点见 stock/indicator/support_resistance.py
+    levels = support_resistance_levels(data, windows=(window,), buffer=buffer, pivots=False)
     return {
-        'support': support_level,
-        'resistance': resistance_level
+        'support': levels['support'],
+        'resistance': levels['resistance']
     }
 
 
@@ -466,16 +426,20 @@ def analyze(stock, stock_data):
 
     # 检查 stock_data 是否为 None 或为空，或者缺少必要的字段
     if stock_data is None or stock_data.empty or not all(field in stock_data.columns for field in required_fields):
-        print(f"\n【错误】：没有有效的股票数据或缺少必要的字段")
+        trace(ERROR, 'analyze.no_data', "\n【错误】：没有有效的股票数据或缺少必要的字段")
         return {"final_decision": "没有股票数据", "reasons": [], "indicators": {}}
 
 
     # 如果数据有效，开始分析
-    print(f"\n==============================")
-    print(f"正在分析股票: {stock.ticker} - {stock.ticker_name}")
+    trace(INFO, 'analyze.start', f"\n==============================\n正在分析股票: {stock.ticker} - {stock.ticker_name}",
+          ticker=stock.ticker)
+
+    # 本次分析的上下文：每个指标只计算一次，市场类型、评分、支撑/压力位都从这里读取
+    context = AnalysisContext(stock_data)
+    stock_data = context.data
 
-    indicators = calculate_indicators_raw_and_suggestions(stock_data)
-    market_type = calculate_market_type_from_indicators(indicators,stock_data)
+    indicators = calculate_indicators_raw_and_suggestions(stock_data, context)
+    market_type = context.cached('market_type', lambda ctx: calculate_market_type_from_indicators(indicators, ctx.data))
     dynamic_indicator_weights = adjust_weights_for_market(market_type)  # 动态调整权重
 
     # 提取原始值、解释和建议
@@ -483,11 +447,11 @@ def analyze(stock, stock_data):
     explanations = {key: indicators[key].get('explanation', '无解释') for key in indicators}
     suggestions = {key: indicators[key].get('suggestion', '无建议') for key in indicators}
 
-    indicator_scores = score_indicators_from_raw(raw_values)
+    indicator_scores = context.cached('scores', lambda ctx: score_indicators_from_raw(raw_values))
     operation_suggestion = generate_operation_suggestion_from_scores(indicator_scores, dynamic_indicator_weights,stock_data)
 
-    # 计算支撑位和压力位
-    support_resistance = calculate_support_resistance(stock_data)
+    # 计算支撑位和压力位（主窗口期之外另有多窗口期与可选的枢轴点，见 SUPPORT_RESISTANCE_CONFIG）
+    support_resistance = context.cached('support_resistance', lambda ctx: support_resistance_levels(ctx.data))
 
     # 返回操作建议和其他相关数据
     final_score = operation_suggestion['final_score']
@@ -509,6 +473,8 @@ def analyze(stock, stock_data):
         'take_profit': take_profit,
         "support": support_resistance["support"],  # 支撑位
         "resistance": support_resistance["resistance"],  # 压力位
+        "support_resistance_levels": support_resistance["levels"],  # 各窗口期的支撑位 / 压力位
+        "pivots": support_resistance["pivots"],  # 枢轴点（未启用时为 None）
         'raw_values': raw_values,  # 添加原始值
         'explanations': explanations,  # 添加解释
         'suggestions': suggestions  # 添加建议
@@ -544,6 +510,25 @@ def adjust_weights_for_market(market_type="trend"):
     return adjusted_weights
 
 
+# 市场类型阈值（calculate_market_type_from_indicators 与 calculate_market_type_series 共用）
+MARKET_TYPE_THRESHOLDS = {
+    'trend_adx': 25,    # ADX 高于该值：趋势市场
+    'rsi_low': 30,      # RSI 在 (rsi_low, rsi_high) 之间且收盘价位于布林带上下轨之间：震荡市场
+    'rsi_high': 70,
+}
+
+# 市场类型（全历史序列的类别顺序，编码即下标）
+MARKET_TYPES = ("neutral", "trend", "sideways")
+
+
+def _latest_window_rsi(rsi_values):
+    """多窗口期 RSI 中用于市场类型判断的序列：优先默认窗口期，否则为各窗口期的均值"""
+    default_window = RSI_CONFIG.get("default_window", 14)
+    if default_window in rsi_values:
+        return rsi_values[default_window]
+    return pd.concat(list(rsi_values.values()), axis=1).mean(axis=1)
+
+
 def calculate_market_type_from_indicators(indicators, stock_data):
     """
     基于 `calculate_indicators_raw_and_suggestions` 函数的返回值来判断市场类型。
@@ -564,69 +549,403 @@ def calculate_market_type_from_indicators(indicators, stock_data):
     if isinstance(adx_value, pd.Series):
         adx_value = adx_value.iloc[-1]  # 获取最后一个值
 
+    thresholds = MARKET_TYPE_THRESHOLDS
+
     # 判断趋势市场（ADX > 25 强趋势）
-    if adx_value > 25:
+    if adx_value > thresholds['trend_adx']:
         return "trend"
 
     # 判断震荡市场（RSI 在 30 和 70 之间，且布林带内震荡）
-    if isinstance(rsi_values, pd.Series):
+    if isinstance(rsi_values, dict):
+        # 多窗口期 RSI：优先使用默认窗口期，否则取各窗口期的均值
+        latest_rsi = _latest_window_rsi(rsi_values).iloc[-1]
+    elif isinstance(rsi_values, pd.Series):
         latest_rsi = rsi_values.iloc[-1]  # 获取 RSI 序列的最新值
     else:
         latest_rsi = rsi_values  # 如果 rsi_values 不是 Series，直接使用它
 
     # 判断 RSI 是否在 30 和 70 之间，且布林带上下轨之间震荡
-    if 30 < latest_rsi < 70:
+    if thresholds['rsi_low'] < latest_rsi < thresholds['rsi_high']:
         # 检查股票价格是否在布林带的上下轨之间
         latest_close = stock_data['close'].iloc[-1]
-        if bollinger['lower'] < latest_close < bollinger['upper']:
+        if bollinger['Lower_Band'].iloc[-1] < latest_close < bollinger['Upper_Band'].iloc[-1]:
             return "sideways"
 
     # 默认判断为中性市场
     return "neutral"
 
 
+def calculate_market_type_series(indicators, stock_data):
+    """
+    一次向量化判断每根K线的市场类型，阈值与 calculate_market_type_from_indicators 一致
+
+    预热期之后第 i 根K线的结果等于对前 i + 1 根K线调用 calculate_market_type_from_indicators 的结果
+    （预热期内 ADX 的平滑初值取决于切片长度，结果可能不同）。
+
+    :param indicators: calculate_indicators_raw_and_suggestions 的返回值（需包含 adx / rsi / bollinger）
+    :param stock_data: 股票数据
+    :return: pd.Series（category 类型，类别顺序为 MARKET_TYPES，.cat.codes 即整数编码）
+    """
+    adx_values = indicators['adx']['raw']
+    rsi_values = indicators['rsi']['raw']
+    bollinger = indicators['bollinger']['raw']
+
+    if isinstance(rsi_values, dict):
+        rsi_values = _latest_window_rsi(rsi_values)
+
+    adx_values = np.asarray(adx_values, dtype=float)
+    rsi_values = np.asarray(rsi_values, dtype=float)
+    close = stock_data['close'].to_numpy(dtype=float)
+    lower = bollinger['Lower_Band'].to_numpy(dtype=float)
+    upper = bollinger['Upper_Band'].to_numpy(dtype=float)
+
+    thresholds = MARKET_TYPE_THRESHOLDS
+    codes = np.select(
+        [
+            adx_values > thresholds['trend_adx'],
+            (thresholds['rsi_low'] < rsi_values) & (rsi_values < thresholds['rsi_high'])
+            & (lower < close) & (close < upper),
+        ],
+        [MARKET_TYPES.index("trend"), MARKET_TYPES.index("sideways")],
+        default=MARKET_TYPES.index("neutral")
+    ).astype(np.int8)
+    return pd.Series(pd.Categorical.from_codes(codes, MARKET_TYPES), index=stock_data.index, name='market_type')
+
+
+
+
+
+# ==== 全历史向量化评分 ====
+# score_indicators_from_raw 中评分的计算顺序（融合时按此顺序累加）
+SCORE_INDICATORS = ('rsi', 'macd', 'bollinger', 'obv', 'vwap', 'stochastic_rsi', 'adx', 'atr', 'keltner')
+
 
+def _prefix_has_nan(values):
+    # 截至每根K线（含）是否出现过 NaN，对应标量路径中对整段序列的 isna().any() 检查
+    return np.cumsum(np.isnan(values)) > 0
+
+
+def score_indicators_series(indicators_raw, market_type="trend"):
+    """
+    score_indicators_from_raw 的全历史版本：一次计算每根K线上各指标的 [0,1] 评分
+
+    第 i 行等于对前 i + 1 根K线依次调用 score_indicators_from_raw 和 generate_operation_suggestion_from_scores
+    时参与融合的评分（VWAP 列为融合时换算后的评分；预热期内 ADX 等指标的初值取决于切片长度，结果可能不同）。
+    标量路径中 min / max 对 NaN 的取舍、评分缺失（不参与融合）的条件都保持不变。
+
+    :param indicators_raw: {指标名称: 原始值}（AnalysisContext.raw_indicators）
+    :param market_type: 评分调整使用的市场类型，字符串（全部K线相同）或与K线等长的序列
+    :return: (scores, available)，均为 K线 × 指标 的 DataFrame；available 为 False 表示该K线上没有该指标的评分
+    """
+    boll = indicators_raw['bollinger']
+    index = boll.index
+    current_close = boll['close'].to_numpy(dtype=float)  # 每根K线上的“最新收盘价”
+    n = len(current_close)
+    all_bars = np.ones(n, dtype=bool)
+    scores = {}
+    available = {}
+
+    with np.errstate(divide='ignore', invalid='ignore', over='ignore'):
+        # 1. RSI：标量路径对截至当前K线的全部窗口期 RSI 整体取均值，任一值为 NaN 时均值为 NaN（评分 0.5）
+        rsi_values = indicators_raw.get('rsi')
+        if isinstance(rsi_values, dict):
+            stacked = np.column_stack([np.asarray(values, dtype=float) for values in rsi_values.values()])
+            rsi_value = np.cumsum(stacked.sum(axis=1)) / (stacked.shape[1] * np.arange(1, n + 1))
+        else:
+            rsi_value = np.asarray(rsi_values, dtype=float)
+        oversold = (30 - rsi_value) / 30
+        overbought = 1 - (rsi_value - 70) / 30
+        scores['rsi'] = np.select(
+            [np.isnan(rsi_value), rsi_value < 30, rsi_value > 70],
+            [0.5, np.where(oversold < 1, oversold, 1), np.where(overbought > 0, overbought, 0)],
+            default=0.5)
+        available['rsi'] = all_bars
+
+        # 2. MACD：柱状图 Sigmoid 映射
+        macd_hist = indicators_raw.get('macd', {}).get('hist', None)
+        if macd_hist is not None and not macd_hist.empty:
+            scores['macd'] = 1 / (1 + np.exp(-macd_hist.to_numpy(dtype=float) * 10))
+            available['macd'] = all_bars
+
+        # 3. Bollinger：与标量路径相同，使用当日最高 / 最低价作为区间，区间宽度不大于 0 时无评分
+        if not boll.empty:
+            lower = boll['low'].to_numpy(dtype=float)
+            width = boll['high'].to_numpy(dtype=float) - lower
+            scores['bollinger'] = 1 - (current_close - lower) / width
+            available['bollinger'] = width > 0
+
+        # 4. OBV：最近 obv_slope_window 根K线的回归斜率，K线数不足窗口时无评分
+        obv = indicators_raw.get('obv')
+        slope_window = OBV_CONFIG.get("obv_slope_window", 5)
+        if obv is not None and not obv.empty and len(obv) >= slope_window:
+            slope = calculate_obv_slope(obv, slope_window).to_numpy(dtype=float)
+            scores['obv'] = 1 / (1 + np.exp(-np.clip(slope, -500, 500)))
+            available['obv'] = np.arange(n) >= slope_window - 1
+
+        # VWAP：标量路径先得到偏离度 Sigmoid 评分，融合时再按“收盘价相对该评分的偏离”换算，这里直接给出换算后的评分；
+        # 截至当前K线出现过 NaN 时无评分
+        vwap = indicators_raw.get('vwap')
+        if vwap is not None and not vwap.empty:
+            vwap = vwap.to_numpy(dtype=float)
+            sigmoid = np.clip(1 / (1 + np.exp((current_close - vwap) / vwap * 20)), 0, 1)
+            deviation = (current_close - sigmoid) / sigmoid * 5
+            deviation = np.where(deviation < 0.5, deviation, 0.5)    # min(0.5, x)
+            deviation = np.where(deviation > -0.5, deviation, -0.5)  # max(-0.5, x)
+            scores['vwap'] = np.where(sigmoid != 0, np.round(0.5 + deviation, 3), 0.5)
+            available['vwap'] = ~_prefix_has_nan(vwap)
+
+        # Stochastic RSI：只有原始值为 Series 且截至当前K线没有 NaN 时才有评分
+        stoch = indicators_raw.get('stochastic_rsi')
+        if isinstance(stoch, pd.Series) and not stoch.empty:
+            stoch = stoch.to_numpy(dtype=float)
+            scores['stochastic_rsi'] = 1 - stoch
+            available['stochastic_rsi'] = ~_prefix_has_nan(stoch)
+
+        # ADX：min(1.0, adx / 50)，ADX 为 NaN 时取 1.0
+        adx = indicators_raw.get('adx')
+        if adx is not None and not adx.empty:
+            adx_score = adx.to_numpy(dtype=float) / 50
+            scores['adx'] = np.where(adx_score < 1.0, adx_score, 1.0)
+            available['adx'] = all_bars
+
+        # ATR：max(0, 1 - ATR / 收盘价 * 5)，为 NaN 时取 0
+        atr = indicators_raw.get('atr')
+        if atr is not None and not atr.empty:
+            atr_score = 1 - atr.to_numpy(dtype=float) / current_close * 5
+            scores['atr'] = np.where(atr_score > 0, atr_score, 0)
+            available['atr'] = all_bars
+
+        # 9. Keltner：与标量路径相同，使用当日最高 / 最低价计算位置
+        kel = indicators_raw.get('keltner')
+        if kel is not None and not kel.empty:
+            kel_low = kel['low'].to_numpy(dtype=float)
+            scores['keltner'] = 1 - (current_close - kel_low) / (kel['high'].to_numpy(dtype=float) - kel_low)
+            available['keltner'] = all_bars
+
+    # 根据市场类型调整评分（与标量路径相同：trend 提高 RSI / ADX，range 调整 RSI / 布林带）
+    market_type = np.broadcast_to(np.asarray(market_type, dtype=object), (n,))
+    trend = market_type == "trend"
+    range_bound = market_type == "range"
+    scores['rsi'] = scores['rsi'] * np.where(trend, 1.2, np.where(range_bound, 0.8, 1.0))
+    if 'adx' in scores:
+        scores['adx'] = scores['adx'] * np.where(trend, 1.5, 1.0)
+    if 'bollinger' in scores:
+        scores['bollinger'] = scores['bollinger'] * np.where(range_bound, 1.5, 1.0)
+
+    # 确保评分在 [0, 1] 范围内（与 min(max(score, 0), 1) 一致，NaN 保持为 NaN）
+    for name in scores:
+        if name != 'vwap':
+            clipped = np.where(0 > scores[name], 0, scores[name])
+            scores[name] = np.where(1 < clipped, 1, clipped)
+
+    columns = [name for name in SCORE_INDICATORS if name in scores]
+    score_frame = pd.DataFrame({name: scores[name] for name in columns}, index=index, dtype=float)
+    available_frame = pd.DataFrame({name: available[name] for name in columns}, index=index, dtype=bool)
+    return score_frame, available_frame
+
+
+def fuse_score_series(scores, available, market_types):
+    """
+    generate_operation_suggestion_from_scores 的全历史版本：按每根K线的市场类型加权融合评分
+
+    各指标按 scores 的列顺序累加，与标量路径的累加顺序相同，结果逐位一致。
+
+    :param scores: score_indicators_series 返回的评分
+    :param available: score_indicators_series 返回的评分是否存在
+    :param market_types: 每根K线的市场类型（calculate_market_type_series 的结果），或单个市场类型字符串
+    :return: pd.Series，每根K线的融合评分 final_score（未四舍五入）
+    """
+    n = len(scores)
+    market_types = np.broadcast_to(np.asarray(market_types, dtype=object), (n,))
+    weights = np.zeros((n, scores.shape[1]))
+    for market_type in pd.unique(market_types):
+        adjusted = adjust_weights_for_market(market_type)
+        weights[market_types == market_type] = [adjusted.get(name, 0) for name in scores.columns]
+
+    values = scores.to_numpy(dtype=float)
+    mask = available.to_numpy(dtype=bool)
+    weighted_sum = np.zeros(n)
+    total_weight = np.zeros(n)
+    for j in range(values.shape[1]):
+        weighted_sum = weighted_sum + np.where(mask[:, j], values[:, j] * weights[:, j], 0.0)
+        total_weight = total_weight + np.where(mask[:, j], weights[:, j], 0.0)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        final_score = np.where(total_weight > 0, weighted_sum / total_weight, 0.5)
+    return pd.Series(final_score, index=scores.index, name='final_score')
+
+
+def suggestion_series_from_scores(final_score):
+    """将融合评分序列映射为综合建议序列（阈值同 FINAL_SCORE_THRESHOLDS）"""
+    values = np.asarray(final_score, dtype=float)
+    labels = np.select([values >= threshold for threshold, _ in FINAL_SCORE_THRESHOLDS],
+                       [label for _, label in FINAL_SCORE_THRESHOLDS], default=FINAL_SCORE_DEFAULT)
+    return pd.Series(labels, index=getattr(final_score, 'index', None), name='suggestion')
+
+
+def score_series(stock_data, context=None):
+    """
+    一次计算全历史每根K线的评分矩阵、市场类型、融合评分和综合建议（全历史回测只需计算一遍）
+
+    与 analyze() 一致：评分调整使用默认的 "trend"，融合权重按每根K线识别出的市场类型调整。
+
+    :param stock_data: 股票数据
+    :param context: AnalysisContext，传入时复用其中已计算的指标
+    :return: pd.DataFrame，列为各指标评分、market_type、final_score、suggestion，
+             以及主窗口期的 support / resistance（与 analyze() 中的支撑位、压力位逐日一致）
+    """
+    if context is None:
+        context = AnalysisContext(stock_data)
+    raw = context.raw_indicators
+    market_types = calculate_market_type_series({name: {'raw': raw[name]} for name in ('adx', 'rsi', 'bollinger')},
+                                                context.data)
+
+    scores, available = score_indicators_series(raw)
+    final_score = fuse_score_series(scores, available, market_types)
+    result = scores.where(available)
+    result['market_type'] = market_types
+    result['final_score'] = final_score
+    result['suggestion'] = suggestion_series_from_scores(final_score)
+
+    window = resolve_params()[0][0]
+    levels = context.cached('support_resistance_series', lambda ctx: support_resistance_series(ctx.data, (window,)))
+    result['support'] = levels[f'support_{window}']
+    result['resistance'] = levels[f'resistance_{window}']
+    return result
+
+
+# 回测单只股票（回测的分析函数，可在子进程中执行）：全历史评分序列一次算出，按 start 之后每个交易日的建议模拟交易
+def backtest_ticker_data(ticker, stock_data, start_date, end_date, initial_capital=100000):
+    """
+    与 back_test.backtest 相同，每个交易日按当日收盘价执行当日建议；stock_data 中 start 之前的部分只用于指标预热
+
+    :param ticker: {'symbol': ..., 'name': ...}
+    :param initial_capital: 初始资金
+    :return: dict，包含最终持仓价值、收益率、交易记录和逐日建议
+    """
+    symbol = ticker['symbol']
+    if stock_data is None or stock_data.empty:
+        raise ValueError(f"没有有效的股票数据: {symbol}")
+    context = AnalysisContext(stock_data)
+    scores = score_series(context.data, context)
+    period = scores.loc[start_date:end_date]
+    close = context.data['close'].loc[period.index]
+
+    simulation = Simulation(initial_capital)
+    for trade_date, suggestion, price in zip(period.index, period['suggestion'], close):
+        simulation.execute_trade(trade_date, symbol, suggestion, price)
+    last_price = close.iloc[-1] if len(close) else float('nan')
+    portfolio_value = simulation.get_portfolio_value(last_price, symbol)
+    return {
+        'symbol': symbol,
+        'name': ticker.get('name') or symbol,
+        'start_date': start_date,
+        'end_date': end_date,
+        'portfolio_value': portfolio_value,
+        'returns': portfolio_value / simulation.initial_capital - 1,
+        'transactions': simulation.get_transactions(),
+        'suggestions': period['suggestion'],
+    }
 
 
 # 批量分析股票并生成报告
-def batch_analysis_stocks_report(stocks, start_date, end_date):
+def batch_analysis_stocks_report(stocks, start_date, end_date, workers=None):
 
-    analysis_results = batch_analysis_stocks(stocks, start_date, end_date)
+    analysis_results = batch_analysis_stocks(stocks, start_date, end_date, workers=workers)
 
     # 所有分析结束后，生成 Markdown 报告
     export_analysis_to_markdown(analysis_results, output_path="../report/分析报告.md")
 
-# 批量分析股票
-def batch_analysis_stocks(stocks, start_date, end_date):
-    analysis_results = []
+# 获取单只股票数据（fetch_data 可替换数据源，签名为 fetch_data(symbol, start_date, end_date)）
+def fetch_ticker(ticker, start_date, end_date, fetch_data=None):
+    if fetch_data is not None:
+        return fetch_data(ticker['symbol'], start_date, end_date)
+    return StockAnalysis(ticker['symbol'], ticker['name'], start_date, end_date).data_fetcher.fetch_data()
 
-    for ticker in stocks:
-        stock = StockAnalysis(ticker['symbol'], ticker['name'], start_date, end_date)
-        stock_data = stock.data_fetcher.fetch_data()
-
-        # 分析股票数据
-        analyze_result = analyze(stock, stock_data)
-
-        # 构建股票分析结果
-        result_entry = {
-            "ticker": stock.ticker,
-            "ticker_name": stock.ticker_name,
-            "final_suggestion": analyze_result["final_suggestion"],
-            "final_score": round(analyze_result["final_score"], 2),
-            "reason": analyze_result["reason"],
-            "operation_detail": analyze_result["operation_detail"],
-            "stop_loss": analyze_result["stop_loss"],
-            "take_profit": analyze_result["take_profit"],
-            "support": analyze_result["support"],  # 支撑位
-            "resistance": analyze_result["resistance"],  # 压力位
-        }
+# 分析单只股票（批量分析的工作函数，可在子进程中执行）
+def analyze_ticker(ticker, start_date, end_date, fetch_data=None, retention=None, tail_bars=None):
+    return analyze_ticker_data(ticker, fetch_ticker(ticker, start_date, end_date, fetch_data), start_date, end_date,
+                               retention, tail_bars)
+
+# 分析已获取数据的单只股票（流水线模式的分析函数）
+def analyze_ticker_data(ticker, stock_data, start_date, end_date, retention=None, tail_bars=None):
+    stock = StockAnalysis(ticker['symbol'], ticker['name'], start_date, end_date)
 
-        # 将各指标建议和解释合并进入结果中
-        for indicator_name, suggestion in analyze_result["suggestions"].items():
-            result_entry[f"{indicator_name}_suggestion"] = suggestion
+    if stock_data is None or stock_data.empty:
+        raise ValueError(f"没有有效的股票数据: {stock.ticker}")
 
-        for indicator_name, explanation in analyze_result["explanations"].items():
-            result_entry[f"{indicator_name}_explanation"] = explanation
+    # 分析股票数据
+    analyze_result = analyze(stock, stock_data)
+
+    # 各指标建议、解释，以及按保留策略裁剪后的原始值（完整序列不随结果保留）
+    indicators = {
+        name: IndicatorResult(suggestion, analyze_result["explanations"].get(name),
+                              retain_raw(analyze_result["raw_values"].get(name), retention, tail_bars))
+        for name, suggestion in analyze_result["suggestions"].items()
+    }
+
+    # 构建股票分析结果
+    return ScoreResult(
+        ticker=stock.ticker,
+        ticker_name=stock.ticker_name,
+        final_suggestion=analyze_result["final_suggestion"],
+        final_score=round(analyze_result["final_score"], 2),
+        reason=analyze_result["reason"],
+        operation_detail=analyze_result["operation_detail"],
+        stop_loss=analyze_result["stop_loss"],
+        take_profit=analyze_result["take_profit"],
+        support=analyze_result["support"],  # 支撑位
+        resistance=analyze_result["resistance"],  # 压力位
+        indicators=indicators,
+    )
+
+# 批量分析股票
+def batch_analysis_stocks(stocks, start_date, end_date, workers=None, chunksize=None, fetch_data=None,
+                          pipeline=None, fetch_workers=None, retention=None, tail_bars=None):
+    """
+    批量分析股票，workers > 1 时在进程池中并行执行
+
+    :param stocks: [{'symbol': ..., 'name': ...}, ...]
+    :param workers: 并行进程数，None 读取 BATCH_CONFIG["WORKERS"]（默认 1，串行）
+    :param chunksize: 每次提交给子进程的股票数量，None 读取 BATCH_CONFIG["CHUNKSIZE"]
+    :param fetch_data: 可选数据源函数 fetch_data(symbol, start_date, end_date)，默认使用 DataFetcher
+    :param pipeline: 是否使用流水线模式（线程获取数据、进程分析，两者重叠），None 读取 BATCH_CONFIG["PIPELINE"]
+    :param fetch_workers: 流水线模式下获取数据的线程数，None 读取 BATCH_CONFIG["FETCH_WORKERS"]
+    :param retention: 原始指标值的保留策略 last / tail / full，None 读取 RESULT_CONFIG["RETENTION"]
+    :param tail_bars: tail 策略保留的K线数，None 读取 RESULT_CONFIG["TAIL_BARS"]
+    :return: 与 stocks 顺序一致的 ScoreResult 列表；单只股票失败时 error 字段记录错误信息
+    """
+    if pipeline is None:
+        pipeline = BATCH_CONFIG.get("PIPELINE", False)
+
+    if pipeline:
+        batch = run_pipeline(partial(fetch_ticker, start_date=start_date, end_date=end_date, fetch_data=fetch_data),
+                             partial(analyze_ticker_data, start_date=start_date, end_date=end_date,
+                                     retention=retention, tail_bars=tail_bars),
+                             stocks, workers=workers, fetch_workers=fetch_workers)
+    else:
+        batch = run_batch(partial(analyze_ticker, start_date=start_date, end_date=end_date, fetch_data=fetch_data,
+                                  retention=retention, tail_bars=tail_bars),
+                          stocks, workers=workers, chunksize=chunksize)
+
+    analysis_results = []
+    for item in batch:
+        if item['error'] is None:
+            result_entry = item['result']
+        else:
+            trace(ERROR, 'batch.error', f"\n【错误】：{item['item']['symbol']} 分析失败：{item['error']}",
+                  ticker=item['item']['symbol'], error=item['error'])
+            result_entry = ScoreResult(
+                ticker=item['item']['symbol'],
+                ticker_name=item['item']['name'],
+                final_suggestion="分析失败",
+                reason=item['error'],
+            )
+        result_entry.error = item['error']
+        # 耗时（秒）；流水线模式另有获取数据与分析各自的耗时
+        for key in ('elapsed', 'fetch_elapsed', 'compute_elapsed'):
+            if key in item:
+                setattr(result_entry, key, item[key])
 
         # 将结果添加到返回列表中
         analysis_results.append(result_entry)
@@ -659,8 +978,14 @@ def from_json():
   "error_description": ""
 }'''
     # 将JSON数据解析为Python字典
-    data = json.loads(json_data)
+    return stocks_from_watchlist(json.loads(json_data))
+
 
+def stocks_from_watchlist(data):
+    """
+    把自选股导出的 JSON（{"data": {"stocks": [...]}}）转换为 [{'symbol': ..., 'name': ...}]，
+    SH600570 / SZ000001 转换为 sh.600570 / sz.000001
+    """
     # 提取股票信息
     stocks = data['data']['stocks']
 
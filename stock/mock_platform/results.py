@@ -0,0 +1,187 @@
+from collections.abc import Mapping
+
+import numpy as np
+import pandas as pd
+from stock.data.config import RESULT_CONFIG
+
+"""
+批量分析的结果类型：使用 __slots__ 存储，按保留策略裁剪原始指标序列
+
+- 保留策略（RESULT_CONFIG["RETENTION"]）：
+    last：只保留每个原始指标的最新值（默认）
+    tail：保留最近 TAIL_BARS 根K线（复制出的独立小序列，不引用完整历史）
+    full：保留完整序列
+- 结果类型实现只读 Mapping，读取方式与原来的结果字典相同，导出函数无需区分字典和结果对象；
+  值为 None 的字段视为不存在（与原来失败结果中缺少的键一致）
+"""
+
+RETENTION_POLICIES = ("last", "tail", "full")
+
+
+def resolve_retention(retention=None, tail_bars=None):
+    """
+    解析保留策略
+
+    :param retention: last / tail / full，None 读取 RESULT_CONFIG["RETENTION"]
+    :param tail_bars: tail 策略保留的K线数，None 读取 RESULT_CONFIG["TAIL_BARS"]
+    :return: (retention, tail_bars)
+    """
+    retention = retention or RESULT_CONFIG.get("RETENTION", "last")
+    if retention not in RETENTION_POLICIES:
+        raise ValueError(f"不支持的保留策略: {retention}，可选 {RETENTION_POLICIES}")
+    tail_bars = RESULT_CONFIG.get("TAIL_BARS", 20) if tail_bars is None else tail_bars
+    return retention, max(1, int(tail_bars))
+
+
+def retain_raw(value, retention=None, tail_bars=None):
+    """
+    按保留策略裁剪原始指标值
+
+    参数:
+    value: 原始指标值（Series / DataFrame / 由它们组成的 dict，如多窗口期 RSI、MACD）
+    retention (str): last / tail / full，None 读取 RESULT_CONFIG["RETENTION"]
+    tail_bars (int): tail 策略保留的K线数
+
+    返回:
+    last：标量（Series）或 {列名: 值}（DataFrame）；tail：最近 tail_bars 行的副本；full：原值
+    """
+    retention, tail_bars = resolve_retention(retention, tail_bars)
+    if isinstance(value, dict):
+        return {key: retain_raw(item, retention, tail_bars) for key, item in value.items()}
+    if retention == "full" or not isinstance(value, (pd.Series, pd.DataFrame)):
+        return value
+    if retention == "tail":
+        # 数据和索引都复制，避免切片继续引用完整历史的内存
+        tail = value.iloc[-tail_bars:].copy()
+        tail.index = tail.index.copy(deep=True)
+        return tail
+    if value.empty:
+        return np.nan if isinstance(value, pd.Series) else {}
+    return value.iloc[-1] if isinstance(value, pd.Series) else value.iloc[-1].to_dict()
+
+
+class _SlotMapping(Mapping):
+    """以 __slots__ 字段作为键的只读映射，值为 None 的字段视为不存在"""
+
+    __slots__ = ()
+
+    _FIELDS = ()
+
+    def __getitem__(self, key):
+        if key in self._FIELDS:
+            value = getattr(self, key)
+            if value is not None:
+                return value
+        raise KeyError(key)
+
+    def __iter__(self):
+        return (key for key in self._FIELDS if getattr(self, key) is not None)
+
+    def __len__(self):
+        return sum(1 for _ in self)
+
+    def __repr__(self):
+        return f"{type(self).__name__}({dict(self)!r})"
+
+
+class IndicatorResult(_SlotMapping):
+    """单个指标的结果：建议、说明和（按保留策略裁剪的）原始值"""
+
+    __slots__ = ("suggestion", "detailed_suggestion", "raw")
+
+    _FIELDS = __slots__
+
+    def __init__(self, suggestion, detailed_suggestion=None, raw=None):
+        self.suggestion = suggestion
+        self.detailed_suggestion = detailed_suggestion
+        self.raw = raw
+
+
+class StrategyAnalysis(_SlotMapping):
+    """策略引擎单只股票的分析内容（对应原结果字典中的 'analysis'）"""
+
+    __slots__ = ("final_decision", "reasons", "indicators", "market_type", "timeframe_indicators")
+
+    _FIELDS = __slots__
+
+    def __init__(self, final_decision, reasons, indicators, market_type=None, timeframe_indicators=None):
+        self.final_decision = final_decision
+        self.reasons = list(reasons)
+        self.indicators = indicators
+        self.market_type = market_type
+        self.timeframe_indicators = timeframe_indicators
+
+
+class StrategyResult(_SlotMapping):
+    """策略引擎单只股票的批量分析结果"""
+
+    __slots__ = ("ticker", "ticker_name", "analysis", "error", "elapsed", "fetch_elapsed", "compute_elapsed")
+
+    _FIELDS = __slots__
+
+    def __init__(self, ticker, ticker_name, analysis, error=None):
+        self.ticker = ticker
+        self.ticker_name = ticker_name
+        self.analysis = analysis
+        self.error = error
+        self.elapsed = None
+        self.fetch_elapsed = None
+        self.compute_elapsed = None
+
+
+class ScoreResult(_SlotMapping):
+    """
+    原始评分引擎单只股票的批量分析结果
+
+    除摘要字段外，还按原结果字典的格式提供 '<指标>_suggestion' / '<指标>_explanation' 键。
+    """
+
+    __slots__ = ("ticker", "ticker_name", "final_suggestion", "final_score", "reason", "operation_detail",
+                 "stop_loss", "take_profit", "support", "resistance", "market_type", "indicators",
+                 "error", "elapsed", "fetch_elapsed", "compute_elapsed")
+
+    _FIELDS = __slots__
+
+    def __init__(self, ticker, ticker_name, final_suggestion, final_score=None, reason=None, operation_detail=None,
+                 stop_loss=None, take_profit=None, support=None, resistance=None, market_type=None,
+                 indicators=None, error=None):
+        self.ticker = ticker
+        self.ticker_name = ticker_name
+        self.final_suggestion = final_suggestion
+        self.final_score = final_score
+        self.reason = reason
+        self.operation_detail = operation_detail
+        self.stop_loss = stop_loss
+        self.take_profit = take_profit
+        self.support = support
+        self.resistance = resistance
+        self.market_type = market_type
+        self.indicators = indicators if indicators is not None else {}
+        self.error = error
+        self.elapsed = None
+        self.fetch_elapsed = None
+        self.compute_elapsed = None
+
+    def _indicator_key(self, key):
+        # '<指标>_suggestion' / '<指标>_explanation' -> (指标, 字段)
+        for suffix, field in (("_suggestion", "suggestion"), ("_explanation", "detailed_suggestion")):
+            if key.endswith(suffix) and key[:-len(suffix)] in self.indicators:
+                return key[:-len(suffix)], field
+        return None
+
+    def __getitem__(self, key):
+        indicator_key = self._indicator_key(key) if isinstance(key, str) and key not in self._FIELDS else None
+        if indicator_key is not None:
+            name, field = indicator_key
+            value = getattr(self.indicators[name], field)
+            if value is not None:
+                return value
+            raise KeyError(key)
+        return super().__getitem__(key)
+
+    def __iter__(self):
+        yield from (key for key in super().__iter__() if key != "indicators")
+        for name, indicator in self.indicators.items():
+            yield f"{name}_suggestion"
+            if indicator.detailed_suggestion is not None:
+                yield f"{name}_explanation"
@@ -0,0 +1,213 @@
+import contextlib
+import datetime
+import heapq
+import math
+from datetime import timedelta
+from functools import partial
+from stock.data.config import BATCH_CONFIG, SCREEN_CONFIG
+from stock.data.trace import ERROR, trace
+from stock.mock_platform import original_strategy_engine, strategy_engine
+from stock.mock_platform.analysis_context import AnalysisContext
+from stock.mock_platform.batch import iter_batch, iter_pipeline
+
+"""
+选股：从大量股票中流式筛选出得分最高的 N 只
+
+- 股票逐只流过分析（串行、进程池或流水线），每只股票只保留一条不含原始指标序列的摘要
+- 摘要进入大小为 N 的最小堆，得分低于堆顶的直接丢弃，内存占用与股票池大小无关
+- 排序依据：final_score（原始评分引擎的融合评分）或 buy_score（策略引擎按市场类型调整后的加权买入得分）
+"""
+
+
+def screen_final_score(ticker, stock_data):
+    """
+    按原始评分引擎计算单只股票的融合评分摘要（不保留原始指标序列和解释文字）
+
+    :param ticker: {'symbol': ..., 'name': ...}
+    :param stock_data: 股票数据
+    :return: dict，包含 ticker / ticker_name / final_score / final_suggestion / market_type
+    """
+    engine = original_strategy_engine
+    context = AnalysisContext(stock_data)
+    raw_values = context.raw_indicators
+    market_type = engine.calculate_market_type_from_indicators(
+        {name: {'raw': raw_values[name]} for name in ('adx', 'rsi', 'bollinger')}, context.data)
+    scores = engine.score_indicators_from_raw(raw_values)
+    operation = engine.generate_operation_suggestion_from_scores(
+        scores, engine.adjust_weights_for_market(market_type), context.data)
+    return {
+        'ticker': ticker['symbol'],
+        'ticker_name': ticker['name'],
+        'final_score': operation['final_score'],
+        'final_suggestion': operation['suggestion'],
+        'market_type': market_type,
+    }
+
+
+def screen_buy_score(ticker, stock_data):
+    """
+    按策略引擎计算单只股票的加权买入得分摘要（不保留指标建议）
+
+    :param ticker: {'symbol': ..., 'name': ...}
+    :param stock_data: 股票数据
+    :return: dict，包含 ticker / ticker_name / buy_score / sell_score / final_suggestion / market_type
+    """
+    engine = strategy_engine
+    context = AnalysisContext(stock_data)
+    indicators = engine.calculate_indicators(context.data, context=context)
+    market_type = engine.detect_market_type(context.data, context)
+    buy_score, sell_score, _ = engine.weighted_scores(
+        indicators, engine.adjust_weights_for_market(market_type, engine.indicator_weights))
+    final_decision, _ = engine.final_suggestion(indicators, market_type, engine.indicator_weights)
+    return {
+        'ticker': ticker['symbol'],
+        'ticker_name': ticker['name'],
+        'buy_score': buy_score,
+        'sell_score': sell_score,
+        'final_suggestion': final_decision,
+        'market_type': market_type,
+    }
+
+
+# 排序依据 -> 单只股票的摘要函数
+SCREENERS = {
+    'final_score': screen_final_score,
+    'buy_score': screen_buy_score,
+}
+
+
+def _get_screener(sort_by):
+    if sort_by not in SCREENERS:
+        raise ValueError(f"不支持的排序依据: {sort_by}，可选 {list(SCREENERS)}")
+    return SCREENERS[sort_by]
+
+
+# 获取数据并计算摘要（逐只分析的工作函数，可在子进程中执行）
+def screen_ticker(ticker, start_date, end_date, sort_by, fetch_data=None, compute_slots=None):
+    return screen_ticker_data(ticker, strategy_engine.fetch_ticker(ticker, start_date, end_date, fetch_data), sort_by,
+                              compute_slots)
+
+# 对已获取数据的单只股票计算摘要（流水线模式的分析函数）；compute_slots 只在计算摘要时占用
+def screen_ticker_data(ticker, stock_data, sort_by, compute_slots=None):
+    if stock_data is None or stock_data.empty:
+        raise ValueError(f"没有有效的股票数据: {ticker['symbol']}")
+    with compute_slots if compute_slots is not None else contextlib.nullcontext():
+        return _get_screener(sort_by)(ticker, stock_data)
+
+
+class TopN:
+    """
+    保留得分最高的 N 条记录（最小堆）
+
+    得分相同时序号小的记录排在前面（默认按加入顺序编号）；得分为 None / NaN 的记录不参与排名。
+    """
+
+    __slots__ = ("size", "key", "_heap", "_count")
+
+    def __init__(self, size, key):
+        """
+        :param size: 保留的记录数量
+        :param key: 得分字段名
+        """
+        self.size = size
+        self.key = key
+        self._heap = []
+        self._count = 0
+
+    def push(self, entry, order=None):
+        """
+        加入一条记录，返回是否进入前 N
+
+        :param entry: 记录（dict）
+        :param order: 同分时的排序序号，None 表示按加入顺序编号
+        """
+        if order is None:
+            order = self._count
+        self._count += 1
+        score = entry.get(self.key)
+        if score is None or math.isnan(score) or self.size <= 0:
+            return False
+        # 序号取负：得分相同时序号大的记录先被淘汰
+        item = (score, -order, entry)
+        if len(self._heap) < self.size:
+            heapq.heappush(self._heap, item)
+            return True
+        if item[:2] > self._heap[0][:2]:
+            heapq.heapreplace(self._heap, item)
+            return True
+        return False
+
+    def results(self):
+        """按得分从高到低返回记录"""
+        return [entry for _, _, entry in sorted(self._heap, key=lambda item: item[:2], reverse=True)]
+
+    def __len__(self):
+        return len(self._heap)
+
+
+def screen_stocks(stocks, start_date, end_date, top_n=None, sort_by=None, workers=None, chunksize=None,
+                  fetch_data=None, pipeline=None, fetch_workers=None, compute_slots=None):
+    """
+    流式选股：逐只分析股票，只保留得分最高的 top_n 只
+
+    :param stocks: [{'symbol': ..., 'name': ...}, ...]，可以是任意可迭代对象（如逐行读取的股票池）
+    :param top_n: 保留的股票数量，None 读取 SCREEN_CONFIG["TOP_N"]
+    :param sort_by: 排序依据 final_score / buy_score，None 读取 SCREEN_CONFIG["SORT_BY"]
+    :param workers: 并行进程数，None 读取 BATCH_CONFIG["WORKERS"]
+    :param chunksize: 每次提交给子进程的股票数量，None 读取 BATCH_CONFIG["CHUNKSIZE"]
+    :param fetch_data: 可选数据源函数 fetch_data(symbol, start_date, end_date)，默认使用 DataFetcher
+    :param pipeline: 是否使用流水线模式，None 读取 BATCH_CONFIG["PIPELINE"]
+    :param fetch_workers: 流水线模式下获取数据的线程数，None 读取 BATCH_CONFIG["FETCH_WORKERS"]
+    :param compute_slots: 可选信号量（如 threading.BoundedSemaphore），只在计算每只股票的摘要时占用、获取数据时不占用；
+                          仅适用于在当前进程中计算（workers=1）
+    :return: dict，top 为按得分从高到低的摘要列表（带 rank），screened / failed 为分析成功 / 失败的股票数量
+    """
+    top_n = SCREEN_CONFIG.get("TOP_N", 50) if top_n is None else top_n
+    sort_by = sort_by or SCREEN_CONFIG.get("SORT_BY", "final_score")
+    _get_screener(sort_by)  # 提前校验排序依据
+    if pipeline is None:
+        pipeline = BATCH_CONFIG.get("PIPELINE", False)
+
+    if pipeline:
+        batch = iter_pipeline(
+            partial(strategy_engine.fetch_ticker, start_date=start_date, end_date=end_date, fetch_data=fetch_data),
+            partial(screen_ticker_data, sort_by=sort_by, compute_slots=compute_slots),
+            stocks, workers=workers, fetch_workers=fetch_workers)
+    else:
+        batch = iter_batch(partial(screen_ticker, start_date=start_date, end_date=end_date, sort_by=sort_by,
+                                   fetch_data=fetch_data, compute_slots=compute_slots),
+                           stocks, workers=workers, chunksize=chunksize)
+
+    top = TopN(top_n, sort_by)
+    screened = failed = 0
+    # 结果按完成顺序到达，以股票在输入中的序号决定同分时的先后
+    for index, item in batch:
+        if item['error'] is not None:
+            failed += 1
+            trace(ERROR, 'screen.error', f"\n【错误】：{item['item']['symbol']} 分析失败：{item['error']}",
+                  ticker=item['item']['symbol'], error=item['error'])
+            continue
+        screened += 1
+        top.push(item['result'], index)
+
+    results = top.results()
+    for rank, entry in enumerate(results, start=1):
+        entry['rank'] = rank
+    return {'top': results, 'screened': screened, 'failed': failed, 'sort_by': sort_by}
+
+
+def print_screen_results(screen_result):
+    """在控制台输出选股结果"""
+    sort_by = screen_result['sort_by']
+    print(f"\n共分析 {screen_result['screened']} 只股票（失败 {screen_result['failed']} 只），"
+          f"按 {sort_by} 取前 {len(screen_result['top'])} 只：")
+    for entry in screen_result['top']:
+        print(f"{entry['rank']:>3}. {entry['ticker_name']}（{entry['ticker']}） "
+              f"{sort_by}={entry[sort_by]:.3f}  {entry['final_suggestion']}  市场类型：{entry['market_type']}")
+
+
+if __name__ == '__main__':
+    end_date = '2025-04-12'
+    start_date = (datetime.datetime.strptime(end_date, "%Y-%m-%d") - timedelta(days=365)).strftime("%Y-%m-%d")
+
+    print_screen_results(screen_stocks(original_strategy_engine.from_json(), start_date, end_date))
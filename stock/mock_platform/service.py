@@ -0,0 +1,425 @@
+import datetime
+import json
+import math
+import threading
+import time
+from collections import OrderedDict, deque
+from collections.abc import Mapping
+from datetime import timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import numpy as np
+import pandas as pd
+from stock.data.config import SERVICE_CONFIG
+from stock.data.synthetic_data import fetch_synthetic_data
+from stock.data.trace import DEBUG, ERROR, INFO, trace
+from stock.mock_platform import original_strategy_engine, strategy_engine
+from stock.mock_platform.screener import screen_stocks
+
+"""
+常驻分析服务：在一个长期运行的进程中保持行情数据和分析结果的内存缓存，通过本地 HTTP 接口提供分析
+
+- 每次运行脚本都要重新导入 pandas / 数据源库、重新获取数据和计算指标；服务只在启动时付出一次导入开销
+- 行情数据按 (股票, 开始日期, 结束日期) 缓存，分析 / 回测结果按请求参数缓存，均为 LRU 淘汰
+- 同一份数据被多个并发请求同时需要时只获取一次，其他请求等待其结果
+- 接口（GET 查询参数或 POST JSON 均可）：
+    /analyze   symbol, name, start, end, engine(original / strategy)
+    /screen    stocks([{symbol, name}] 或 symbols), start, end, top_n, sort_by
+    /backtest  symbol, name, start, end, initial_capital
+    /metrics   各接口的请求数、失败数、p50 / p99 耗时，缓存命中情况，并发数
+    /clear     清空缓存（跨日运行时使用）
+"""
+
+
+class LRUCache:
+    """
+    线程安全的 LRU 缓存，get_or_compute 保证同一个键同时只计算一次
+
+    计算函数抛出的异常不缓存，原样抛给所有等待该键的调用方。
+    """
+
+    def __init__(self, max_entries):
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._pending = {}
+        self._lock = threading.Lock()
+
+    def get_or_compute(self, key, func):
+        """
+        读取缓存，不存在时调用 func() 计算并缓存
+
+        :param key: 缓存键（可哈希）
+        :param func: 无参计算函数
+        """
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._entries[key]
+            pending = self._pending.get(key)
+            if pending is None:
+                self.misses += 1
+                pending = self._pending[key] = {'event': threading.Event(), 'value': None, 'error': None}
+                owner = True
+            else:
+                self.hits += 1
+                owner = False
+
+        if not owner:
+            pending['event'].wait()
+            if pending['error'] is not None:
+                raise pending['error']
+            return pending['value']
+
+        try:
+            value = func()
+        except Exception as e:
+            pending['error'] = e
+            raise
+        else:
+            pending['value'] = value
+            with self._lock:
+                self._entries[key] = value
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+            return value
+        finally:
+            with self._lock:
+                del self._pending[key]
+            pending['event'].set()
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            return {'entries': len(self._entries), 'hits': self.hits, 'misses': self.misses}
+
+
+class LatencyMetrics:
+    """按接口记录最近 window 次请求的耗时，以及累计请求数、失败数和并发数"""
+
+    def __init__(self, window):
+        self.window = window
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self._latencies = {}
+        self._counts = {}
+        self._errors = {}
+        self._lock = threading.Lock()
+
+    def start(self):
+        with self._lock:
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+
+    def finish(self, endpoint, elapsed, error=False):
+        """
+        :param endpoint: 接口名称
+        :param elapsed: 耗时（秒）
+        :param error: 请求是否失败
+        """
+        with self._lock:
+            self.in_flight -= 1
+            self._latencies.setdefault(endpoint, deque(maxlen=self.window)).append(elapsed)
+            self._counts[endpoint] = self._counts.get(endpoint, 0) + 1
+            if error:
+                self._errors[endpoint] = self._errors.get(endpoint, 0) + 1
+
+    def snapshot(self):
+        """
+        :return: dict，{接口: {count, errors, p50_ms, p99_ms, max_ms}}，以及 in_flight / max_in_flight
+        """
+        with self._lock:
+            latencies = {endpoint: np.array(values) * 1000 for endpoint, values in self._latencies.items()}
+            endpoints = {
+                endpoint: {
+                    'count': self._counts[endpoint],
+                    'errors': self._errors.get(endpoint, 0),
+                    'p50_ms': float(np.percentile(values, 50)),
+                    'p99_ms': float(np.percentile(values, 99)),
+                    'max_ms': float(values.max()),
+                }
+                for endpoint, values in latencies.items()
+            }
+            return {'endpoints': endpoints, 'in_flight': self.in_flight, 'max_in_flight': self.max_in_flight}
+
+
+def to_json_value(value):
+    """把分析结果（结果对象、NumPy / pandas 值）转换为可 JSON 序列化的值，NaN 转为 None"""
+    if isinstance(value, Mapping):
+        return {str(key): to_json_value(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [to_json_value(item) for item in value]
+    if isinstance(value, pd.Series):
+        return {str(key): to_json_value(item) for key, item in value.items()}
+    if isinstance(value, pd.DataFrame):
+        return {str(key): to_json_value(row) for key, row in value.to_dict(orient='index').items()}
+    if isinstance(value, (pd.Timestamp, datetime.date)):
+        return value.isoformat()
+    if isinstance(value, np.ndarray):
+        return [to_json_value(item) for item in value.tolist()]
+    if isinstance(value, np.generic):
+        value = value.item()
+    if isinstance(value, float) and not math.isfinite(value):
+        return None
+    return value
+
+
+def _default_fetch_data():
+    if SERVICE_CONFIG.get("DATA_SOURCE", "fetcher") == "synthetic":
+        return fetch_synthetic_data
+    return None
+
+
+class AnalysisService:
+    """
+    分析服务：持有行情数据缓存、结果缓存和请求指标，可直接在进程内调用，也可由 HTTP 服务调用
+
+    - analyze(symbol, ...)：单只股票分析（original / strategy 两套引擎）
+    - screen(stocks, ...)：流式选股，股票数据走同一份行情缓存
+    - backtest(symbol, ...)：一次计算全历史评分序列后逐日模拟交易
+    """
+
+    ENGINES = {
+        'original': original_strategy_engine,
+        'strategy': strategy_engine,
+    }
+
+    def __init__(self, fetch_data=None, history_cache_size=None, result_cache_size=None, max_concurrency=None,
+                 metrics_window=None):
+        """
+        :param fetch_data: 数据源函数 fetch_data(symbol, start_date, end_date)，None 按 SERVICE_CONFIG["DATA_SOURCE"]
+        :param history_cache_size: 行情数据缓存份数，None 读取 SERVICE_CONFIG["HISTORY_CACHE_SIZE"]
+        :param result_cache_size: 结果缓存份数，None 读取 SERVICE_CONFIG["RESULT_CACHE_SIZE"]
+        :param max_concurrency: 同时计算的请求数上限（获取数据不计入），None 读取 SERVICE_CONFIG["MAX_CONCURRENCY"]
+        :param metrics_window: 每个接口保留的耗时记录数，None 读取 SERVICE_CONFIG["METRICS_WINDOW"]
+        """
+        self.fetch_data = fetch_data if fetch_data is not None else _default_fetch_data()
+        self.histories = LRUCache(history_cache_size or SERVICE_CONFIG.get("HISTORY_CACHE_SIZE", 512))
+        self.results = LRUCache(result_cache_size or SERVICE_CONFIG.get("RESULT_CACHE_SIZE", 2048))
+        self.metrics = LatencyMetrics(metrics_window or SERVICE_CONFIG.get("METRICS_WINDOW", 1000))
+        self._compute_slots = threading.BoundedSemaphore(max_concurrency or SERVICE_CONFIG.get("MAX_CONCURRENCY", 4))
+
+    # ---------- 数据 ----------
+
+    def fetch(self, symbol, start_date, end_date):
+        """获取行情数据（带缓存），签名与批量分析的 fetch_data 一致"""
+        return self.histories.get_or_compute(
+            (symbol, start_date, end_date),
+            lambda: original_strategy_engine.fetch_ticker({'symbol': symbol, 'name': symbol}, start_date, end_date,
+                                                          self.fetch_data))
+
+    @staticmethod
+    def resolve_dates(start_date=None, end_date=None, lookback_days=None):
+        """
+        补全日期区间：end 默认今天，start 默认 end 之前 LOOKBACK_DAYS 天
+
+        :return: (start_date, end_date)，格式 YYYY-MM-DD
+        """
+        end_date = end_date or datetime.date.today().strftime("%Y-%m-%d")
+        if not start_date:
+            lookback_days = lookback_days or SERVICE_CONFIG.get("LOOKBACK_DAYS", 365)
+            start_date = (datetime.datetime.strptime(end_date, "%Y-%m-%d")
+                          - timedelta(days=lookback_days)).strftime("%Y-%m-%d")
+        return start_date, end_date
+
+    # ---------- 接口 ----------
+
+    def analyze(self, symbol, name=None, start_date=None, end_date=None, engine='original'):
+        """
+        分析单只股票
+
+        :param symbol: 股票代码
+        :param name: 股票名称，默认与代码相同
+        :param engine: original（原始评分引擎）/ strategy（策略引擎）
+        :return: 分析结果（ScoreResult / StrategyResult）
+        """
+        if engine not in self.ENGINES:
+            raise ValueError(f"不支持的分析引擎: {engine}，可选 {list(self.ENGINES)}")
+        start_date, end_date = self.resolve_dates(start_date, end_date)
+        ticker = {'symbol': symbol, 'name': name or symbol}
+
+        def compute():
+            # 获取数据（网络 IO）不占用计算名额，只在分析时占用
+            stock_data = self.fetch(symbol, start_date, end_date)
+            with self._compute_slots:
+                return self.ENGINES[engine].analyze_ticker_data(ticker, stock_data, start_date, end_date)
+
+        return self.results.get_or_compute(('analyze', engine, symbol, ticker['name'], start_date, end_date), compute)
+
+    def screen(self, stocks, start_date=None, end_date=None, top_n=None, sort_by=None):
+        """
+        流式选股（在服务进程内串行执行，股票数据走行情缓存）
+
+        :param stocks: [{'symbol': ..., 'name': ...}, ...]
+        :return: screen_stocks 的结果
+        """
+        start_date, end_date = self.resolve_dates(start_date, end_date)
+        # 与 analyze / backtest 相同：获取数据不占用计算名额，每只股票只在计算摘要时占用
+        return screen_stocks(stocks, start_date, end_date, top_n=top_n, sort_by=sort_by, workers=1,
+                             fetch_data=self.fetch, pipeline=False, compute_slots=self._compute_slots)
+
+    def backtest(self, symbol, name=None, start_date=None, end_date=None, initial_capital=100000, warmup_days=None):
+        """
+        单只股票回测：按原始评分引擎的全历史评分序列逐日给出建议，并用 Simulation 模拟交易
+
+        与 back_test.backtest 相同，每个交易日按当日收盘价执行当日建议；建议由 score_series 一次算出，
+        start 之前额外获取 warmup_days 天的数据用于指标预热。
+
+        :param initial_capital: 初始资金
+        :param warmup_days: 指标预热天数，None 读取 SERVICE_CONFIG["BACKTEST_WARMUP_DAYS"]
+        :return: dict，包含最终持仓价值、收益率、交易记录和逐日建议
+        """
+        start_date, end_date = self.resolve_dates(start_date, end_date)
+        if warmup_days is None:
+            warmup_days = SERVICE_CONFIG.get("BACKTEST_WARMUP_DAYS", 180)
+        fetch_start = (datetime.datetime.strptime(start_date, "%Y-%m-%d")
+                       - timedelta(days=warmup_days)).strftime("%Y-%m-%d")
+
+        def compute():
+            stock_data = self.fetch(symbol, fetch_start, end_date)
+            with self._compute_slots:
+                return original_strategy_engine.backtest_ticker_data(
+                    {'symbol': symbol, 'name': name or symbol}, stock_data, start_date, end_date, initial_capital)
+
+        return self.results.get_or_compute(
+            ('backtest', symbol, name, start_date, end_date, initial_capital, warmup_days), compute)
+
+    def metrics_snapshot(self):
+        """请求指标与缓存命中情况"""
+        snapshot = self.metrics.snapshot()
+        snapshot['history_cache'] = self.histories.stats()
+        snapshot['result_cache'] = self.results.stats()
+        return snapshot
+
+    def clear(self):
+        """清空行情数据与结果缓存"""
+        self.histories.clear()
+        self.results.clear()
+        return {'cleared': True}
+
+    def handle(self, endpoint, params):
+        """
+        按接口名称分发请求，记录耗时
+
+        :param endpoint: analyze / screen / backtest / metrics / clear
+        :param params: 请求参数 dict
+        :return: 可 JSON 序列化的结果
+        """
+        handlers = {
+            'analyze': lambda: self.analyze(params['symbol'], params.get('name'), params.get('start'),
+                                            params.get('end'), params.get('engine', 'original')),
+            'screen': lambda: self.screen(_stock_list(params), params.get('start'), params.get('end'),
+                                          _optional_int(params.get('top_n')), params.get('sort_by')),
+            'backtest': lambda: self.backtest(params['symbol'], params.get('name'), params.get('start'),
+                                              params.get('end'), float(params.get('initial_capital', 100000))),
+            'metrics': self.metrics_snapshot,
+            'clear': self.clear,
+        }
+        if endpoint not in handlers:
+            raise LookupError(f"未知接口: /{endpoint}")
+
+        self.metrics.start()
+        start = time.perf_counter()
+        failed = True
+        try:
+            result = to_json_value(handlers[endpoint]())
+            failed = False
+            return result
+        finally:
+            self.metrics.finish(endpoint, time.perf_counter() - start, failed)
+
+
+def _optional_int(value):
+    return None if value is None else int(value)
+
+
+def _stock_list(params):
+    """screen 的股票列表：stocks=[{symbol, name}] 或 symbols（列表或逗号分隔的字符串）"""
+    if 'stocks' in params:
+        return [{'symbol': stock['symbol'], 'name': stock.get('name', stock['symbol'])} for stock in params['stocks']]
+    symbols = params.get('symbols', [])
+    if isinstance(symbols, str):
+        symbols = [symbol for symbol in symbols.split(',') if symbol]
+    return [{'symbol': symbol, 'name': symbol} for symbol in symbols]
+
+
+class ServiceRequestHandler(BaseHTTPRequestHandler):
+    """HTTP 请求处理：路径为接口名称，参数来自查询字符串和 POST 的 JSON 请求体（两者合并）"""
+
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        self._dispatch()
+
+    def do_POST(self):
+        self._dispatch()
+
+    def _dispatch(self):
+        url = urlparse(self.path)
+        params = {key: values[-1] for key, values in parse_qs(url.query).items()}
+        try:
+            length = int(self.headers.get('Content-Length') or 0)
+            if length:
+                params.update(json.loads(self.rfile.read(length).decode('utf-8')))
+            result = self.server.service.handle(url.path.strip('/'), params)
+            self._reply(200, result)
+        except LookupError as e:
+            # 未知接口 / 缺少必填参数
+            status = 404 if str(e).startswith("未知接口") else 400
+            self._reply(status, {'error': f"{type(e).__name__}: {e}"})
+        except (ValueError, TypeError) as e:
+            self._reply(400, {'error': f"{type(e).__name__}: {e}"})
+        except Exception as e:
+            trace(ERROR, 'service.error', f"【错误】：{self.path} 处理失败：{e}", path=self.path, error=str(e))
+            self._reply(500, {'error': f"{type(e).__name__}: {e}"})
+
+    def _reply(self, status, payload):
+        body = json.dumps(payload, ensure_ascii=False).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        trace(DEBUG, 'service.request', format % args, client=self.client_address[0])
+
+
+def make_server(service=None, host=None, port=None):
+    """
+    创建 HTTP 服务（未启动）
+
+    :param service: AnalysisService，None 按 SERVICE_CONFIG 创建
+    :param host: 监听地址，None 读取 SERVICE_CONFIG["HOST"]
+    :param port: 监听端口，None 读取 SERVICE_CONFIG["PORT"]；0 表示由系统分配空闲端口
+    :return: ThreadingHTTPServer，server.service 为分析服务
+    """
+    host = host or SERVICE_CONFIG.get("HOST", "127.0.0.1")
+    port = SERVICE_CONFIG.get("PORT", 8765) if port is None else port
+    server = ThreadingHTTPServer((host, port), ServiceRequestHandler)
+    server.daemon_threads = True
+    server.service = service if service is not None else AnalysisService()
+    return server
+
+
+def serve(service=None, host=None, port=None):
+    """启动 HTTP 服务并一直运行，Ctrl+C 退出"""
+    server = make_server(service, host, port)
+    host, port = server.server_address[:2]
+    trace(INFO, 'service.start', f"分析服务已启动: http://{host}:{port}", host=host, port=port)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == '__main__':
+    serve()
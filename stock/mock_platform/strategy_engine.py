@@ -1,15 +1,17 @@
 import datetime
 from datetime import timedelta
+from functools import partial
+import numpy as np
+import pandas as pd
+from stock.data.config import BATCH_CONFIG
 from stock.data.stock_analysis import StockAnalysis
-from stock.indicator.rsi import *
-from stock.indicator.macd import *
-from stock.indicator.bollinger_bands import *
-from stock.indicator.obv import *
-from stock.indicator.vwap import *
-from stock.indicator.stochastic_rsi import *
-from stock.indicator.adx import *
-from stock.indicator.atr import *
-from stock.indicator.keltner_channel import *
+from stock.data.trace import ERROR, INFO, trace
+from stock.indicator.registry import active_indicators, compute_suggestions
+from stock.indicator.signals import BUY, HOLD, LABEL_TO_SIGNAL, SELL, signal_to_label
+from stock.mock_platform.analysis_context import AnalysisContext
+from stock.mock_platform.batch import run_batch, run_pipeline
+from stock.mock_platform.results import IndicatorResult, StrategyAnalysis, StrategyResult
+from stock.mock_platform.strategy_rules import compile_strategies, strategy_indicators
 import json
 import ast
 
@@ -35,7 +37,8 @@ indicator_weights = {
 
 # ==== 动态调整权重 ====
 def adjust_weights_for_market(market_type, indicator_weights):
-    adjusted_weights = indicator_weights.copy()
+    # 逐个指标复制内层字典，避免调整和归一化修改传入的（全局）权重表
+    adjusted_weights = {ind: dict(weights) for ind, weights in indicator_weights.items()}
 
     if market_type == "趋势市":
         # 增加趋势类指标的权重
@@ -64,40 +67,115 @@ def adjust_weights_for_market(market_type, indicator_weights):
 
     return adjusted_weights
 
+# ==== 策略组合规则（规则语法见 strategy_rules.py，同一策略内按顺序匹配，等价于 if / elif） ====
+GROUPED_STRATEGY_RULES = (
+    ("策略1", (  # 趋势确认与反弹
+        ("rsi=BUY & adx=BUY & stochastic_rsi=BUY -> BUY", "策略1确认低点反转信号成立"),
+        ("rsi=SELL | adx=SELL -> SELL", "策略1提示趋势减弱或超买"),
+    )),
+    ("策略2", (  # 波动+布林+Keltner
+        ("bollinger=BUY & keltner=BUY & atr!=SELL -> BUY", "策略2：低波动区域预示反弹机会"),
+    )),
+    ("策略3", (  # 动量（MACD+VWAP+OBV）
+        ("macd=BUY & vwap=BUY & obv=BUY -> BUY", "策略3：资金动能共振"),
+    )),
+    ("策略4", (  # 风险控制
+        ("rsi=SELL & adx=BUY & atr!=SELL -> SELL", "策略4：高波动+强趋势+超买风险"),
+    )),
+)
+
+GROUPED_STRATEGIES = compile_strategies(GROUPED_STRATEGY_RULES)
+
+# ==== 策略组合引用的指标（与 GROUPED_STRATEGY_RULES 中的四条策略对应） ====
+GROUPED_STRATEGY_INDICATORS = strategy_indicators(GROUPED_STRATEGIES)
+
 # ==== Step 1: 指标计算 ====
-def calculate_indicators(stock_data):
-    return {
-        'rsi': generate_operation_suggestion(calculate_rsi_for_multiple_windows(stock_data)),
-        'macd': generate_macd_signal(*calculate_macd(stock_data['close'])),
-        'bollinger': generate_bollinger_operations(generate_bollinger_signals(calculate_bollinger_bands(stock_data))),
-        'obv': generate_obv_operation_suggestion(calculate_obv(stock_data), stock_data),
-        'vwap': generate_vwap_operation_suggestion(stock_data, calculate_vwap(stock_data)),
-        'stochastic_rsi': generate_stochastic_rsi_operation_suggestion(calculate_stochastic_rsi(stock_data)),
-        'adx': generate_adx_operation_suggestion(calculate_adx_safe(stock_data)),
-        'atr': generate_atr_operation_suggestion(calculate_atr(stock_data)),
-        'keltner': generate_keltner_channel_operation_suggestion(calculate_keltner_channel(stock_data))
-    }
+def calculate_indicators(stock_data, names=None, context=None):
+    """
+    计算指标建议，默认只计算权重非零或被策略组合引用的指标
+
+    :param stock_data: 股票数据
+    :param names: 指定要计算的指标名称，None 表示按权重表和策略组合自动筛选
+    :param context: AnalysisContext，传入时指标结果缓存在上下文中供后续步骤复用
+    :return: {指标名称: Suggestion}
+    """
+    if names is None:
+        names = active_indicators(indicator_weights, GROUPED_STRATEGY_INDICATORS)
+    if context is None:
+        return compute_suggestions(stock_data, names)
+    return {name: context.suggestion(name) for name in names}
 
 # ==== Step 2: 市场类型识别 ====
-def detect_market_type(stock_data):
-    adx_values = calculate_adx_safe(stock_data)
-    atr_values = calculate_atr(stock_data)
-    bb = calculate_bollinger_bands(stock_data)
-    bollinger_width = (bb['high'] - bb['low']) / stock_data['close']
+# 市场类型阈值（detect_market_type 与 detect_market_type_series 共用）
+MARKET_TYPE_THRESHOLDS = {
+    'trend_adx': 25,       # ADX 高于该值且波动宽度高于 trend_width：趋势市
+    'trend_width': 0.06,
+    'range_width': 0.04,   # 波动宽度低于该值且 ADX 低于 range_adx：震荡市
+    'range_adx': 20,
+}
+
+# 市场类型（全历史序列的类别顺序，编码即下标）
+MARKET_TYPES = ("中性市", "趋势市", "震荡市")
+
+def detect_market_type(stock_data, context=None):
+    # 传入 context 时直接复用 calculate_indicators 已计算的 ADX / ATR / 布林带
+    if context is None:
+        context = AnalysisContext(stock_data, names=['adx', 'atr', 'bollinger'])
+    adx_values = context.raw('adx')
+    atr_values = context.raw('atr')
+    bb = context.raw('bollinger')
+    bollinger_width = (bb['high'] - bb['low']) / context.data['close']
 
     recent_adx = adx_values.iloc[-1] if not adx_values.empty else 20
     recent_atr = atr_values.iloc[-1] if not atr_values.empty else 0.01
     recent_bw = bollinger_width.iloc[-1] if not bollinger_width.empty else 0.05
 
-    if recent_adx > 25 and recent_bw > 0.06:
+    thresholds = MARKET_TYPE_THRESHOLDS
+    if recent_adx > thresholds['trend_adx'] and recent_bw > thresholds['trend_width']:
         return "趋势市"
-    elif recent_bw < 0.04 and recent_adx < 20:
+    elif recent_bw < thresholds['range_width'] and recent_adx < thresholds['range_adx']:
         return "震荡市"
     else:
         return "中性市"
 
+def detect_market_type_series(stock_data, context=None):
+    """
+    一次向量化识别每根K线的市场类型，阈值与 detect_market_type 一致
+
+    预热期之后第 i 根K线的结果等于 detect_market_type(stock_data.iloc[:i + 1])，回测与加权可直接按下标查询，
+    不必在每个切片上重新识别（预热期内 ADX 的平滑初值取决于切片长度，结果可能不同）。
+
+    :param stock_data: 股票数据
+    :param context: AnalysisContext，传入时复用其中已计算的 ADX / 布林带
+    :return: pd.Series（category 类型，类别顺序为 MARKET_TYPES，.cat.codes 即整数编码）
+    """
+    if context is None:
+        context = AnalysisContext(stock_data, names=['adx', 'bollinger'])
+    adx_values = context.raw('adx').to_numpy(dtype=float)
+    bb = context.raw('bollinger')
+    bollinger_width = ((bb['high'] - bb['low']) / context.data['close']).to_numpy(dtype=float)
+
+    thresholds = MARKET_TYPE_THRESHOLDS
+    codes = np.select(
+        [
+            (adx_values > thresholds['trend_adx']) & (bollinger_width > thresholds['trend_width']),
+            (bollinger_width < thresholds['range_width']) & (adx_values < thresholds['range_adx']),
+        ],
+        [MARKET_TYPES.index("趋势市"), MARKET_TYPES.index("震荡市")],
+        default=MARKET_TYPES.index("中性市")
+    ).astype(np.int8)
+    return pd.Series(pd.Categorical.from_codes(codes, MARKET_TYPES), index=context.data.index, name='market_type')
+
 # ==== Step 3: 静态加权建议 ====
-def weighted_decision(indicators, indicator_weights):
+# 加权建议阈值（weighted_decision 与 decision_engine 共用）
+WEIGHTED_DECISION_THRESHOLDS = {
+    'strong_score': 0.12,   # 强烈买入/卖出：该方向得分高于此值、且超过反方向得分的 2 倍
+    'strong_diff': 0.08,    # 强烈买入/卖出：买卖得分差的绝对值高于此值
+    'cautious_diff': 0.03,  # 谨慎买入/卖出：买卖得分差的绝对值高于此值
+}
+
+def weighted_scores(indicators, indicator_weights):
+    """按指标建议累加买入 / 卖出 / 观望的加权得分，返回 (buy_score, sell_score, hold_score)"""
     buy_score, sell_score, hold_score = 0, 0, 0
     for ind, signal in indicators.items():
         weight = indicator_weights[ind]
@@ -107,53 +185,51 @@ def weighted_decision(indicators, indicator_weights):
             sell_score += weight['卖出']
         else:
             hold_score += weight['观望']
+    return buy_score, sell_score, hold_score
+
+def weighted_decision(indicators, indicator_weights):
+    buy_score, sell_score, hold_score = weighted_scores(indicators, indicator_weights)
 
     diff = buy_score - sell_score
     explain = f"买入得分={buy_score:.3f}，卖出得分={sell_score:.3f}，观望得分={hold_score:.3f}"
 
     # 新增显著性判断
-    if buy_score > 0.12 and buy_score > 2 * sell_score and diff > 0.08:
+    thresholds = WEIGHTED_DECISION_THRESHOLDS
+    if buy_score > thresholds['strong_score'] and buy_score > 2 * sell_score and diff > thresholds['strong_diff']:
         return "强烈买入", explain
-    elif buy_score > sell_score and diff > 0.03:
+    elif buy_score > sell_score and diff > thresholds['cautious_diff']:
         return "谨慎买入", explain
-    elif sell_score > 0.12 and sell_score > 2 * buy_score and diff < -0.08:
+    elif sell_score > thresholds['strong_score'] and sell_score > 2 * buy_score and diff < -thresholds['strong_diff']:
         return "强烈卖出", explain
-    elif sell_score > buy_score and diff < -0.03:
+    elif sell_score > buy_score and diff < -thresholds['cautious_diff']:
         return "谨慎卖出", explain
     else:
         return "观望", explain
 
 
 # ==== Step 4: 策略组合判断 ====
+def _suggestion_of(indicators, name):
+    # 未参与计算的指标按观望处理
+    signal = indicators.get(name)
+    return signal['suggestion'] if signal is not None else "观望"
+
+def _indicator_signals(indicators):
+    # 最新K线上各指标的信号编码（1 / -1 / 0）
+    return {name: LABEL_TO_SIGNAL.get(_suggestion_of(indicators, name), HOLD) for name in indicators}
+
 def grouped_strategies(indicators):
     strategy_results = []
     reasons = []
 
-    # 策略1：趋势确认与反弹
-    if indicators['rsi']['suggestion'] == "买入" and indicators['adx']['suggestion'] == "买入" and indicators['stochastic_rsi']['suggestion'] == "买入":
-        strategy_results.append("买入")
-        reasons.append("策略1确认低点反转信号成立")
-    elif indicators['rsi']['suggestion'] == "卖出" or indicators['adx']['suggestion'] == "卖出":
-        strategy_results.append("卖出")
-        reasons.append("策略1提示趋势减弱或超买")
-
-    # 策略2：波动+布林+Keltner
-    if indicators['bollinger']['suggestion'] == "买入" and indicators['keltner']['suggestion'] == "买入" and indicators['atr']['suggestion'] != "卖出":
-        strategy_results.append("买入")
-        reasons.append("策略2：低波动区域预示反弹机会")
-
-    # 策略3：动量（MACD+VWAP+OBV）
-    if indicators['macd']['suggestion'] == "买入" and indicators['vwap']['suggestion'] == "买入" and indicators['obv']['suggestion'] == "买入":
-        strategy_results.append("买入")
-        reasons.append("策略3：资金动能共振")
+    signals = _indicator_signals(indicators)
+    for strategy in GROUPED_STRATEGIES:
+        rule = strategy.matched_rules(signals)
+        if rule is not None and rule.action != HOLD:
+            strategy_results.append(rule.action)
+            reasons.append(rule.reason)
 
-    # 策略4：风险控制
-    if indicators['rsi']['suggestion'] == "卖出" and indicators['adx']['suggestion'] == "买入" and indicators['atr']['suggestion'] != "卖出":
-        strategy_results.append("卖出")
-        reasons.append("策略4：高波动+强趋势+超买风险")
-
-    buy_count = strategy_results.count("买入")
-    sell_count = strategy_results.count("卖出")
+    buy_count = strategy_results.count(BUY)
+    sell_count = strategy_results.count(SELL)
 
     if buy_count >= 2:
         return "强烈买入", reasons
@@ -167,6 +243,13 @@ def grouped_strategies(indicators):
         return "观望", reasons
 
 # ==== Step 5: 总体融合建议 ====
+# 加权建议 / 策略建议的得分（也作为向量化决策结果的整数编码）
+DECISION_SCORES = {
+    "强烈买入": 3, "谨慎买入": 2,
+    "观望": 0,
+    "谨慎卖出": -2, "强烈卖出": -3
+}
+
 def final_suggestion(indicators, market_type, indicator_weights):
     adjusted_weights = adjust_weights_for_market(market_type, indicator_weights)
     weighted, weighted_reason = weighted_decision(indicators, adjusted_weights)
@@ -178,11 +261,7 @@ def final_suggestion(indicators, market_type, indicator_weights):
     explanation += [f" - {r}" for r in group_reasons]
 
     # 综合判断机制（改进版）
-    scores = {
-        "强烈买入": 3, "谨慎买入": 2,
-        "观望": 0,
-        "谨慎卖出": -2, "强烈卖出": -3
-    }
+    scores = DECISION_SCORES
 
     weighted_score = scores.get(weighted, 0)
     grouped_score = scores.get(grouped, 0)
@@ -213,35 +292,37 @@ def final_suggestion(indicators, market_type, indicator_weights):
 
     return final, explanation
 
+# 策略组报告文字（按 GROUPED_STRATEGY_RULES 中各策略的结果选择）
+STRATEGY_REPORT_TEXTS = {
+    "策略1": {
+        BUY: "✅ 策略1【趋势反转确认】：满足 RSI、ADX、StochRSI 三重信号，倾向买入。",
+        SELL: "⚠️ 策略1【趋势减弱或超买】：RSI/ADX 提示市场可能面临回调。",
+        HOLD: "➖ 策略1无明显信号。",
+    },
+    "策略2": {
+        BUY: "✅ 策略2【布林+Keltner 缩口反弹】：提示当前处于低波动区，可能反弹。",
+        HOLD: "➖ 策略2无明显信号。",
+    },
+    "策略3": {
+        BUY: "✅ 策略3【动能增强】：MACD、VWAP、OBV 联合向好，资金流入明显。",
+        HOLD: "➖ 策略3无明显信号。",
+    },
+    "策略4": {
+        SELL: "⚠️ 策略4【风险预警】：强趋势+超买+波动提升，需警惕回调风险。",
+        HOLD: "➖ 策略4未触发风险预警。",
+    },
+}
+
 def generate_strategy_report(indicators):
     report_lines = []
     report_lines.append("📊 策略组分析报告")
 
-    # 策略1：趋势确认与反弹
-    if indicators['rsi']['suggestion'] == "买入" and indicators['adx']['suggestion'] == "买入" and indicators['stochastic_rsi']['suggestion'] == "买入":
-        report_lines.append("✅ 策略1【趋势反转确认】：满足 RSI、ADX、StochRSI 三重信号，倾向买入。")
-    elif indicators['rsi']['suggestion'] == "卖出" or indicators['adx']['suggestion'] == "卖出":
-        report_lines.append("⚠️ 策略1【趋势减弱或超买】：RSI/ADX 提示市场可能面临回调。")
-    else:
-        report_lines.append("➖ 策略1无明显信号。")
-
-    # 策略2：波动+布林+Keltner
-    if indicators['bollinger']['suggestion'] == "买入" and indicators['keltner']['suggestion'] == "买入" and indicators['atr']['suggestion'] != "卖出":
-        report_lines.append("✅ 策略2【布林+Keltner 缩口反弹】：提示当前处于低波动区，可能反弹。")
-    else:
-        report_lines.append("➖ 策略2无明显信号。")
-
-    # 策略3：动量
-    if indicators['macd']['suggestion'] == "买入" and indicators['vwap']['suggestion'] == "买入" and indicators['obv']['suggestion'] == "买入":
-        report_lines.append("✅ 策略3【动能增强】：MACD、VWAP、OBV 联合向好，资金流入明显。")
-    else:
-        report_lines.append("➖ 策略3无明显信号。")
-
-    # 策略4：风控
-    if indicators['rsi']['suggestion'] == "卖出" and indicators['adx']['suggestion'] == "买入" and indicators['atr']['suggestion'] != "卖出":
-        report_lines.append("⚠️ 策略4【风险预警】：强趋势+超买+波动提升，需警惕回调风险。")
-    else:
-        report_lines.append("➖ 策略4未触发风险预警。")
+    signals = _indicator_signals(indicators)
+    for strategy in GROUPED_STRATEGIES:
+        rule = strategy.matched_rules(signals)
+        action = rule.action if rule is not None else HOLD
+        texts = STRATEGY_REPORT_TEXTS.get(strategy.name, {})
+        report_lines.append(texts.get(action, f"➖ {strategy.name}：{signal_to_label(action)}"))
 
     return "\n".join(report_lines)
 
@@ -278,65 +359,131 @@ def export_analysis_to_markdown(all_results, output_path):
             # 添加分隔线，方便区分每支股票的报告
             f.write("\n---\n\n")
 
-def analyze(stock, stock_data, indicator_weights):
+def analyze(stock, stock_data, indicator_weights, timeframe_indicators=None):
     # 检查 stock_data 是否为空或缺少必要字段
     required_fields = ['close']
 
     # 检查 stock_data 是否为 None 或为空，或者缺少必要的字段
     if stock_data is None or stock_data.empty or not all(field in stock_data.columns for field in required_fields):
-        print(f"\n【错误】：没有有效的股票数据或缺少必要的字段")
+        trace(ERROR, 'analyze.no_data', "\n【错误】：没有有效的股票数据或缺少必要的字段")
         return {"final_decision": "没有股票数据", "reasons": [], "indicators": {}}
 
 
     # 如果数据有效，开始分析
-    print(f"\n==============================")
-    print(f"正在分析股票: {stock.ticker} - {stock.ticker_name}")
+    trace(INFO, 'analyze.start', f"\n==============================\n正在分析股票: {stock.ticker} - {stock.ticker_name}",
+          ticker=stock.ticker)
+
+    # 本次分析的上下文：指标只计算一次，市场类型识别直接复用
+    context = AnalysisContext(stock_data)
+    stock_data = context.data
 
     # 计算技术指标
-    indicators = calculate_indicators(stock_data)
+    indicators = calculate_indicators(stock_data, context=context)
 
     # 检测市场类型
-    market_type = detect_market_type(stock_data)
+    market_type = context.cached('market_type', lambda ctx: detect_market_type(ctx.data, ctx))
 
     # 得到最终建议和理由
     final_decision, reasons = final_suggestion(indicators, market_type, indicator_weights)
 
-    # 返回结构化数据
-    return {
+    result = {
         "final_decision": final_decision,
         "reasons": reasons,
         "indicators": indicators
     }
+
+    # 可选：周线 / 月线指标（MultiTimeframeIndicators 跨调用保留，只增量聚合新的交易日）
+    if timeframe_indicators is not None:
+        timeframe_indicators.update(stock_data)
+        result["timeframe_indicators"] = timeframe_indicators.suggestions()
+
+    # 返回结构化数据
+    return result
 # 批量分析股票并生成报告
-def batch_analysis_stocks_report(stocks, start_date, end_date):
+def batch_analysis_stocks_report(stocks, start_date, end_date, workers=None):
 
-    analysis_results = batch_analysis_stocks(stocks, start_date, end_date)
+    analysis_results = batch_analysis_stocks(stocks, start_date, end_date, workers=workers)
 
     # 所有分析结束后，生成 Markdown 报告
     export_analysis_to_markdown(analysis_results, output_path="../report/分析报告.md")
 
-# 批量分析股票
-def batch_analysis_stocks(stocks, start_date, end_date):
-    # 初始化存储分析结果的列表
-    analysis_results = []
+# 获取单只股票数据（fetch_data 可替换数据源，签名为 fetch_data(symbol, start_date, end_date)）
+def fetch_ticker(ticker, start_date, end_date, fetch_data=None):
+    if fetch_data is not None:
+        return fetch_data(ticker['symbol'], start_date, end_date)
+    return StockAnalysis(ticker['symbol'], ticker['name'], start_date, end_date).data_fetcher.fetch_data()
+
+# 分析单只股票（批量分析的工作函数，可在子进程中执行）
+def analyze_ticker(ticker, start_date, end_date, fetch_data=None):
+    return analyze_ticker_data(ticker, fetch_ticker(ticker, start_date, end_date, fetch_data), start_date, end_date)
+
+# 分析已获取数据的单只股票（流水线模式的分析函数）
+def analyze_ticker_data(ticker, stock_data, start_date, end_date):
+    # 使用 ticker 的 symbol 和 name 创建 StockAnalysis 对象
+    stock = StockAnalysis(ticker['symbol'], ticker['name'], start_date, end_date)
 
-    # 遍历每个股票
-    for ticker in stocks:
-        # 使用 ticker 的 symbol 和 name 创建 StockAnalysis 对象
-        stock = StockAnalysis(ticker['symbol'], ticker['name'], start_date, end_date)
+    # 执行分析函数并获取分析结果
+    analyze_result = analyze(stock, stock_data, indicator_weights)
 
-        # 获取股票数据
-        stock_data = stock.data_fetcher.fetch_data()
+    # 结果需在进程间传递：延迟生成的指标建议转换为 IndicatorResult（只保留建议与说明文字）
+    indicators = {
+        name: IndicatorResult(signal['suggestion'], signal['detailed_suggestion'])
+        for name, signal in analyze_result["indicators"].items()
+    }
+
+    return StrategyResult(
+        ticker=stock.ticker,
+        ticker_name=stock.ticker_name,
+        analysis=StrategyAnalysis(analyze_result["final_decision"], analyze_result["reasons"], indicators,
+                                  timeframe_indicators=analyze_result.get("timeframe_indicators"))
+    )
 
-        # 执行分析函数并获取分析结果
-        analyze_result = analyze(stock, stock_data, indicator_weights)
+# 批量分析股票
+def batch_analysis_stocks(stocks, start_date, end_date, workers=None, chunksize=None, fetch_data=None,
+                          pipeline=None, fetch_workers=None):
+    """
+    批量分析股票，workers > 1 时在进程池中并行执行
+
+    :param stocks: [{'symbol': ..., 'name': ...}, ...]
+    :param workers: 并行进程数，None 读取 BATCH_CONFIG["WORKERS"]（默认 1，串行）
+    :param chunksize: 每次提交给子进程的股票数量，None 读取 BATCH_CONFIG["CHUNKSIZE"]
+    :param fetch_data: 可选数据源函数 fetch_data(symbol, start_date, end_date)，默认使用 DataFetcher
+    :param pipeline: 是否使用流水线模式（线程获取数据、进程分析，两者重叠），None 读取 BATCH_CONFIG["PIPELINE"]
+    :param fetch_workers: 流水线模式下获取数据的线程数，None 读取 BATCH_CONFIG["FETCH_WORKERS"]
+    :return: 与 stocks 顺序一致的 StrategyResult 列表；单只股票失败时 error 字段记录错误信息
+    """
+    if pipeline is None:
+        pipeline = BATCH_CONFIG.get("PIPELINE", False)
+
+    if pipeline:
+        batch = run_pipeline(partial(fetch_ticker, start_date=start_date, end_date=end_date, fetch_data=fetch_data),
+                             partial(analyze_ticker_data, start_date=start_date, end_date=end_date),
+                             stocks, workers=workers, fetch_workers=fetch_workers)
+    else:
+        batch = run_batch(partial(analyze_ticker, start_date=start_date, end_date=end_date, fetch_data=fetch_data),
+                          stocks, workers=workers, chunksize=chunksize)
+
+    # 初始化存储分析结果的列表
+    analysis_results = []
+    for item in batch:
+        if item['error'] is None:
+            result = item['result']
+        else:
+            trace(ERROR, 'batch.error', f"\n【错误】：{item['item']['symbol']} 分析失败：{item['error']}",
+                  ticker=item['item']['symbol'], error=item['error'])
+            result = StrategyResult(
+                ticker=item['item']['symbol'],
+                ticker_name=item['item']['name'],
+                analysis=StrategyAnalysis("分析失败", [item['error']], {})
+            )
+        result.error = item['error']
+        # 耗时（秒）；流水线模式另有获取数据与分析各自的耗时
+        for key in ('elapsed', 'fetch_elapsed', 'compute_elapsed'):
+            if key in item:
+                setattr(result, key, item[key])
 
         # 将结果存储到列表中
-        analysis_results.append({
-            "ticker": stock.ticker,
-            "ticker_name": stock.ticker_name,
-            "analysis": analyze_result
-        })
+        analysis_results.append(result)
 
     return analysis_results
 
@@ -374,8 +521,8 @@ def export_analysis_to_console(all_results):
         print("\n" + "-"*50 + "\n")
 
 # 批量分析股票并打印到控制台
-def batch_analysis_stocks_console(stocks_infos,start_date,end_date):
-    analysis_results = batch_analysis_stocks(stocks_infos, start_date, end_date)
+def batch_analysis_stocks_console(stocks_infos,start_date,end_date, workers=None):
+    analysis_results = batch_analysis_stocks(stocks_infos, start_date, end_date, workers=workers)
     export_analysis_to_console(analysis_results)
 
 def from_json():
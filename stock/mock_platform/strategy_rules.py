@@ -0,0 +1,224 @@
+import re
+
+import numpy as np
+from stock.indicator.signals import BUY, HOLD, SELL, SIGNAL_DTYPE
+
+"""
+声明式策略规则：把 "rsi=BUY & adx=BUY & stochastic_rsi=BUY -> BUY" 这样的文本规则编译为 NumPy 布尔掩码运算
+
+规则语法：
+    条件 [& 条件 ...] [| 条件 [& 条件 ...] ...] -> 动作
+    - 条件：指标名称=信号 或 指标名称!=信号，信号为 BUY / SELL / HOLD（也可写 买入 / 卖出 / 观望）
+    - & 的优先级高于 |（不支持括号）；箭头可写作 -> 或 →
+    - 动作：BUY / SELL / HOLD
+
+一个策略由若干条规则组成，按先后顺序匹配（等价于 if / elif），都不满足时为观望。
+规则对信号的形状没有要求：单根K线（标量）、全历史（K线）或 股票 × K线 的信号矩阵都可以一次求值。
+"""
+
+# 规则中的信号名称 -> int8 信号编码
+SIGNAL_NAMES = {
+    "BUY": BUY, "SELL": SELL, "HOLD": HOLD,
+    "买入": BUY, "卖出": SELL, "观望": HOLD,
+}
+
+_ARROW = re.compile(r"\s*(?:->|→)\s*")
+_CONDITION = re.compile(r"^\s*(\w+)\s*(!=|=)\s*(\w+)\s*$")
+
+
+def _signal_code(token, text):
+    if token not in SIGNAL_NAMES:
+        raise ValueError(f"无法解析的策略规则: {text!r}（未知信号 {token!r}）")
+    return SIGNAL_NAMES[token]
+
+
+class Condition:
+    """单个条件：指标信号 等于 / 不等于 某个信号编码"""
+
+    __slots__ = ("name", "signal", "negate")
+
+    def __init__(self, name, signal, negate=False):
+        self.name = name
+        self.signal = signal
+        self.negate = negate
+
+    def mask(self, signals):
+        # 未提供信号的指标按观望处理（与 strategy_engine 中未参与计算的指标一致）
+        values = signals.get(self.name, HOLD)
+        return np.not_equal(values, self.signal) if self.negate else np.equal(values, self.signal)
+
+    def __repr__(self):
+        return f"{self.name}{'!=' if self.negate else '='}{self.signal}"
+
+
+class Rule:
+    """
+    一条编译后的规则：若干 AND 条件组之间取 OR，满足时给出 action
+
+    - text: 原始规则文本
+    - clauses: ((Condition, ...), ...)，外层为 OR，内层为 AND
+    - action: 满足时的信号编码
+    - reason: 满足时的说明文字（可选）
+    """
+
+    __slots__ = ("text", "clauses", "action", "reason")
+
+    def __init__(self, text, clauses, action, reason=None):
+        self.text = text
+        self.clauses = clauses
+        self.action = action
+        self.reason = reason
+
+    @property
+    def indicators(self):
+        """规则引用的指标名称（按出现顺序去重）"""
+        return tuple(dict.fromkeys(condition.name for clause in self.clauses for condition in clause))
+
+    def mask(self, signals):
+        """
+        计算规则在每根K线上是否成立
+
+        :param signals: {指标名称: int8 信号（标量或数组）}
+        :return: 布尔数组（形状与信号相同）
+        """
+        result = None
+        for clause in self.clauses:
+            clause_mask = None
+            for condition in clause:
+                condition_mask = condition.mask(signals)
+                clause_mask = condition_mask if clause_mask is None else clause_mask & condition_mask
+            result = clause_mask if result is None else result | clause_mask
+        return result
+
+    def __repr__(self):
+        return f"Rule({self.text!r})"
+
+
+def parse_rule(text, reason=None):
+    """
+    解析一条规则文本
+
+    参数:
+    text (str): 规则文本，如 "rsi=SELL & adx=BUY & atr!=SELL -> SELL"
+    reason (str): 规则成立时的说明文字
+
+    返回:
+    Rule: 编译后的规则
+    """
+    parts = _ARROW.split(text.strip())
+    if len(parts) != 2 or not parts[0] or not parts[1]:
+        raise ValueError(f"无法解析的策略规则: {text!r}（缺少 -> 动作）")
+    condition_text, action_text = parts
+
+    clauses = []
+    for clause_text in condition_text.split("|"):
+        clause = []
+        for item in clause_text.split("&"):
+            match = _CONDITION.match(item)
+            if match is None:
+                raise ValueError(f"无法解析的策略规则: {text!r}（条件 {item.strip()!r}）")
+            name, operator, signal = match.groups()
+            clause.append(Condition(name, _signal_code(signal, text), negate=(operator == "!=")))
+        clauses.append(tuple(clause))
+    return Rule(text, tuple(clauses), _signal_code(action_text.strip(), text), reason)
+
+
+class Strategy:
+    """一个策略：按顺序匹配的规则列表，都不满足时为观望"""
+
+    __slots__ = ("name", "rules")
+
+    def __init__(self, name, rules):
+        self.name = name
+        self.rules = tuple(rules)
+
+    @property
+    def indicators(self):
+        """策略引用的指标名称"""
+        return tuple(dict.fromkeys(name for rule in self.rules for name in rule.indicators))
+
+    def evaluate(self, signals):
+        """
+        对全部K线求值
+
+        :param signals: {指标名称: int8 信号（标量或数组）}
+        :return: int8 信号数组（买入 1 / 卖出 -1 / 观望 0）
+        """
+        masks = [rule.mask(signals) for rule in self.rules]
+        return np.select(masks, [rule.action for rule in self.rules], default=HOLD).astype(SIGNAL_DTYPE)
+
+    def matched_rules(self, signals):
+        """
+        单根K线上命中的规则（按 if / elif 只取第一条），用于生成说明文字
+
+        :param signals: {指标名称: 标量信号}
+        :return: 命中的 Rule，没有命中时返回 None
+        """
+        for rule in self.rules:
+            if bool(rule.mask(signals)):
+                return rule
+        return None
+
+    def __repr__(self):
+        return f"Strategy({self.name!r}, rules={len(self.rules)})"
+
+
+def compile_strategies(definitions):
+    """
+    编译策略定义
+
+    参数:
+    definitions (iterable): [(策略名称, [规则文本 或 (规则文本, 说明), ...]), ...]
+
+    返回:
+    tuple: Strategy 列表
+    """
+    strategies = []
+    for name, rules in definitions:
+        compiled = [parse_rule(rule) if isinstance(rule, str) else parse_rule(*rule) for rule in rules]
+        strategies.append(Strategy(name, compiled))
+    return tuple(strategies)
+
+
+def strategy_indicators(strategies):
+    """全部策略引用的指标名称（每个策略一组，可直接传给 registry.active_indicators）"""
+    return tuple(strategy.indicators for strategy in strategies)
+
+
+def signals_from_matrix(signal_matrix, names):
+    """把信号矩阵（... × 指标）按列拆成 {指标名称: 信号视图}，不复制数据"""
+    signal_matrix = np.asarray(signal_matrix)
+    return {name: signal_matrix[..., j] for j, name in enumerate(names)}
+
+
+def evaluate_strategies(strategies, signals):
+    """
+    一次求出每个策略在每根K线上的信号
+
+    参数:
+    strategies (iterable): Strategy 列表
+    signals (dict): {指标名称: int8 信号（标量或数组）}
+
+    返回:
+    dict: {策略名称: int8 信号数组}
+    """
+    return {strategy.name: strategy.evaluate(signals) for strategy in strategies}
+
+
+def count_votes(strategy_signals):
+    """
+    统计每根K线上给出买入 / 卖出的策略数量
+
+    参数:
+    strategy_signals (dict): evaluate_strategies 的结果
+
+    返回:
+    tuple: (buy_count, sell_count)，均为 int8 数组
+    """
+    values = list(strategy_signals.values())
+    buy_count = np.zeros(np.shape(values[0]), dtype=np.int8)
+    sell_count = np.zeros(np.shape(values[0]), dtype=np.int8)
+    for value in values:
+        buy_count += value == BUY
+        sell_count += value == SELL
+    return buy_count, sell_count
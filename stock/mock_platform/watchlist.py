@@ -0,0 +1,193 @@
+import datetime
+import os
+from datetime import timedelta
+from functools import partial
+from stock.data.config import WATCHLIST_CONFIG
+from stock.data.snapshot import SnapshotWriter, load_snapshot, save_snapshot
+from stock.data.trace import ERROR, INFO, WARNING, trace
+from stock.indicator.registry import active_indicators, indicator_names
+from stock.indicator.streaming import StreamingState, state_fingerprint
+from stock.mock_platform import strategy_engine
+from stock.mock_platform.batch import iter_pipeline
+
+"""
+收盘后自选股增量刷新：每只股票只获取上次刷新之后新收盘的K线，推进已保存的流式指标状态
+
+- 首次刷新（或状态文件缺失、指标参数变化）时获取 LOOKBACK_DAYS 天历史建立状态
+- 之后每天只获取新增的K线，指标状态 O(1) 推进，策略引擎的市场类型识别与综合建议在流式状态上执行，
+  结果与每天重新分析一年数据相同
+- 全部股票的状态与上一次的建议保存在 STATE_DIR 下的一个快照文件中（stock/data/snapshot.py），启动时读取，
+  刷新过程中定期写入；上一次的建议用于列出建议的变化
+"""
+
+
+def watchlist_indicators():
+    """刷新需要的指标：策略引擎实际参与计算的指标，加上市场类型识别用到的 ADX / ATR / 布林带"""
+    needed = set(active_indicators(strategy_engine.indicator_weights, strategy_engine.GROUPED_STRATEGY_INDICATORS))
+    needed.update(('adx', 'atr', 'bollinger'))
+    return [name for name in indicator_names() if name in needed]
+
+
+def snapshot_path(state_dir):
+    return os.path.join(state_dir, "watchlist_state.npz")
+
+
+def weight_tables():
+    """随状态一起保存的权重表：上一次的建议是在这些权重下给出的"""
+    return {'indicator_weights': strategy_engine.indicator_weights}
+
+
+def load_saved_states(state_dir):
+    """
+    启动时读取快照中全部股票的已保存状态
+
+    :return: {symbol: {'state': ..., 'final_decision': ..., 'suggestions': ...}}；快照不存在或损坏时为空字典
+    """
+    snapshot = load_snapshot(snapshot_path(state_dir))
+    if snapshot is None:
+        return {}
+    if snapshot['sections'].get('tables') != weight_tables():
+        trace(WARNING, 'watchlist.weights_changed', "权重表与上次刷新时不同，建议的变化可能来自权重调整",
+              created=snapshot['created'])
+    return snapshot['sections'].get('saved', {})
+
+
+def save_states(state_dir, saved_states):
+    """把全部股票的状态和当前权重表写入快照"""
+    return save_snapshot(snapshot_path(state_dir), {'saved': saved_states, 'tables': weight_tables()})
+
+
+def _saved_state(item, fingerprint):
+    # 已保存的状态与当前指标配置一致时返回其 state_dict，否则返回 None（需要重新建立）
+    saved = item.get('saved')
+    if not saved or saved['state'].get('fingerprint') != fingerprint:
+        return None
+    return saved['state']
+
+
+# 获取新收盘的K线（刷新的获取数据函数，在线程中执行）
+def fetch_new_bars(item, end_date, lookback_days, fingerprint, fetch_data=None):
+    saved_state = _saved_state(item, fingerprint)
+    if saved_state is None:
+        start_date = (datetime.datetime.strptime(end_date, "%Y-%m-%d") - timedelta(days=lookback_days)).strftime("%Y-%m-%d")
+    else:
+        start_date = (datetime.datetime.strptime(saved_state['last_date'], "%Y-%m-%d")
+                      + timedelta(days=1)).strftime("%Y-%m-%d")
+        if start_date > end_date:
+            return None
+    return strategy_engine.fetch_ticker(item['ticker'], start_date, end_date, fetch_data)
+
+
+# 推进流式状态并生成建议（刷新的分析函数，可在子进程中执行）
+def advance_ticker(item, stock_data, lookback_days, fingerprint):
+    ticker = item['ticker']
+    saved = item.get('saved') or {}
+    saved_state = _saved_state(item, fingerprint)
+    state = StreamingState.from_state_dict(saved_state) if saved_state is not None else None
+    rebuilt = state is None
+    if rebuilt:
+        state = StreamingState(ticker['symbol'], watchlist_indicators(), lookback_days=lookback_days)
+        saved = {}
+
+    new_bars = state.update_frame(stock_data)
+    if state.bar_count == 0:
+        raise ValueError(f"没有有效的股票数据: {ticker['symbol']}")
+
+    # 与 strategy_engine.analyze 相同的步骤，上下文换成流式状态
+    indicators = strategy_engine.calculate_indicators(state.data, context=state)
+    market_type = strategy_engine.detect_market_type(state.data, state)
+    final_decision, reasons = strategy_engine.final_suggestion(indicators, market_type,
+                                                               strategy_engine.indicator_weights)
+
+    suggestions = {name: signal['suggestion'] for name, signal in indicators.items()}
+    previous = saved.get('suggestions', {})
+    report = {
+        'ticker': ticker['symbol'],
+        'ticker_name': ticker['name'],
+        'date': state.last_date,
+        'new_bars': new_bars,
+        'rebuilt': rebuilt,
+        'final_decision': final_decision,
+        'previous_decision': saved.get('final_decision'),
+        'market_type': market_type,
+        'reasons': reasons,
+        'suggestions': suggestions,
+        'changes': {name: (previous.get(name), label) for name, label in suggestions.items()
+                    if previous.get(name) != label},
+    }
+    return {
+        'saved': {'state': state.state_dict(), 'final_decision': final_decision, 'suggestions': suggestions},
+        'report': report,
+    }
+
+
+def refresh_watchlist(stocks, end_date=None, state_dir=None, lookback_days=None, fetch_data=None, workers=None,
+                      fetch_workers=None, snapshot_interval=None):
+    """
+    收盘后刷新自选股：只处理上次刷新之后新收盘的K线，并保存推进后的状态
+
+    :param stocks: [{'symbol': ..., 'name': ...}, ...]
+    :param end_date: 刷新截止日期（YYYY-MM-DD），None 为今天
+    :param state_dir: 状态保存目录，None 读取 WATCHLIST_CONFIG["STATE_DIR"]
+    :param lookback_days: 建立状态时获取的历史天数，None 读取 WATCHLIST_CONFIG["LOOKBACK_DAYS"]
+    :param fetch_data: 可选数据源函数 fetch_data(symbol, start_date, end_date)，默认使用 DataFetcher
+    :param workers: 分析进程数，None 读取 BATCH_CONFIG["WORKERS"]
+    :param fetch_workers: 获取数据的线程数，None 读取 BATCH_CONFIG["FETCH_WORKERS"]
+    :param snapshot_interval: 刷新过程中写快照的间隔（秒），None 读取 SNAPSHOT_CONFIG["INTERVAL"]
+    :return: 与 stocks 顺序一致的刷新结果列表（dict）；单只股票失败时 error 字段记录错误信息，状态保持不变
+    """
+    end_date = end_date or datetime.date.today().strftime("%Y-%m-%d")
+    state_dir = state_dir or WATCHLIST_CONFIG.get("STATE_DIR", "../data/watchlist_state")
+    lookback_days = lookback_days or WATCHLIST_CONFIG.get("LOOKBACK_DAYS", 365)
+
+    fingerprint = state_fingerprint(watchlist_indicators(), lookback_days=lookback_days)
+
+    saved_states = load_saved_states(state_dir)
+    items = [{'ticker': ticker, 'saved': saved_states.get(ticker['symbol'])} for ticker in stocks]
+    batch = iter_pipeline(partial(fetch_new_bars, end_date=end_date, lookback_days=lookback_days,
+                                  fingerprint=fingerprint, fetch_data=fetch_data),
+                          partial(advance_ticker, lookback_days=lookback_days, fingerprint=fingerprint),
+                          items, workers=workers, fetch_workers=fetch_workers)
+
+    # 刷新过程中定期写快照，中断后重新运行时已刷新的股票不再重复获取
+    writer = SnapshotWriter(snapshot_path(state_dir), snapshot_interval)
+    reports = [None] * len(items)
+    for index, item in batch:
+        ticker = item['item']['ticker']
+        if item['error'] is not None:
+            trace(ERROR, 'watchlist.error', f"\n【错误】：{ticker['symbol']} 刷新失败：{item['error']}",
+                  ticker=ticker['symbol'], error=item['error'])
+            reports[index] = {'ticker': ticker['symbol'], 'ticker_name': ticker['name'], 'error': item['error']}
+            continue
+        saved_states[ticker['symbol']] = item['result']['saved']
+        writer.maybe_write(lambda: {'saved': saved_states, 'tables': weight_tables()})
+        report = item['result']['report']
+        report['error'] = None
+        report['elapsed'] = item['elapsed']
+        reports[index] = report
+        trace(INFO, 'watchlist.refresh', f"{ticker['name']}（{ticker['symbol']}） {report['date']}：{report['final_decision']}",
+              ticker=ticker['symbol'], date=report['date'], new_bars=report['new_bars'],
+              final_decision=report['final_decision'])
+    save_states(state_dir, saved_states)
+    return reports
+
+
+def print_refresh_report(reports):
+    """在控制台输出刷新结果：综合建议或指标建议有变化的股票"""
+    failed = [report for report in reports if report['error'] is not None]
+    refreshed = [report for report in reports if report['error'] is None]
+    changed = [report for report in refreshed
+               if report['changes'] or report['final_decision'] != report['previous_decision']]
+    print(f"\n共刷新 {len(refreshed)} 只股票（失败 {len(failed)} 只），{len(changed)} 只建议有变化：")
+    for report in changed:
+        previous = report['previous_decision'] or "（首次）"
+        print(f"\n### {report['ticker_name']}（{report['ticker']}） {report['date']}："
+              f"{previous} → {report['final_decision']}  市场类型：{report['market_type']}")
+        for name, (old, new) in report['changes'].items():
+            print(f" - {name.upper()}：{old or '（首次）'} → {new}")
+    for report in failed:
+        print(f"\n【错误】：{report['ticker']} 刷新失败：{report['error']}")
+
+
+if __name__ == '__main__':
+    print_refresh_report(refresh_watchlist(strategy_engine.from_json()))
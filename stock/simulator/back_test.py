@@ -1,6 +1,7 @@
 import matplotlib.pyplot as plt
 from stock.mock_platform.original_strategy_engine import analyze
 from stock.data.stock_analysis import StockAnalysis
+from stock.data.trace import INFO, trace, tracing
 import numpy as np
 from datetime import datetime, timedelta
 from stock.simulator.simulation import Simulation
@@ -79,9 +80,11 @@ def backtest(stock,simulation):
     plt.show()
 
     # 输出操作建议
-    print("操作建议：")
-    for date, recommendation in recommendations:
-        print(f"{date.strftime('%Y%m%d')}: {recommendation}")
+    if tracing(INFO):
+        trace(INFO, 'backtest.recommendations', "操作建议：", ticker=stock.ticker)
+        for date, recommendation in recommendations:
+            trace(INFO, 'backtest.recommendation', f"{date.strftime('%Y%m%d')}: {recommendation}",
+                  ticker=stock.ticker, date=date.strftime('%Y-%m-%d'), recommendation=recommendation)
 
 if __name__ == "__main__":
     ticker = 'sh.600570'  # 示例股票代码
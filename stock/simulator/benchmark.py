@@ -0,0 +1,1041 @@
+import contextlib
+import io
+import json
+import os
+import tempfile
+import time
+import threading
+import tracemalloc
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+
+import numpy as np
+import pandas as pd
+
+from stock.data import trace as tracer
+from stock.data.history_cache import CachedFetch
+from stock.data.ring_buffer import RingBuffer, UniverseRingBuffer, default_capacity
+from stock.data.snapshot import load_snapshot, read_snapshot, save_snapshot
+from stock.data.synthetic_data import fetch_synthetic_data, fetch_synthetic_history, make_synthetic_ohlcv
+from stock.indicator import kernels
+from stock.indicator.multi_timeframe import MultiTimeframeIndicators
+from stock.indicator.obv import calculate_obv, calculate_obv_slope
+from stock.indicator.registry import compute_suggestions
+from stock.indicator.streaming import StreamingState
+from stock.indicator.support_resistance import SupportResistanceTracker, support_resistance_levels, support_resistance_series
+from stock.indicator.signals import Suggestion, signal_to_label
+from stock.mock_platform import original_strategy_engine, strategy_engine
+from stock.mock_platform.engine_comparison import compare_engines
+from stock.mock_platform.decision_engine import compile_decision_engine, decision_labels
+from stock.mock_platform.screener import screen_stocks
+from stock.mock_platform.service import AnalysisService, make_server
+from stock.mock_platform.watchlist import refresh_watchlist, watchlist_indicators
+from stock.mock_platform.strategy_rules import evaluate_strategies, signals_from_matrix
+from stock.mock_platform.strategy_engine import calculate_indicators, detect_market_type, final_suggestion, indicator_weights
+
+"""
+性能基准：在模拟数据上测量回测中各环节的耗时，便于优化前后对比
+"""
+
+
+def _timed(func, repeat=1):
+    """执行 func 若干次，返回 (最后一次结果, 平均耗时秒)"""
+    result = None
+    start = time.perf_counter()
+    for _ in range(repeat):
+        result = func()
+    return result, (time.perf_counter() - start) / repeat
+
+
+def bench_backtest_decision(days=120, lookback=250, read_details=False, seed=0):
+    """
+    测量回测中"每个交易日做一次决策"的平均耗时
+
+    模拟 back_test.backtest 的逐日滚动：对每个交易日截取前 lookback 根K线，
+    计算全部指标建议、识别市场类型并给出最终建议。
+
+    参数:
+    days (int): 参与回测的交易日数量
+    lookback (int): 每个交易日使用的历史K线数量
+    read_details (bool): 是否读取每个指标的详细建议文本（模拟生成报告的场景）
+    seed (int): 模拟数据随机种子
+
+    返回:
+    dict: 包含总耗时与每日平均耗时（毫秒）
+    """
+    stock_data = make_synthetic_ohlcv(days=days + lookback, seed=seed)
+
+    def run():
+        for end in range(lookback, lookback + days):
+            window = stock_data.iloc[end - lookback:end]
+            indicators = calculate_indicators(window)
+            if read_details:
+                for signal in indicators.values():
+                    signal['detailed_suggestion']
+            final_suggestion(indicators, detect_market_type(window), indicator_weights)
+
+    _, elapsed = _timed(run)
+    return {
+        'days': days,
+        'total_ms': elapsed * 1000,
+        'per_day_ms': elapsed * 1000 / days,
+    }
+
+
+def bench_kernels(days=2500, repeat=20, seed=0):
+    """
+    对比各核函数后端（numba / numpy / python）的耗时，并以 python 逐元素实现为参考校验等价性
+
+    参数:
+    days (int): 序列长度
+    repeat (int): 每个核函数的重复次数
+    seed (int): 模拟数据随机种子
+
+    返回:
+    dict: {后端: {核函数: (平均耗时毫秒, 相对 python 参考实现的最大绝对误差)}}
+    """
+    stock_data = make_synthetic_ohlcv(days=days, seed=seed)
+    close = stock_data['close'].to_numpy()
+    delta = np.diff(close, prepend=np.nan)
+    gain = np.maximum(delta, 0)
+
+    cases = {
+        'wilder_sum_smoothing': lambda: kernels.wilder_sum_smoothing(np.nan_to_num(gain), 14),
+        'wilder_mean_smoothing': lambda: kernels.wilder_mean_smoothing(np.nan_to_num(gain), 21),
+        'ewm_mean': lambda: kernels.ewm_mean(gain, 14),
+        'obv_accumulate': lambda: kernels.obv_accumulate(close, stock_data['volume'].to_numpy(), 1000),
+        'rolling_max': lambda: kernels.rolling_max(close, 21),
+        'rolling_min': lambda: kernels.rolling_min(close, 21),
+        'rolling_mean': lambda: kernels.rolling_mean(close, 5),
+    }
+
+    previous_backend = kernels.get_kernel_backend()
+    try:
+        kernels.set_kernel_backend('python')
+        reference = {name: case() for name, case in cases.items()}
+
+        results = {}
+        for backend in kernels.available_backends():
+            kernels.set_kernel_backend(backend)
+            results[backend] = {}
+            for name, case in cases.items():
+                case()  # 预热（numba 首次调用会触发编译）
+                output, elapsed = _timed(case, repeat)
+                error = float(np.nanmax(np.abs(output - reference[name])))
+                results[backend][name] = (elapsed * 1000, error)
+        return results
+    finally:
+        kernels.set_kernel_backend(previous_backend)
+
+
+def bench_obv_slope(days=2500, window=5, seed=0):
+    """
+    对比全历史 OBV 斜率的两种算法：逐K线 np.polyfit 与闭式滚动回归（calculate_obv_slope）
+
+    参数:
+    days (int): 序列长度
+    window (int): 回归窗口长度
+    seed (int): 模拟数据随机种子
+
+    返回:
+    dict: 两种算法的耗时（毫秒）、加速比和斜率最大相对误差
+    """
+    obv = calculate_obv(make_synthetic_ohlcv(days=days, seed=seed))
+    values = obv.to_numpy()
+
+    reference, elapsed_polyfit = _timed(lambda: np.array(
+        [np.polyfit(range(window), values[end - window:end], 1)[0] for end in range(window, len(values) + 1)]))
+    slope, elapsed_closed = _timed(lambda: calculate_obv_slope(obv, window).to_numpy()[window - 1:])
+
+    return {
+        'polyfit_ms': elapsed_polyfit * 1000,
+        'closed_form_ms': elapsed_closed * 1000,
+        'speedup': elapsed_polyfit / elapsed_closed,
+        'max_rel_error': float(np.max(np.abs(slope - reference) / np.maximum(np.abs(reference), 1.0))),
+    }
+
+
+def bench_multi_timeframe(days=120, history=2500, seed=0):
+    """
+    对比逐日获取周线 / 月线指标建议的两种做法：每天对全部日线重新 resample，与增量聚合（MultiTimeframeIndicators）
+
+    参数:
+    days (int): 逐日推进的交易日数量
+    history (int): 第一天之前已有的日线数量
+    seed (int): 模拟数据随机种子
+
+    返回:
+    dict: 两种做法的每日平均耗时（毫秒）、加速比和最新建议是否一致
+    """
+    stock_data = make_synthetic_ohlcv(days=history + days, seed=seed)
+    rules = {'open': 'first', 'high': 'max', 'low': 'min', 'close': 'last', 'volume': 'sum', 'amount': 'sum'}
+    names = ['rsi', 'macd', 'bollinger']
+
+    def full_resample():
+        result = None
+        for end in range(history, history + days):
+            daily = stock_data.iloc[:end + 1]
+            result = {
+                timeframe: compute_suggestions(daily.resample(freq).agg(rules).dropna(subset=['close']), names)
+                for timeframe, freq in (('weekly', 'W'), ('monthly', 'ME'))
+            }
+        return result
+
+    def incremental():
+        indicators = MultiTimeframeIndicators(names=names)
+        indicators.update(stock_data.iloc[:history])
+        result = None
+        for end in range(history, history + days):
+            indicators.update(stock_data.iloc[:end + 1])
+            result = indicators.suggestions()
+        return result
+
+    expected, elapsed_full = _timed(full_resample)
+    actual, elapsed_incremental = _timed(incremental)
+    same = all(expected[timeframe][name]['suggestion'] == actual[timeframe][name]['suggestion']
+               for timeframe in expected for name in names)
+
+    return {
+        'full_resample_per_day_ms': elapsed_full * 1000 / days,
+        'incremental_per_day_ms': elapsed_incremental * 1000 / days,
+        'speedup': elapsed_full / elapsed_incremental,
+        'same_suggestions': same,
+    }
+
+
+def bench_analyze(tickers=20, days=250, seed=0):
+    """
+    测量两套引擎单只股票 analyze() 的平均耗时（指标计算、市场类型、评分、支撑/压力位全流程）
+
+    参数:
+    tickers (int): 模拟股票数量
+    days (int): 每只股票的K线数量
+    seed (int): 模拟数据随机种子
+
+    返回:
+    dict: 两套引擎每只股票的平均耗时（毫秒）
+    """
+    class _Stock:
+        ticker = 'SYNTHETIC'
+        ticker_name = '模拟数据'
+
+    universe = [make_synthetic_ohlcv(days=days, seed=seed + i) for i in range(tickers)]
+    weights = {name: dict(weight) for name, weight in strategy_engine.indicator_weights.items()}
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        strategy_engine.analyze(_Stock, universe[0], weights)  # 预热
+        _, elapsed_strategy = _timed(lambda: [strategy_engine.analyze(_Stock, data, weights) for data in universe])
+        _, elapsed_original = _timed(lambda: [original_strategy_engine.analyze(_Stock, data) for data in universe])
+
+    return {
+        'strategy_engine_ms': elapsed_strategy * 1000 / tickers,
+        'original_strategy_engine_ms': elapsed_original * 1000 / tickers,
+    }
+
+
+def bench_batch(tickers=256, workers=None, start_date='2023-01-01', end_date='2024-12-31'):
+    """
+    测量 batch_analysis_stocks 在不同进程数下的耗时与加速比（模拟数据源，不访问网络）
+
+    参数:
+    tickers (int): 股票数量
+    workers (list): 要测试的进程数列表，默认 1 到 CPU 核数之间按倍数递增
+    start_date (str): 开始日期
+    end_date (str): 结束日期
+
+    返回:
+    dict: {进程数: 总耗时毫秒} 以及最大进程数相对单进程的加速比
+    """
+    if workers is None:
+        workers = [1]
+        while workers[-1] * 2 <= (os.cpu_count() or 1):
+            workers.append(workers[-1] * 2)
+    stocks = [{'symbol': f'SYN{i:04d}', 'name': f'模拟{i}'} for i in range(tickers)]
+
+    timings = {}
+    with contextlib.redirect_stdout(io.StringIO()):
+        for count in workers:
+            _, elapsed = _timed(lambda: strategy_engine.batch_analysis_stocks(
+                stocks, start_date, end_date, workers=count, fetch_data=fetch_synthetic_data))
+            timings[count] = elapsed
+
+    return {
+        **{f'workers_{count}_ms': elapsed * 1000 for count, elapsed in timings.items()},
+        'speedup': timings[workers[0]] / timings[workers[-1]],
+    }
+
+
+def _fetch_with_latency(symbol, start_date, end_date, latency):
+    """模拟网络延迟的数据源"""
+    time.sleep(latency)
+    return fetch_synthetic_data(symbol, start_date, end_date)
+
+
+def bench_pipeline(tickers=64, latency=0.05, fetch_workers=4, workers=1,
+                   start_date='2023-01-01', end_date='2024-12-31'):
+    """
+    对比批量分析的串行模式与流水线模式（获取数据与分析重叠）的总耗时
+
+    参数:
+    tickers (int): 股票数量
+    latency (float): 每只股票获取数据的模拟网络延迟（秒）
+    fetch_workers (int): 流水线模式下获取数据的线程数
+    workers (int): 分析进程数
+    start_date (str): 开始日期
+    end_date (str): 结束日期
+
+    返回:
+    dict: 两种模式的总耗时（毫秒）、获取与分析各自的累计耗时以及结果是否一致
+    """
+    stocks = [{'symbol': f'SYN{i:04d}', 'name': f'模拟{i}'} for i in range(tickers)]
+    fetch = partial(_fetch_with_latency, latency=latency)
+
+    def strip(results):
+        return [{key: value for key, value in result.items() if not key.endswith('elapsed')} for result in results]
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        serial, elapsed_serial = _timed(lambda: strategy_engine.batch_analysis_stocks(
+            stocks, start_date, end_date, workers=workers, fetch_data=fetch, pipeline=False))
+        piped, elapsed_pipeline = _timed(lambda: strategy_engine.batch_analysis_stocks(
+            stocks, start_date, end_date, workers=workers, fetch_data=fetch, pipeline=True, fetch_workers=fetch_workers))
+
+    return {
+        'serial_ms': elapsed_serial * 1000,
+        'pipeline_ms': elapsed_pipeline * 1000,
+        'fetch_total_ms': tickers * latency * 1000,
+        'speedup': elapsed_serial / elapsed_pipeline,
+        'same_results': strip(serial) == strip(piped),
+    }
+
+
+def bench_market_type_series(days=1000, warmup=30, seed=0):
+    """
+    对比逐切片识别市场类型（detect_market_type）与一次向量化识别（detect_market_type_series）
+
+    参数:
+    days (int): K线数量
+    warmup (int): 跳过的预热K线数量（预热期内两者可能不同）
+    seed (int): 模拟数据随机种子
+
+    返回:
+    dict: 两种做法的耗时（毫秒）、加速比和预热期后的不一致K线数
+    """
+    stock_data = make_synthetic_ohlcv(days=days, seed=seed)
+
+    per_slice, elapsed_slices = _timed(
+        lambda: [strategy_engine.detect_market_type(stock_data.iloc[:end + 1]) for end in range(warmup, days)])
+    series, elapsed_series = _timed(lambda: strategy_engine.detect_market_type_series(stock_data))
+
+    return {
+        'per_slice_ms': elapsed_slices * 1000,
+        'series_ms': elapsed_series * 1000,
+        'speedup': elapsed_slices / elapsed_series,
+        'mismatches': sum(label != series.iloc[end] for end, label in zip(range(warmup, days), per_slice)),
+    }
+
+
+def bench_decision_engine(days=250, warmup=60, step=5, seed=0):
+    """
+    对比逐K线调用标量决策（final_suggestion）与一次矩阵化决策（decision_engine）
+
+    标量路径每个切片都要重算指标、识别市场类型并复制归一化权重表；矩阵路径只计算一次全历史信号。
+
+    参数:
+    days (int): K线数量
+    warmup (int): 第一个决策K线（之前为指标预热期）
+    step (int): 标量路径每隔 step 根K线决策一次（用于校验最后一根K线）
+    seed (int): 模拟数据随机种子
+
+    返回:
+    dict: 单根K线的平均耗时（毫秒）、加速比和各切片最后一根K线的不一致数
+    """
+    stock_data = make_synthetic_ohlcv(days=days, seed=seed)
+    engine = compile_decision_engine(indicator_weights)
+    ends = list(range(warmup, days + 1, step))
+
+    def scalar_decisions():
+        decisions = []
+        for end in ends:
+            window = stock_data.iloc[:end]
+            final, _ = final_suggestion(calculate_indicators(window), detect_market_type(window), indicator_weights)
+            decisions.append(final)
+        return decisions
+
+    scalar, elapsed_scalar = _timed(scalar_decisions)
+    result, elapsed_matrix = _timed(lambda: engine.decide_stock(stock_data))
+    # 校验：每个切片单独走矩阵路径，最后一根K线必须与标量路径一致
+    mismatches = sum(decision_labels(engine.decide_stock(stock_data.iloc[:end])['final'][-1:])[0] != label
+                     for end, label in zip(ends, scalar))
+
+    scalar_per_bar = elapsed_scalar / len(ends)
+    matrix_per_bar = elapsed_matrix / len(result['final'])
+    return {
+        'scalar_per_bar_ms': scalar_per_bar * 1000,
+        'matrix_per_bar_ms': matrix_per_bar * 1000,
+        'speedup': scalar_per_bar / matrix_per_bar,
+        'mismatches': mismatches,
+    }
+
+
+def bench_strategy_rules(tickers=1000, days=2500, sample=2000, seed=0):
+    """
+    对比逐K线的 grouped_strategies 与编译后的策略规则对整个 股票 × K线 信号矩阵一次求值
+
+    参数:
+    tickers (int): 股票数量
+    days (int): 每只股票的K线数量（2500 约为 10 年）
+    sample (int): 标量路径抽样的K线数量（按单根K线耗时折算）
+    seed (int): 随机信号种子
+
+    返回:
+    dict: 单根K线的平均耗时（微秒）、加速比、矩阵求值总耗时（毫秒）和抽样K线的不一致数
+    """
+    names = strategy_engine.active_indicators(indicator_weights, strategy_engine.GROUPED_STRATEGY_INDICATORS)
+    rng = np.random.default_rng(seed)
+    signal_matrix = rng.integers(-1, 2, size=(tickers, days, len(names))).astype(np.int8)
+    strategies = strategy_engine.GROUPED_STRATEGIES
+
+    strategy_signals, elapsed_matrix = _timed(
+        lambda: evaluate_strategies(strategies, signals_from_matrix(signal_matrix, names)))
+
+    flat = signal_matrix.reshape(-1, len(names))
+    rows = rng.choice(len(flat), size=sample, replace=False)
+
+    def scalar_strategies():
+        return [strategy_engine.grouped_strategies(
+            {name: Suggestion(signal_to_label(value), "") for name, value in zip(names, flat[row])})
+            for row in rows]
+
+    _, elapsed_scalar = _timed(scalar_strategies)
+    # 校验：抽样K线上逐条规则的命中结果与矩阵求值一致
+    flat_signals = {name: value.reshape(-1) for name, value in strategy_signals.items()}
+    mismatches = 0
+    for row in rows:
+        bar_signals = dict(zip(names, flat[row].tolist()))
+        for strategy in strategies:
+            rule = strategy.matched_rules(bar_signals)
+            mismatches += (rule.action if rule is not None else 0) != flat_signals[strategy.name][row]
+
+    scalar_per_bar = elapsed_scalar / sample
+    matrix_per_bar = elapsed_matrix / flat.shape[0]
+    return {
+        'scalar_per_bar_us': scalar_per_bar * 1e6,
+        'matrix_per_bar_us': matrix_per_bar * 1e6,
+        'speedup': scalar_per_bar / matrix_per_bar,
+        'matrix_total_ms': elapsed_matrix * 1000,
+        'mismatches': mismatches,
+    }
+
+
+def bench_score_series(days=250, warmup=40, step=5, seed=0):
+    """
+    对比原始评分引擎逐日回测（每天重算指标、评分和融合）与一次计算全历史评分序列（score_series）
+
+    参数:
+    days (int): K线数量
+    warmup (int): 第一个回测日（之前为指标预热期）
+    step (int): 逐日路径每隔 step 根K线计算一次（用于校验）
+    seed (int): 模拟数据随机种子
+
+    返回:
+    dict: 单根K线的平均耗时（毫秒）、加速比和抽样K线上综合建议的不一致数
+    """
+    stock_data = make_synthetic_ohlcv(days=days, seed=seed)
+    ends = list(range(warmup, days + 1, step))
+    engine = original_strategy_engine
+
+    def daily_suggestions():
+        suggestions = []
+        for end in ends:
+            window = stock_data.iloc[:end]
+            indicators = engine.calculate_indicators_raw_and_suggestions(window)
+            market_type = engine.calculate_market_type_from_indicators(indicators, window)
+            scores = engine.score_indicators_from_raw({name: value['raw'] for name, value in indicators.items()})
+            suggestions.append(engine.generate_operation_suggestion_from_scores(
+                scores, engine.adjust_weights_for_market(market_type), window)['suggestion'])
+        return suggestions
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        daily, elapsed_daily = _timed(daily_suggestions)
+    series, elapsed_series = _timed(lambda: engine.score_series(stock_data))
+
+    daily_per_bar = elapsed_daily / len(ends)
+    series_per_bar = elapsed_series / days
+    return {
+        'daily_per_bar_ms': daily_per_bar * 1000,
+        'series_per_bar_ms': series_per_bar * 1000,
+        'speedup': daily_per_bar / series_per_bar,
+        'mismatches': sum(label != series['suggestion'].iloc[end - 1] for end, label in zip(ends, daily)),
+    }
+
+
+def _peak_memory(func):
+    """执行 func，返回 (结果, Python 内存分配峰值 MB)"""
+    tracemalloc.start()
+    try:
+        result = func()
+        return result, tracemalloc.get_traced_memory()[1] / 2 ** 20
+    finally:
+        tracemalloc.stop()
+
+
+def bench_screen(small=50, large=200, top_n=10, start_date='2023-01-01', end_date='2024-12-31'):
+    """
+    对比流式选股（screen_stocks）与批量分析后排序（batch_analysis_stocks）的内存峰值
+
+    参数:
+    small (int): 小股票池数量
+    large (int): 大股票池数量
+    top_n (int): 保留的候选数量
+    start_date (str): 模拟数据开始日期
+    end_date (str): 模拟数据结束日期
+
+    返回:
+    dict: 两种股票池规模下选股的内存峰值、大股票池下批量分析的内存峰值（MB），以及两者前 N 名的得分是否一致
+    """
+    def universe(count):
+        return [{'symbol': f'SYN{i:05d}', 'name': f'模拟{i}'} for i in range(count)]
+
+    def screen(count):
+        return screen_stocks(universe(count), start_date, end_date, top_n=top_n, sort_by='final_score',
+                             workers=1, pipeline=False, fetch_data=fetch_synthetic_data)
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        screen(2)  # 预热：导入、JIT 编译等一次性开销不计入内存峰值
+        _, screen_small_mb = _peak_memory(lambda: screen(small))
+        screened, screen_large_mb = _peak_memory(lambda: screen(large))
+        batch, batch_large_mb = _peak_memory(lambda: original_strategy_engine.batch_analysis_stocks(
+            universe(large), start_date, end_date, workers=1, pipeline=False, fetch_data=fetch_synthetic_data))
+
+    # 批量分析的 final_score 保留 2 位小数，按得分比较前 N 名
+    expected = sorted((entry['final_score'] for entry in batch), reverse=True)[:top_n]
+    return {
+        f'screen_{small}_mb': screen_small_mb,
+        f'screen_{large}_mb': screen_large_mb,
+        f'batch_{large}_mb': batch_large_mb,
+        'same_top': [round(entry['final_score'], 2) for entry in screened['top']] == expected,
+    }
+
+
+def bench_result_retention(tickers=40, start_date='2020-01-01', end_date='2024-12-31', projected_tickers=5000):
+    """
+    测量批量分析结果在不同保留策略下占用的内存，并折算到 projected_tickers 只股票
+
+    参数:
+    tickers (int): 实际分析的股票数量
+    start_date (str): 模拟数据开始日期（默认约 5 年日线）
+    end_date (str): 模拟数据结束日期
+    projected_tickers (int): 折算的股票数量
+
+    返回:
+    dict: 每种保留策略下单只股票结果的内存（KB）与折算后的总内存（MB）
+    """
+    stocks = [{'symbol': f'SYN{i:05d}', 'name': f'模拟{i}'} for i in range(tickers)]
+    result = {}
+    with contextlib.redirect_stdout(io.StringIO()):
+        # 预热：导入、JIT 编译、缓存等一次性开销不计入结果内存
+        original_strategy_engine.batch_analysis_stocks(stocks[:2], start_date, end_date, workers=1, pipeline=False,
+                                                       fetch_data=fetch_synthetic_data)
+        for retention in ('last', 'tail', 'full'):
+            tracemalloc.start()
+            baseline = tracemalloc.get_traced_memory()[0]
+            results = original_strategy_engine.batch_analysis_stocks(
+                stocks, start_date, end_date, workers=1, pipeline=False, fetch_data=fetch_synthetic_data,
+                retention=retention)
+            retained = tracemalloc.get_traced_memory()[0] - baseline  # 分析结束后仍被结果引用的内存
+            tracemalloc.stop()
+            del results
+            per_ticker = retained / tickers
+            result[f'{retention}_kb_per_ticker'] = per_ticker / 2 ** 10
+            result[f'{retention}_{projected_tickers}_mb'] = per_ticker * projected_tickers / 2 ** 20
+    return result
+
+
+def bench_trace(tickers=20, days=250, calls=200000, seed=0):
+    """
+    测量结构化日志的开销：关闭时单次 trace() 调用的耗时，以及 analyze() 在关闭 / 文本 / JSON 输出下的耗时
+
+    同时检查 JSON 格式的每一行都能被解析，且包含 ts / level / event / message 字段。
+
+    参数:
+    tickers (int): 模拟股票数量
+    days (int): 每只股票的K线数量
+    calls (int): 测量单次调用开销的调用次数
+    seed (int): 模拟数据随机种子
+
+    返回:
+    dict: 单次调用耗时（纳秒）、三种输出方式下每只股票的 analyze() 耗时（毫秒）和 JSON 行数
+    """
+    class _Stock:
+        ticker = 'SYNTHETIC'
+        ticker_name = '模拟数据'
+
+    universe = [make_synthetic_ohlcv(days=days, seed=seed + i) for i in range(tickers)]
+    saved = tracer.settings()
+
+    def run():
+        return [original_strategy_engine.analyze(_Stock, data) for data in universe]
+
+    result = {}
+    try:
+        tracer.configure(level="off")
+        _, elapsed = _timed(lambda: [tracer.trace(tracer.DEBUG, 'bench.event', "消息", value=i) for i in range(calls)])
+        result['disabled_call_ns'] = elapsed * 1e9 / calls
+
+        with contextlib.redirect_stdout(io.StringIO()):
+            run()  # 预热
+            _, elapsed = _timed(run)
+            result['off_ms'] = elapsed * 1000 / tickers
+
+            tracer.configure(level="debug", fmt="text", output="stdout")
+            _, elapsed = _timed(run)
+            result['text_debug_ms'] = elapsed * 1000 / tickers
+
+            buffer = io.StringIO()
+            with contextlib.redirect_stdout(buffer):
+                tracer.configure(fmt="json")
+                _, elapsed = _timed(run)
+            result['json_debug_ms'] = elapsed * 1000 / tickers
+    finally:
+        tracer.configure(*saved)
+
+    records = [json.loads(line) for line in buffer.getvalue().splitlines()]
+    assert records and all({'ts', 'level', 'event', 'message'} <= record.keys() for record in records)
+    result['json_lines'] = len(records)
+    return result
+
+
+def bench_service(tickers=16, clients=8, rounds=4, start_date='2023-01-01', end_date='2024-12-31'):
+    """
+    测量常驻分析服务的请求耗时：首次请求（获取数据 + 计算）与缓存命中后的重复请求，多个客户端并发请求
+
+    服务使用本地模拟数据源，在随机端口上启动；同时检查 /analyze 的结果与直接调用 analyze_ticker 一致，
+    /screen 与直接调用 screen_stocks 的排名一致，未知接口返回 404。
+
+    参数:
+    tickers (int): 股票数量
+    clients (int): 并发客户端数量
+    rounds (int): 缓存命中后每只股票重复请求的轮数
+    start_date (str): 模拟数据开始日期
+    end_date (str): 模拟数据结束日期
+
+    返回:
+    dict: 冷 / 热请求的平均耗时（毫秒），服务端记录的 analyze p50 / p99，最大并发数
+    """
+    server = make_server(AnalysisService(fetch_data=fetch_synthetic_data), host='127.0.0.1', port=0)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    base_url = f"http://127.0.0.1:{server.server_address[1]}"
+    symbols = [f'SYN{i:05d}' for i in range(tickers)]
+
+    def request(path, payload=None):
+        data = None if payload is None else json.dumps(payload).encode('utf-8')
+        with urllib.request.urlopen(urllib.request.Request(base_url + path, data=data)) as response:
+            return json.loads(response.read().decode('utf-8'))
+
+    def analyze(symbol):
+        return request(f"/analyze?symbol={symbol}&start={start_date}&end={end_date}")
+
+    try:
+        with contextlib.redirect_stdout(io.StringIO()), ThreadPoolExecutor(clients) as pool:
+            _, elapsed_cold = _timed(lambda: list(pool.map(analyze, symbols)))
+            _, elapsed_warm = _timed(lambda: list(pool.map(analyze, symbols * rounds)))
+            results = dict(zip(symbols, pool.map(analyze, symbols)))
+            screened = request('/screen', {'symbols': symbols, 'start': start_date, 'end': end_date, 'top_n': 5})
+            backtest = request('/backtest', {'symbol': symbols[0], 'start': '2024-01-01', 'end': end_date})
+
+            expected = original_strategy_engine.analyze_ticker({'symbol': symbols[0], 'name': symbols[0]},
+                                                               start_date, end_date, fetch_data=fetch_synthetic_data)
+            expected_top = screen_stocks([{'symbol': symbol, 'name': symbol} for symbol in symbols], start_date,
+                                         end_date, top_n=5, workers=1, fetch_data=fetch_synthetic_data,
+                                         pipeline=False)
+        try:
+            request('/unknown')
+            not_found = False
+        except urllib.error.HTTPError as e:
+            not_found = e.code == 404
+        metrics = request('/metrics')
+    finally:
+        server.shutdown()
+        server.server_close()
+
+    assert results[symbols[0]]['final_suggestion'] == expected['final_suggestion']
+    assert results[symbols[0]]['final_score'] == expected['final_score']
+    assert [entry['ticker'] for entry in screened['top']] == [entry['ticker'] for entry in expected_top['top']]
+    assert not_found and 'returns' in backtest
+    analyze_metrics = metrics['endpoints']['analyze']
+    return {
+        'cold_ms': elapsed_cold * 1000 / tickers,
+        'warm_ms': elapsed_warm * 1000 / (tickers * rounds),
+        'analyze_p50_ms': analyze_metrics['p50_ms'],
+        'analyze_p99_ms': analyze_metrics['p99_ms'],
+        'max_in_flight': metrics['max_in_flight'],
+        'history_hits': metrics['history_cache']['hits'],
+    }
+
+
+def bench_watchlist(tickers=500, days=5, check_tickers=20, start_date='2024-06-03'):
+    """
+    测量收盘后自选股增量刷新的耗时，并与每天重新分析一年数据的结果对比
+
+    数据源为互相衔接的模拟行情（fetch_synthetic_history）：先在 start_date 建立全部股票的状态，
+    之后逐日刷新 days 个交易日；前 check_tickers 只股票每天同时用 strategy_engine 重新分析一年数据，
+    检查综合建议和各指标建议是否一致。
+
+    参数:
+    tickers (int): 自选股数量
+    days (int): 逐日刷新的交易日数
+    check_tickers (int): 逐日对比的股票数量
+    start_date (str): 建立状态的日期
+
+    返回:
+    dict: 建立状态与每日刷新的总耗时（秒）、每天重新分析一年数据的耗时（按对比股票折算，秒）、不一致数量
+    """
+    stocks = [{'symbol': f'SYN{i:05d}', 'name': f'模拟{i}'} for i in range(tickers)]
+    trade_dates = [date.strftime('%Y-%m-%d') for date in pd.bdate_range(start=start_date, periods=days + 1)]
+    lookback_days = 365
+    mismatches = 0
+    elapsed_daily = []
+    elapsed_full = []
+
+    with tempfile.TemporaryDirectory() as state_dir, contextlib.redirect_stdout(io.StringIO()):
+        refresh = partial(refresh_watchlist, state_dir=state_dir, lookback_days=lookback_days,
+                          fetch_data=fetch_synthetic_history, workers=1)
+        _, elapsed_bootstrap = _timed(lambda: refresh(stocks, trade_dates[0]))
+        for end_date in trade_dates[1:]:
+            reports, elapsed = _timed(lambda: refresh(stocks, end_date))
+            elapsed_daily.append(elapsed)
+
+            start = (pd.Timestamp(end_date) - pd.Timedelta(days=lookback_days)).strftime('%Y-%m-%d')
+            expected, elapsed = _timed(lambda: [strategy_engine.analyze_ticker(stock, start, end_date,
+                                                                               fetch_data=fetch_synthetic_history)
+                                                for stock in stocks[:check_tickers]])
+            elapsed_full.append(elapsed * tickers / check_tickers)
+            for report, result in zip(reports, expected):
+                analysis = result['analysis']
+                assert report['error'] is None and report['new_bars'] == 1
+                mismatches += report['final_decision'] != analysis['final_decision']
+                mismatches += sum(report['suggestions'][name] != indicator['suggestion']
+                                  for name, indicator in analysis['indicators'].items())
+
+    return {
+        'bootstrap_s': elapsed_bootstrap,
+        'daily_refresh_s': float(np.mean(elapsed_daily)),
+        'daily_full_reanalysis_s': float(np.mean(elapsed_full)),
+        'mismatches': mismatches,
+    }
+
+
+def bench_snapshot(tickers=500, end_date='2024-06-03', lookback_days=365):
+    """
+    测量启动时恢复流式指标状态的耗时：获取并回放一年K线预热 vs 读取快照 vs 读取逐只股票的 JSON 状态文件
+
+    同时检查快照恢复的状态与原状态完全一致，以及截断、篡改后的快照能被识别出来。
+
+    参数:
+    tickers (int): 股票数量
+    end_date (str): 状态截止日期
+    lookback_days (int): 预热的历史天数
+
+    返回:
+    dict: 冷启动（获取 + 回放）、快照恢复、JSON 恢复的耗时（秒），快照大小（MB），不一致数量，识别出的损坏数量
+    """
+    names = watchlist_indicators()
+    symbols = [f'SYN{i:05d}' for i in range(tickers)]
+    start_date = (pd.Timestamp(end_date) - pd.Timedelta(days=lookback_days)).strftime('%Y-%m-%d')
+
+    def cold_start():
+        states = {}
+        for symbol in symbols:
+            state = StreamingState(symbol, names, lookback_days=lookback_days)
+            state.update_frame(fetch_synthetic_history(symbol, start_date, end_date))
+            states[symbol] = state
+        return states
+
+    def restore(saved):
+        return {symbol: StreamingState.from_state_dict(state) for symbol, state in saved.items()}
+
+    states, elapsed_cold = _timed(cold_start)
+    saved = {symbol: state.state_dict() for symbol, state in states.items()}
+    expected = {symbol: json.dumps(state, sort_keys=True) for symbol, state in saved.items()}
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'state.npz')
+        size, elapsed_save = _timed(lambda: save_snapshot(path, {'states': saved}))
+        restored, elapsed_snapshot = _timed(lambda: restore(read_snapshot(path)['sections']['states']))
+        for symbol, text in expected.items():
+            with open(os.path.join(directory, f'{symbol}.json'), 'w', encoding='utf-8') as f:
+                f.write(text)
+
+        def restore_json():
+            loaded = {}
+            for symbol in symbols:
+                with open(os.path.join(directory, f'{symbol}.json'), encoding='utf-8') as f:
+                    loaded[symbol] = json.load(f)
+            return restore(loaded)
+
+        _, elapsed_json = _timed(restore_json)
+        mismatches = sum(json.dumps(restored[symbol].state_dict(), sort_keys=True) != expected[symbol]
+                         for symbol in symbols)
+
+        # 截断文件、改动数据区中的一个字节：都应被识别（load_snapshot 返回 None）
+        with open(path, 'rb') as f:
+            content = f.read()
+        damaged = [content[:len(content) // 2], content[:len(content) // 2] + bytes([content[len(content) // 2] ^ 0xFF])
+                   + content[len(content) // 2 + 1:]]
+        detected = 0
+        with contextlib.redirect_stdout(io.StringIO()), contextlib.redirect_stderr(io.StringIO()):
+            for index, data in enumerate(damaged):
+                damaged_path = os.path.join(directory, f'damaged{index}.npz')
+                with open(damaged_path, 'wb') as f:
+                    f.write(data)
+                detected += load_snapshot(damaged_path) is None
+
+    return {
+        'cold_start_s': elapsed_cold,
+        'snapshot_save_s': elapsed_save,
+        'snapshot_restore_s': elapsed_snapshot,
+        'json_restore_s': elapsed_json,
+        'snapshot_mb': size / 1e6,
+        'mismatches': mismatches,
+        'corruption_detected': f"{detected}/{len(damaged)}",
+    }
+
+
+def bench_ring_buffer(days=2000, tickers=500, seed=0):
+    """
+    测量实时模式逐根追加K线并读取最近窗口的耗时：不断增长的 DataFrame vs 定长环形缓冲区
+
+    每追加一根K线读取一次最近 capacity 根收盘价并计算 20 日滚动最高价，检查结果与全历史计算的最后一段一致、
+    读取的视图没有复制；另外测量全部股票共用时间轴的缓冲区每天追加一次的耗时。
+
+    参数:
+    days (int): 逐根追加的K线数
+    tickers (int): 共用时间轴缓冲区的股票数量
+    seed (int): 随机种子
+
+    返回:
+    dict: 缓冲区长度、两种方式的总耗时（秒）、内存占用（KB）、不一致数量、是否零复制、全部股票每天追加耗时（毫秒）
+    """
+    stock_data = make_synthetic_ohlcv(days=days, seed=seed)
+    columns = list(RingBuffer().columns)
+    stock_data = stock_data.reindex(columns=columns)
+    capacity = default_capacity()
+    window = 20
+    dates = [date.strftime('%Y-%m-%d') for date in stock_data.index]
+    rows = stock_data.to_numpy(dtype=float)
+
+    def growing_frame():
+        frame = stock_data.iloc[:0]
+        for i in range(days):
+            frame = pd.concat([frame, stock_data.iloc[i:i + 1]])
+            kernels.rolling_max(frame['close'].iloc[-capacity:].to_numpy(), window)
+        return frame
+
+    def ring():
+        buffer = RingBuffer(capacity, columns)
+        for date, row in zip(dates, rows):
+            buffer.append(date, row)
+            kernels.rolling_max(buffer.column('close'), window)
+        return buffer
+
+    frame, elapsed_frame = _timed(growing_frame)
+    buffer, elapsed_ring = _timed(ring)
+
+    close = buffer.column('close')
+    expected = kernels.rolling_max(stock_data['close'].to_numpy(), window)[-capacity:]
+    mismatches = int(np.sum(~np.isclose(kernels.rolling_max(close, window)[window - 1:], expected[window - 1:],
+                                        equal_nan=True)))
+    mismatches += int(np.sum(buffer.frame().to_numpy() != stock_data.iloc[-capacity:].to_numpy()))
+
+    universe = UniverseRingBuffer([f'SYN{i:05d}' for i in range(tickers)], capacity, columns)
+    day_rows = np.repeat(rows[:, None, :], tickers, axis=1)
+    _, elapsed_universe = _timed(lambda: [universe.append(date, day_rows[i]) for i, date in enumerate(dates)])
+
+    return {
+        'capacity': capacity,
+        'growing_frame_s': elapsed_frame,
+        'ring_buffer_s': elapsed_ring,
+        'frame_kb': frame.memory_usage(deep=True).sum() / 1024,
+        'ring_kb': (buffer._values.nbytes + buffer._dates.nbytes) / 1024,
+        'mismatches': mismatches,
+        'zero_copy': bool(np.shares_memory(kernels._as_float_array(close), close)),
+        'universe_append_ms': elapsed_universe / days * 1000,
+    }
+
+
+def bench_engine_comparison(tickers=40, latency=0.02, start_date='2023-06-01', end_date='2024-06-01'):
+    """
+    测量两个引擎对比的耗时：分别执行 strategy_engine 与 original_strategy_engine（各自获取数据、计算指标）
+    vs 对比模式（获取一次、计算一次，全部注册引擎共享），并检查两种方式的综合建议一致
+
+    参数:
+    tickers (int): 股票数量
+    latency (float): 模拟每次获取数据的网络延迟（秒）
+    start_date, end_date (str): 分析区间
+
+    返回:
+    dict: 分别执行与对比模式的耗时（秒）、对比模式中的引擎数量、综合建议不一致数量、两个引擎方向不一致的股票数
+    """
+    stocks = [{'symbol': f'SYN{i:05d}', 'name': f'模拟{i}'} for i in range(tickers)]
+    fetch_data = partial(_fetch_with_latency, latency=latency)
+
+    def separate():
+        strategy = strategy_engine.batch_analysis_stocks(stocks, start_date, end_date, workers=1,
+                                                         fetch_data=fetch_data)
+        original = original_strategy_engine.batch_analysis_stocks(stocks, start_date, end_date, workers=1,
+                                                                  fetch_data=fetch_data)
+        return strategy, original
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        (strategy, original), elapsed_separate = _timed(separate)
+        comparison, elapsed_shared = _timed(lambda: compare_engines(stocks, start_date, end_date, workers=1,
+                                                                    fetch_data=fetch_data, fetch_workers=1))
+
+    mismatches = 0
+    for row, strategy_result, original_result in zip(comparison['rows'], strategy, original):
+        mismatches += row['results']['strategy_engine']['decision'] != strategy_result['analysis']['final_decision']
+        mismatches += row['results']['original_strategy_engine']['decision'] != original_result['final_suggestion']
+
+    return {
+        'separate_s': elapsed_separate,
+        'shared_s': elapsed_shared,
+        'engines': len(comparison['engines']),
+        'mismatches': mismatches,
+        'disagreements': comparison['pairwise'][('strategy_engine', 'original_strategy_engine')],
+    }
+
+
+def bench_support_resistance(days=2500, windows=(5, 20, 60), buffer=0.02, seed=0):
+    """
+    对比回测中逐日计算支撑位 / 压力位的三种方式：每天对完整历史做 pandas rolling（原实现）、
+    一次计算全历史序列、实时模式逐根推进，并检查三者与原实现逐日一致
+
+    参数:
+    days (int): K线数量
+    windows (tuple): 窗口期
+    buffer (float): 触及时的修正比例
+    seed (int): 模拟数据随机种子
+
+    返回:
+    dict: 三种方式的总耗时（秒）与不一致数量
+    """
+    stock_data = make_synthetic_ohlcv(days=days, seed=seed)
+
+    def rolling_daily():
+        # 原实现：每天复制历史、添加滚动列、读取最后一行
+        levels = []
+        for end in range(1, days + 1):
+            data = stock_data.iloc[:end].copy()
+            row = []
+            for window in windows:
+                data['support'] = data['close'].rolling(window=window).min()
+                data['resistance'] = data['close'].rolling(window=window).max()
+                support, resistance = data['support'].iloc[-1], data['resistance'].iloc[-1]
+                price = data['close'].iloc[-1]
+                resistance = price * (1 + buffer) if price >= resistance else resistance
+                support = price * (1 - buffer) if price <= support else support
+                row.extend((support, resistance))
+            levels.append(row)
+        return np.array(levels)
+
+    def tracker():
+        tracked = SupportResistanceTracker(windows, buffer, pivots=False)
+        levels = []
+        for close in stock_data['close'].to_numpy():
+            result = tracked.update({'close': close})['levels']
+            levels.append([value for window in windows for value in (result[window]['support'],
+                                                                     result[window]['resistance'])])
+        return np.array(levels)
+
+    columns = [f'{name}_{window}' for window in windows for name in ('support', 'resistance')]
+    support_resistance_series(stock_data.iloc[:100], windows, buffer, pivots=False)  # 预热 JIT 编译
+    expected, elapsed_rolling = _timed(rolling_daily)
+    series, elapsed_series = _timed(lambda: support_resistance_series(stock_data, windows, buffer, pivots=False))
+    tracked, elapsed_tracker = _timed(tracker)
+    latest = support_resistance_levels(stock_data, windows, buffer, pivots=False)['levels']
+
+    mismatches = int(np.sum(~np.isclose(series[columns].to_numpy(), expected, equal_nan=True)))
+    mismatches += int(np.sum(~np.isclose(tracked, expected, equal_nan=True)))
+    mismatches += int(not np.allclose([latest[window][name] for window in windows
+                                       for name in ('support', 'resistance')], expected[-1]))
+    return {
+        'rolling_daily_s': elapsed_rolling,
+        'series_s': elapsed_series,
+        'tracker_s': elapsed_tracker,
+        'mismatches': mismatches,
+    }
+
+
+def bench_history_cache(tickers=64, latency=0.05, start_date='2023-06-01', end_date='2024-06-01'):
+    """
+    测量命令行 --cache-dir 的效果：第一次运行（获取数据并写入磁盘缓存）vs 再次运行（直接读取缓存），
+    并检查缓存读出的数据与数据源返回的一致
+
+    参数:
+    tickers (int): 股票数量
+    latency (float): 模拟每次获取数据的网络延迟（秒）
+    start_date, end_date (str): 分析区间
+
+    返回:
+    dict: 两次批量分析的耗时（秒）、缓存文件数与大小（MB）、数据不一致的股票数、两次分析结果是否一致
+    """
+    stocks = [{'symbol': f'SYN{i:05d}', 'name': f'模拟{i}'} for i in range(tickers)]
+
+    def analyze(fetch_data):
+        results = original_strategy_engine.batch_analysis_stocks(stocks, start_date, end_date, workers=1,
+                                                                 fetch_data=fetch_data)
+        return [(result['final_suggestion'], result['final_score']) for result in results]
+
+    with tempfile.TemporaryDirectory() as cache_dir, contextlib.redirect_stdout(io.StringIO()):
+        fetch_data = CachedFetch(cache_dir, partial(_fetch_with_latency, latency=latency))
+        cold, elapsed_cold = _timed(lambda: analyze(fetch_data))
+        warm, elapsed_warm = _timed(lambda: analyze(fetch_data))
+        files = os.listdir(cache_dir)
+        size = sum(os.path.getsize(os.path.join(cache_dir, name)) for name in files)
+        mismatches = sum(not fetch_data(ticker['symbol'], start_date, end_date).equals(
+                             fetch_synthetic_data(ticker['symbol'], start_date, end_date))
+                         for ticker in stocks)
+
+    return {
+        'cold_s': elapsed_cold,
+        'warm_s': elapsed_warm,
+        'files': len(files),
+        'cache_mb': size / 1e6,
+        'mismatches': mismatches,
+        'same_results': cold == warm,
+    }
+
+
+def print_bench_result(name, result):
+    print(f"{name:<40} " + ", ".join(f"{key}={value:.3f}" if isinstance(value, float) else f"{key}={value}"
+                                      for key, value in result.items()))
+
+
+if __name__ == '__main__':
+    print_bench_result("回测每日决策（仅读取建议）", bench_backtest_decision(read_details=False))
+    print_bench_result("回测每日决策（读取详细建议）", bench_backtest_decision(read_details=True))
+    print_bench_result("单只股票 analyze()", bench_analyze())
+    print_bench_result("批量分析 多进程", bench_batch())
+    print_bench_result("批量分析 串行 vs 流水线", bench_pipeline())
+    print_bench_result("流式选股 内存峰值", bench_screen())
+    print_bench_result("批量结果 保留策略内存", bench_result_retention())
+    print_bench_result("常驻服务 冷 / 热请求", bench_service())
+    print_bench_result("自选股 收盘后增量刷新", bench_watchlist())
+    print_bench_result("启动 回放预热 vs 快照恢复", bench_snapshot())
+    print_bench_result("实时K线 增长 DataFrame vs 环形缓冲区", bench_ring_buffer())
+    print_bench_result("引擎对比 分别执行 vs 共享指标", bench_engine_comparison())
+    print_bench_result("支撑 / 压力位 逐日 rolling vs 序列 vs 逐根推进", bench_support_resistance())
+    print_bench_result("命令行 行情数据 获取 vs 磁盘缓存", bench_history_cache())
+    print_bench_result("结构化日志 关闭 / 文本 / JSON", bench_trace())
+    print_bench_result("市场类型 逐切片 vs 全历史序列", bench_market_type_series())
+    print_bench_result("决策 逐K线标量 vs 矩阵化", bench_decision_engine())
+    print_bench_result("策略规则 逐K线 vs 信号矩阵", bench_strategy_rules())
+    print_bench_result("原始评分引擎 逐日 vs 全历史序列", bench_score_series())
+    print_bench_result("全历史 OBV 斜率 polyfit vs 闭式回归", bench_obv_slope())
+    print_bench_result("周线 / 月线 全量重采样 vs 增量聚合", bench_multi_timeframe())
+    for backend, timings in bench_kernels().items():
+        for kernel_name, (elapsed_ms, error) in timings.items():
+            print(f"核函数 {backend:<7} {kernel_name:<24} {elapsed_ms:.3f} ms  最大误差 {error:.2e}")
@@ -1,3 +1,6 @@
+from stock.data.trace import INFO, trace
+
+
 class Simulation:
     """
     模拟交易类，负责执行交易并管理持仓和账户状态。
@@ -71,11 +74,13 @@ class Simulation:
 
                 # 判断是否触发止盈或止损
                 if price_change >= self.take_profit_ratio:
-                    print(f"📈 止盈触发：{symbol} 当前涨幅 {price_change:.2%}，卖出")
+                    trace(INFO, 'simulation.take_profit', f"📈 止盈触发：{symbol} 当前涨幅 {price_change:.2%}，卖出",
+                          symbol=symbol, date=date, price_change=price_change)
                     quantity_to_sell = self.positions[symbol]
                     self._sell(date, symbol, quantity_to_sell, price)
                 elif price_change <= -self.stop_loss_ratio:
-                    print(f"📉 止损触发：{symbol} 当前跌幅 {price_change:.2%}，卖出")
+                    trace(INFO, 'simulation.stop_loss', f"📉 止损触发：{symbol} 当前跌幅 {price_change:.2%}，卖出",
+                          symbol=symbol, date=date, price_change=price_change)
                     quantity_to_sell = self.positions[symbol]
                     self._sell(date, symbol, quantity_to_sell, price)
                 else:
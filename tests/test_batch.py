@@ -0,0 +1,117 @@
+import multiprocessing
+import os
+import threading
+import time
+
+import pytest
+
+from stock.data import trace as tracer
+from stock.mock_platform.batch import iter_batch, iter_pipeline, run_batch, run_pipeline
+
+"""
+批量执行：单个任务失败、子进程崩溃、结果无法序列化时其余任务照常完成，流水线提前结束时获取线程退出
+"""
+
+
+def square(item):
+    if item == "bad":
+        raise ValueError("bad item")
+    return item * item
+
+
+def crash_on_three(item):
+    if item == 3:
+        os._exit(1)  # 模拟子进程异常退出（如内存不足被杀）
+    return item * item
+
+
+def unpicklable_on_two(item):
+    return (lambda: item) if item == 2 else item
+
+
+def worker_trace_settings(item):
+    return tracer.settings()
+
+
+def compute_square(item, data):
+    if item == 3:
+        os._exit(1)
+    return data * data
+
+
+def identity_fetch(item):
+    if item == "missing":
+        raise KeyError(item)
+    return item
+
+
+def test_run_batch_keeps_order_and_records_errors():
+    results = run_batch(square, [1, "bad", 3], workers=2, chunksize=1)
+    assert [entry["item"] for entry in results] == [1, "bad", 3]
+    assert [entry["result"] for entry in results] == [1, None, 9]
+    assert results[1]["error"].startswith("ValueError")
+    assert "bad item" in results[1]["traceback"]
+
+
+@pytest.mark.parametrize("chunksize", [1, 3])
+def test_iter_batch_worker_crash_fails_only_crashing_item(chunksize):
+    """崩溃时在途的其他任务（包括同一块中的任务）重新执行后成功，只有导致崩溃的任务失败"""
+    items = list(range(40))
+    results = dict(iter_batch(crash_on_three, items, workers=4, chunksize=chunksize))
+    assert sorted(results) == items
+    assert [index for index, entry in results.items() if entry["error"] is not None] == [3]
+    assert results[3]["error"].startswith("BrokenProcessPool")
+    assert all(results[index]["result"] == index * index for index in items if index != 3)
+
+
+def test_iter_batch_fails_whole_chunk_on_unpicklable_result():
+    results = dict(iter_batch(unpicklable_on_two, range(6), workers=2, chunksize=2))
+    assert results[2]["error"] is not None
+    assert results[3]["error"] is not None  # 与 2 在同一块
+    assert [results[i]["result"] for i in (0, 1, 4, 5)] == [0, 1, 4, 5]
+
+
+def test_run_pipeline_records_fetch_errors():
+    results = run_pipeline(identity_fetch, compute_square, [2, "missing", 4], workers=1, fetch_workers=2)
+    assert [entry["result"] for entry in results] == [4, None, 16]
+    assert results[1]["error"].startswith("KeyError")
+
+
+def test_iter_pipeline_worker_crash_fails_only_crashing_item():
+    items = list(range(40))
+    results = dict(iter_pipeline(identity_fetch, compute_square, items, workers=4, fetch_workers=2, queue_size=4))
+    assert sorted(results) == items
+    assert [index for index, entry in results.items() if entry["error"] is not None] == [3]
+    assert results[3]["error"].startswith("BrokenProcessPool")
+    assert all(results[index]["result"] == index * index for index in items if index != 3)
+
+
+def test_iter_pipeline_early_close_stops_fetchers():
+    fetched = []
+
+    def fetch(item):
+        fetched.append(item)
+        return item
+
+    before = threading.active_count()
+    stream = iter_pipeline(fetch, compute_square, range(1000), workers=1, fetch_workers=4, queue_size=2)
+    next(stream)
+    stream.close()
+    assert threading.active_count() == before
+    count = len(fetched)
+    time.sleep(0.3)
+    assert len(fetched) == count < 1000
+
+
+def test_workers_inherit_trace_settings_under_spawn():
+    """spawn 方式启动的子进程重新导入模块，需由进程池初始化函数带入主进程的运行日志设置"""
+    saved = tracer.settings()
+    start_method = multiprocessing.get_start_method(allow_none=True)
+    try:
+        tracer.configure(level="error", fmt="json", output="stderr")
+        multiprocessing.set_start_method("spawn", force=True)
+        results = run_batch(worker_trace_settings, range(4), workers=2, chunksize=1)
+    finally:
+        multiprocessing.set_start_method(start_method, force=True)
+        tracer.configure(*saved)
+    assert [entry["result"] for entry in results] == [(tracer.ERROR, "json", "stderr")] * 4
@@ -0,0 +1,44 @@
+import numpy as np
+
+from stock.data.synthetic_data import make_synthetic_ohlcv
+from stock.indicator import registry
+from stock.mock_platform.analysis_context import AnalysisContext
+from stock.mock_platform.decision_engine import compile_decision_engine
+
+"""
+向量化决策引擎：传入的 AnalysisContext 中已计算的指标直接复用，不重新计算
+"""
+
+
+class CountingContext(AnalysisContext):
+    """记录每个指标原始值实际计算的次数"""
+
+    def __init__(self, stock_data, names=None):
+        super().__init__(stock_data, names)
+        self.computed = []
+
+    def raw(self, name):
+        if name not in self._raw:
+            self.computed.append(name)
+        return super().raw(name)
+
+
+def test_decide_stock_reuses_context_indicators(monkeypatch):
+    stock_data = make_synthetic_ohlcv(days=600, seed=7)
+    engine = compile_decision_engine()
+    expected = engine.decide_stock(stock_data)
+
+    context = CountingContext(stock_data, names=engine.names)
+    for name in engine.names:
+        context.raw(name)
+    computed_before = list(context.computed)
+
+    def fail(*args, **kwargs):
+        raise AssertionError("已计算的指标被重新计算")
+
+    monkeypatch.setattr(registry, "compute_raw_indicators", fail)
+    result = engine.decide_stock(stock_data, context)
+
+    assert context.computed == computed_before  # 每个指标只计算一次
+    for key, values in expected.items():
+        np.testing.assert_array_equal(result[key], values)
@@ -0,0 +1,84 @@
+import datetime
+import os
+
+import numpy as np
+import pytest
+
+from stock.data import history_cache
+from stock.data.history_cache import CachedFetch, load_history, save_history
+from stock.data.synthetic_data import fetch_synthetic_data
+
+"""
+行情数据磁盘缓存：已结束区间读写缓存，包含今天的区间不缓存，写入失败不留下临时文件
+"""
+
+
+class CountingFetch:
+    def __init__(self):
+        self.calls = 0
+
+    def __call__(self, symbol, start_date, end_date):
+        self.calls += 1
+        return fetch_synthetic_data(symbol, start_date, end_date)
+
+
+def test_past_range_is_cached(tmp_path):
+    fetch = CountingFetch()
+    cached = CachedFetch(str(tmp_path), fetch)
+    first = cached("AAPL", "2024-01-01", "2024-06-30")
+    second = cached("AAPL", "2024-01-01", "2024-06-30")
+    assert fetch.calls == 1
+    assert second.equals(first)
+    assert len(os.listdir(tmp_path)) == 1
+
+
+def test_range_ending_today_is_not_cached(tmp_path):
+    fetch = CountingFetch()
+    cached = CachedFetch(str(tmp_path), fetch)
+    today = datetime.date.today()
+    start = (today - datetime.timedelta(days=90)).strftime("%Y-%m-%d")
+    cached("AAPL", start, today.strftime("%Y-%m-%d"))
+    cached("AAPL", start, today.strftime("%Y-%m-%d"))
+    assert fetch.calls == 2
+    assert os.listdir(tmp_path) == []
+
+
+def test_failed_save_removes_temp_file(tmp_path, monkeypatch):
+    def broken_savez(*args, **kwargs):
+        raise OSError("No space left on device")
+
+    monkeypatch.setattr(history_cache.np, "savez", broken_savez)
+    path = str(tmp_path / "AAPL.npz")
+    with pytest.raises(OSError):
+        save_history(path, fetch_synthetic_data("AAPL", "2024-01-01", "2024-03-31"))
+    assert os.listdir(tmp_path) == []
+
+
+def test_save_and_load_round_trip(tmp_path):
+    data = fetch_synthetic_data("600519", "2024-01-01", "2024-03-31")
+    data.iloc[3, 0] = np.nan
+    path = str(tmp_path / "600519.npz")
+    save_history(path, data)
+    loaded = load_history(path)
+    assert loaded.equals(data)
+    assert loaded.index.name == data.index.name
+
+
+def test_corrupted_cache_file_is_refetched(tmp_path):
+    """缓存文件任意位置损坏时重新获取数据，不抛出异常"""
+    fetch = CountingFetch()
+    cached = CachedFetch(str(tmp_path), fetch)
+    expected = cached("AAPL", "2024-01-01", "2024-06-30")
+    path = os.path.join(tmp_path, os.listdir(tmp_path)[0])
+    with open(path, 'rb') as f:
+        original = f.read()
+
+    rng = np.random.default_rng(1)
+    for _ in range(200):
+        data = bytearray(original)
+        for position in rng.integers(0, len(data), size=int(rng.integers(1, 4))):
+            data[position] ^= int(rng.integers(1, 256))
+        with open(path, 'wb') as f:
+            f.write(bytes(data))
+        stock_data = cached("AAPL", "2024-01-01", "2024-06-30")
+        assert stock_data.shape == expected.shape
@@ -0,0 +1,119 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from stock.data.synthetic_data import make_synthetic_ohlcv
+from stock.indicator import kernels
+from stock.mock_platform.combined_rate_analysis import calculate_indicator_signals
+
+"""
+核函数后端等价性：numba / numpy / python 三种后端的输出一致，且与 pandas 的对应实现一致
+"""
+
+BACKENDS = kernels.available_backends()
+
+
+@pytest.fixture
+def backend():
+    """测试结束后恢复原来的后端"""
+    previous = kernels.get_kernel_backend()
+    yield kernels.set_kernel_backend
+    kernels.set_kernel_backend(previous)
+
+
+@pytest.fixture(scope="module")
+def series():
+    """带缺失值的随机游走序列"""
+    rng = np.random.default_rng(0)
+    values = 100 + np.cumsum(rng.normal(0, 1, 3000))
+    values[[5, 400, 401, 1777]] = np.nan
+    return values
+
+
+@pytest.fixture(scope="module")
+def ohlcv():
+    return make_synthetic_ohlcv(days=1500, seed=3)
+
+
+def run_all(backend, func, *args):
+    """在每个可用后端上调用 func，返回 {后端: 结果}"""
+    results = {}
+    for name in BACKENDS:
+        backend(name)
+        results[name] = func(*args)
+    return results
+
+
+def assert_backends_close(results, rtol=1e-9, atol=1e-9):
+    reference = results["python"]
+    for name, result in results.items():
+        np.testing.assert_allclose(result, reference, rtol=rtol, atol=atol, equal_nan=True,
+                                   err_msg=f"{name} 后端与 python 后端不一致")
+
+
+@pytest.mark.parametrize("func,arg", [
+    (kernels.wilder_sum_smoothing, 14),
+    (kernels.wilder_mean_smoothing, 14),
+    (kernels.ewm_mean, 12),
+    (kernels.rolling_max, 20),
+    (kernels.rolling_min, 20),
+    (kernels.rolling_mean, 20),
+])
+def test_recurrence_kernels_match_across_backends(backend, series, func, arg):
+    assert_backends_close(run_all(backend, func, series, arg))
+
+
+def test_obv_accumulate_matches_across_backends(backend, ohlcv):
+    close = ohlcv["close"].to_numpy()
+    volume = ohlcv["volume"].to_numpy()
+    assert_backends_close(run_all(backend, kernels.obv_accumulate, close, volume, 1000.0))
+
+
+@pytest.mark.parametrize("name", BACKENDS)
+def test_ewm_mean_matches_pandas(backend, series, name):
+    backend(name)
+    expected = pd.Series(series).ewm(span=12, adjust=False).mean().to_numpy()
+    np.testing.assert_allclose(kernels.ewm_mean(series, 12), expected, rtol=1e-9, equal_nan=True)
+
+
+@pytest.mark.parametrize("name", BACKENDS)
+def test_rolling_kernels_match_pandas(backend, series, name):
+    """滚动核函数把 ±inf 视同缺失值，与 pandas rolling 一致"""
+    backend(name)
+    series = series.copy()
+    series[[900, 2500]] = [np.inf, -np.inf]
+    rolling = pd.Series(series).replace([np.inf, -np.inf], np.nan).rolling(20)
+    np.testing.assert_allclose(kernels.rolling_max(series, 20), rolling.max().to_numpy(), equal_nan=True)
+    np.testing.assert_allclose(kernels.rolling_min(series, 20), rolling.min().to_numpy(), equal_nan=True)
+    np.testing.assert_allclose(kernels.rolling_mean(series, 20), rolling.mean().to_numpy(),
+                               rtol=1e-9, equal_nan=True)
+
+
+def test_rolling_linregress_matches_polyfit(series):
+    window = 30
+    slope, r2 = kernels.rolling_linregress(series, window)
+    for end in (window - 1, 100, 410, 1200, len(series) - 1):
+        chunk = series[end - window + 1:end + 1]
+        if np.isnan(chunk).any():
+            assert np.isnan(slope[end])
+            continue
+        expected_slope = np.polyfit(np.arange(window), chunk, 1)[0]
+        expected_r2 = np.corrcoef(np.arange(window), chunk)[0, 1] ** 2
+        assert slope[end] == pytest.approx(expected_slope, rel=1e-8)
+        assert r2[end] == pytest.approx(expected_r2, rel=1e-8)
+    assert np.isnan(slope[:window - 1]).all()
+
+
+def test_indicator_signals_match_across_backends(backend, ohlcv):
+    results = run_all(backend, calculate_indicator_signals, ohlcv)
+    reference = results["python"]
+    for name, signals in results.items():
+        assert signals.keys() == reference.keys()
+        for indicator in reference:
+            np.testing.assert_array_equal(np.asarray(signals[indicator]), np.asarray(reference[indicator]),
+                                          err_msg=f"{name} 后端的 {indicator} 信号与 python 后端不一致")
+
+
+def test_set_kernel_backend_rejects_unknown(backend):
+    with pytest.raises(ValueError):
+        backend("fortran")
@@ -0,0 +1,167 @@
+import json
+import threading
+import urllib.error
+import urllib.request
+
+import pytest
+
+from stock.data.synthetic_data import fetch_synthetic_data
+from stock.mock_platform.service import AnalysisService, make_server
+
+"""
+分析服务：HTTP 状态码映射、结果缓存命中，以及获取数据时不占用计算名额
+"""
+
+START, END = "2024-01-01", "2024-12-31"
+
+
+class FakeFetch:
+    """模拟数据源：记录调用次数，symbol 为 BOOM 时抛出异常，在 blocked 中的 symbol 等待 release 后才返回"""
+
+    def __init__(self):
+        self.calls = []
+        self.blocked = set()
+        self.release = threading.Event()
+        self.started = threading.Event()
+
+    def __call__(self, symbol, start_date, end_date):
+        self.calls.append(symbol)
+        if symbol == "BOOM":
+            raise RuntimeError("数据源不可用")
+        if symbol in self.blocked:
+            self.started.set()
+            assert self.release.wait(10)
+        return fetch_synthetic_data(symbol, start_date, end_date)
+
+
+@pytest.fixture
+def fetch():
+    return FakeFetch()
+
+
+@pytest.fixture
+def server(fetch):
+    server = make_server(AnalysisService(fetch_data=fetch, max_concurrency=1), "127.0.0.1", 0)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+    thread.join(5)
+
+
+def request(server, path, payload=None):
+    """发送请求，返回 (状态码, JSON 响应体)"""
+    host, port = server.server_address[:2]
+    data = json.dumps(payload).encode("utf-8") if payload is not None else None
+    try:
+        with urllib.request.urlopen(f"http://{host}:{port}{path}", data=data, timeout=30) as response:
+            return response.status, json.loads(response.read())
+    except urllib.error.HTTPError as e:
+        return e.code, json.loads(e.read())
+
+
+def test_analyze_returns_200(server):
+    status, body = request(server, f"/analyze?symbol=AAPL&start={START}&end={END}")
+    assert status == 200
+    assert body["ticker"] == "AAPL"
+    assert body["final_suggestion"]
+
+
+def test_post_json_body(server):
+    status, body = request(server, "/backtest", {"symbol": "AAPL", "start": START, "end": END})
+    assert status == 200
+    assert body["returns"] is not None
+
+
+def test_unknown_endpoint_returns_404(server):
+    status, body = request(server, "/nope")
+    assert status == 404
+    assert "未知接口" in body["error"]
+
+
+@pytest.mark.parametrize("path", [
+    "/analyze",  # 缺少 symbol
+    f"/analyze?symbol=AAPL&engine=unknown&start={START}&end={END}",
+    "/backtest?symbol=AAPL&initial_capital=abc",
+])
+def test_bad_request_returns_400(server, path):
+    status, body = request(server, path)
+    assert status == 400
+    assert body["error"]
+
+
+def test_fetch_error_returns_500_and_is_not_cached(server, fetch):
+    path = f"/analyze?symbol=BOOM&start={START}&end={END}"
+    assert request(server, path)[0] == 500
+    assert request(server, path)[0] == 500
+    assert fetch.calls.count("BOOM") == 2
+
+    _, metrics = request(server, "/metrics")
+    assert metrics["endpoints"]["analyze"]["errors"] == 2
+
+
+def test_repeated_request_hits_result_cache(server, fetch):
+    path = f"/analyze?symbol=MSFT&start={START}&end={END}"
+    status, first = request(server, path)
+    assert status == 200
+    status, second = request(server, path)
+    assert status == 200
+    assert second == first
+    assert fetch.calls == ["MSFT"]
+
+    _, metrics = request(server, "/metrics")
+    assert metrics["result_cache"]["hits"] == 1
+    assert metrics["result_cache"]["misses"] == 1
+    assert metrics["history_cache"]["misses"] == 1
+
+
+def test_clear_drops_cached_results(server, fetch):
+    path = f"/analyze?symbol=MSFT&start={START}&end={END}"
+    request(server, path)
+    assert request(server, "/clear")[1] == {"cleared": True}
+    request(server, path)
+    assert fetch.calls == ["MSFT", "MSFT"]
+
+
+def test_slow_fetch_does_not_hold_compute_slot(fetch):
+    """max_concurrency=1 时，一个请求在等待数据源期间，其他请求仍可完成分析"""
+    service = AnalysisService(fetch_data=fetch, max_concurrency=1)
+    fetch.blocked.add("SLOW")
+    slow = threading.Thread(target=service.analyze, args=("SLOW", None, START, END), daemon=True)
+    slow.start()
+    try:
+        assert fetch.started.wait(10)
+        results = []
+        fast = threading.Thread(target=lambda: results.append(service.analyze("AAPL", None, START, END)), daemon=True)
+        fast.start()
+        fast.join(5)
+        assert not fast.is_alive(), "数据源阻塞时其他请求无法分析"
+        assert [result.ticker for result in results] == ["AAPL"]
+    finally:
+        fetch.release.set()
+        slow.join(30)
+    assert not slow.is_alive()
+
+
+def test_slow_fetch_during_screen_does_not_delay_analyze(fetch):
+    """选股时逐只获取数据，等待数据源期间不占用计算名额"""
+    service = AnalysisService(fetch_data=fetch, max_concurrency=1)
+    fetch.blocked.add("SLOW")
+    stocks = [{'symbol': symbol, 'name': symbol} for symbol in ("MSFT", "SLOW", "600519")]
+    screened = []
+    screen = threading.Thread(target=lambda: screened.append(service.screen(stocks, START, END)), daemon=True)
+    screen.start()
+    try:
+        assert fetch.started.wait(10)
+        results = []
+        fast = threading.Thread(target=lambda: results.append(service.analyze("AAPL", None, START, END)), daemon=True)
+        fast.start()
+        fast.join(5)
+        assert not fast.is_alive(), "选股等待数据源时其他请求无法分析"
+        assert [result.ticker for result in results] == ["AAPL"]
+    finally:
+        fetch.release.set()
+        screen.join(30)
+    assert not screen.is_alive()
+    assert screened[0]['screened'] == 3
@@ -0,0 +1,59 @@
+import numpy as np
+import pytest
+
+from stock.data.snapshot import load_snapshot, read_snapshot, save_snapshot
+
+"""
+状态快照：保存后原样读回；文件任意位置损坏时 load_snapshot 返回 None，不抛出异常
+"""
+
+
+def sample_sections():
+    states = {
+        f"SYM{i}": {
+            'last_close': 10.0 + i,
+            'bars': i * 3,
+            'name': f"股票{i}",
+            'active': i % 2 == 0,
+            'window': [1.0 * i, 2.0, None],
+            'levels': {'support': 9.5 + i, 'resistance': None},
+        }
+        for i in range(20)
+    }
+    return {'states': states, 'tables': {'meta': {'version': 'v1'}}}
+
+
+@pytest.mark.parametrize("compress", [False, True])
+def test_round_trip(tmp_path, compress):
+    path = str(tmp_path / "state.npz")
+    save_snapshot(path, sample_sections(), meta={'source': 'test'}, compress=compress)
+    snapshot = read_snapshot(path)
+    assert snapshot['sections'] == sample_sections()
+    assert snapshot['meta'] == {'source': 'test'}
+
+
+@pytest.mark.parametrize("compress", [False, True])
+def test_corrupted_file_loads_as_none(tmp_path, compress):
+    """随机翻转或截断字节：load_snapshot 要么返回与原数据一致的快照，要么返回 None"""
+    path = str(tmp_path / "state.npz")
+    save_snapshot(path, sample_sections(), compress=compress)
+    with open(path, 'rb') as f:
+        original = f.read()
+
+    rng = np.random.default_rng(0)
+    for _ in range(400):
+        data = bytearray(original)
+        if rng.random() < 0.2:
+            data = data[:int(rng.integers(0, len(data)))]
+        else:
+            for position in rng.integers(0, len(data), size=int(rng.integers(1, 4))):
+                data[position] ^= int(rng.integers(1, 256))
+        with open(path, 'wb') as f:
+            f.write(bytes(data))
+
+        snapshot = load_snapshot(path)
+        assert snapshot is None or snapshot['sections'] == sample_sections()
+
+
+def test_missing_file_loads_as_none(tmp_path):
+    assert load_snapshot(str(tmp_path / "missing.npz")) is None